@@ -1,17 +1,18 @@
 import asyncio
-import base64
 import io
 import os
 import sys
 import traceback
 from dotenv import load_dotenv
 import cv2
-import pyaudio
+try:
+    import pyaudio
+except ImportError: # Headless (--wav) mode runs without PortAudio
+    pyaudio = None
 import PIL.Image
 import mss
 import argparse
-import math
-import struct
+import threading
 import time
 
 from google import genai
@@ -23,13 +24,45 @@ if sys.version_info < (3, 11, 0):
     asyncio.ExceptionGroup = exceptiongroup.ExceptionGroup
 
 from tools import tools_list
-
-FORMAT = pyaudio.paInt16
+from vad import VoiceActivityDetector, SilenceGate
+from audio_buffers import PcmRingBuffer, PlaybackJitterBuffer, DROP_OLDEST
+from audio_io import AudioInputThread, AudioOutputThread, PlaybackClock, EchoGate
+from packetizer import AdaptivePacketizer
+from dsp import MicFrontEnd
+from aec import EchoCanceller, FarEndReference, CaptureTimeline
+from audio_devices import DeviceRegistry, INPUT, OUTPUT
+from session_recorder import SessionRecorder, session_directory
+from live_session import LiveSessionManager
+from chat_log import ChatBuffer
+from visualizer import LevelMeter
+from transcription_batcher import TranscriptionBatcher
+from tool_registry import ToolRegistry, ToolConfirmations
+from task_supervisor import TaskSupervisor
+
+FORMAT = pyaudio.paInt16 if pyaudio else None
 CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 
+# Mic -> send_realtime ring buffer
+MIC_BUFFER_SECONDS = 2.0
+MIC_OVERFLOW_POLICY = DROP_OLDEST # drop_oldest | drop_newest
+
+# Received audio -> play_audio jitter buffer
+PLAYBACK_TARGET_MS = 100 # Depth to build up before playback starts
+PLAYBACK_MAX_MS = 30000 # Hard cap on buffered model audio
+PLAYBACK_LATE_MS = 500 # Chunks further behind schedule than this are skipped
+ECHO_TAIL_MS = 50 # Extra mic mute after the last sample leaves the speaker (room reverb)
+
+# Background task groups: (name, max running, max waiting beyond that); None = unlimited
+TASK_GROUPS = (
+    ("web_agent", 1, 2), # One browser session at a time
+    ("cad", 1, 2),
+    ("files", 4, 16),
+    ("tool_calls", None, None), # Tool call batches (each waits on its own tools)
+)
+
 MODEL = "models/gemini-2.5-flash-native-audio-preview-12-2025"
 DEFAULT_MODE = "camera"
 
@@ -264,7 +297,8 @@ Ingen stress. Ingen låtsasklarhet.""",
     )
 )
 
-pya = pyaudio.PyAudio()
+# Shared PyAudio instance + cached device list (PortAudio is initialized on first use)
+audio_devices = DeviceRegistry() # PyAudio is created on first use, never in headless mode
 
 # from cad_agent import CadAgent
 from web_agent import WebAgent
@@ -272,14 +306,28 @@ from kasa_agent import KasaAgent
 from printer_agent import PrinterAgent
 
 class AudioLoop:
-    def __init__(self, video_mode=DEFAULT_MODE, on_audio_data=None, on_video_frame=None, on_cad_data=None, on_web_data=None, on_transcription=None, on_tool_confirmation=None, on_cad_status=None, on_cad_thought=None, on_project_update=None, on_device_update=None, on_error=None, input_device_index=None, input_device_name=None, output_device_index=None, kasa_agent=None):
+    def __init__(self, video_mode=DEFAULT_MODE, on_audio_data=None, on_video_frame=None, on_cad_data=None, on_web_data=None, on_transcription=None, on_tool_confirmation=None, on_cad_status=None, on_cad_thought=None, on_project_update=None, on_device_update=None, on_error=None, input_device_index=None, input_device_name=None, output_device_index=None, kasa_agent=None, file_io=None, connect=None, on_tool_confirmation_expired=None, on_audio_levels=None):
         self.video_mode = video_mode
-        self.on_audio_data = on_audio_data
+        self.file_io = file_io # Headless: WAV files replace the mic and speaker (see headless.py)
+        # Session backend: returns an async context manager yielding a Live session (see fake_live.py)
+        self._connect = connect or (lambda: client.aio.live.connect(model=MODEL, config=config))
+        # Active + pre-warmed standby connection, rotated before the server's session limits
+        self.sessions = LiveSessionManager(self._connect)
+        self._session_ready = asyncio.Event() # Set while self.session can be sent to
+        self._session_broken = asyncio.Event() # Set by senders when the active session fails
+        self._in_turn = False # The model is in the middle of a turn
+        self._tools_pending = 0 # Tool call batches received but not yet answered
+        self.on_audio_data = on_audio_data # Raw playback PCM, every chunk (while forward_raw_audio)
+        self.on_audio_levels = on_audio_levels # Visualizer frames (RMS + FFT bands, see visualizer.py)
+        self.forward_raw_audio = True
+        self.level_meter = LevelMeter(RECEIVE_SAMPLE_RATE)
         self.on_video_frame = on_video_frame
         self.on_cad_data = on_cad_data
         self.on_web_data = on_web_data
         self.on_transcription = on_transcription
+        self.transcripts = TranscriptionBatcher(self._emit_transcription) # Coalesces deltas into fewer emits
         self.on_tool_confirmation = on_tool_confirmation 
+        self.on_tool_confirmation_expired = on_tool_confirmation_expired # Request timed out or was abandoned
         self.on_cad_status = on_cad_status
         self.on_cad_thought = on_cad_thought
         self.on_project_update = on_project_update
@@ -288,18 +336,21 @@ class AudioLoop:
         self.input_device_index = input_device_index
         self.input_device_name = input_device_name
         self.output_device_index = output_device_index
+        self.output_device_name = None
+        self.input_device = None # Names of the devices actually opened
+        self.output_device = None
+        self.device_switch_ms = {"input": None, "output": None}
+        self._had_output = False # Playback was running before a device rescan closed it
 
-        self.audio_in_queue = None
         self.out_queue = None
         self.paused = False
 
-        self.chat_buffer = {"sender": None, "text": ""} # For aggregating chunks
+        self.chat_buffer = ChatBuffer() # Aggregates transcription chunks per speaker for the chat log
         
         # Track last transcription text to calculate deltas (Gemini sends cumulative text)
         self._last_input_transcription = ""
         self._last_output_transcription = ""
 
-        self.audio_in_queue = None
         self.out_queue = None
         self.paused = False
 
@@ -325,16 +376,65 @@ class AudioLoop:
         self.stop_event = asyncio.Event()
         
         self.permissions = {} # Default Empty (Will treat unset as True)
-        self._pending_confirmations = {}
+        # Outstanding user confirmations, auto-denied after a timeout (see update_confirmation_settings)
+        self.confirmations = ToolConfirmations()
+        # Tracked background work, cancelled when run() ends (see TASK_GROUPS)
+        self.tasks = TaskSupervisor()
+        for group, limit, max_queued in TASK_GROUPS:
+            self.tasks.configure_group(group, limit=limit, max_queued=max_queued)
+        # Function call name -> handler (see _register_tools)
+        self.tools = ToolRegistry(supervisor=self.tasks)
+        self._register_tools()
 
         # Video buffering state
         self._latest_image_payload = None
-        # VAD State
-        self._is_speaking = False
-        self._silence_start_time = None
+        # VAD State (threshold / hangover are runtime settings, see update_vad_settings)
+        self.vad = VoiceActivityDetector(sample_rate=SEND_SAMPLE_RATE)
+        # Mic conditioning (resample/high-pass/AGC), rebuilt for the device rate in listen_audio
+        self.dsp_settings = {"highpass_hz": 80.0, "agc": True, "agc_target": 3000.0, "agc_max_gain": 4.0}
+        self.mic_frontend = MicFrontEnd(SEND_SAMPLE_RATE, SEND_SAMPLE_RATE, **self.dsp_settings)
+        # Acoustic echo cancellation against the playback stream (replaces echo_gate muting when enabled)
+        self.aec_settings = {"enabled": True, "filter_ms": 128.0, "margin_ms": 20.0}
+        self.far_end = FarEndReference(SEND_SAMPLE_RATE, RECEIVE_SAMPLE_RATE)
+        self.echo_canceller = EchoCanceller(SEND_SAMPLE_RATE, filter_ms=self.aec_settings["filter_ms"])
+        self.capture_timeline = CaptureTimeline(SEND_SAMPLE_RATE)
+        # Optional uplink silence suppression (off by default, see update_silence_gate_settings)
+        self.silence_gate = SilenceGate(sample_rate=SEND_SAMPLE_RATE)
+        self._stream_end_pending = False
         
-        # Echo Cancellation: Track when A.D.A is speaking to drop mic input
-        self.is_speaking = False
+        # Echo Cancellation: Track when A.D.A is audible to drop mic input (see is_speaking)
+        self.playback_clock = PlaybackClock(RECEIVE_SAMPLE_RATE)
+        self.echo_gate = EchoGate(self.playback_clock, tail_ms=ECHO_TAIL_MS)
+
+        # Mic capture writes into a preallocated ring, send_realtime drains whole chunks
+        self.mic_buffer = PcmRingBuffer(
+            capacity=int(SEND_SAMPLE_RATE * MIC_BUFFER_SECONDS) * 2,
+            frame_size=CHUNK_SIZE * 2,
+            overflow=MIC_OVERFLOW_POLICY,
+        )
+        self._send_ready = asyncio.Event() # Set when mic audio or media is waiting to be sent
+        self._audio_msg = {"data": b"", "mime_type": "audio/pcm"} # Reused for every audio send
+        # Decides how many mic chunks go into each send (see update_packetizer_settings)
+        self.packetizer = AdaptivePacketizer(CHUNK_SIZE / SEND_SAMPLE_RATE)
+
+        # Received model audio is buffered here and drained by play_audio
+        self.playback_buffer = PlaybackJitterBuffer(
+            sample_rate=RECEIVE_SAMPLE_RATE,
+            target_ms=PLAYBACK_TARGET_MS,
+            max_ms=PLAYBACK_MAX_MS,
+            late_ms=PLAYBACK_LATE_MS,
+        )
+        self._playback_ready = threading.Event() # Set by receive_audio, waited on by the output thread
+
+        # Dedicated audio I/O threads (started by listen_audio / play_audio)
+        self._loop = None
+        self._input_thread = None
+        self._output_thread = None
+        self._capture_enabled = threading.Event() # Cleared while paused
+        self._capture_enabled.set()
+        self.interruptions = {} # Barge-in count by source (transcription / vad / server)
+        self.recording_enabled = False # Opt-in session recorder (see update_recorder_settings)
+        self.recorder = None
         
         # Initialize ProjectManager
         from project_manager import ProjectManager
@@ -354,188 +454,481 @@ class AudioLoop:
 
     def flush_chat(self):
         """Forces the current chat buffer to be written to log."""
-        if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-            self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-            self.chat_buffer = {"sender": None, "text": ""}
+        finished = self.chat_buffer.take()
+        if finished:
+            self.project_manager.log_chat(*finished)
         # Reset transcription tracking for new turn
         self._last_input_transcription = ""
         self._last_output_transcription = ""
 
+    @property
+    def is_speaking(self):
+        """True while model audio written to the device is still audible."""
+        return self.echo_gate.is_closed()
+
     def update_permissions(self, new_perms):
         print(f"[ADA DEBUG] [CONFIG] Updating tool permissions: {new_perms}")
         self.permissions.update(new_perms)
 
+    def update_vad_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating VAD settings: {settings}")
+        try:
+            self.vad.configure(
+                threshold=settings.get("threshold"),
+                silence_duration=settings.get("silence_duration"),
+                detector=settings.get("detector"),
+            )
+        except ValueError as e:
+            print(f"[ADA DEBUG] [ERR] Invalid VAD settings: {e}")
+
+    def update_silence_gate_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating silence gate settings: {settings}")
+        self.silence_gate.configure(
+            enabled=settings.get("enabled"),
+            hangover=settings.get("hangover"),
+            preroll=settings.get("preroll"),
+        )
+        if not self.silence_gate.enabled and self._stream_end_pending:
+            self._stream_end_pending = False
+
+    def update_dsp_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating mic DSP settings: {settings}")
+        self.dsp_settings.update({k: v for k, v in settings.items() if k in self.dsp_settings})
+        self.mic_frontend.configure(**self.dsp_settings)
+
+    def update_aec_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating echo cancellation settings: {settings}")
+        previous = dict(self.aec_settings)
+        self.aec_settings.update({k: v for k, v in settings.items() if k in self.aec_settings})
+        if self.aec_settings["filter_ms"] != previous["filter_ms"]:
+            self.echo_canceller = EchoCanceller(SEND_SAMPLE_RATE, filter_ms=float(self.aec_settings["filter_ms"]))
+        self._apply_aec()
+
+    def _apply_aec(self):
+        """Attaches (or detaches) the echo canceller to the current mic front-end."""
+        if self.aec_settings["enabled"]:
+            self.mic_frontend.set_echo_canceller(self.echo_canceller, self.far_end, float(self.aec_settings["margin_ms"]))
+        else:
+            self.mic_frontend.set_echo_canceller(None, None)
+        self.echo_canceller.enabled = bool(self.aec_settings["enabled"])
+
+    def update_recorder_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating recorder settings: {settings}")
+        self.recording_enabled = bool(settings.get("enabled", self.recording_enabled))
+        if not self.recording_enabled:
+            self._stop_recorder()
+        elif self._session_ready.is_set() and self.recorder is None:
+            self._start_recorder()
+
+    def _start_recorder(self):
+        """Starts recording the current session into the active project."""
+        directory = session_directory(self.project_manager.get_current_project_path())
+        try:
+            self.recorder = SessionRecorder(directory)
+            print(f"[ADA DEBUG] [REC] Recording session to {directory}")
+        except OSError as e:
+            print(f"[ADA DEBUG] [ERR] Failed to start session recorder: {e}")
+            self.recorder = None
+
+    def _stop_recorder(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder:
+            recorder.close()
+            print(f"[ADA DEBUG] [REC] Saved session recording to {recorder.directory}")
+
+    def _record_event(self, kind, **fields):
+        recorder = self.recorder
+        if recorder:
+            recorder.event(kind, **fields)
+
+    def update_session_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating Live session settings: {settings}")
+        self.sessions.configure(standby=settings.get("standby"), rotate_after=settings.get("rotate_after"))
+
+    def update_confirmation_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating tool confirmation settings: {settings}")
+        self.confirmations.configure(timeout=settings.get("timeout"))
+
+    def update_transcription_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating transcription settings: {settings}")
+        if "window_ms" in settings:
+            self.transcripts.configure(window=settings["window_ms"] / 1000.0)
+
+    def _emit_transcription(self, data):
+        if self.on_transcription:
+            self.on_transcription(data)
+
+    def update_visualizer_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating visualizer settings: {settings}")
+        self.level_meter.configure(fps=settings.get("fps"), bands=settings.get("bands"))
+        if "raw_pcm" in settings:
+            self.forward_raw_audio = bool(settings["raw_pcm"])
+
+    def update_packetizer_settings(self, settings):
+        print(f"[ADA DEBUG] [CONFIG] Updating packetizer settings: {settings}")
+        self.packetizer.configure(**{k: v for k, v in settings.items() if k in self.packetizer.settings()})
+
     def set_paused(self, paused):
         self.paused = paused
+        if paused:
+            self._capture_enabled.clear()
+        else:
+            self._capture_enabled.set()
 
     def stop(self):
         self.stop_event.set()
         
     def resolve_tool_confirmation(self, request_id, confirmed):
         print(f"[ADA DEBUG] [RESOLVE] resolve_tool_confirmation called. ID: {request_id}, Confirmed: {confirmed}")
-        if request_id in self._pending_confirmations:
-            future = self._pending_confirmations[request_id]
-            if not future.done():
-                print(f"[ADA DEBUG] [RESOLVE] Future found and pending. Setting result to: {confirmed}")
-                future.set_result(confirmed)
-            else:
-                 print(f"[ADA DEBUG] [WARN] Request {request_id} future already done. Result: {future.result()}")
-        else:
-            print(f"[ADA DEBUG] [WARN] Confirmation Request {request_id} not found in pending dict. Keys: {list(self._pending_confirmations.keys())}")
+        if not self.confirmations.resolve(request_id, confirmed):
+            # Already answered, timed out, or from a previous run
+            print(f"[ADA DEBUG] [WARN] Confirmation Request {request_id} is not pending. Pending: {self.confirmations.pending()}")
 
     def clear_audio_queue(self):
         """Clears the queue of pending audio chunks to stop playback immediately."""
         try:
-            count = 0
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
-                count += 1
+            count = self.playback_buffer.clear()
             if count > 0:
                 print(f"[ADA DEBUG] [AUDIO] Cleared {count} chunks from playback queue due to interruption.")
         except Exception as e:
             print(f"[ADA DEBUG] [ERR] Failed to clear audio queue: {e}")
 
+    def interrupt_playback(self, source):
+        """
+        Barge-in: drops queued model audio AND whatever the output device still
+        holds, so playback goes silent within one write slice instead of after
+        the PortAudio buffer drains. `source` is what detected the interruption
+        ("transcription", "vad" or "server") and is only used for metrics.
+        """
+        audible = self.playback_clock.is_playing()
+        self.clear_audio_queue()
+        if not audible or not self._output_thread:
+            return False
+        self._output_thread.flush()
+        self.interruptions[source] = self.interruptions.get(source, 0) + 1
+        self._record_event("interruption", source=source)
+        print(f"[ADA DEBUG] [AUDIO] Barge-in ({source}): flushing output device.")
+        return True
+
     async def send_frame(self, frame_data):
-        # Update the latest frame payload
-        if isinstance(frame_data, bytes):
-            b64_data = base64.b64encode(frame_data).decode('utf-8')
-        else:
-            b64_data = frame_data 
+        # Update the latest frame payload (raw JPEG bytes go to the SDK as-is, like mic audio;
+        # a base64 string from an older client is passed through)
+        if isinstance(frame_data, (bytearray, memoryview)):
+            frame_data = bytes(frame_data)
 
         # Store as the designated "next frame to send"
-        self._latest_image_payload = {"mime_type": "image/jpeg", "data": b64_data}
+        self._latest_image_payload = {"mime_type": "image/jpeg", "data": frame_data}
         # No event signal needed - listen_audio pulls it
 
-    async def send_realtime(self):
+    def get_audio_metrics(self):
+        """Snapshot of audio pipeline counters for debugging/monitoring."""
+        return {
+            "mic_frontend": self.mic_frontend.stats(),
+            "mic_buffer": self.mic_buffer.stats(),
+            "uplink": self.packetizer.stats(),
+            "silence_gate": self.silence_gate.stats(),
+            "playback": self.playback_buffer.stats(),
+            "playback_clock": self.playback_clock.stats(),
+            "visualizer": self.level_meter.stats(),
+            "transcription": self.transcripts.stats(),
+            "echo_gate": self.echo_gate.stats(),
+            "aec": {
+                **self.echo_canceller.stats(),
+                "far_end": self.far_end.stats(),
+                "capture_reanchors": self.capture_timeline.reanchors,
+            },
+            "interruptions": dict(self.interruptions),
+            "recorder": self.recorder.stats() if self.recorder else None,
+            "session": self.sessions.stats(),
+            "tools": {**self.tools.stats(), "batches_pending": self._tools_pending},
+            "confirmations": self.confirmations.stats(),
+            "tasks": self.tasks.stats(),
+            "chat_log": self.project_manager.chat_log.stats(),
+            "devices": {
+                **audio_devices.stats(),
+                "input": self.input_device,
+                "output": self.output_device,
+                "switch_ms": dict(self.device_switch_ms),
+            },
+            "io": {
+                "input": self._input_thread.stats() if self._input_thread else None,
+                "output": self._output_thread.stats() if self._output_thread else None,
+            },
+        }
+
+    async def _put_media(self, msg):
+        """Queues a non-audio realtime message (e.g. a video frame) for send_realtime."""
+        await self.out_queue.put(msg)
+        self._send_ready.set()
+
+    async def _session_call(self, method, **kwargs):
+        """
+        Calls a send method on the active session. If the session fails, the
+        session loop is told and the same message is retried on the session
+        that replaces it, so nothing read from the mic buffer is lost.
+        """
         while True:
-            msg = await self.out_queue.get()
-            await self.session.send(input=msg, end_of_turn=False)
+            await self._session_ready.wait()
+            session = self.session
+            try:
+                return await getattr(session, method)(**kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if session is self.session:
+                    print(f"[ADA DEBUG] [ERR] Send failed, waiting for the next session: {e}")
+                    self._session_ready.clear()
+                    self._session_broken.set()
 
-    async def listen_audio(self):
-        mic_info = pya.get_default_input_device_info()
+    async def send_realtime(self):
+        hold_started = None
+        while True:
+            # Media (video frames) is rare, send it as soon as it is queued
+            while not self.out_queue.empty():
+                msg = self.out_queue.get_nowait()
+                await self._session_call("send", input=msg, end_of_turn=False)
+
+            available = self.mic_buffer.frames_available()
+            if available == 0:
+                if self._stream_end_pending:
+                    # Silence gate paused the mic: let the server flush its cached audio
+                    self._stream_end_pending = False
+                    await self._session_call("send_realtime_input", audio_stream_end=True)
+                    continue
+                self._send_ready.clear()
+                await self._send_ready.wait()
+                continue
 
-        # Resolve Input Device by Name if provided
-        resolved_input_device_index = None
-        
-        if self.input_device_name:
-            print(f"[ADA] Attempting to find input device matching: '{self.input_device_name}'")
-            count = pya.get_device_count()
-            best_match = None
-            
-            for i in range(count):
-                try:
-                    info = pya.get_device_info_by_index(i)
-                    if info['maxInputChannels'] > 0:
-                        name = info.get('name', '')
-                        # Simple case-insensitive check
-                        if self.input_device_name.lower() in name.lower() or name.lower() in self.input_device_name.lower():
-                             print(f"   Candidate {i}: {name}")
-                             # Prioritize exact match or very close match if possible, but first match is okay for now
-                             resolved_input_device_index = i
-                             best_match = name
-                             break
-                except Exception:
+            frames = self.packetizer.target_frames(available)
+            if available < frames and not self._stream_end_pending:
+                # Coalescing: wait for more frames, but never hold audio longer than max_hold_ms
+                if hold_started is None:
+                    hold_started = time.monotonic()
+                remaining = self.packetizer.max_hold_ms / 1000.0 - (time.monotonic() - hold_started)
+                if remaining > 0:
+                    self._send_ready.clear()
+                    try:
+                        await asyncio.wait_for(self._send_ready.wait(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        pass
                     continue
-            
-            if resolved_input_device_index is not None:
-                print(f"[ADA] Resolved input device '{self.input_device_name}' to index {resolved_input_device_index} ({best_match})")
-            else:
-                print(f"[ADA] Could not find device matching '{self.input_device_name}'. Checking index...")
+                frames = available
+            hold_started = None
+
+            data = self.mic_buffer.read_frames(frames)
+            self._audio_msg["data"] = data
+            start = time.perf_counter()
+            await self._session_call("send", input=self._audio_msg, end_of_turn=False)
+            self.packetizer.on_sent(frames, len(data), time.perf_counter() - start)
+
+    def _open_input_stream(self):
+        """Resolves the configured mic and opens it at its native rate (blocking)."""
+        if self.file_io:
+            stream = self.file_io.open_input()
+            capture_chunk = round(CHUNK_SIZE * stream.rate / SEND_SAMPLE_RATE)
+            return stream, stream.rate, capture_chunk, {"index": None, "name": stream.name}
+
+        device = audio_devices.resolve(INPUT, self.input_device_name, self.input_device_index)
+        if device is None:
+            raise OSError("No audio input device available")
+        print(f"[ADA] Using input device {device['index']} ({device['name']})")
+
+        # Capture at the device's native rate; the DSP front-end resamples to SEND_SAMPLE_RATE
+        native_rate = int(device["default_sample_rate"]) or SEND_SAMPLE_RATE
+        error = None
+        for rate in dict.fromkeys((native_rate, SEND_SAMPLE_RATE)):
+            capture_chunk = round(CHUNK_SIZE * rate / SEND_SAMPLE_RATE)
+            try:
+                stream = audio_devices.open(
+                    format=FORMAT,
+                    channels=CHANNELS,
+                    rate=rate,
+                    input=True,
+                    input_device_index=device["index"],
+                    frames_per_buffer=capture_chunk,
+                )
+                return stream, rate, capture_chunk, device
+            except OSError as e:
+                print(f"[ADA] [ERR] Failed to open audio input stream at {rate} Hz: {e}")
+                error = e
+        raise error
+
+    def _start_input(self, stream, rate, capture_chunk, device):
+        """Builds the mic front-end for the stream's rate and starts the capture thread."""
+        self.audio_stream = stream
+        self.input_device = device["name"]
+        self.mic_frontend = MicFrontEnd(rate, SEND_SAMPLE_RATE, **self.dsp_settings)
+        try:
+            input_latency = stream.get_input_latency()
+        except Exception:
+            input_latency = 0.0
+        self.capture_timeline = CaptureTimeline(rate, input_latency=input_latency)
+        self._apply_aec()
+        print(f"[ADA] Capturing at {rate} Hz ({capture_chunk} frames/chunk), sending at {SEND_SAMPLE_RATE} Hz")
 
-        # Fallback to index if Name lookup failed or wasn't provided
-        if resolved_input_device_index is None and self.input_device_index is not None:
-             try:
-                 resolved_input_device_index = int(self.input_device_index)
-                 print(f"[ADA] Requesting Input Device Index: {resolved_input_device_index}")
-             except ValueError:
-                 print(f"[ADA] Invalid device index '{self.input_device_index}', reverting to default.")
-                 resolved_input_device_index = None
+        if __debug__:
+            kwargs = {"exception_on_overflow": False}
+        else:
+            kwargs = {}
 
-        if resolved_input_device_index is None:
-             print("[ADA] Using Default Input Device")
+        self._input_thread = AudioInputThread(
+            stream,
+            capture_chunk,
+            on_chunk=self._process_mic_chunk,
+            enabled=self._capture_enabled,
+            read_kwargs=kwargs,
+        )
+        self._input_thread.start()
 
+    async def listen_audio(self):
         try:
-            self.audio_stream = await asyncio.to_thread(
-                pya.open,
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=SEND_SAMPLE_RATE,
-                input=True,
-                input_device_index=resolved_input_device_index if resolved_input_device_index is not None else mic_info["index"],
-                frames_per_buffer=CHUNK_SIZE,
-            )
+            opened = await asyncio.to_thread(self._open_input_stream)
         except OSError as e:
             print(f"[ADA] [ERR] Failed to open audio input stream: {e}")
             print("[ADA] [WARN] Audio features will be disabled. Please check microphone permissions.")
             return
 
-        if __debug__:
-            kwargs = {"exception_on_overflow": False}
+        # Capture runs on its own long-lived thread; this task only starts it
+        self._loop = asyncio.get_running_loop()
+        self._start_input(*opened)
+
+    async def switch_input_device(self, device_name=None, device_index=None):
+        """
+        Moves capture to another mic while the Live session keeps running.
+        The new stream is opened before the old capture thread is retired,
+        so a failed switch leaves the current mic untouched.
+        """
+        start = time.perf_counter()
+        self.input_device_name = device_name
+        self.input_device_index = device_index
+
+        if device_name and audio_devices.find(device_name, INPUT) is None:
+            # Not in the cache: maybe hotplugged, which needs a PortAudio rescan
+            await self._rescan_devices()
+
+        try:
+            opened = await asyncio.to_thread(self._open_input_stream)
+        except OSError as e:
+            print(f"[ADA] [ERR] Input device switch failed: {e}")
+            await self._ensure_output()
+            return {"ok": False, "error": str(e)}
+
+        old = self._input_thread
+        if old:
+            old.stop()
+            await asyncio.to_thread(old.join, 1.0) # At most one chunk read
+        self.echo_canceller.reset() # Different mic, different echo path
+        self._loop = asyncio.get_running_loop()
+        self._start_input(*opened)
+        await self._ensure_output()
+
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self.device_switch_ms["input"] = elapsed
+        print(f"[ADA] Switched input to '{self.input_device}' in {elapsed:.0f} ms")
+        return {"ok": True, "device": self.input_device, "switch_ms": round(elapsed, 1)}
+
+    async def _rescan_devices(self) -> bool:
+        """
+        Re-initializes PortAudio to see hotplugged devices; every stream is closed first.
+        Skipped (returns False) if a stream owner is still blocked in read/write after
+        the join timeout: terminating PortAudio under an open stream is not allowed.
+        """
+        self._had_output = self._output_thread is not None or self._had_output
+        threads = [t for t in (self._input_thread, self._output_thread) if t]
+        self._stop_audio_threads()
+        for thread in threads:
+            await asyncio.to_thread(thread.join, 1.0)
+        busy = [t.name for t in threads if t.is_alive()]
+        if busy:
+            print(f"[ADA] [WARN] Skipping device rescan, audio thread(s) still running: {', '.join(busy)}")
+            return False
+        await asyncio.to_thread(audio_devices.rescan)
+        return True
+
+    def _process_mic_chunk(self, data):
+        """Called on the capture thread for every mic chunk."""
+        if self.aec_settings["enabled"]:
+            # Full duplex: the echo canceller removes playback from the mic signal
+            capture_start = self.capture_timeline.chunk_start(len(data) // 2)
         else:
-            kwargs = {}
+            # ECHO CANCELLATION fallback: Drop mic input while Lexi is audible
+            if not self.echo_gate.allow(CHUNK_SIZE / SEND_SAMPLE_RATE):
+                # Skip sending this audio chunk to prevent feedback loop
+                return
+            capture_start = None
         
-        # VAD Constants
-        VAD_THRESHOLD = 800 # Adj based on mic sensitivity (800 is conservative for 16-bit)
-        SILENCE_DURATION = 0.5 # Seconds of silence to consider "done speaking"
+        # Resample to SEND_SAMPLE_RATE, high-pass, AEC and AGC (view into a reused buffer)
+        data = self.mic_frontend.process(data, capture_start)
+
+        # 1. VAD (drives video frames, barge-in, packet sizing and silence gating).
+        # It sees the level before AGC, so boosted room noise does not read as speech.
+        vad_event = self.vad.process(self.mic_frontend.pre_agc)
+        if vad_event:
+            self._loop.call_soon_threadsafe(self._handle_vad_event, vad_event)
+
+        # 2. Optional silence suppression: may hold the chunk back or release a pre-roll
+        chunks, gate_event = self.silence_gate.process(data, self.vad.is_speech)
+        if gate_event:
+            self._loop.call_soon_threadsafe(self._handle_silence_gate_event, gate_event)
+
+        # 3. Send Audio (never blocks - overflow policy decides what is dropped)
+        for chunk in chunks:
+            dropped = self.mic_buffer.write(chunk)
+            if dropped and self.mic_buffer.overruns % 20 == 1:
+                print(f"[ADA DEBUG] [AUDIO] Mic buffer overrun ({self.mic_buffer.overruns} total, {self.mic_buffer.dropped_bytes} bytes dropped). Sender is stalling.")
+        if chunks:
+            self._loop.call_soon_threadsafe(self._send_ready.set)
+            recorder = self.recorder
+            if recorder:
+                for chunk in chunks:
+                    recorder.write("mic", chunk)
+
+    def _handle_vad_event(self, vad_event):
+        """Runs on the event loop for VAD onset/offset from the capture thread."""
+        self.packetizer.on_vad(vad_event)
+        self._record_event("vad", state=vad_event, level=int(self.vad.last_level))
+        if vad_event == "onset":
+            # NEW Speech Utterance Started
+            print(f"[ADA DEBUG] [VAD] Speech Detected (Level: {int(self.vad.last_level)}). Sending Video Frame.")
+
+            # Local barge-in: don't wait for the server to transcribe the user.
+            # With AEC on, an onset during playback may be residual echo; trust it only on double-talk.
+            if not (self.echo_canceller.enabled and self.playback_clock.is_playing() and not self.echo_canceller.double_talk):
+                self.interrupt_playback("vad")
+            
+            # Send ONE frame
+            if self._latest_image_payload and self.out_queue:
+                try:
+                    self.out_queue.put_nowait(self._latest_image_payload)
+                    self._send_ready.set()
+                except asyncio.QueueFull:
+                    print(f"[ADA DEBUG] [VAD] Media queue full, skipping video frame.")
+            else:
+                print(f"[ADA DEBUG] [VAD] No video frame available to send.")
         
-        while True:
-            if self.paused:
-                await asyncio.sleep(0.1)
-                continue
-
-            try:
-                data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
-                
-                # ECHO CANCELLATION: Drop mic input while Lexi is speaking
-                if self.is_speaking:
-                    # Skip sending this audio chunk to prevent feedback loop
-                    continue
-                
-                # 1. Send Audio
-                if self.out_queue:
-                    await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
-                
-                # 2. VAD Logic for Video
-                # rms = audioop.rms(data, 2)
-                # Replacement for audioop.rms(data, 2)
-                count = len(data) // 2
-                if count > 0:
-                    shorts = struct.unpack(f"<{count}h", data)
-                    sum_squares = sum(s**2 for s in shorts)
-                    rms = int(math.sqrt(sum_squares / count))
-                else:
-                    rms = 0
-                
-                if rms > VAD_THRESHOLD:
-                    # Speech Detected
-                    self._silence_start_time = None
-                    
-                    if not self._is_speaking:
-                        # NEW Speech Utterance Started
-                        self._is_speaking = True
-                        print(f"[ADA DEBUG] [VAD] Speech Detected (RMS: {rms}). Sending Video Frame.")
-                        
-                        # Send ONE frame
-                        if self._latest_image_payload and self.out_queue:
-                            await self.out_queue.put(self._latest_image_payload)
-                        else:
-                            print(f"[ADA DEBUG] [VAD] No video frame available to send.")
-                            
-                else:
-                    # Silence
-                    if self._is_speaking:
-                        if self._silence_start_time is None:
-                            self._silence_start_time = time.time()
-                        
-                        elif time.time() - self._silence_start_time > SILENCE_DURATION:
-                            # Silence confirmed, reset state
-                            print(f"[ADA DEBUG] [VAD] Silence detected. Resetting speech state.")
-                            self._is_speaking = False
-                            self._silence_start_time = None
-
-            except Exception as e:
-                print(f"Error reading audio: {e}")
-                await asyncio.sleep(0.1)
+        elif vad_event == "offset":
+            # Silence confirmed, reset state
+            print(f"[ADA DEBUG] [VAD] Silence detected. Resetting speech state.")
+
+    def _handle_silence_gate_event(self, gate_event):
+        """Runs on the event loop when silence gating pauses or resumes the uplink."""
+        self._record_event("silence_gate", state=gate_event)
+        if gate_event == "pause":
+            # send_realtime sends audio_stream_end once the buffered audio is out
+            self._stream_end_pending = True
+            self._send_ready.set()
+            print(f"[ADA DEBUG] [VAD] Silence gate: pausing mic stream ({self.silence_gate.bytes_saved} bytes saved this session).")
+        elif gate_event == "resume":
+            self._stream_end_pending = False
+            print(f"[ADA DEBUG] [VAD] Silence gate: resuming mic stream with pre-roll.")
+
+    def _stop_audio_threads(self):
+        for thread in (self._input_thread, self._output_thread):
+            if thread:
+                thread.stop()
+        self._playback_ready.set() # Wake the output thread so it notices
+        self._input_thread = None
+        self._output_thread = None
 
     async def handle_cad_request(self, prompt):
         print(f"[ADA DEBUG] [CAD] Background Task Started: handle_cad_request('{prompt}')")
@@ -554,7 +947,7 @@ class AudioLoop:
                 self.project_manager.switch_project(new_project_name)
                 # Notify User (Optional, or rely on update)
                 try:
-                    await self.session.send(input=f"System Notification: Automatic Project Creation. Switched to new project '{new_project_name}'.", end_of_turn=False)
+                    await self._session_call("send", input=f"System Notification: Automatic Project Creation. Switched to new project '{new_project_name}'.", end_of_turn=False)
                     if self.on_project_update:
                          self.on_project_update(new_project_name)
                 except Exception as e:
@@ -585,7 +978,7 @@ class AudioLoop:
             # Notify the model that the task is done - this triggers speech about completion
             completion_msg = "System Notification: CAD generation is complete! The 3D model is now displayed for the user. Let them know it's ready."
             try:
-                await self.session.send(input=completion_msg, end_of_turn=True)
+                await self._session_call("send", input=completion_msg, end_of_turn=True)
                 print(f"[ADA DEBUG] [NOTE] Sent completion notification to model.")
             except Exception as e:
                  print(f"[ADA DEBUG] [ERR] Failed to send completion notification: {e}")
@@ -594,7 +987,7 @@ class AudioLoop:
             print(f"[ADA DEBUG] [ERR] CadAgent returned None.")
             # Optionally notify failure
             try:
-                await self.session.send(input="System Notification: CAD generation failed.", end_of_turn=True)
+                await self._session_call("send", input="System Notification: CAD generation failed.", end_of_turn=True)
             except Exception:
                 pass
 
@@ -615,7 +1008,7 @@ class AudioLoop:
                 self.project_manager.switch_project(new_project_name)
                 # Notify User
                 try:
-                    await self.session.send(input=f"System Notification: Automatic Project Creation. Switched to new project '{new_project_name}'.", end_of_turn=False)
+                    await self._session_call("send", input=f"System Notification: Automatic Project Creation. Switched to new project '{new_project_name}'.", end_of_turn=False)
                     if self.on_project_update:
                          self.on_project_update(new_project_name)
                 except Exception as e:
@@ -650,7 +1043,7 @@ class AudioLoop:
 
         print(f"[ADA DEBUG] [FS] Result: {result}")
         try:
-             await self.session.send(input=f"System Notification: {result}", end_of_turn=True)
+             await self._session_call("send", input=f"System Notification: {result}", end_of_turn=True)
         except Exception as e:
              print(f"[ADA DEBUG] [ERR] Failed to send fs result: {e}")
 
@@ -667,7 +1060,7 @@ class AudioLoop:
 
         print(f"[ADA DEBUG] [FS] Result: {result}")
         try:
-             await self.session.send(input=f"System Notification: {result}", end_of_turn=True)
+             await self._session_call("send", input=f"System Notification: {result}", end_of_turn=True)
         except Exception as e:
              print(f"[ADA DEBUG] [ERR] Failed to send fs result: {e}")
 
@@ -685,16 +1078,16 @@ class AudioLoop:
 
         print(f"[ADA DEBUG] [FS] Result: {result}")
         try:
-             await self.session.send(input=f"System Notification: {result}", end_of_turn=True)
+             await self._session_call("send", input=f"System Notification: {result}", end_of_turn=True)
         except Exception as e:
              print(f"[ADA DEBUG] [ERR] Failed to send fs result: {e}")
 
     async def handle_web_agent_request(self, prompt):
         print(f"[ADA DEBUG] [WEB] Web Agent Task: '{prompt}'")
         
-        async def update_frontend(image_b64, log_text):
+        async def update_frontend(image_png, log_text):
             if self.on_web_data:
-                 self.on_web_data({"image": image_b64, "log": log_text})
+                 self.on_web_data({"image": image_png, "log": log_text})
                  
         # Run the web agent and wait for it to return
         result = await self.web_agent.run_task(prompt, update_callback=update_frontend)
@@ -702,23 +1095,345 @@ class AudioLoop:
         
         # Send the final result back to the main model
         try:
-             await self.session.send(input=f"System Notification: Web Agent has finished.\nResult: {result}", end_of_turn=True)
+             await self._session_call("send", input=f"System Notification: Web Agent has finished.\nResult: {result}", end_of_turn=True)
         except Exception as e:
              print(f"[ADA DEBUG] [ERR] Failed to send web agent result to model: {e}")
 
-    async def receive_audio(self):
+    def _register_tools(self):
+        """Registers the handler of every function the model can call."""
+        register = self.tools.register
+        # Long jobs report back through the session themselves
+        register("generate_cad", self._tool_generate_cad, background=True, group="cad") # Model already acknowledged when user asked
+        register("run_web_agent", self._tool_run_web_agent, background=True, group="web_agent", ack="Web Navigation started. Do not reply to this message.")
+        register("write_file", self._tool_write_file, background=True, group="files", ack="Writing file...")
+        register("read_directory", self._tool_read_directory, background=True, group="files", ack="Reading directory...")
+        register("read_file", self._tool_read_file, background=True, group="files", ack="Reading file...")
+        # The model waits for these results
+        register("create_project", self._tool_create_project, timeout=10)
+        register("switch_project", self._tool_switch_project, timeout=10)
+        register("list_projects", self._tool_list_projects, timeout=10)
+        register("list_smart_devices", self._tool_list_smart_devices, timeout=10)
+        register("control_light", self._tool_control_light, timeout=20)
+        register("discover_printers", self._tool_discover_printers, timeout=30) # Includes a 5 s mDNS browse
+        register("print_stl", self._tool_print_stl, timeout=600) # Slicing can take minutes
+        register("get_print_status", self._tool_get_print_status, timeout=20)
+        register("iterate_cad", self._tool_iterate_cad, timeout=300)
+
+    def _dispatch_tool_calls(self, session, function_calls):
+        """Starts a tool_call batch in the background; receive_audio never waits on tools."""
+        self._tools_pending += 1
+        names = ",".join(fc.name for fc in function_calls)
+        self.tasks.spawn("tool_calls", self._run_tool_batch(session, list(function_calls)), name=names)
+
+    async def _run_tool_batch(self, session, function_calls):
+        """Runs all calls of one tool_call concurrently; each result is sent as soon as it is ready."""
+        try:
+            await asyncio.gather(*(self._run_tool_call(session, fc) for fc in function_calls))
+        finally:
+            self._tools_pending -= 1
+
+    async def _run_tool_call(self, session, fc):
+        self._record_event("tool_call", name=fc.name, id=fc.id)
+        confirmed = await self._confirm_tool(fc) if fc.name in self.tools else True
+        if confirmed is None:
+            result = "The user did not confirm this request in time, so the tool was not run. Ask again if it is still needed."
+        elif not confirmed:
+            print(f"[ADA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
+            result = "User denied the request to use this tool."
+        else:
+            result = await self.tools.execute(fc.name, fc.args)
+        if result is None:
+            return
+        function_response = types.FunctionResponse(id=fc.id, name=fc.name, response={"result": result})
+        print(f"[ADA DEBUG] [RESPONSE] Sending function response: {function_response}")
+        self._record_event("tool_response", names=[fc.name])
+        await self._send_tool_responses(session, [function_response])
+
+    async def _confirm_tool(self, fc):
+        """
+        Asks the user to confirm a tool call unless its permission is switched
+        off. Only this call waits; other calls and the receive loop carry on.
+        Returns True/False, or None if the request timed out unanswered.
+        """
+        # Check Permissions (Default to True if not set)
+        confirmation_required = self.permissions.get(fc.name, True)
+        if not confirmation_required:
+            print(f"[ADA DEBUG] [TOOL] Permission check: '{fc.name}' -> AUTO-ALLOW")
+            return True
+        if not self.on_tool_confirmation:
+            return True # No UI to ask
+        return await self.confirmations.confirm(fc.name, fc.args, self.on_tool_confirmation,
+                                                on_expired=self.on_tool_confirmation_expired)
+
+    # --- Tool handlers: args dict in, result text for the model out ---
+
+    async def _tool_generate_cad(self, args):
+        prompt = args.get("prompt", "")
+        print(f"\n[ADA DEBUG] --------------------------------------------------")
+        print(f"[ADA DEBUG] [TOOL] Tool Call Detected: 'generate_cad'")
+        print(f"[ADA DEBUG] [IN] Arguments: prompt='{prompt}'")
+        await self.handle_cad_request(prompt)
+
+    async def _tool_run_web_agent(self, args):
+        prompt = args.get("prompt", "")
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'run_web_agent' with prompt='{prompt}'")
+        await self.handle_web_agent_request(prompt)
+
+    async def _tool_write_file(self, args):
+        path = args["path"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'write_file' path='{path}'")
+        await self.handle_write_file(path, args["content"])
+
+    async def _tool_read_directory(self, args):
+        path = args["path"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'read_directory' path='{path}'")
+        await self.handle_read_directory(path)
+
+    async def _tool_read_file(self, args):
+        path = args["path"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'read_file' path='{path}'")
+        await self.handle_read_file(path)
+
+    async def _tool_create_project(self, args):
+        name = args["name"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'create_project' name='{name}'")
+        success, msg = self.project_manager.create_project(name)
+        if success:
+            # Auto-switch to the newly created project
+            self.project_manager.switch_project(name)
+            msg += f" Switched to '{name}'."
+            if self.on_project_update:
+                self.on_project_update(name)
+        return msg
+
+    async def _tool_switch_project(self, args):
+        name = args["name"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'switch_project' name='{name}'")
+        success, msg = self.project_manager.switch_project(name)
+        if success:
+            if self.on_project_update:
+                self.on_project_update(name)
+            # Gather project context and send to AI (silently, no response expected)
+            context = self.project_manager.get_project_context()
+            print(f"[ADA DEBUG] [PROJECT] Sending project context to AI ({len(context)} chars)")
+            try:
+                await self._session_call("send", input=f"System Notification: {msg}\n\n{context}", end_of_turn=False)
+            except Exception as e:
+                print(f"[ADA DEBUG] [ERR] Failed to send project context: {e}")
+        return msg
+
+    async def _tool_list_projects(self, args):
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'list_projects'")
+        projects = self.project_manager.list_projects()
+        return f"Available projects: {', '.join(projects)}"
+
+    def _smart_device_list(self):
+        """Cached Kasa devices in the shape the frontend expects, plus a summary line per device for the model."""
+        dev_summaries = []
+        frontend_list = []
+        # devices_dict is {ip: SmartDevice}
+        for ip, d in self.kasa_agent.devices.items():
+            dev_type = "unknown"
+            if d.is_bulb: dev_type = "bulb"
+            elif d.is_plug: dev_type = "plug"
+            elif d.is_strip: dev_type = "strip"
+            elif d.is_dimmer: dev_type = "dimmer"
+
+            # Format for Model
+            info = f"{d.alias} (IP: {ip}, Type: {dev_type})"
+            info += " [ON]" if d.is_on else " [OFF]"
+            dev_summaries.append(info)
+
+            # Format for Frontend
+            frontend_list.append({
+                "ip": ip,
+                "alias": d.alias,
+                "model": d.model,
+                "type": dev_type,
+                "is_on": d.is_on,
+                "brightness": d.brightness if d.is_bulb or d.is_dimmer else None,
+                "hsv": d.hsv if d.is_bulb and d.is_color else None,
+                "has_color": d.is_color if d.is_bulb else False,
+                "has_brightness": d.is_dimmable if d.is_bulb or d.is_dimmer else False
+            })
+        return dev_summaries, frontend_list
+
+    async def _tool_list_smart_devices(self, args):
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'list_smart_devices'")
+        # Use cached devices directly for speed
+        dev_summaries, frontend_list = self._smart_device_list()
+
+        result_str = "No devices found in cache."
+        if dev_summaries:
+            result_str = "Found Devices (Cached):\n" + "\n".join(dev_summaries)
+
+        # Trigger frontend update
+        if self.on_device_update:
+            self.on_device_update(frontend_list)
+        return result_str
+
+    async def _tool_control_light(self, args):
+        target = args["target"]
+        action = args["action"]
+        brightness = args.get("brightness")
+        color = args.get("color")
+
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'control_light' Target='{target}' Action='{action}'")
+
+        result_msg = f"Action '{action}' on '{target}' failed."
+        success = False
+
+        if action == "turn_on":
+            success = await self.kasa_agent.turn_on(target)
+            if success:
+                result_msg = f"Turned ON '{target}'."
+        elif action == "turn_off":
+            success = await self.kasa_agent.turn_off(target)
+            if success:
+                result_msg = f"Turned OFF '{target}'."
+        elif action == "set":
+            success = True
+            result_msg = f"Updated '{target}':"
+
+        # Apply extra attributes if 'set' or if we just turned it on and want to set them too
+        if success or action == "set":
+            if brightness is not None:
+                sb = await self.kasa_agent.set_brightness(target, brightness)
+                if sb:
+                    result_msg += f" Set brightness to {brightness}."
+            if color is not None:
+                sc = await self.kasa_agent.set_color(target, color)
+                if sc:
+                    result_msg += f" Set color to {color}."
+
+        # Notify Frontend of State Change
+        if success:
+            # KasaAgent updates its internal state on control, so the cached list is current
+            if self.on_device_update:
+                self.on_device_update(self._smart_device_list()[1])
+        else:
+            # Report Error
+            if self.on_error:
+                self.on_error(result_msg)
+        return result_msg
+
+    async def _tool_discover_printers(self, args):
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'discover_printers'")
+        printers = await self.printer_agent.discover_printers()
+        # Format for model
+        if printers:
+            printer_list = []
+            for p in printers:
+                printer_list.append(f"{p['name']} ({p['host']}:{p['port']}, type: {p['printer_type']})")
+            return "Found Printers:\n" + "\n".join(printer_list)
+        return "No printers found on network. Ensure printers are on and running OctoPrint/Moonraker."
+
+    async def _tool_print_stl(self, args):
+        stl_path = args["stl_path"]
+        printer = args["printer"]
+        profile = args.get("profile")
+
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'print_stl' STL='{stl_path}' Printer='{printer}'")
+
+        # Resolve 'current' to project STL
+        if stl_path.lower() == "current":
+            stl_path = "output.stl" # Let printer agent resolve it in root_path
+
+        # Get current project path
+        project_path = str(self.project_manager.get_current_project_path())
+
+        result = await self.printer_agent.print_stl(
+            stl_path,
+            printer,
+            profile,
+            root_path=project_path
+        )
+        return result.get("message", "Unknown result")
+
+    async def _tool_get_print_status(self, args):
+        printer = args["printer"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'get_print_status' Printer='{printer}'")
+
+        status = await self.printer_agent.get_print_status(printer)
+        if not status:
+            return f"Could not get status for printer '{printer}'. Ensure it is discovered first."
+        result_str = f"Printer: {status.printer}\n"
+        result_str += f"State: {status.state}\n"
+        result_str += f"Progress: {status.progress_percent:.1f}%\n"
+        if status.time_remaining:
+            result_str += f"Time Remaining: {status.time_remaining}\n"
+        if status.time_elapsed:
+            result_str += f"Time Elapsed: {status.time_elapsed}\n"
+        if status.filename:
+            result_str += f"File: {status.filename}\n"
+        if status.temperatures:
+            temps = status.temperatures
+            if "hotend" in temps:
+                result_str += f"Hotend: {temps['hotend']['current']:.0f}°C / {temps['hotend']['target']:.0f}°C\n"
+            if "bed" in temps:
+                result_str += f"Bed: {temps['bed']['current']:.0f}°C / {temps['bed']['target']:.0f}°C"
+        return result_str
+
+    async def _tool_iterate_cad(self, args):
+        prompt = args["prompt"]
+        print(f"[ADA DEBUG] [TOOL] Tool Call: 'iterate_cad' Prompt='{prompt}'")
+
+        # Emit status
+        if self.on_cad_status:
+            self.on_cad_status("generating")
+
+        # Get project cad folder path
+        cad_output_dir = str(self.project_manager.get_current_project_path() / "cad")
+
+        # Call CadAgent to iterate on the design
+        cad_data = await self.cad_agent.iterate_prototype(prompt, output_dir=cad_output_dir)
+
+        if not cad_data:
+            print(f"[ADA DEBUG] [ERR] CadAgent iteration returned None.")
+            return f"Failed to iterate design with prompt: {prompt}"
+
+        print(f"[ADA DEBUG] [OK] CadAgent iteration returned data successfully.")
+
+        # Dispatch to frontend
+        if self.on_cad_data:
+            print(f"[ADA DEBUG] [SEND] Dispatching iterated CAD data to frontend...")
+            self.on_cad_data(cad_data)
+            print(f"[ADA DEBUG] [SENT] Dispatch complete.")
+
+        # Save to Project
+        self.project_manager.save_cad_artifact("output.stl", f"Iteration: {prompt}")
+        return f"Successfully iterated design: {prompt}. The updated 3D model is now displayed."
+
+    async def receive_audio(self, session=None):
         "Background task to reads from the websocket and write pcm chunks to the output queue"
+        # Bound to one session: after a switchover a still-running receiver must not read the new one
+        session = session or self.session
         try:
             while True:
-                turn = self.session.receive()
+                turn = session.receive()
                 async for response in turn:
+                    if response.go_away:
+                        # The server will close this connection soon: rotate to the standby first
+                        print(f"[ADA DEBUG] [CONNECT] Server GoAway, time left: {response.go_away.time_left}")
+                        self.sessions.on_go_away(response.go_away.time_left)
+                        continue
+                    self._in_turn = True
+
                     # 1. Handle Audio Data
                     if data := response.data:
-                        self.audio_in_queue.put_nowait(data)
+                        self.playback_buffer.put(data)
+                        self._playback_ready.set()
+                        recorder = self.recorder
+                        if recorder:
+                            recorder.write("model", data)
                         # NOTE: 'continue' removed here to allow processing transcription/tools in same packet
 
                     # 2. Handle Transcription (User & Model)
                     if response.server_content:
+                        if response.server_content.interrupted:
+                            # Server-side VAD heard the user over the model
+                            self.interrupt_playback("server")
+
                         if response.server_content.input_transcription:
                             transcript = response.server_content.input_transcription.text
                             if transcript:
@@ -732,23 +1447,17 @@ class AudioLoop:
                                     
                                     # Only send if there's new text
                                     if delta:
+                                        self._record_event("transcription", sender="User", text=delta)
                                         # User is speaking, so interrupt model playback!
-                                        self.clear_audio_queue()
+                                        self.interrupt_playback("transcription")
 
-                                        # Send to frontend (Streaming)
-                                        if self.on_transcription:
-                                             self.on_transcription({"sender": "User", "text": delta})
+                                        # Send to frontend (Streaming, coalesced per frame window)
+                                        self.transcripts.add("User", delta)
                                         
-                                        # Buffer for Logging
-                                        if self.chat_buffer["sender"] != "User":
-                                            # Flush previous if exists
-                                            if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-                                                self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-                                            # Start new
-                                            self.chat_buffer = {"sender": "User", "text": delta}
-                                        else:
-                                            # Append
-                                            self.chat_buffer["text"] += delta
+                                        # Buffer for Logging (a speaker change logs the previous message)
+                                        finished = self.chat_buffer.add("User", delta)
+                                        if finished:
+                                            self.project_manager.log_chat(*finished)
                         
                         if response.server_content.output_transcription:
                             transcript = response.server_content.output_transcription.text
@@ -763,467 +1472,165 @@ class AudioLoop:
                                     
                                     # Only send if there's new text
                                     if delta:
-                                        # Send to frontend (Streaming)
-                                        if self.on_transcription:
-                                             self.on_transcription({"sender": "Lexi", "text": delta})
+                                        self._record_event("transcription", sender="Lexi", text=delta)
+                                        # Send to frontend (Streaming, coalesced per frame window)
+                                        self.transcripts.add("Lexi", delta)
                                         
-                                        # Buffer for Logging
-                                        if self.chat_buffer["sender"] != "Lexi":
-                                            # Flush previous
-                                            if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-                                                self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-                                            # Start new
-                                            self.chat_buffer = {"sender": "Lexi", "text": delta}
-                                        else:
-                                            # Append
-                                            self.chat_buffer["text"] += delta
+                                        # Buffer for Logging (a speaker change logs the previous message)
+                                        finished = self.chat_buffer.add("Lexi", delta)
+                                        if finished:
+                                            self.project_manager.log_chat(*finished)
                         
                         # Flush buffer on turn completion if needed, 
                         # but usually better to wait for sender switch or explicit end.
                         # We can also check turn_complete signal if available in response.server_content.model_turn etc
 
-                    # 3. Handle Tool Calls
+                    # 3. Handle Tool Calls (executed off the receive loop, see _dispatch_tool_calls)
                     if response.tool_call:
                         print("The tool was called")
-                        function_responses = []
-                        for fc in response.tool_call.function_calls:
-                            if fc.name in ["generate_cad", "run_web_agent", "write_file", "read_directory", "read_file", "create_project", "switch_project", "list_projects", "list_smart_devices", "control_light", "discover_printers", "print_stl", "get_print_status", "iterate_cad"]:
-                                prompt = fc.args.get("prompt", "") # Prompt is not present for all tools
-                                
-                                # Check Permissions (Default to True if not set)
-                                confirmation_required = self.permissions.get(fc.name, True)
-                                
-                                if not confirmation_required:
-                                    print(f"[ADA DEBUG] [TOOL] Permission check: '{fc.name}' -> AUTO-ALLOW")
-                                    # Skip confirmation block and jump to execution
-                                    pass
-                                else:
-                                    # Confirmation Logic
-                                    if self.on_tool_confirmation:
-                                        import uuid
-                                        request_id = str(uuid.uuid4())
-                                    print(f"[ADA DEBUG] [STOP] Requesting confirmation for '{fc.name}' (ID: {request_id})")
-                                    
-                                    future = asyncio.Future()
-                                    self._pending_confirmations[request_id] = future
-                                    
-                                    self.on_tool_confirmation({
-                                        "id": request_id, 
-                                        "tool": fc.name, 
-                                        "args": fc.args
-                                    })
-                                    
-                                    try:
-                                        # Wait for user response
-                                        confirmed = await future
-
-                                    finally:
-                                        self._pending_confirmations.pop(request_id, None)
-
-                                    print(f"[ADA DEBUG] [CONFIRM] Request {request_id} resolved. Confirmed: {confirmed}")
-
-                                    if not confirmed:
-                                        print(f"[ADA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
-                                        function_response = types.FunctionResponse(
-                                            id=fc.id,
-                                            name=fc.name,
-                                            response={
-                                                "result": "User denied the request to use this tool.",
-                                            }
-                                        )
-                                        function_responses.append(function_response)
-                                        continue
-
-                                    if not confirmed:
-                                        print(f"[ADA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
-                                        function_response = types.FunctionResponse(
-                                            id=fc.id,
-                                            name=fc.name,
-                                            response={
-                                                "result": "User denied the request to use this tool.",
-                                            }
-                                        )
-                                        function_responses.append(function_response)
-                                        continue
-
-                                # If confirmed (or no callback configured, or auto-allowed), proceed
-                                if fc.name == "generate_cad":
-                                    print(f"\n[ADA DEBUG] --------------------------------------------------")
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call Detected: 'generate_cad'")
-                                    print(f"[ADA DEBUG] [IN] Arguments: prompt='{prompt}'")
-                                    
-                                    asyncio.create_task(self.handle_cad_request(prompt))
-                                    # No function response needed - model already acknowledged when user asked
-                                
-                                elif fc.name == "run_web_agent":
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'run_web_agent' with prompt='{prompt}'")
-                                    asyncio.create_task(self.handle_web_agent_request(prompt))
-                                    
-                                    result_text = "Web Navigation started. Do not reply to this message."
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id,
-                                        name=fc.name,
-                                        response={
-                                            "result": result_text,
-                                        }
-                                    )
-                                    print(f"[ADA DEBUG] [RESPONSE] Sending function response: {function_response}")
-                                    function_responses.append(function_response)
-
-
-
-                                elif fc.name == "write_file":
-                                    path = fc.args["path"]
-                                    content = fc.args["content"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'write_file' path='{path}'")
-                                    asyncio.create_task(self.handle_write_file(path, content))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Writing file..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "read_directory":
-                                    path = fc.args["path"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'read_directory' path='{path}'")
-                                    asyncio.create_task(self.handle_read_directory(path))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Reading directory..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "read_file":
-                                    path = fc.args["path"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'read_file' path='{path}'")
-                                    asyncio.create_task(self.handle_read_file(path))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Reading file..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "create_project":
-                                    name = fc.args["name"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'create_project' name='{name}'")
-                                    success, msg = self.project_manager.create_project(name)
-                                    if success:
-                                        # Auto-switch to the newly created project
-                                        self.project_manager.switch_project(name)
-                                        msg += f" Switched to '{name}'."
-                                        if self.on_project_update:
-                                            self.on_project_update(name)
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": msg}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "switch_project":
-                                    name = fc.args["name"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'switch_project' name='{name}'")
-                                    success, msg = self.project_manager.switch_project(name)
-                                    if success:
-                                        if self.on_project_update:
-                                            self.on_project_update(name)
-                                        # Gather project context and send to AI (silently, no response expected)
-                                        context = self.project_manager.get_project_context()
-                                        print(f"[ADA DEBUG] [PROJECT] Sending project context to AI ({len(context)} chars)")
-                                        try:
-                                            await self.session.send(input=f"System Notification: {msg}\n\n{context}", end_of_turn=False)
-                                        except Exception as e:
-                                            print(f"[ADA DEBUG] [ERR] Failed to send project context: {e}")
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": msg}
-                                    )
-                                    function_responses.append(function_response)
-                                
-                                elif fc.name == "list_projects":
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'list_projects'")
-                                    projects = self.project_manager.list_projects()
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": f"Available projects: {', '.join(projects)}"}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "list_smart_devices":
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'list_smart_devices'")
-                                    # Use cached devices directly for speed
-                                    # devices_dict is {ip: SmartDevice}
-                                    
-                                    dev_summaries = []
-                                    frontend_list = []
-                                    
-                                    for ip, d in self.kasa_agent.devices.items():
-                                        dev_type = "unknown"
-                                        if d.is_bulb: dev_type = "bulb"
-                                        elif d.is_plug: dev_type = "plug"
-                                        elif d.is_strip: dev_type = "strip"
-                                        elif d.is_dimmer: dev_type = "dimmer"
-                                        
-                                        # Format for Model
-                                        info = f"{d.alias} (IP: {ip}, Type: {dev_type})"
-                                        if d.is_on:
-                                            info += " [ON]"
-                                        else:
-                                            info += " [OFF]"
-                                        dev_summaries.append(info)
-                                        
-                                        # Format for Frontend
-                                        frontend_list.append({
-                                            "ip": ip,
-                                            "alias": d.alias,
-                                            "model": d.model,
-                                            "type": dev_type,
-                                            "is_on": d.is_on,
-                                            "brightness": d.brightness if d.is_bulb or d.is_dimmer else None,
-                                            "hsv": d.hsv if d.is_bulb and d.is_color else None,
-                                            "has_color": d.is_color if d.is_bulb else False,
-                                            "has_brightness": d.is_dimmable if d.is_bulb or d.is_dimmer else False
-                                        })
-                                    
-                                    result_str = "No devices found in cache."
-                                    if dev_summaries:
-                                        result_str = "Found Devices (Cached):\n" + "\n".join(dev_summaries)
-                                    
-                                    # Trigger frontend update
-                                    if self.on_device_update:
-                                        self.on_device_update(frontend_list)
-
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "control_light":
-                                    target = fc.args["target"]
-                                    action = fc.args["action"]
-                                    brightness = fc.args.get("brightness")
-                                    color = fc.args.get("color")
-                                    
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'control_light' Target='{target}' Action='{action}'")
-                                    
-                                    result_msg = f"Action '{action}' on '{target}' failed."
-                                    success = False
-                                    
-                                    if action == "turn_on":
-                                        success = await self.kasa_agent.turn_on(target)
-                                        if success:
-                                            result_msg = f"Turned ON '{target}'."
-                                    elif action == "turn_off":
-                                        success = await self.kasa_agent.turn_off(target)
-                                        if success:
-                                            result_msg = f"Turned OFF '{target}'."
-                                    elif action == "set":
-                                        success = True
-                                        result_msg = f"Updated '{target}':"
-                                    
-                                    # Apply extra attributes if 'set' or if we just turned it on and want to set them too
-                                    if success or action == "set":
-                                        if brightness is not None:
-                                            sb = await self.kasa_agent.set_brightness(target, brightness)
-                                            if sb:
-                                                result_msg += f" Set brightness to {brightness}."
-                                        if color is not None:
-                                            sc = await self.kasa_agent.set_color(target, color)
-                                            if sc:
-                                                result_msg += f" Set color to {color}."
-
-                                    # Notify Frontend of State Change
-                                    if success:
-                                        # We don't need full discovery, just refresh known state or push update
-                                        # But for simplicity, let's get the standard list representation
-                                        # KasaAgent updates its internal state on control, so we can rebuild the list
-                                        
-                                        # Quick rebuild of list from internal dict
-                                        updated_list = []
-                                        for ip, dev in self.kasa_agent.devices.items():
-                                            # We need to ensure we have the correct dict structure expected by frontend
-                                            # We duplicate logic from KasaAgent.discover_devices a bit, but that's okay for now or we can add a helper
-                                            # Ideally KasaAgent has a 'get_devices_list()' method.
-                                            # Use the cached objects in self.kasa_agent.devices
-                                            
-                                            dev_type = "unknown"
-                                            if dev.is_bulb: dev_type = "bulb"
-                                            elif dev.is_plug: dev_type = "plug"
-                                            elif dev.is_strip: dev_type = "strip"
-                                            elif dev.is_dimmer: dev_type = "dimmer"
-
-                                            d_info = {
-                                                "ip": ip,
-                                                "alias": dev.alias,
-                                                "model": dev.model,
-                                                "type": dev_type,
-                                                "is_on": dev.is_on,
-                                                "brightness": dev.brightness if dev.is_bulb or dev.is_dimmer else None,
-                                                "hsv": dev.hsv if dev.is_bulb and dev.is_color else None,
-                                                "has_color": dev.is_color if dev.is_bulb else False,
-                                                "has_brightness": dev.is_dimmable if dev.is_bulb or dev.is_dimmer else False
-                                            }
-                                            updated_list.append(d_info)
-                                            
-                                        if self.on_device_update:
-                                            self.on_device_update(updated_list)
-                                    else:
-                                        # Report Error
-                                        if self.on_error:
-                                            self.on_error(result_msg)
-
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_msg}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "discover_printers":
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'discover_printers'")
-                                    printers = await self.printer_agent.discover_printers()
-                                    # Format for model
-                                    if printers:
-                                        printer_list = []
-                                        for p in printers:
-                                            printer_list.append(f"{p['name']} ({p['host']}:{p['port']}, type: {p['printer_type']})")
-                                        result_str = "Found Printers:\n" + "\n".join(printer_list)
-                                    else:
-                                        result_str = "No printers found on network. Ensure printers are on and running OctoPrint/Moonraker."
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "print_stl":
-                                    stl_path = fc.args["stl_path"]
-                                    printer = fc.args["printer"]
-                                    profile = fc.args.get("profile")
-                                    
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'print_stl' STL='{stl_path}' Printer='{printer}'")
-                                    
-                                    # Resolve 'current' to project STL
-                                    if stl_path.lower() == "current":
-                                        stl_path = "output.stl" # Let printer agent resolve it in root_path
-
-                                    # Get current project path
-                                    project_path = str(self.project_manager.get_current_project_path())
-                                    
-                                    result = await self.printer_agent.print_stl(
-                                        stl_path, 
-                                        printer, 
-                                        profile, 
-                                        root_path=project_path
-                                    )
-                                    result_str = result.get("message", "Unknown result")
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "get_print_status":
-                                    printer = fc.args["printer"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'get_print_status' Printer='{printer}'")
-                                    
-                                    status = await self.printer_agent.get_print_status(printer)
-                                    if status:
-                                        result_str = f"Printer: {status.printer}\n"
-                                        result_str += f"State: {status.state}\n"
-                                        result_str += f"Progress: {status.progress_percent:.1f}%\n"
-                                        if status.time_remaining:
-                                            result_str += f"Time Remaining: {status.time_remaining}\n"
-                                        if status.time_elapsed:
-                                            result_str += f"Time Elapsed: {status.time_elapsed}\n"
-                                        if status.filename:
-                                            result_str += f"File: {status.filename}\n"
-                                        if status.temperatures:
-                                            temps = status.temperatures
-                                            if "hotend" in temps:
-                                                result_str += f"Hotend: {temps['hotend']['current']:.0f}°C / {temps['hotend']['target']:.0f}°C\n"
-                                            if "bed" in temps:
-                                                result_str += f"Bed: {temps['bed']['current']:.0f}°C / {temps['bed']['target']:.0f}°C"
-                                    else:
-                                        result_str = f"Could not get status for printer '{printer}'. Ensure it is discovered first."
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "iterate_cad":
-                                    prompt = fc.args["prompt"]
-                                    print(f"[ADA DEBUG] [TOOL] Tool Call: 'iterate_cad' Prompt='{prompt}'")
-                                    
-                                    # Emit status
-                                    if self.on_cad_status:
-                                        self.on_cad_status("generating")
-                                    
-                                    # Get project cad folder path
-                                    cad_output_dir = str(self.project_manager.get_current_project_path() / "cad")
-                                    
-                                    # Call CadAgent to iterate on the design
-                                    cad_data = await self.cad_agent.iterate_prototype(prompt, output_dir=cad_output_dir)
-                                    
-                                    if cad_data:
-                                        print(f"[ADA DEBUG] [OK] CadAgent iteration returned data successfully.")
-                                        
-                                        # Dispatch to frontend
-                                        if self.on_cad_data:
-                                            print(f"[ADA DEBUG] [SEND] Dispatching iterated CAD data to frontend...")
-                                            self.on_cad_data(cad_data)
-                                            print(f"[ADA DEBUG] [SENT] Dispatch complete.")
-                                        
-                                        # Save to Project
-                                        self.project_manager.save_cad_artifact("output.stl", f"Iteration: {prompt}")
-                                        
-                                        result_str = f"Successfully iterated design: {prompt}. The updated 3D model is now displayed."
-                                    else:
-                                        print(f"[ADA DEBUG] [ERR] CadAgent iteration returned None.")
-                                        result_str = f"Failed to iterate design with prompt: {prompt}"
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-                        if function_responses:
-                            await self.session.send_tool_response(function_responses=function_responses)
+                        self._dispatch_tool_calls(session, response.tool_call.function_calls)
                 
                 # Turn/Response Loop Finished
+                self._in_turn = False
+                self._record_event("turn_complete")
+                self.transcripts.flush("turn_end")
                 self.flush_chat()
 
-                while not self.audio_in_queue.empty():
-                    self.audio_in_queue.get_nowait()
+                self.playback_buffer.clear()
         except Exception as e:
             print(f"Error in receive_audio: {e}")
             traceback.print_exc()
-            # CRITICAL: Re-raise to crash the TaskGroup and trigger outer loop reconnect
+            # CRITICAL: Re-raise so the session loop switches to another connection
             raise e
 
-    async def play_audio(self):
-        stream = await asyncio.to_thread(
-            pya.open,
+    def _open_output_stream(self):
+        """Resolves the configured speaker and opens it (blocking)."""
+        if self.file_io:
+            stream = self.file_io.open_output()
+            return stream, {"index": None, "name": stream.name}
+        device = audio_devices.resolve(OUTPUT, self.output_device_name, self.output_device_index)
+        if device is None:
+            raise OSError("No audio output device available")
+        stream = audio_devices.open(
             format=FORMAT,
             channels=CHANNELS,
             rate=RECEIVE_SAMPLE_RATE,
             output=True,
-            output_device_index=self.output_device_index,
+            output_device_index=device["index"],
         )
-        while True:
-            bytestream = await self.audio_in_queue.get()
-            
-            # PERFORMANCE DEBUG
-            queue_size = self.audio_in_queue.qsize()
-            if queue_size % 20 == 0:  # Log every 20th chunk to reduce spam
-                print(f"[PERF] Audio chunk. Queue size: {queue_size}")
-            
-            # Set speaking flag when we start playing audio
-            self.is_speaking = True
-            
-            if self.on_audio_data:
-                self.on_audio_data(bytestream)
-            await asyncio.to_thread(stream.write, bytestream)
-            
-            # NO DELAY - let audio play as fast as possible
-            
-            # Check if queue is empty - if so, we're done speaking
-            if self.audio_in_queue.empty():
-                # Short wait to ensure last chunk finishes
-                await asyncio.sleep(0.2)
-                self.is_speaking = False
-                print("[PERF] Speaking done - mic re-enabled")
+        return stream, device
+
+    def _start_output(self, stream, device):
+        """Starts the playback thread on an open output stream."""
+        self.output_device = device["name"]
+        try:
+            self.playback_clock.output_latency = stream.get_output_latency()
+        except Exception:
+            self.playback_clock.output_latency = 0.0
+        print(f"[ADA DEBUG] [AUDIO] Output '{self.output_device}' latency: {self.playback_clock.output_latency * 1000:.0f} ms")
+
+        self._output_thread = AudioOutputThread(
+            stream,
+            self.playback_buffer,
+            self._playback_ready,
+            on_chunk=self._on_playback_chunk,
+            on_drained=self._on_playback_drained,
+            playback_clock=self.playback_clock,
+            abort_stream=None if self.file_io else abort_output_stream,
+            on_flush=self.far_end.truncate,
+        )
+        self._output_thread.start()
+        self._had_output = False
+
+    async def play_audio(self):
+        opened = await asyncio.to_thread(self._open_output_stream)
+
+        # Playback runs on its own long-lived thread; this task only starts it
+        self._loop = asyncio.get_running_loop()
+        self._start_output(*opened)
+
+    async def _ensure_output(self):
+        """Reopens playback if a device rescan closed it."""
+        if self._had_output and self._output_thread is None:
+            try:
+                self._start_output(*await asyncio.to_thread(self._open_output_stream))
+            except OSError as e:
+                print(f"[ADA] [ERR] Failed to reopen audio output: {e}")
+
+    async def switch_output_device(self, device_name=None, device_index=None):
+        """
+        Moves playback to another speaker while the Live session keeps running.
+        Audio still queued in the jitter buffer continues on the new device.
+        """
+        start = time.perf_counter()
+        self.output_device_name = device_name
+        self.output_device_index = device_index
+
+        had_input = self._input_thread is not None
+        if device_name and audio_devices.find(device_name, OUTPUT) is None:
+            # Not in the cache: maybe hotplugged, which needs a PortAudio rescan
+            await self._rescan_devices()
+
+        try:
+            opened = await asyncio.to_thread(self._open_output_stream)
+        except OSError as e:
+            print(f"[ADA] [ERR] Output device switch failed: {e}")
+            await self._ensure_output()
+            return {"ok": False, "error": str(e)}
+
+        old = self._output_thread
+        if old:
+            old.stop()
+            self._playback_ready.set()
+            await asyncio.to_thread(old.join, 1.0) # At most one write slice
+        # Whatever the old device still had queued is gone
+        self.playback_clock.reset()
+        self.far_end.truncate()
+        self.echo_canceller.reset()
+        self._loop = asyncio.get_running_loop()
+        self._start_output(*opened)
+
+        if had_input and self._input_thread is None:
+            try:
+                self._start_input(*await asyncio.to_thread(self._open_input_stream))
+            except OSError as e:
+                print(f"[ADA] [ERR] Failed to reopen audio input: {e}")
+
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self.device_switch_ms["output"] = elapsed
+        print(f"[ADA] Switched output to '{self.output_device}' in {elapsed:.0f} ms")
+        return {"ok": True, "device": self.output_device, "switch_ms": round(elapsed, 1)}
+
+    def _on_playback_chunk(self, bytestream):
+        """Called on the output thread just before a chunk is written."""
+        # PERFORMANCE DEBUG
+        if self.playback_buffer.chunks_played % 20 == 0:  # Log every 20th chunk to reduce spam
+            print(f"[PERF] Audio chunk. Buffer depth: {self.playback_buffer.depth_ms:.0f} ms, lag: {self.playback_buffer.last_lag_ms:.0f} ms")
+        
+        if self.echo_canceller.enabled:
+            # AEC reference: the chunk starts where the previously written audio ends
+            duration = len(bytestream) / 2 / RECEIVE_SAMPLE_RATE
+            self.far_end.write(bytestream, self.playback_clock.audible_until() - duration)
+
+        recorder = self.recorder
+        if recorder:
+            recorder.write("speaker", bytestream)
+
+        if self.on_audio_levels:
+            # Only chunks that complete a UI frame cross over to the event loop
+            levels = self.level_meter.feed(bytestream)
+            if levels is not None:
+                self._loop.call_soon_threadsafe(self.on_audio_levels, levels)
+
+        if self.on_audio_data and self.forward_raw_audio:
+            self._loop.call_soon_threadsafe(self.on_audio_data, bytestream)
+
+    def _on_playback_drained(self):
+        """Called on the output thread after a write that emptied the buffer."""
+        remaining_ms = (self.echo_gate.open_at() - time.monotonic()) * 1000
+        print(f"[PERF] Speaking done - mic re-enabled in {max(0, remaining_ms):.0f} ms")
+        if self.on_audio_levels:
+            self._loop.call_soon_threadsafe(self.on_audio_levels, self.level_meter.silence()) # Let the visualizer settle
 
     async def get_frames(self):
         cap = await asyncio.to_thread(cv2.VideoCapture, 0, cv2.CAP_AVFOUNDATION)
@@ -1236,7 +1643,7 @@ class AudioLoop:
                 break
             await asyncio.sleep(1.0)
             if self.out_queue:
-                await self.out_queue.put(frame)
+                await self._put_media(frame)
         cap.release()
 
     def _get_frame(self, cap):
@@ -1250,83 +1657,171 @@ class AudioLoop:
         img.save(image_io, format="jpeg")
         image_io.seek(0)
         image_bytes = image_io.read()
-        return {"mime_type": "image/jpeg", "data": base64.b64encode(image_bytes).decode()}
+        return {"mime_type": "image/jpeg", "data": image_bytes}
 
     async def _get_screen(self):
         pass 
     async def get_screen(self):
          pass
 
+    async def _send_tool_responses(self, session, function_responses):
+        """Answers tool calls on the session that made them, or hands the results to its replacement."""
+        if session is self.session:
+            try:
+                await session.send_tool_response(function_responses=function_responses)
+                return
+            except Exception as e:
+                if session is self.session:
+                    print(f"[ADA DEBUG] [ERR] Tool response failed, waiting for the next session: {e}")
+                    self._session_ready.clear()
+                    self._session_broken.set()
+
+        # The call IDs mean nothing to the new session: deliver the results as a user turn
+        results = "\n".join(f"- {r.name}: {r.response}" for r in function_responses)
+        print(f"[ADA DEBUG] [CONNECT] Forwarding {len(function_responses)} tool result(s) to the new session.")
+        await self._session_call(
+            "send_client_content",
+            turns=types.Content(role="user", parts=[types.Part(text=f"System Notification: Results of the tool calls you made before the connection was switched:\n{results}")]),
+            turn_complete=True,
+        )
+
+    def _use_session(self, session):
+        """Makes `session` the one all senders and the receiver talk to."""
+        self.session = session
+        # Transcriptions are cumulative per session, so delta tracking restarts
+        self._last_input_transcription = ""
+        self._last_output_transcription = ""
+        self._in_turn = False
+        self._session_broken.clear()
+        self._session_ready.set()
+
+    async def _seed_context(self, session, resume=False):
+        """
+        Gives a freshly promoted session the recent conversation as history
+        turns. Without `resume` this does not start a model turn, so the model
+        does not re-acknowledge anything; with it, the model finishes the
+        answer that was cut off.
+        """
+        turns = []
+        history = await asyncio.to_thread(self.project_manager.get_recent_chat_history, 10) # File I/O off the event loop
+        pending = self.chat_buffer.text
+        if self.chat_buffer.sender and pending.strip():
+            if not history or history[-1].get("text") != pending:
+                history.append({"sender": self.chat_buffer.sender, "text": pending})
+        for entry in history:
+            text = entry.get("text", "").strip()
+            if text:
+                role = "user" if entry.get("sender") == "User" else "model"
+                turns.append(types.Content(role=role, parts=[types.Part(text=text)]))
+        if resume:
+            turns.append(types.Content(role="user", parts=[types.Part(text="System Notification: The connection was switched while you were answering. Continue where you left off without mentioning it.")]))
+        if turns:
+            await session.send_client_content(turns=turns, turn_complete=resume)
+
+    async def _rotation_point(self):
+        """Returns at the first quiet moment once the active session is due for rotation."""
+        while True:
+            if not self.sessions.rotation_due():
+                # Polled so a GoAway (which moves the deadline up) is noticed within a second
+                await asyncio.sleep(min(1.0, max(0.05, self.sessions.seconds_until_rotation())))
+                continue
+            busy = self._in_turn or self._tools_pending or self.vad.is_speech
+            if not busy or self.sessions.rotation_forced():
+                return
+            await asyncio.sleep(0.1)
+
+    async def _serve_session(self, session):
+        """Receives on `session` until it fails or is due for rotation. Returns "drop" or "rotate"."""
+        receiver = asyncio.create_task(self.receive_audio(session))
+        broken = asyncio.create_task(self._session_broken.wait())
+        rotation = asyncio.create_task(self._rotation_point())
+        try:
+            done, _ = await asyncio.wait({receiver, broken, rotation}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            broken.cancel()
+            rotation.cancel()
+        self._session_ready.clear()
+
+        # Tool calls run in their own tasks: their results are forwarded to the next session
+        if not receiver.done():
+            receiver.cancel()
+        elif not receiver.cancelled():
+            receiver.exception() # Already logged by receive_audio
+        return "rotate" if rotation in done else "drop"
+
+    async def _run_sessions(self, start_message=None, restored=False):
+        """Connects, then keeps a usable session in self.session by switching over as needed."""
+        print(f"[ADA DEBUG] [CONNECT] Connecting to Gemini Live API...")
+        session = await self.sessions.start()
+        self._use_session(session)
+        if self.recording_enabled and self.recorder is None:
+            self._start_recorder()
+        self._record_event("session_start", reconnect=restored, model=MODEL)
+
+        if restored:
+            print(f"[ADA DEBUG] [RECONNECT] Connection restored, restoring recent chat history...")
+            await self._seed_context(session)
+        else:
+            if start_message:
+                print(f"[ADA DEBUG] [INFO] Sending start message: {start_message}")
+                await session.send(input=start_message, end_of_turn=True)
+
+            # Sync Project State
+            if self.on_project_update and self.project_manager:
+                self.on_project_update(self.project_manager.current_project)
+
+        while True:
+            reason = await self._serve_session(session)
+            was_in_turn = self._in_turn
+            print(f"[ADA DEBUG] [CONNECT] Switching Live session ({reason})...")
+            session = await self.sessions.switch(reason)
+            try:
+                await self._seed_context(session, resume=(reason == "drop" and was_in_turn))
+            except Exception as e:
+                print(f"[ADA DEBUG] [ERR] Failed to restore context on the new session: {e}")
+            self._use_session(session)
+            elapsed = self.sessions.switch_done()
+            self._record_event("session_switch", reason=reason, switch_ms=round(elapsed, 1))
+            print(f"[ADA DEBUG] [CONNECT] Session switched ({reason}) in {elapsed:.0f} ms.")
+
     async def run(self, start_message=None):
+        """
+        Runs until stop(). Mic/playback threads, buffers and the send loop live
+        for the whole run; Live connections come and go underneath them
+        (see _run_sessions and live_session.py).
+        """
         retry_delay = 1
-        is_reconnect = False
-        
+        restored = False
+        self.out_queue = asyncio.Queue(maxsize=10)
+
         while not self.stop_event.is_set():
+            self.playback_buffer.clear() # Drop audio from a previous run
+            self.mic_buffer.clear() # Drop audio captured for a previous run
+            if self.silence_gate.pauses:
+                print(f"[ADA DEBUG] [AUDIO] Silence gate saved {self.silence_gate.bytes_saved} bytes last session.")
+            self.silence_gate.reset() # New session starts streaming
+            self.silence_gate.reset_counters()
+            self._stream_end_pending = False
             try:
-                print(f"[ADA DEBUG] [CONNECT] Connecting to Gemini Live API...")
-                async with (
-                    client.aio.live.connect(model=MODEL, config=config) as session,
-                    asyncio.TaskGroup() as tg,
-                ):
-                    self.session = session
-
-                    self.audio_in_queue = asyncio.Queue()
-                    self.out_queue = asyncio.Queue(maxsize=10)
-
-                    tg.create_task(self.send_realtime())
-                    tg.create_task(self.listen_audio())
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [
+                        tg.create_task(self._run_sessions(start_message, restored)),
+                        tg.create_task(self.send_realtime()),
+                        tg.create_task(self.listen_audio()),
+                        tg.create_task(self.play_audio()),
+                    ]
                     # tg.create_task(self._process_video_queue()) # Removed in favor of VAD
 
                     if self.video_mode == "camera":
-                        tg.create_task(self.get_frames())
+                        tasks.append(tg.create_task(self.get_frames()))
                     elif self.video_mode == "screen":
-                        tg.create_task(self.get_screen())
-
-                    tg.create_task(self.receive_audio())
-                    tg.create_task(self.play_audio())
-
-                    # Handle Startup vs Reconnect Logic
-                    if not is_reconnect:
-                        if start_message:
-                            print(f"[ADA DEBUG] [INFO] Sending start message: {start_message}")
-                            await self.session.send(input=start_message, end_of_turn=True)
-                        
-                        # Sync Project State
-                        if self.on_project_update and self.project_manager:
-                            self.on_project_update(self.project_manager.current_project)
-                    
-                    else:
-                        print(f"[ADA DEBUG] [RECONNECT] Connection restored.")
-                        # Restore Context
-                        print(f"[ADA DEBUG] [RECONNECT] Fetching recent chat history to restore context...")
-                        history = self.project_manager.get_recent_chat_history(limit=10)
-                        
-                        context_msg = "System Notification: Connection was lost and just re-established. Here is the recent chat history to help you resume seamlessly:\n\n"
-                        for entry in history:
-                            sender = entry.get('sender', 'Unknown')
-                            text = entry.get('text', '')
-                            context_msg += f"[{sender}]: {text}\n"
-                        
-                        context_msg += "\nPlease acknowledge the reconnection to the user (e.g. 'I lost connection for a moment, but I'm back...') and resume what you were doing."
-                        
-                        print(f"[ADA DEBUG] [RECONNECT] Sending restoration context to model...")
-                        await self.session.send(input=context_msg, end_of_turn=True)
+                        tasks.append(tg.create_task(self.get_screen()))
 
-                    # Reset retry delay on successful connection
+                    # Reset retry delay on successful start
                     retry_delay = 1
-                    
-                    # Wait until stop event, or until the session task group exits (which happens on error)
-                    # Actually, the TaskGroup context manager will exit if any tasks fail/cancel.
-                    # We need to keep this block alive.
-                    # The original code just waited on stop_event, but that doesn't account for session death.
-                    # We should rely on the TaskGroup raising an exception when subtasks fail (like receive_audio).
-                    
-                    # However, since receive_audio is a task in the group, if it crashes (connection closed), 
-                    # the group will cancel others and exit. We catch that exit below.
-                    
-                    # We can await stop_event, but if the connection dies, receive_audio crashes -> group closes -> we exit `async with` -> restart loop.
-                    # To ensure we don't block indefinitely if connection dies silently (unlikely with receive_audio), we just wait.
                     await self.stop_event.wait()
+                    for task in tasks:
+                        task.cancel()
 
             except asyncio.CancelledError:
                 print(f"[ADA DEBUG] [STOP] Main loop cancelled.")
@@ -1334,45 +1829,46 @@ class AudioLoop:
                 
             except Exception as e:
                 # This catches the ExceptionGroup from TaskGroup or direct exceptions
-                print(f"[ADA DEBUG] [ERR] Connection Error: {e}")
+                print(f"[ADA DEBUG] [ERR] Audio loop error: {e}")
                 
                 if self.stop_event.is_set():
                     break
                 
-                print(f"[ADA DEBUG] [RETRY] Reconnecting in {retry_delay} seconds...")
+                print(f"[ADA DEBUG] [RETRY] Restarting in {retry_delay} seconds...")
                 await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, 10) # Exponential backoff capped at 10s
-                is_reconnect = True # Next loop will be a reconnect
+                restored = True # Next loop restores the conversation
                 
             finally:
-                # Cleanup before retry
-                if hasattr(self, 'audio_stream') and self.audio_stream:
-                    try:
-                        self.audio_stream.close()
-                    except: 
-                        pass
+                # Cleanup before retry (the I/O threads close their own streams)
+                self._session_ready.clear()
+                self._stop_audio_threads()
+                await self.sessions.close()
+                self._stop_recorder()
+
+        # Background work survives reconnects (tool results are forwarded), but not stop()
+        cancelled = self.tasks.cancel()
+        if cancelled:
+            print(f"[ADA DEBUG] [STOP] Cancelled {cancelled} background task(s).")
+        self.transcripts.flush("stop")
+        self.flush_chat()
+        await asyncio.to_thread(self.project_manager.close_chat_log) # Writes the last queued messages, ends the writer thread
+
+def abort_output_stream(stream):
+    """Stops an output stream immediately, discarding buffered samples (Pa_AbortStream)."""
+    # PyAudio's Stream only exposes stop_stream (Pa_StopStream), which plays out the buffer.
+    # Pa_AbortStream is reached through private PyAudio internals, so fall back when they differ.
+    portaudio = getattr(pyaudio, "_portaudio", None)
+    if hasattr(portaudio, "abort_stream") and hasattr(stream, "_stream"):
+        portaudio.abort_stream(stream._stream)
+    else:
+        stream.stop_stream()
 
 def get_input_devices():
-    p = pyaudio.PyAudio()
-    info = p.get_host_api_info_by_index(0)
-    numdevices = info.get('deviceCount')
-    devices = []
-    for i in range(0, numdevices):
-        if (p.get_device_info_by_host_api_device_index(0, i).get('maxInputChannels')) > 0:
-            devices.append((i, p.get_device_info_by_host_api_device_index(0, i).get('name')))
-    p.terminate()
-    return devices
+    return [(d["index"], d["name"]) for d in audio_devices.devices(INPUT)]
 
 def get_output_devices():
-    p = pyaudio.PyAudio()
-    info = p.get_host_api_info_by_index(0)
-    numdevices = info.get('deviceCount')
-    devices = []
-    for i in range(0, numdevices):
-        if (p.get_device_info_by_host_api_device_index(0, i).get('maxOutputChannels')) > 0:
-            devices.append((i, p.get_device_info_by_host_api_device_index(0, i).get('name')))
-    p.terminate()
-    return devices
+    return [(d["index"], d["name"]) for d in audio_devices.devices(OUTPUT)]
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -1383,6 +1879,14 @@ if __name__ == "__main__":
         help="pixels to stream from",
         choices=["camera", "screen", "none"],
     )
+    parser.add_argument("--wav", nargs="+", help="Headless: stream these WAV files instead of the mic (no PyAudio)")
+    parser.add_argument("--out", default="headless_out", help="Headless: directory for model audio, transcripts and results")
+    parser.add_argument("--speed", type=float, default=1.0, help="Headless: input pacing (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Headless: files processed at the same time")
     args = parser.parse_args()
-    main = AudioLoop(video_mode=args.mode)
-    asyncio.run(main.run())
\ No newline at end of file
+    if args.wav:
+        from headless import run_batch
+        asyncio.run(run_batch(args.wav, args.out, concurrency=args.concurrency, speed=args.speed))
+    else:
+        main = AudioLoop(video_mode=args.mode)
+        asyncio.run(main.run())
\ No newline at end of file
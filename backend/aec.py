@@ -0,0 +1,320 @@
+"""
+AEC - Adaptive acoustic echo cancellation for the mic path.
+
+FarEndReference:
+    Timeline of the model audio actually sent to the speaker, resampled to the
+    mic rate and indexed by the wall time at which each sample becomes audible
+    (PlaybackClock: frames already queued + the stream's output latency).
+    The capture thread reads the slice that was audible while a mic chunk was
+    being recorded, so the echo canceller sees a time-aligned reference.
+
+CaptureTimeline:
+    Maps mic samples to wall time by counting samples from an anchor instead
+    of trusting per-read timestamps (which jitter by a few ms and would shift
+    the alignment under the adaptive filter). Re-anchors on gaps and drift.
+
+EchoCanceller:
+    Partitioned-block frequency-domain NLMS (overlap-save, gradient
+    constrained). The reference is read `margin_ms` ahead of the estimated
+    alignment, so latency errors in either direction stay inside the filter.
+    Adaptation is frozen while the near end dominates (Geigel double-talk
+    detector). Reports ERLE over far-end-active blocks and the CPU cost.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from dsp import PolyphaseResampler, _Buffer
+
+
+class FarEndReference:
+    """Thread-safe ring of far-end samples addressed by audible wall time."""
+
+    def __init__(self, sample_rate: int = 16000, source_rate: int = 24000,
+                 capacity_seconds: float = 4.0, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self._clock = clock
+        self._epoch = clock()
+        self.capacity = int(sample_rate * capacity_seconds)
+        self._ring = np.zeros(self.capacity)
+        self._end = 0  # Highest absolute sample index written + 1
+        self._resampler = PolyphaseResampler(source_rate, sample_rate)
+        self._lock = threading.Lock()
+
+        # Counters
+        self.samples_written = 0
+        self.reads = 0
+        self.silent_reads = 0  # Reads with no far-end audio at all
+
+    def index(self, t: float) -> int:
+        return int(round((t - self._epoch) * self.sample_rate))
+
+    def write(self, pcm, audible_at: float):
+        """Adds a chunk of int16 far-end PCM whose first sample is audible at `audible_at`."""
+        x = np.frombuffer(pcm, dtype="<i2").astype(np.float64)
+        y = self._resampler.process(x)
+        n = y.shape[0]
+        if n == 0:
+            return
+        start = self.index(audible_at)
+        with self._lock:
+            if start > self._end:
+                # Silence between the previous audio and this chunk
+                self._zero(self._end, min(start, self._end + self.capacity))
+            if n > self.capacity:
+                y = y[n - self.capacity:]
+                start += n - self.capacity
+                n = self.capacity
+            self._copy_in(y, start)
+            self._end = max(self._end, start + n)
+            self.samples_written += n
+
+    def truncate(self, t: Optional[float] = None):
+        """Forgets far-end audio scheduled after `t` (e.g. after an output flush)."""
+        t = self._clock() if t is None else t
+        cut = self.index(t)
+        with self._lock:
+            if cut < self._end:
+                self._zero(max(cut, self._end - self.capacity), self._end)
+                self._end = max(cut, self._end - self.capacity)
+
+    def read(self, start_time: float, out: np.ndarray) -> bool:
+        """
+        Fills `out` with the far-end samples audible from `start_time` on (zeros
+        where nothing was playing). Returns False if the whole slice is silent.
+        """
+        n = out.shape[0]
+        start = self.index(start_time)
+        out[:] = 0.0
+        with self._lock:
+            self.reads += 1
+            lo = max(start, self._end - self.capacity)
+            hi = min(start + n, self._end)
+            if hi <= lo:
+                self.silent_reads += 1
+                return False
+            first = lo % self.capacity
+            count = hi - lo
+            part = min(count, self.capacity - first)
+            out[lo - start:lo - start + part] = self._ring[first:first + part]
+            if part < count:
+                out[lo - start + part:hi - start] = self._ring[:count - part]
+            return True
+
+    def _zero(self, lo: int, hi: int):
+        if hi <= lo:
+            return
+        first = lo % self.capacity
+        count = min(hi - lo, self.capacity)
+        part = min(count, self.capacity - first)
+        self._ring[first:first + part] = 0.0
+        if part < count:
+            self._ring[:count - part] = 0.0
+
+    def _copy_in(self, y: np.ndarray, start: int):
+        n = y.shape[0]
+        first = start % self.capacity
+        part = min(n, self.capacity - first)
+        self._ring[first:first + part] = y[:part]
+        if part < n:
+            self._ring[:n - part] = y[part:]
+
+    def stats(self) -> Dict:
+        return {
+            "samples_written": self.samples_written,
+            "reads": self.reads,
+            "silent_reads": self.silent_reads,
+        }
+
+
+class CaptureTimeline:
+    """Start time of each mic chunk, derived from a sample count and an anchor."""
+
+    def __init__(self, sample_rate: int = 16000, input_latency: float = 0.0,
+                 max_drift_ms: float = 20.0, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.input_latency = input_latency
+        self.max_drift = max_drift_ms / 1000.0
+        self._clock = clock
+        self._anchor = None
+        self._samples = 0
+        self.reanchors = 0
+
+    def reset(self):
+        self._anchor = None
+        self._samples = 0
+
+    def chunk_start(self, samples: int, now: Optional[float] = None) -> float:
+        """Call right after a chunk of `samples` was read. Returns when its first sample was captured."""
+        now = self._clock() if now is None else now
+        measured = now - self.input_latency - samples / self.sample_rate
+        if self._anchor is None:
+            self._anchor = measured
+            self._samples = 0
+        else:
+            expected = self._anchor + self._samples / self.sample_rate
+            if abs(measured - expected) > self.max_drift:
+                # Gap (gated/paused) or clock drift: start a new count
+                self._anchor = measured
+                self._samples = 0
+                self.reanchors += 1
+        start = self._anchor + self._samples / self.sample_rate
+        self._samples += samples
+        return start
+
+
+class EchoCanceller:
+    """Partitioned-block frequency-domain NLMS echo canceller (mono, float samples)."""
+
+    def __init__(self, sample_rate: int = 16000, block: int = 256, filter_ms: float = 128.0,
+                 mu: float = 0.5, double_talk_ratio: float = 0.6, far_threshold: float = 100.0):
+        self.sample_rate = sample_rate
+        self.block = block
+        self.partitions = max(1, int(math.ceil(filter_ms / 1000.0 * sample_rate / block)))
+        self.mu = mu
+        self.double_talk_ratio = double_talk_ratio
+        self.far_threshold = far_threshold  # Reference RMS below which there is no echo to cancel
+        self.enabled = True
+
+        bins = block + 1
+        self._W = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._X = np.zeros((self.partitions, bins), dtype=np.complex128)
+        self._power = np.full(bins, 1.0)
+        self._delta = float(block * 2 * 100.0 ** 2)  # Regularizer ~ a 100 RMS noise floor
+        self._x_frame = np.zeros(2 * block)  # [previous ref block | current ref block]
+        self._e_frame = np.zeros(2 * block)  # [zeros | error block]
+        self._x_peaks = deque([0.0] * self.partitions, maxlen=self.partitions)
+
+        # Samples that do not fill a block wait for the next chunk (fewer than `block`)
+        self._held_near = np.zeros(block)
+        self._held_ref = np.zeros(block)
+        self._held = 0
+        # Work and output buffers, sized to the largest chunk seen
+        self._near = _Buffer(np.float64)
+        self._ref = _Buffer(np.float64)
+        self._out = _Buffer(np.float64)
+
+        # Metrics
+        self.double_talk = False
+        self.erle_db = 0.0
+        self.blocks = 0
+        self.adapted_blocks = 0
+        self.double_talk_blocks = 0
+        self.resets = 0
+        self.cpu_seconds = 0.0
+        self.audio_seconds = 0.0
+        self.last_chunk_ms = 0.0
+
+    def reset(self):
+        self._W[:] = 0
+        self._X[:] = 0
+        self._power[:] = 1.0
+        self._x_frame[:] = 0
+        self._x_peaks.extend([0.0] * self.partitions)
+        self._held = 0
+        self.resets += 1
+
+    def process(self, near: np.ndarray, ref: np.ndarray) -> np.ndarray:
+        """
+        Cancels the echo of `ref` from `near` (same length, same time span).
+        Returns the echo-free signal for every complete block processed so far;
+        a partial trailing block is held until the next call. The result is a
+        view into a reused buffer, valid until the next call.
+        """
+        start = time.perf_counter()
+        held = self._held
+        if held:
+            total = held + near.shape[0]
+            joined_near = self._near.get(total)
+            joined_ref = self._ref.get(total)
+            joined_near[:held] = self._held_near[:held]
+            joined_near[held:] = near
+            joined_ref[:held] = self._held_ref[:held]
+            joined_ref[held:] = ref
+            near, ref = joined_near, joined_ref
+        n_blocks = near.shape[0] // self.block
+        used = n_blocks * self.block
+        out = self._out.get(used)
+
+        for b in range(n_blocks):
+            s = slice(b * self.block, (b + 1) * self.block)
+            out[s] = self._process_block(near[s], ref[s])
+
+        self._held = near.shape[0] - used
+        self._held_near[:self._held] = near[used:]
+        self._held_ref[:self._held] = ref[used:]
+
+        elapsed = time.perf_counter() - start
+        self.cpu_seconds += elapsed
+        self.audio_seconds += used / self.sample_rate
+        self.last_chunk_ms = elapsed * 1000.0
+        return out
+
+    def _process_block(self, d: np.ndarray, x: np.ndarray) -> np.ndarray:
+        B = self.block
+        self.blocks += 1
+
+        # Reference spectrum of [previous | current] block, newest partition first
+        self._x_frame[:B] = self._x_frame[B:]
+        self._x_frame[B:] = x
+        Xb = np.fft.rfft(self._x_frame)
+        self._X[1:] = self._X[:-1]
+        self._X[0] = Xb
+
+        # Echo estimate (overlap-save keeps the last B samples)
+        y = np.fft.irfft((self._W * self._X).sum(axis=0))[B:]
+        e = d - y
+
+        x_rms = math.sqrt(float(np.dot(x, x)) / B)
+        self._x_peaks.append(float(np.max(np.abs(x))) if x_rms > 0 else 0.0)
+        far_active = x_rms > self.far_threshold
+        if not far_active:
+            self.double_talk = False
+            return e
+
+        # Geigel: near-end peak well above what the echo path could produce -> someone is talking
+        self.double_talk = float(np.max(np.abs(d))) > self.double_talk_ratio * max(self._x_peaks)
+        if self.double_talk:
+            self.double_talk_blocks += 1
+        else:
+            self.adapted_blocks += 1
+            self._power *= 0.9
+            self._power += 0.1 * (Xb.real ** 2 + Xb.imag ** 2)
+            self._e_frame[B:] = e
+            E = np.fft.rfft(self._e_frame)
+            G = self.mu * np.conj(self._X) * E / (self.partitions * self._power + self._delta)
+            # Gradient constraint: keep each partition a causal B-tap filter
+            g = np.fft.irfft(G, axis=1)
+            g[:, B:] = 0.0
+            self._W += np.fft.rfft(g, axis=1)
+
+            if not np.all(np.isfinite(self._W)):
+                self.reset()
+                return d
+
+        d_pow = float(np.dot(d, d))
+        e_pow = float(np.dot(e, e))
+        if not self.double_talk and d_pow > 0 and e_pow > 0:
+            erle = 10.0 * math.log10(d_pow / e_pow)
+            self.erle_db = 0.9 * self.erle_db + 0.1 * erle
+        return e
+
+    def stats(self) -> Dict:
+        cpu = self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0
+        return {
+            "enabled": self.enabled,
+            "filter_ms": round(self.partitions * self.block / self.sample_rate * 1000.0, 1),
+            "erle_db": round(self.erle_db, 1),
+            "double_talk": self.double_talk,
+            "blocks": self.blocks,
+            "adapted_blocks": self.adapted_blocks,
+            "double_talk_blocks": self.double_talk_blocks,
+            "resets": self.resets,
+            "cpu_ms_per_s": round(cpu * 1000.0, 2),
+            "last_chunk_ms": round(self.last_chunk_ms, 2),
+        }
@@ -0,0 +1,323 @@
+"""
+Audio Buffers - Preallocated PCM buffers for the realtime audio path.
+
+PcmRingBuffer:
+    Fixed-capacity byte ring backed by a single bytearray/memoryview.
+    The capture side writes raw PCM into it, the sender drains whole frames.
+    Overflow is handled by an explicit policy instead of blocking the writer:
+    - drop_oldest: discard the oldest whole frames to make room (keeps audio fresh)
+    - drop_newest: discard the incoming chunk (keeps what is already queued)
+
+PlaybackJitterBuffer:
+    Bounded queue of received PCM chunks in front of the output device.
+    - Primes to a target depth (ms) before playback starts, but never waits
+      longer than that target for more audio to arrive.
+    - Schedules chunks on a media timeline anchored at the first played chunk;
+      chunks that fall more than `late_ms` behind schedule are dropped, so a slow
+      device catches up by skipping audio rather than time-stretching it.
+    - Caps total buffered audio at `max_ms` by discarding the oldest chunks.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+class PcmRingBuffer:
+    """Thread-safe fixed-capacity PCM ring buffer with overrun/underrun counters."""
+
+    def __init__(self, capacity: int, frame_size: int, overflow: str = DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Available: {', '.join(OVERFLOW_POLICIES)}")
+        if frame_size <= 0:
+            raise ValueError("frame_size must be positive")
+
+        # Round capacity up to whole frames so frame reads never straddle a partial drop
+        frames = max(1, -(-capacity // frame_size))
+        self.capacity = frames * frame_size
+        self.frame_size = frame_size
+        self.overflow = overflow
+
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self._head = 0  # Read position
+        self._size = 0  # Bytes currently buffered
+        self._lock = threading.Lock()
+
+        # Counters
+        self.overruns = 0
+        self.underruns = 0
+        self.dropped_bytes = 0
+        self.written_bytes = 0
+        self.peak_fill = 0
+
+    def __len__(self):
+        return self._size
+
+    def frames_available(self) -> int:
+        return self._size // self.frame_size
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._size = 0
+
+    def write(self, data) -> int:
+        """
+        Copies a chunk into the ring. Never blocks.
+        Returns the number of bytes dropped because of overflow (0 normally).
+        """
+        src = memoryview(data).cast("B")
+        n = len(src)
+        if n == 0:
+            return 0
+
+        with self._lock:
+            dropped = 0
+            free = self.capacity - self._size
+
+            if n > free:
+                self.overruns += 1
+                if self.overflow == DROP_NEWEST:
+                    self.dropped_bytes += n
+                    return n
+
+                if n >= self.capacity:
+                    # Chunk alone fills the ring: keep only its newest bytes
+                    dropped = self._size + (n - self.capacity)
+                    src = src[n - self.capacity:]
+                    n = self.capacity
+                    self._head = 0
+                    self._size = 0
+                else:
+                    # Drop whole oldest frames until the chunk fits
+                    need = n - free
+                    drop = min(self._size, -(-need // self.frame_size) * self.frame_size)
+                    self._head = (self._head + drop) % self.capacity
+                    self._size -= drop
+                    dropped = drop
+                self.dropped_bytes += dropped
+
+            tail = (self._head + self._size) % self.capacity
+            first = min(n, self.capacity - tail)
+            self._view[tail:tail + first] = src[:first]
+            if first < n:
+                self._view[:n - first] = src[first:]
+
+            self._size += n
+            self.written_bytes += n
+            if self._size > self.peak_fill:
+                self.peak_fill = self._size
+            return dropped
+
+    def _copy_out(self, out, n: int):
+        head = self._head
+        first = min(n, self.capacity - head)
+        out[:first] = self._view[head:head + first]
+        if first < n:
+            out[first:n] = self._view[:n - first]
+        self._head = (head + n) % self.capacity
+        self._size -= n
+
+    def _take(self, n: int) -> bytes:
+        """Removes n bytes and returns them as one bytes object (a single allocation, even when wrapping)."""
+        head = self._head
+        end = head + n
+        if end <= self.capacity:
+            data = self._view[head:end].tobytes()
+        else:
+            data = b"".join((self._view[head:], self._view[:end - self.capacity]))
+        self._head = end % self.capacity
+        self._size -= n
+        return data
+
+    def read_into(self, out) -> bool:
+        """
+        Copies one whole frame into a caller-owned writable buffer (no allocation).
+        Returns False (and counts an underrun) if a whole frame is not available.
+        """
+        dest = memoryview(out).cast("B")
+        with self._lock:
+            if self._size < self.frame_size:
+                self.underruns += 1
+                return False
+            self._copy_out(dest, self.frame_size)
+            return True
+
+    def read_frame(self) -> Optional[bytes]:
+        """Returns one whole frame as bytes, or None (and counts an underrun)."""
+        with self._lock:
+            if self._size < self.frame_size:
+                self.underruns += 1
+                return None
+            return self._take(self.frame_size)
+
+    def read_frames(self, count: int) -> Optional[bytes]:
+        """Returns `count` whole frames as one bytes object, or None (and counts an underrun)."""
+        n = count * self.frame_size
+        with self._lock:
+            if count <= 0 or self._size < n:
+                self.underruns += 1
+                return None
+            return self._take(n)
+
+    def stats(self) -> Dict:
+        return {
+            "capacity_bytes": self.capacity,
+            "frame_bytes": self.frame_size,
+            "fill_bytes": self._size,
+            "peak_fill_bytes": self.peak_fill,
+            "overflow_policy": self.overflow,
+            "overruns": self.overruns,
+            "underruns": self.underruns,
+            "dropped_bytes": self.dropped_bytes,
+            "written_bytes": self.written_bytes,
+        }
+
+
+class PlaybackJitterBuffer:
+    """Thread-safe playback jitter buffer with depth and latency metrics."""
+
+    def __init__(self, sample_rate: int = 24000, sample_width: int = 2, channels: int = 1,
+                 target_ms: float = 100.0, max_ms: float = 30000.0, late_ms: float = 500.0,
+                 clock=time.monotonic):
+        self.bytes_per_ms = sample_rate * sample_width * channels / 1000.0
+        self.target_ms = target_ms
+        self.max_ms = max_ms
+        self.late_ms = late_ms
+        self._clock = clock
+
+        self._chunks = deque()  # (chunk, media_offset_s, arrival)
+        self._bytes = 0
+        self._media_pos = 0.0  # Seconds of audio accepted so far
+        self._anchor = None  # Wall time at which media offset 0 would play
+        self._primed = False
+        self._first_arrival = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.chunks_in = 0
+        self.chunks_played = 0
+        self.late_drops = 0
+        self.overflow_drops = 0
+        self.cleared_chunks = 0
+        self.underruns = 0  # Playback ran dry and had to re-prime (includes natural end of speech)
+        self.peak_depth_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_prime_wait_ms = 0.0
+
+    def __len__(self):
+        return len(self._chunks)
+
+    @property
+    def depth_ms(self) -> float:
+        return self._bytes / self.bytes_per_ms
+
+    def put(self, chunk: bytes):
+        """Adds a received chunk. Never blocks."""
+        now = self._clock()
+        duration = len(chunk) / self.bytes_per_ms / 1000.0
+        with self._lock:
+            if not self._chunks and not self._primed:
+                self._first_arrival = now
+            self._chunks.append((chunk, self._media_pos, now))
+            self._media_pos += duration
+            self._bytes += len(chunk)
+            self.chunks_in += 1
+
+            # Bounded maximum: shed the oldest audio
+            while self.depth_ms > self.max_ms and len(self._chunks) > 1:
+                old, _, _ = self._chunks.popleft()
+                self._bytes -= len(old)
+                self.overflow_drops += 1
+
+            depth = self.depth_ms
+            if depth > self.peak_depth_ms:
+                self.peak_depth_ms = depth
+
+    def ready_in(self) -> Optional[float]:
+        """
+        Seconds until pop() can return audio: 0 if ready now,
+        None if the buffer is empty (wait for the next put).
+        """
+        with self._lock:
+            if not self._chunks:
+                return None
+            if self._primed or self.depth_ms >= self.target_ms:
+                return 0.0
+            waited = self._clock() - self._first_arrival
+            return max(0.0, self.target_ms / 1000.0 - waited)
+
+    def pop(self) -> Optional[bytes]:
+        """Returns the next chunk to play, or None if nothing is ready."""
+        now = self._clock()
+        with self._lock:
+            if not self._chunks:
+                if self._primed:
+                    # Ran dry: re-prime and re-anchor so a gap is not counted as lateness
+                    self.underruns += 1
+                    self._primed = False
+                    self._anchor = None
+                return None
+
+            if not self._primed:
+                waited = now - self._first_arrival
+                if self.depth_ms < self.target_ms and waited * 1000.0 < self.target_ms:
+                    return None
+                self._primed = True
+                self.last_prime_wait_ms = waited * 1000.0
+
+            while self._chunks:
+                chunk, offset, _ = self._chunks.popleft()
+                self._bytes -= len(chunk)
+
+                if self._anchor is None:
+                    self._anchor = now - offset
+                lag_ms = (now - (self._anchor + offset)) * 1000.0
+
+                if lag_ms > self.late_ms and self._chunks:
+                    # Too far behind schedule: skip this chunk to catch up
+                    self.late_drops += 1
+                    continue
+
+                self.last_lag_ms = max(0.0, lag_ms)
+                if self.last_lag_ms > self.max_lag_ms:
+                    self.max_lag_ms = self.last_lag_ms
+                self.chunks_played += 1
+                return chunk
+            return None
+
+    def clear(self) -> int:
+        """Drops all buffered audio (e.g. on interruption). Returns chunks dropped."""
+        with self._lock:
+            count = len(self._chunks)
+            self._chunks.clear()
+            self._bytes = 0
+            self._primed = False
+            self._anchor = None
+            self.cleared_chunks += count
+            return count
+
+    def stats(self) -> Dict:
+        return {
+            "depth_ms": round(self.depth_ms, 1),
+            "peak_depth_ms": round(self.peak_depth_ms, 1),
+            "target_ms": self.target_ms,
+            "max_ms": self.max_ms,
+            "added_latency_ms": round(self.last_prime_wait_ms + self.last_lag_ms, 1),
+            "prime_wait_ms": round(self.last_prime_wait_ms, 1),
+            "lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "chunks_in": self.chunks_in,
+            "chunks_played": self.chunks_played,
+            "late_drops": self.late_drops,
+            "overflow_drops": self.overflow_drops,
+            "cleared_chunks": self.cleared_chunks,
+            "underruns": self.underruns,
+        }
@@ -0,0 +1,187 @@
+"""
+Audio Devices - Cached PortAudio device registry.
+
+One PyAudio instance is created lazily and shared for enumeration and for
+opening streams. The device list is read once and served from memory;
+name lookups go through a precomputed lowercase index instead of querying
+PortAudio device by device.
+
+PortAudio only notices hotplugged devices when it is re-initialized, which
+invalidates every open stream. So refresh() re-reads the list from the live
+instance (cheap), while rescan() terminates and re-initializes PortAudio and
+must only be called with no streams open. resolve() rescans on a miss only
+when the caller says it is safe.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+INPUT = "input"
+OUTPUT = "output"
+
+
+def _default_factory():
+    import pyaudio
+    return pyaudio.PyAudio()
+
+
+class DeviceRegistry:
+    """Lazily initialized, cached view of the PortAudio devices."""
+
+    def __init__(self, factory: Optional[Callable] = None):
+        self._factory = factory or _default_factory
+        self._pa = None
+        self._devices: List[Dict] = []
+        self._by_name: Dict[str, Dict] = {}
+        self._defaults: Dict[str, Optional[int]] = {INPUT: None, OUTPUT: None}
+        self._lock = threading.RLock()
+
+        # Counters
+        self.generation = 0  # Bumped whenever the device list changes
+        self.refreshes = 0
+        self.rescans = 0
+        self.last_refresh_ms = 0.0
+
+    @property
+    def pa(self):
+        """The shared PyAudio instance (created and scanned on first use)."""
+        with self._lock:
+            if self._pa is None:
+                self._pa = self._factory()
+                self._scan()
+            return self._pa
+
+    def open(self, **kwargs):
+        """Opens a stream on the shared instance (same arguments as PyAudio.open)."""
+        return self.pa.open(**kwargs)
+
+    def refresh(self):
+        """Re-reads the device list from the current PortAudio instance."""
+        with self._lock:
+            if self._pa is None:
+                self.pa
+            else:
+                self._scan()
+
+    def rescan(self):
+        """Re-initializes PortAudio to pick up hotplugged devices. No streams may be open."""
+        with self._lock:
+            if self._pa is not None:
+                try:
+                    self._pa.terminate()
+                except Exception:
+                    pass
+                self._pa = None
+            self.rescans += 1
+            self.pa
+
+    def terminate(self):
+        with self._lock:
+            if self._pa is not None:
+                self._pa.terminate()
+                self._pa = None
+
+    def _scan(self):
+        start = time.perf_counter()
+        pa = self._pa
+        devices = []
+        for i in range(pa.get_device_count()):
+            try:
+                info = pa.get_device_info_by_index(i)
+            except Exception:
+                continue
+            devices.append({
+                "index": i,
+                "name": info.get("name", ""),
+                "max_input_channels": int(info.get("maxInputChannels", 0)),
+                "max_output_channels": int(info.get("maxOutputChannels", 0)),
+                "default_sample_rate": float(info.get("defaultSampleRate", 0.0)),
+                "host_api": info.get("hostApi", 0),
+            })
+
+        defaults = {}
+        for kind, getter in ((INPUT, "get_default_input_device_info"), (OUTPUT, "get_default_output_device_info")):
+            try:
+                defaults[kind] = int(getattr(pa, getter)()["index"])
+            except Exception:
+                defaults[kind] = None
+
+        changed = [(d["index"], d["name"]) for d in devices] != [(d["index"], d["name"]) for d in self._devices]
+        self._devices = devices
+        self._by_name = {}
+        for d in devices:
+            self._by_name.setdefault(d["name"].lower(), d)
+        self._defaults = defaults
+        if changed:
+            self.generation += 1
+        self.refreshes += 1
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000.0
+
+    def devices(self, kind: Optional[str] = None) -> List[Dict]:
+        self.pa
+        if kind is None:
+            return list(self._devices)
+        key = "max_input_channels" if kind == INPUT else "max_output_channels"
+        return [d for d in self._devices if d[key] > 0]
+
+    def get(self, index: int) -> Optional[Dict]:
+        self.pa
+        for d in self._devices:
+            if d["index"] == index:
+                return d
+        return None
+
+    def default(self, kind: str) -> Optional[Dict]:
+        self.pa
+        index = self._defaults.get(kind)
+        return self.get(index) if index is not None else None
+
+    def find(self, name: str, kind: str) -> Optional[Dict]:
+        """Exact (case-insensitive) name match first, then substring either way."""
+        self.pa
+        key = "max_input_channels" if kind == INPUT else "max_output_channels"
+        wanted = name.lower()
+        exact = self._by_name.get(wanted)
+        if exact and exact[key] > 0:
+            return exact
+        for d in self._devices:
+            if d[key] <= 0:
+                continue
+            have = d["name"].lower()
+            if wanted in have or have in wanted:
+                return d
+        return None
+
+    def resolve(self, kind: str, name: Optional[str] = None, index=None,
+                rescan_on_miss: bool = False) -> Optional[Dict]:
+        """
+        Picks a device by name, then by index, then the system default.
+        With `rescan_on_miss`, an unknown name triggers one rescan (hotplug).
+        """
+        if name:
+            device = self.find(name, kind)
+            if device is None and rescan_on_miss:
+                self.rescan()
+                device = self.find(name, kind)
+            if device is not None:
+                return device
+            print(f"[ADA] Could not find {kind} device matching '{name}'. Checking index...")
+        if index is not None:
+            try:
+                device = self.get(int(index))
+            except (TypeError, ValueError):
+                print(f"[ADA] Invalid device index '{index}', reverting to default.")
+                device = None
+            if device is not None:
+                return device
+        return self.default(kind)
+
+    def stats(self) -> Dict:
+        return {
+            "devices": len(self._devices),
+            "generation": self.generation,
+            "refreshes": self.refreshes,
+            "rescans": self.rescans,
+            "last_refresh_ms": round(self.last_refresh_ms, 1),
+        }
@@ -0,0 +1,326 @@
+"""
+Audio I/O - Long-lived capture and playback threads for the PyAudio streams.
+
+Each thread owns its stream for its whole lifetime (it is the only code that
+reads/writes/closes it), so blocking PortAudio calls never go through the
+shared asyncio executor. Data is exchanged with the event loop through the
+buffers in audio_buffers.py (short memcpy-only critical sections) and
+loop.call_soon_threadsafe notifications; the threads themselves sleep on
+events instead of polling.
+
+PlaybackClock / EchoGate:
+    Track how much audio has been handed to the output device and when its
+    last sample actually leaves the speaker (frames written + the stream's
+    reported output latency), so the mic is muted only for that window.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class PlaybackClock:
+    """Estimates when the last written output sample becomes audible."""
+
+    def __init__(self, sample_rate: int, output_latency: float = 0.0, sample_width: int = 2,
+                 channels: int = 1, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.output_latency = output_latency
+        self.frame_bytes = sample_width * channels
+        self._clock = clock
+        self._play_end = 0.0  # Wall time when the last written frame finishes playing (before latency)
+        self.frames_written = 0
+
+    def on_write(self, nbytes: int, now: Optional[float] = None):
+        """Records a chunk that is about to be written to the device."""
+        now = self._clock() if now is None else now
+        frames = nbytes // self.frame_bytes
+        # If the device ran dry the chunk starts now, otherwise it queues behind what is pending
+        self._play_end = max(self._play_end, now) + frames / self.sample_rate
+        self.frames_written += frames
+
+    def reset(self, now: Optional[float] = None):
+        """Forgets pending audio (e.g. after the output buffer was flushed)."""
+        now = self._clock() if now is None else now
+        self._play_end = min(self._play_end, now)
+
+    def audible_until(self) -> float:
+        return self._play_end + self.output_latency
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds until the last written sample has left the speaker."""
+        now = self._clock() if now is None else now
+        return max(0.0, self.audible_until() - now)
+
+    def is_playing(self, now: Optional[float] = None) -> bool:
+        return self.remaining(now) > 0.0
+
+    def position(self, now: Optional[float] = None) -> int:
+        """Frames that have been played out so far."""
+        now = self._clock() if now is None else now
+        pending = max(0.0, self._play_end - now) * self.sample_rate
+        return max(0, self.frames_written - int(round(pending)))
+
+    def stats(self) -> Dict:
+        return {
+            "frames_written": self.frames_written,
+            "position_frames": self.position(),
+            "remaining_ms": round(self.remaining() * 1000.0, 1),
+            "output_latency_ms": round(self.output_latency * 1000.0, 1),
+        }
+
+
+class EchoGate:
+    """
+    Mutes mic chunks while playback is audible (plus a short room-echo tail)
+    and measures how much mic time that costs.
+    """
+
+    def __init__(self, playback_clock: PlaybackClock, tail_ms: float = 50.0, clock=time.monotonic):
+        self.playback_clock = playback_clock
+        self.tail_ms = tail_ms
+        self._clock = clock
+        self._gated = False
+
+        # Counters
+        self.gated_chunks = 0
+        self.gated_ms = 0.0  # Total mic time discarded (dead time)
+        self.last_reopen_delay_ms = 0.0  # Gate end -> first mic chunk accepted
+
+    def open_at(self) -> float:
+        return self.playback_clock.audible_until() + self.tail_ms / 1000.0
+
+    def is_closed(self, now: Optional[float] = None) -> bool:
+        now = self._clock() if now is None else now
+        return now < self.open_at()
+
+    def allow(self, chunk_seconds: float, now: Optional[float] = None) -> bool:
+        """
+        Returns False (and counts the chunk as dead time) if any part of the chunk
+        that just finished capturing at `now` overlaps the closed window.
+        """
+        now = self._clock() if now is None else now
+        chunk_start = now - chunk_seconds
+        if chunk_start < self.open_at():
+            self._gated = True
+            self.gated_chunks += 1
+            self.gated_ms += chunk_seconds * 1000.0
+            return False
+        if self._gated:
+            self._gated = False
+            self.last_reopen_delay_ms = (chunk_start - self.open_at()) * 1000.0
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "closed": self.is_closed(),
+            "tail_ms": self.tail_ms,
+            "gated_chunks": self.gated_chunks,
+            "dead_time_ms": round(self.gated_ms, 1),
+            "last_reopen_delay_ms": round(self.last_reopen_delay_ms, 1),
+        }
+
+
+class AudioIOThread(threading.Thread):
+    """Base class: a daemon thread that owns one PyAudio stream."""
+
+    def __init__(self, stream, name: str):
+        super().__init__(name=name, daemon=True)
+        self.stream = stream
+        self._stop_event = threading.Event()
+
+        # Counters
+        self.chunks = 0
+        self.errors = 0
+        self.max_call_ms = 0.0
+
+    def stop(self):
+        """Asks the thread to exit; it closes its stream on the way out."""
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def _close_stream(self):
+        try:
+            self.stream.stop_stream()
+        except Exception:
+            pass
+        try:
+            self.stream.close()
+        except Exception:
+            pass
+
+    def _timed(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if elapsed > self.max_call_ms:
+            self.max_call_ms = elapsed
+        return result
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.is_alive(),
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "max_call_ms": round(self.max_call_ms, 1),
+        }
+
+
+class AudioInputThread(AudioIOThread):
+    """
+    Reads fixed-size chunks from an input stream and hands them to `on_chunk`
+    (called on this thread). While `enabled` is cleared (paused) the thread
+    sleeps on the event instead of reading.
+    """
+
+    def __init__(self, stream, chunk_size: int, on_chunk: Callable[[bytes], None],
+                 enabled: threading.Event, read_kwargs: Optional[Dict] = None):
+        super().__init__(stream, name="ada-audio-in")
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self.enabled = enabled
+        self.read_kwargs = read_kwargs or {}
+
+    def run(self):
+        try:
+            while not self.stopped:
+                # Paused: block on the event (timeout only so stop() is noticed)
+                if not self.enabled.wait(timeout=0.5):
+                    continue
+                try:
+                    data = self._timed(self.stream.read, self.chunk_size, **self.read_kwargs)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error reading audio: {e}")
+                    self._stop_event.wait(0.1)
+                    continue
+
+                self.chunks += 1
+                try:
+                    self.on_chunk(data)
+                except Exception as e:
+                    print(f"[ADA DEBUG] [ERR] Mic chunk handler failed: {e}")
+        finally:
+            self._close_stream()
+
+
+class AudioOutputThread(AudioIOThread):
+    """
+    Drains a PlaybackJitterBuffer into an output stream.
+
+    `ready` is set by the producer after every put. `on_chunk` is called with
+    each chunk just before it is written, `on_drained` after a write that left
+    the buffer empty, `on_flush` after a flush (all on this thread). If a
+    PlaybackClock is given, every write is recorded on it.
+
+    Chunks are written in `slice_bytes` pieces so flush() can cut the in-flight
+    chunk short; the flush itself (abort_stream, then restart) runs on this
+    thread, which owns the stream.
+    """
+
+    def __init__(self, stream, source, ready: threading.Event,
+                 on_chunk: Optional[Callable[[bytes], None]] = None,
+                 on_drained: Optional[Callable[[], None]] = None,
+                 playback_clock: Optional[PlaybackClock] = None,
+                 abort_stream: Optional[Callable] = None,
+                 on_flush: Optional[Callable[[], None]] = None,
+                 slice_bytes: int = 960):
+        super().__init__(stream, name="ada-audio-out")
+        self.source = source
+        self.ready = ready
+        self.playback_clock = playback_clock
+        self.on_chunk = on_chunk
+        self.on_drained = on_drained
+        self.abort_stream = abort_stream
+        self.on_flush = on_flush
+        self.slice_bytes = slice_bytes
+        self.idle_wakeups = 0
+
+        self._flush_event = threading.Event()
+        self._flush_requested_at = 0.0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def flush(self):
+        """Requests that device-level output is discarded as soon as possible."""
+        self._flush_requested_at = time.perf_counter()
+        self._flush_event.set()
+        self.ready.set()
+
+    def _flush_device(self):
+        self._flush_event.clear()
+        try:
+            if self.abort_stream:
+                # Drops whatever is still queued in the PortAudio/device buffer
+                self.abort_stream(self.stream)
+            else:
+                self.stream.stop_stream()
+            self.stream.start_stream()
+        except Exception as e:
+            self.errors += 1
+            print(f"[ADA DEBUG] [ERR] Audio output flush failed: {e}")
+        if self.playback_clock:
+            self.playback_clock.reset()
+        if self.on_flush:
+            self.on_flush()
+
+        elapsed = (time.perf_counter() - self._flush_requested_at) * 1000.0
+        self.flushes += 1
+        self.last_flush_ms = elapsed
+        if elapsed > self.max_flush_ms:
+            self.max_flush_ms = elapsed
+
+    def _write(self, chunk: bytes) -> bool:
+        """Writes a chunk slice by slice. Returns False if a flush cut it short."""
+        view = memoryview(chunk)
+        for offset in range(0, len(view), self.slice_bytes):
+            if self._flush_event.is_set() or self.stopped:
+                return False
+            self._timed(self.stream.write, view[offset:offset + self.slice_bytes])
+        return True
+
+    def run(self):
+        try:
+            while not self.stopped:
+                if self._flush_event.is_set():
+                    self._flush_device()
+                    continue
+
+                self.ready.clear()
+                chunk = self.source.pop()
+                if chunk is None:
+                    # Empty: sleep until the next put. Priming: sleep until the depth deadline.
+                    timeout = self.source.ready_in()
+                    self.ready.wait(timeout if timeout is not None else 0.5)
+                    self.idle_wakeups += 1
+                    continue
+
+                if self.playback_clock:
+                    self.playback_clock.on_write(len(chunk))
+                if self.on_chunk:
+                    self.on_chunk(chunk)
+                try:
+                    if not self._write(chunk):
+                        continue  # Flushed mid-chunk: the rest is dropped
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[ADA DEBUG] [ERR] Audio output write failed: {e}")
+                    continue
+                self.chunks += 1
+
+                if self.on_drained and len(self.source) == 0:
+                    self.on_drained()
+        finally:
+            self._close_stream()
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats["idle_wakeups"] = self.idle_wakeups
+        stats["flushes"] = self.flushes
+        stats["last_flush_ms"] = round(self.last_flush_ms, 1)
+        stats["max_flush_ms"] = round(self.max_flush_ms, 1)
+        return stats
@@ -4,7 +4,6 @@ from mediapipe.tasks.python import vision
 import cv2
 import asyncio
 import os
-import base64
 import numpy as np
 import urllib.request
 
@@ -17,7 +16,7 @@ class FaceAuthenticator:
         """
         :param reference_image_path: Path to the user's reference photo.
         :param on_status_change: Async callback(is_authenticated: bool).
-        :param on_frame: Async callback(frame_data_b64: str) to send frames to frontend.
+        :param on_frame: Async callback(frame_jpeg: bytes) to send frames to frontend.
         """
         self.reference_image_path = reference_image_path
         self.on_status_change = on_status_change
@@ -214,8 +213,7 @@ class FaceAuthenticator:
             if self.on_frame:
                 small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
                 _, buffer = cv2.imencode('.jpg', small_frame)
-                b64_str = base64.b64encode(buffer).decode('utf-8')
-                
-                asyncio.run_coroutine_threadsafe(self.on_frame(b64_str), loop)
+                # Raw JPEG: sent as a binary Socket.IO attachment, no base64
+                asyncio.run_coroutine_threadsafe(self.on_frame(buffer.tobytes()), loop)
 
         video_capture.release()
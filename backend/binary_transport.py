@@ -0,0 +1,151 @@
+"""
+Binary Transport - Bulk Socket.IO payloads as binary attachments.
+
+Frames and artifacts (browser screenshots, auth camera frames, STL files)
+used to travel as base64 strings inside JSON: a third larger, plus an encode
+on the server and a decode in the browser. BinaryTransport.emit() passes
+bytes values through as they are, and python-socketio sends them as native
+binary attachments (an ArrayBuffer in the browser).
+
+A bytes value larger than `chunk_size` is streamed ahead of its event as
+'binary_chunk' events ({"id", "index", "count", "data"}), yielding to the
+event loop between chunks so other emits are interleaved instead of queueing
+behind one multi-megabyte packet. The event itself then carries
+{"__chunked__": id, "size": n} in that field; the frontend reassembles it
+(src/utils/binaryTransport.js) before the handler sees the payload.
+
+Every emit (and every ingest reported with record()) is counted per event
+in size and latency histograms. Latency is the time until Socket.IO has
+queued the last packet, which includes waiting behind earlier emits.
+`on_emit(event, room, size)` is called after each emit (per-client
+accounting, see subscriptions.py).
+"""
+
+import asyncio
+import base64
+import itertools
+import time
+from typing import Dict, Optional
+
+CHUNK_SIZE = 256 * 1024
+SIZE_BUCKETS = [(1024, "1K"), (4096, "4K"), (16384, "16K"), (65536, "64K"),
+                (262144, "256K"), (1048576, "1M"), (4194304, "4M")]
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000]
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+
+def as_bytes(value):
+    """Raw bytes from bytes or a base64 string (None stays None)."""
+    if value is None or isinstance(value, bytes):
+        return value
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    return base64.b64decode(value)
+
+
+def payload_size(data) -> int:
+    """Approximate payload bytes: binaries and strings are counted, JSON structure is not."""
+    if isinstance(data, BINARY_TYPES):
+        return len(data)
+    if isinstance(data, str):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(payload_size(v) for v in data.values())
+    if isinstance(data, (list, tuple)):
+        return sum(payload_size(v) for v in data)
+    return 0 if data is None else 8
+
+
+class _EventStats:
+    def __init__(self, direction: str):
+        self.direction = direction
+        self.count = 0
+        self.bytes = 0
+        self.max_bytes = 0
+        self.chunked = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.sizes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.latencies = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, size: int, ms: float, chunked: bool):
+        self.count += 1
+        self.bytes += size
+        self.max_bytes = max(self.max_bytes, size)
+        self.chunked += int(chunked)
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.sizes[next((i for i, (limit, _) in enumerate(SIZE_BUCKETS) if size <= limit), len(SIZE_BUCKETS))] += 1
+        self.latencies[next((i for i, limit in enumerate(LATENCY_BUCKETS_MS) if ms <= limit),
+                            len(LATENCY_BUCKETS_MS))] += 1
+
+    def snapshot(self) -> Dict:
+        size_labels = [f"<={label}" for _, label in SIZE_BUCKETS] + [f">{SIZE_BUCKETS[-1][1]}"]
+        latency_labels = [f"<={ms}ms" for ms in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "direction": self.direction,
+            "count": self.count,
+            "bytes": self.bytes,
+            "avg_bytes": round(self.bytes / self.count) if self.count else 0,
+            "max_bytes": self.max_bytes,
+            "chunked": self.chunked,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "size_hist": {label: n for label, n in zip(size_labels, self.sizes) if n},
+            "latency_hist": {label: n for label, n in zip(latency_labels, self.latencies) if n},
+        }
+
+
+class BinaryTransport:
+    """Socket.IO emits with binary attachments, chunking and per-event histograms."""
+
+    def __init__(self, sio, chunk_size: int = CHUNK_SIZE, on_emit=None, clock=time.monotonic):
+        self.sio = sio
+        self.chunk_size = chunk_size
+        self.on_emit = on_emit
+        self._clock = clock
+        self._ids = itertools.count(1)
+        self._events: Dict[str, _EventStats] = {}
+
+    async def emit(self, event: str, data=None, room: Optional[str] = None):
+        """Emits `event`; bytes values in a dict payload go out as binary attachments."""
+        start = self._clock()
+        size = payload_size(data)
+        chunked = False
+        if isinstance(data, dict) and self.chunk_size:
+            for key, value in list(data.items()):
+                if isinstance(value, BINARY_TYPES) and len(value) > self.chunk_size:
+                    if not chunked:
+                        data = dict(data) # The caller's dict is left as it was
+                        chunked = True
+                    data[key] = await self._send_chunks(value, room)
+        await self.sio.emit(event, data, room=room)
+        self.record(event, size, (self._clock() - start) * 1000.0, chunked=chunked)
+        if self.on_emit:
+            self.on_emit(event, room, size)
+
+    async def _send_chunks(self, value, room: Optional[str]) -> Dict:
+        view = memoryview(value)
+        transfer_id = next(self._ids)
+        count = -(-len(view) // self.chunk_size)
+        for index in range(count):
+            chunk = view[index * self.chunk_size:(index + 1) * self.chunk_size].tobytes()
+            await self.sio.emit("binary_chunk", {"id": transfer_id, "index": index, "count": count, "data": chunk},
+                                room=room)
+            await asyncio.sleep(0) # Let other emits go out between chunks
+        return {"__chunked__": transfer_id, "size": len(view)}
+
+    def record(self, event: str, size: int, ms: float, direction: str = "out", chunked: bool = False):
+        """Counts one transfer (also used for incoming payloads such as video frames)."""
+        key = event if direction == "out" else f"{event} ({direction})"
+        stats = self._events.get(key)
+        if stats is None:
+            stats = self._events[key] = _EventStats(direction)
+        stats.add(size, ms, chunked)
+
+    def stats(self) -> Dict:
+        return {
+            "chunk_size": self.chunk_size,
+            "events": {event: stats.snapshot() for event, stats in self._events.items()},
+        }
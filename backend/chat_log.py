@@ -0,0 +1,176 @@
+"""
+Chat Log - Batched chat_history.jsonl writes and transcript aggregation.
+
+ChatLogWriter replaces open/append/close per message: append() only queues
+the entry, and a background thread writes queued entries in one write() per
+file through long-lived handles. It writes every `interval` seconds, or
+sooner once `max_pending` entries are waiting, and flushes each batch to the
+OS, so a crash of the process loses at most the entries of one interval.
+With `fsync` the batch is also forced to disk, which covers power loss too.
+flush() writes everything queued synchronously (readers call it first, so
+they always see their own writes). close() stops the thread and closes the
+handles; the owner calls it when done (it also runs at interpreter exit),
+and entries appended after that are written synchronously.
+
+ChatBuffer collects the streamed transcription deltas of the current
+speaker as a list of parts joined on demand, instead of growing one string
+with += for every delta.
+"""
+
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class ChatLogWriter:
+    """Background JSONL appender with batching and bounded loss."""
+
+    def __init__(self, interval: float = 0.5, max_pending: int = 64, fsync: bool = False):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self._pending: List[Tuple[Path, Dict]] = []
+        self._lock = threading.Lock()  # Guards _pending (held only briefly, by the event loop too)
+        self._write_lock = threading.Lock()  # Serializes batches so entries land in order
+        self._wake = threading.Event()
+        self._files: Dict[Path, object] = {}  # Long-lived append handles
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Counters
+        self.entries = 0
+        self.batches = 0
+        self.bytes = 0
+        self.errors = 0
+        self.max_batch = 0
+
+    def append(self, path, entry: Dict):
+        """Queues one entry for `path` (never blocks on file I/O)."""
+        with self._lock:
+            self._pending.append((Path(path), entry))
+            pending = len(self._pending)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        if self._closed:
+            self.close() # No writer thread any more: write now and don't keep the handle
+        elif pending >= self.max_pending:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes all queued entries now (in the calling thread)."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            # One write per file; order within a file is the append order
+            by_path: Dict[Path, List[str]] = {}
+            for path, entry in batch:
+                by_path.setdefault(path, []).append(json.dumps(entry) + "\n")
+            for path, lines in by_path.items():
+                data = "".join(lines)
+                try:
+                    f = self._files.get(path)
+                    if f is None:
+                        f = self._files[path] = open(path, "a", encoding="utf-8")
+                    f.write(data)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                    self.bytes += len(data)
+                except OSError as e:
+                    # e.g. the project folder was deleted: drop the handle, retry with a fresh one next time
+                    self.errors += 1
+                    self._close_file(path)
+                    print(f"[ProjectManager] [ERR] Failed to write chat history to {path}: {e}")
+            self.entries += len(batch)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(batch))
+
+    def _close_file(self, path: Path):
+        f = self._files.pop(path, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+
+    def close(self):
+        """Writes everything queued and closes all handles."""
+        self._closed = True
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            atexit.unregister(self.close)
+            if thread is not threading.current_thread():
+                thread.join()
+        self.flush()
+        with self._write_lock:
+            for path in list(self._files):
+                self._close_file(path)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "entries": self.entries,
+            "batches": self.batches,
+            "avg_batch": round(self.entries / self.batches, 1) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "open_files": len(self._files),
+        }
+
+
+class ChatBuffer:
+    """Transcription deltas of the current speaker, joined on demand."""
+
+    def __init__(self):
+        self.sender: Optional[str] = None
+        self._parts: List[str] = []
+        self._text: Optional[str] = ""  # Cached join (None: stale)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]  # Later joins start from the joined prefix
+        return self._text
+
+    def add(self, sender: str, delta: str) -> Optional[Tuple[str, str]]:
+        """
+        Adds a delta. When the speaker changes, the previous speaker's message
+        is returned as (sender, text) so it can be logged (None otherwise).
+        """
+        finished = None
+        if sender != self.sender:
+            finished = self.take()
+            self.sender = sender
+        self._parts.append(delta)
+        self._text = None
+        return finished
+
+    def take(self) -> Optional[Tuple[str, str]]:
+        """Returns the buffered message (if it has any text) and empties the buffer."""
+        sender, text = self.sender, self.text
+        self.sender = None
+        self._parts = []
+        self._text = ""
+        if sender and text.strip():
+            return sender, text
+        return None
@@ -0,0 +1,333 @@
+"""
+DSP - Vectorized mic conditioning between capture and the send buffer.
+
+MicFrontEnd chains, per capture chunk:
+- PolyphaseResampler: device native rate (e.g. 44.1/48 kHz) -> 16 kHz with a
+  Kaiser-windowed sinc prototype split into polyphase branches; only the
+  output samples that are kept are computed
+- HighPassFilter: one-pole DC blocker / high-pass, evaluated block-wise with a
+  scaled cumulative sum instead of a per-sample Python loop
+- optional echo canceller (aec.py), fed the far-end slice for the chunk
+- AutomaticGainControl: per-chunk RMS gain toward a target level with
+  attack/release smoothing, a noise-floor freeze and a linear in-chunk ramp
+
+The chunk as it was before AGC is kept as well (MicFrontEnd.pre_agc): level
+decisions such as the VAD must not see the gain, or room noise that AGC has
+slowly boosted would cross the speech threshold.
+
+All stages work in float64 on buffers allocated once (and grown only if a
+larger chunk shows up), so the steady state does no per-chunk allocation.
+The int16 output is a view into a reusable buffer that is only valid until
+the next call.
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class _Buffer:
+    """Reusable work array, grown on demand."""
+
+    def __init__(self, dtype, size: int = 0, width: Optional[int] = None):
+        self.dtype = dtype
+        self.width = width
+        self._buf = self._alloc(size)
+
+    def _alloc(self, n: int) -> np.ndarray:
+        shape = (n, self.width) if self.width else n
+        return np.zeros(shape, dtype=self.dtype)
+
+    def get(self, n: int) -> np.ndarray:
+        if n > self._buf.shape[0]:
+            self._buf = self._alloc(n)
+        return self._buf[:n]
+
+
+class _Ramp:
+    """Cached 0..n-1 index vector."""
+
+    def __init__(self):
+        self._buf = np.arange(0)
+
+    def get(self, n: int) -> np.ndarray:
+        if n > self._buf.shape[0]:
+            self._buf = np.arange(n)
+        return self._buf[:n]
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler (in_rate -> out_rate) for mono float signals."""
+
+    def __init__(self, in_rate: int, out_rate: int, taps_per_phase: int = 48,
+                 rolloff: float = 0.9, beta: float = 8.0):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.passthrough = self.up == self.down
+        k = self.taps = taps_per_phase
+
+        # Prototype low-pass at the upsampled rate, cut off below the lower Nyquist
+        n = k * self.up
+        cutoff = 0.5 * rolloff / max(self.up, self.down)
+        t = np.arange(n) - (n - 1) / 2.0
+        h = 2.0 * cutoff * np.sinc(2.0 * cutoff * t) * np.kaiser(n, beta) * self.up
+        # Branch p holds h[p + j*up], reversed so it dots with an ascending input window
+        self._phases = h.reshape(k, self.up).T[:, ::-1].copy()
+
+        self._hist = np.zeros(k - 1)  # Last k-1 inputs of the previous chunk
+        self._pos = (k - 1) * self.up  # Next output position, in 1/up input samples from buf[0]
+        self._buf = _Buffer(np.float64)
+        self._idx = _Buffer(np.int64)
+        self._phase_idx = _Buffer(np.int64)
+        self._win_idx = _Buffer(np.int64, width=k)
+        self._win = _Buffer(np.float64, width=k)
+        self._coef = _Buffer(np.float64, width=k)
+        self._out = _Buffer(np.float64)
+        self._offsets = np.arange(k)
+        self._steps = _Ramp()
+
+    def reset(self):
+        self._hist[:] = 0.0
+        self._pos = (self.taps - 1) * self.up
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Resamples one chunk. Returns a view into an internal buffer."""
+        if self.passthrough:
+            return x
+        k = self.taps
+        h = k - 1
+        n_buf = h + x.shape[0]
+        buf = self._buf.get(n_buf)
+        buf[:h] = self._hist
+        buf[h:] = x
+
+        count = max(0, -(-(n_buf * self.up - self._pos) // self.down))
+        out = self._out.get(count)
+        if count:
+            # Output m sits at input index n = pos//up with phase pos%up
+            pos = self._idx.get(count)
+            np.multiply(self._steps.get(count), self.down, out=pos)
+            pos += self._pos
+            phase = self._phase_idx.get(count)
+            np.remainder(pos, self.up, out=phase)
+            np.floor_divide(pos, self.up, out=pos)
+            pos -= h  # Window start
+
+            win_idx = self._win_idx.get(count)
+            np.add(pos[:, None], self._offsets, out=win_idx)
+            win = self._win.get(count)
+            coef = self._coef.get(count)
+            np.take(buf, win_idx, out=win)
+            np.take(self._phases, phase, axis=0, out=coef)
+            np.einsum("ij,ij->i", win, coef, out=out)
+
+        # Keep the tail as history and rebase the position on it
+        self._hist[:] = buf[n_buf - h:]
+        self._pos += count * self.down - (n_buf - h) * self.up
+        return out
+
+
+class HighPassFilter:
+    """One-pole DC blocker: y[n] = x[n] - x[n-1] + r * y[n-1]."""
+
+    BLOCK = 256  # r**-BLOCK must stay well inside float64 range
+
+    def __init__(self, sample_rate: int, cutoff_hz: float = 80.0):
+        self.sample_rate = sample_rate
+        self.configure(cutoff_hz)
+        self._x_prev = 0.0
+        self._y_prev = 0.0
+        self._diff = _Buffer(np.float64)
+        self._out = _Buffer(np.float64)
+
+    def configure(self, cutoff_hz: float):
+        self.cutoff_hz = float(cutoff_hz)
+        self.enabled = self.cutoff_hz > 0
+        r = math.exp(-2.0 * math.pi * self.cutoff_hz / self.sample_rate) if self.enabled else 0.0
+        self.r = r
+        steps = np.arange(self.BLOCK)
+        self._pow = r ** steps if r else np.zeros(self.BLOCK)
+        self._ipow = r ** -steps if r else np.zeros(self.BLOCK)
+
+    def reset(self):
+        self._x_prev = 0.0
+        self._y_prev = 0.0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if not self.enabled:
+            return x
+        n = x.shape[0]
+        d = self._diff.get(n)
+        out = self._out.get(n)
+        if n == 0:
+            return out
+        d[0] = x[0] - self._x_prev
+        np.subtract(x[1:], x[:-1], out=d[1:])
+        self._x_prev = float(x[-1])
+
+        # y[i] = r^i * (r*y_prev + sum_{k<=i} r^-k * d[k]), one block at a time
+        r = self.r
+        for start in range(0, n, self.BLOCK):
+            stop = min(n, start + self.BLOCK)
+            m = stop - start
+            seg = out[start:stop]
+            np.multiply(d[start:stop], self._ipow[:m], out=seg)
+            np.cumsum(seg, out=seg)
+            seg += r * self._y_prev
+            seg *= self._pow[:m]
+            self._y_prev = float(seg[-1])
+        return out
+
+
+class AutomaticGainControl:
+    """Slow per-chunk gain control toward a target RMS level."""
+
+    def __init__(self, target: float = 3000.0, max_gain: float = 8.0, min_gain: float = 0.25,
+                 noise_floor: float = 200.0, attack: float = 0.5, release: float = 0.05,
+                 enabled: bool = True):
+        self.target = target
+        self.max_gain = max_gain
+        self.min_gain = min_gain
+        self.noise_floor = noise_floor
+        self.attack = attack  # Smoothing when the gain has to drop (loud input)
+        self.release = release  # Smoothing when the gain may rise (quiet input)
+        self.enabled = enabled
+        self.gain = 1.0
+        self._ramp = _Buffer(np.float64)
+        self._steps = _Ramp()
+
+    def reset(self):
+        self.gain = 1.0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Scales `x` in place and returns it."""
+        n = x.shape[0]
+        if not self.enabled or n == 0:
+            return x
+        rms = math.sqrt(float(np.dot(x, x)) / n)
+        start = self.gain
+        if rms > self.noise_floor:
+            # Only adapt on signal, so silence and room noise are not pumped up
+            desired = min(self.max_gain, max(self.min_gain, self.target / rms))
+            rate = self.attack if desired < self.gain else self.release
+            self.gain += (desired - self.gain) * rate
+
+        if self.gain == start:
+            x *= start
+            return x
+        ramp = self._ramp.get(n)
+        np.multiply(self._steps.get(n + 1)[1:], (self.gain - start) / n, out=ramp)
+        ramp += start
+        x *= ramp
+        return x
+
+
+class MicFrontEnd:
+    """Resample -> high-pass -> AGC, from native-rate int16 PCM to 16 kHz int16 PCM."""
+
+    def __init__(self, in_rate: int, out_rate: int = 16000, highpass_hz: float = 80.0,
+                 agc: bool = True, agc_target: float = 3000.0, agc_max_gain: float = 8.0):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.resampler = PolyphaseResampler(in_rate, out_rate)
+        self.highpass = HighPassFilter(out_rate, highpass_hz)
+        self.agc = AutomaticGainControl(target=agc_target, max_gain=agc_max_gain, enabled=agc)
+        self._in = _Buffer(np.float64)
+        self._pcm = _Buffer(np.int16)
+        self._ref = _Buffer(np.float64)
+        self._pre = _Buffer(np.int16)
+        self._pre_f = _Buffer(np.float64)
+        self.pre_agc = memoryview(b"")  # Last chunk before AGC, as PCM bytes (valid until the next call)
+
+        # Echo cancellation runs after the high-pass and before AGC (a varying
+        # gain in front of the adaptive filter would look like a changing echo path)
+        self.echo_canceller = None
+        self.far_end = None
+        self.echo_margin = 0.0
+
+        # Counters
+        self.chunks = 0
+        self.samples_out = 0
+
+    def configure(self, highpass_hz: Optional[float] = None, agc: Optional[bool] = None,
+                  agc_target: Optional[float] = None, agc_max_gain: Optional[float] = None):
+        """Updates conditioning settings at runtime."""
+        if highpass_hz is not None:
+            self.highpass.configure(highpass_hz)
+        if agc is not None:
+            self.agc.enabled = bool(agc)
+            if not self.agc.enabled:
+                self.agc.reset()
+        if agc_target is not None:
+            self.agc.target = float(agc_target)
+        if agc_max_gain is not None:
+            self.agc.max_gain = float(agc_max_gain)
+
+    def settings(self) -> Dict:
+        return {
+            "highpass_hz": self.highpass.cutoff_hz,
+            "agc": self.agc.enabled,
+            "agc_target": self.agc.target,
+            "agc_max_gain": self.agc.max_gain,
+        }
+
+    def reset(self):
+        self.resampler.reset()
+        self.highpass.reset()
+        self.agc.reset()
+
+    def set_echo_canceller(self, echo_canceller, far_end, margin_ms: float = 20.0):
+        """Enables echo cancellation against `far_end` (None disables it)."""
+        self.echo_canceller = echo_canceller
+        self.far_end = far_end
+        self.echo_margin = margin_ms / 1000.0
+
+    def process(self, data, capture_start: Optional[float] = None) -> memoryview:
+        """
+        Conditions one native-rate chunk. Returns the 16 kHz PCM as a byte
+        memoryview into a reusable buffer (valid until the next call).
+        `capture_start` (wall time of the first sample) enables echo cancellation.
+        """
+        raw = np.frombuffer(data, dtype="<i2")
+        x = self._in.get(raw.shape[0])
+        np.copyto(x, raw, casting="unsafe")
+
+        y = self.resampler.process(x)
+        y = self.highpass.process(y)
+        if self.echo_canceller is not None and capture_start is not None:
+            # Read the reference slightly ahead so alignment errors either way stay causal
+            ref = self._ref.get(y.shape[0])
+            self.far_end.read(capture_start + self.echo_margin, ref)
+            y = self.echo_canceller.process(y, ref)
+        if self.agc.enabled:
+            pre = self._pre.get(y.shape[0])
+            self._to_pcm(y, self._pre_f.get(y.shape[0]), pre)
+            y = self.agc.process(y)
+
+        pcm = self._pcm.get(y.shape[0])
+        self._to_pcm(y, y, pcm)
+        out = memoryview(pcm.view(np.uint8))
+        self.pre_agc = memoryview(pre.view(np.uint8)) if self.agc.enabled else out
+
+        self.chunks += 1
+        self.samples_out += pcm.shape[0]
+        return out
+
+    @staticmethod
+    def _to_pcm(y: np.ndarray, scratch: np.ndarray, pcm: np.ndarray):
+        np.clip(y, -32768, 32767, out=scratch)
+        np.rint(scratch, out=scratch)
+        np.copyto(pcm, scratch, casting="unsafe")
+
+    def stats(self) -> Dict:
+        return {
+            **self.settings(),
+            "native_rate": self.in_rate,
+            "resampling": not self.resampler.passthrough,
+            "agc_gain": round(self.agc.gain, 2),
+            "chunks": self.chunks,
+        }
@@ -0,0 +1,204 @@
+"""
+Emit Scheduler - Prioritized, bounded outbound Socket.IO events.
+
+Callbacks from AudioLoop and the server's background loops used to emit
+through one fire-and-forget task each, so a burst of browser screenshots or
+printer updates competed equally with transcription and tool confirmations.
+EmitScheduler.submit() instead queues the event in its priority class and a
+single worker sends the queued events, highest class first:
+
+- critical: tool confirmations, errors, status, auth status
+- interactive: transcription, visualizer levels
+- state: device, printer, project and CAD status updates
+- bulk: frames, artifacts, raw audio
+
+Events not listed in EVENT_CLASSES are "state". Each class holds at most
+`max_queued` events; when it is full the oldest queued event is dropped.
+For LATEST_WINS events only the newest queued payload matters: a new one
+replaces the queued one with the same key in place, so a backlog of
+screenshots collapses to the latest frame. An optional merge function keeps
+what must not be lost (the browser log lines of replaced frames).
+
+Must be used from the event loop thread. stats() reports per-class queue
+depth, sends, drops, replacements and the time events waited in the queue.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+# (name, max_queued), highest priority first
+PRIORITY_CLASSES = (
+    ("critical", 256),
+    ("interactive", 256),
+    ("state", 128),
+    ("bulk", 16),
+)
+
+EVENT_CLASSES = {
+    "tool_confirmation_request": "critical",
+    "tool_confirmation_expired": "critical",
+    "error": "critical",
+    "status": "critical",
+    "auth_status": "critical",
+    "transcription": "interactive",
+    "audio_levels": "interactive",
+    "project_update": "state",
+    "kasa_devices": "state",
+    "print_status_update": "state",
+    "cad_status": "state",
+    "browser_frame": "bulk",
+    "auth_frame": "bulk",
+    "cad_data": "bulk",
+    "audio_pcm": "bulk",
+}
+DEFAULT_CLASS = "state"
+
+
+def _merge_browser_frame(old: Dict, new: Dict) -> Dict:
+    """Newest screenshot, but keep the log lines of the frame it replaces."""
+    log = "\n".join(line for line in (old.get("log"), new.get("log")) if line)
+    return {**new, "log": log}
+
+
+# Event -> (key function or None for one slot per event, merge function or None)
+LATEST_WINS = {
+    "audio_levels": (None, None),
+    "auth_frame": (None, None),
+    "kasa_devices": (None, None),
+    "browser_frame": (None, _merge_browser_frame),
+    "print_status_update": (lambda data: data.get("printer"), None),
+}
+
+
+class _Item:
+    __slots__ = ("event", "data", "room", "slot", "queued_at")
+
+    def __init__(self, event: str, data, room: Optional[str], slot, queued_at: float):
+        self.event = event
+        self.data = data
+        self.room = room
+        self.slot = slot  # Latest-wins key, None for ordinary events
+        self.queued_at = queued_at
+
+
+class _Class:
+    def __init__(self, name: str, max_queued: int):
+        self.name = name
+        self.max_queued = max_queued
+        self.queue = deque()
+        self.slots: Dict = {}  # Latest-wins key -> queued item
+
+        # Counters
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.replaced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+
+class EmitScheduler:
+    """Priority classes with bounded queues and latest-wins replacement."""
+
+    def __init__(self, send: Callable, classes=PRIORITY_CLASSES, event_classes: Optional[Dict] = None,
+                 latest_wins: Optional[Dict] = None, clock=time.monotonic):
+        self._send = send  # async send(event, data, room=None)
+        self._classes = [_Class(name, max_queued) for name, max_queued in classes]
+        self._by_name = {c.name: c for c in self._classes}
+        self._event_classes = EVENT_CLASSES if event_classes is None else event_classes
+        self._latest_wins = LATEST_WINS if latest_wins is None else latest_wins
+        self._clock = clock
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    def class_of(self, event: str) -> str:
+        name = self._event_classes.get(event, DEFAULT_CLASS)
+        return name if name in self._by_name else self._classes[-1].name
+
+    def submit(self, event: str, data=None, room: Optional[str] = None):
+        """Queues an emit (never blocks; may drop the oldest event of a full class)."""
+        cls = self._by_name[self.class_of(event)]
+        cls.submitted += 1
+        slot = None
+        if event in self._latest_wins:
+            key_fn, merge = self._latest_wins[event]
+            slot = (event, room, key_fn(data) if key_fn else None)
+            queued = cls.slots.get(slot)
+            if queued is not None:
+                queued.data = merge(queued.data, data) if merge else data
+                cls.replaced += 1
+                return
+        if len(cls.queue) >= cls.max_queued:
+            oldest = cls.queue.popleft()
+            if oldest.slot is not None:
+                cls.slots.pop(oldest.slot, None)
+            cls.dropped += 1
+            if cls.dropped == 1 or cls.dropped % 100 == 0:
+                print(f"[SERVER] [EMIT] '{cls.name}' queue full: dropped '{oldest.event}' ({cls.dropped} dropped so far)")
+        item = _Item(event, data, room, slot, self._clock())
+        cls.queue.append(item)
+        if slot is not None:
+            cls.slots[slot] = item
+        cls.max_depth = max(cls.max_depth, len(cls.queue))
+        self._wake.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def _next(self):
+        for cls in self._classes:
+            if cls.queue:
+                item = cls.queue.popleft()
+                if item.slot is not None:
+                    cls.slots.pop(item.slot, None)
+                return cls, item
+        return None, None
+
+    async def _run(self):
+        while True:
+            cls, item = self._next()
+            if item is None:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            waited = (self._clock() - item.queued_at) * 1000.0
+            cls.total_wait_ms += waited
+            cls.max_wait_ms = max(cls.max_wait_ms, waited)
+            try:
+                await self._send(item.event, item.data, room=item.room)
+                cls.sent += 1
+            except Exception as e:
+                cls.errors += 1
+                print(f"[SERVER] [EMIT] Failed to emit '{item.event}': {e}")
+            await asyncio.sleep(0) # Producers run between sends, so new urgent events are seen
+
+    def depth(self, class_name: Optional[str] = None) -> int:
+        if class_name is not None:
+            return len(self._by_name[class_name].queue)
+        return sum(len(c.queue) for c in self._classes)
+
+    async def close(self):
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    def stats(self) -> Dict:
+        return {
+            cls.name: {
+                "depth": len(cls.queue),
+                "max_depth": cls.max_depth,
+                "max_queued": cls.max_queued,
+                "submitted": cls.submitted,
+                "sent": cls.sent,
+                "dropped": cls.dropped,
+                "replaced": cls.replaced,
+                "errors": cls.errors,
+                "avg_wait_ms": round(cls.total_wait_ms / (cls.sent + cls.errors), 2) if cls.sent + cls.errors else 0.0,
+                "max_wait_ms": round(cls.max_wait_ms, 2),
+            }
+            for cls in self._classes
+        }
@@ -0,0 +1,306 @@
+"""
+Fake Live - Local stand-in for the Gemini Live API.
+
+FakeLiveServer.connect has the shape of client.aio.live.connect (an async
+context manager yielding a session), so it plugs into AudioLoop(connect=...)
+and exercises run(), receive_audio() and the tool dispatch path without
+network access. Sessions speak the same google.genai types as the real API:
+
+- send(input=..., end_of_turn=...) / send_realtime_input(audio_stream_end=True)
+  are accepted and logged (mic audio is counted, not interpreted)
+- receive() yields one model turn of LiveServerMessages and stops after
+  turn_complete, like the SDK
+- send_client_content(turns=..., turn_complete=...) is logged; a complete
+  turn counts as a text trigger
+- send_tool_response() releases a turn that is waiting on its tool calls
+
+The server plays a script of FakeTurns. A turn starts on its trigger, waits
+`first_byte_ms` (+ jitter), then streams the user transcription, any tool
+calls (and waits for their responses), model audio in `chunk_ms` chunks with
+interleaved output transcription, and turn_complete. The script position is
+kept on the server, so a reconnect resumes with the next turn. A session only
+starts playing the script once the client uses it (first send or receive), so
+an idle standby connection leaves the script alone. drop() kills the session
+in use the way a network error would; go_away() announces a shutdown.
+
+With `tagged_audio`, every sample of chunk n has the value n (1..32767), so a
+listener on the output side can tell which chunk it is playing.
+"""
+
+import asyncio
+import contextlib
+import random
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from google.genai import types
+
+SEND_BYTES_PER_SECOND = 16000 * 2  # Mic audio the real API expects (16 kHz int16)
+
+
+class FakeTurn:
+    """One scripted model turn."""
+
+    def __init__(self, trigger: str = "audio", after_audio_ms: float = 500.0, input_text: str = "",
+                 output_text: str = "", audio_ms: float = 1000.0, tool_calls: Optional[List[Dict]] = None,
+                 interrupt_at_ms: Optional[float] = None):
+        if trigger not in ("audio", "text", "immediate"):
+            raise ValueError(f"Unknown trigger '{trigger}'")
+        self.trigger = trigger  # audio: after `after_audio_ms` of mic audio (or audio_stream_end)
+        self.after_audio_ms = after_audio_ms  # text: after send(..., end_of_turn=True)
+        self.input_text = input_text
+        self.output_text = output_text
+        self.audio_ms = audio_ms
+        self.tool_calls = tool_calls or []  # [{"name": ..., "args": {...}}]
+        self.interrupt_at_ms = interrupt_at_ms  # Server-side barge-in after this much audio
+
+
+class FakeLiveSession:
+    """Session object handed out by FakeLiveServer.connect()."""
+
+    def __init__(self, server: "FakeLiveServer"):
+        self._server = server
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._audio_bytes = 0  # Mic audio since the previous turn ended
+        self._wake = asyncio.Event()  # Something arrived that a trigger may be waiting for
+        self._text_turn = False
+        self._stream_end = False
+        self._pending_tools: Dict[str, float] = {}
+        self._director: Optional[asyncio.Task] = None
+        self.closed = False
+        self.context_turns = 0  # Turns received through send_client_content
+
+    # --- Client -> server ---
+
+    async def send(self, input=None, end_of_turn: bool = False):
+        self._check()
+        self._start()
+        server = self._server
+        if isinstance(input, dict) and "data" in input:
+            n = len(input["data"])
+            if input.get("mime_type", "").startswith("audio/"):
+                self._audio_bytes += n
+                server.uplink.append((server.clock(), n))
+            else:
+                server.media_messages += 1
+        else:
+            server.text_messages += 1
+        if end_of_turn:
+            self._text_turn = True
+        self._wake.set()
+
+    async def send_realtime_input(self, audio=None, audio_stream_end: Optional[bool] = None, **kwargs):
+        self._check()
+        if audio is not None:
+            await self.send(input={"data": audio.data, "mime_type": audio.mime_type})
+        if audio_stream_end:
+            self._server.stream_ends += 1
+            self._stream_end = True
+            self._wake.set()
+
+    async def send_client_content(self, turns=None, turn_complete: bool = True):
+        self._check()
+        self._start()
+        self._server.text_messages += 1
+        self.context_turns += len(turns) if isinstance(turns, list) else int(turns is not None)
+        if turn_complete:
+            self._text_turn = True
+        self._wake.set()
+
+    async def send_tool_response(self, function_responses=None):
+        self._check()
+        now = self._server.clock()
+        responses = function_responses if isinstance(function_responses, list) else [function_responses]
+        for response in responses:
+            sent_at = self._pending_tools.pop(response.id, None)
+            if sent_at is not None:
+                self._server.tool_latency_ms.append((now - sent_at) * 1000.0)
+        self._wake.set()
+
+    # --- Server -> client ---
+
+    async def receive(self):
+        """Yields the messages of one model turn (ends after turn_complete)."""
+        self._check()
+        self._start()
+        while True:
+            msg = await self._outbox.get()
+            if msg is None:
+                raise ConnectionError("Fake Live connection dropped")
+            if msg.data:
+                self._server.downlink.append((self._server.clock(), len(msg.data)))
+            yield msg
+            if msg.server_content and msg.server_content.turn_complete:
+                return
+
+    # --- Internals ---
+
+    def _start(self):
+        """First use: this session becomes the server's active one and starts the script."""
+        if self._director is None:
+            self._server.session = self
+            self._director = asyncio.create_task(self._play())
+
+    def _check(self):
+        if self.closed:
+            raise ConnectionError("Fake Live session is closed")
+
+    def _close(self, dropped: bool = False):
+        if not self.closed:
+            self.closed = True
+            if dropped:
+                self._outbox.put_nowait(None)
+            self._wake.set()
+
+    async def _wait_for(self, predicate):
+        while not predicate():
+            if self.closed:
+                raise ConnectionError("Fake Live session is closed")
+            self._wake.clear()
+            await self._wake.wait()
+
+    async def _play(self):
+        """Runs the script from the server's current position."""
+        server = self._server
+        while server.turn_index < len(server.script):
+            turn = server.script[server.turn_index]
+            if turn.trigger == "audio":
+                need = turn.after_audio_ms / 1000.0 * SEND_BYTES_PER_SECOND
+                await self._wait_for(lambda: self._audio_bytes >= need or self._stream_end)
+            elif turn.trigger == "text":
+                await self._wait_for(lambda: self._text_turn)
+
+            await asyncio.sleep(server.delay(server.first_byte_ms))
+            if turn.input_text:
+                self._emit(input_transcription=types.Transcription(text=turn.input_text))
+
+            if turn.tool_calls:
+                calls = []
+                for call in turn.tool_calls:
+                    server.tool_calls += 1
+                    call_id = f"fake-call-{server.tool_calls}"
+                    calls.append(types.FunctionCall(id=call_id, name=call["name"], args=call.get("args", {})))
+                    self._pending_tools[call_id] = server.clock()
+                self._outbox.put_nowait(types.LiveServerMessage(
+                    tool_call=types.LiveServerToolCall(function_calls=calls)))
+                await self._wait_for(lambda: not self._pending_tools)
+                await asyncio.sleep(server.delay(server.first_byte_ms))
+
+            await self._stream_audio(turn)
+            self._emit(turn_complete=True)
+            server.turn_index += 1
+            server.turns_done += 1
+            # The next trigger only counts what arrives after this turn
+            self._audio_bytes = 0
+            self._text_turn = False
+            self._stream_end = False
+
+    async def _stream_audio(self, turn: FakeTurn):
+        server = self._server
+        chunks = max(1, int(round(turn.audio_ms / server.chunk_ms)))
+        words = turn.output_text.split()
+        per_chunk = max(1, -(-len(words) // chunks)) if words else 0
+        for i in range(chunks):
+            if self.closed:
+                raise ConnectionError("Fake Live session is closed")
+            if turn.interrupt_at_ms is not None and i * server.chunk_ms >= turn.interrupt_at_ms:
+                self._emit(interrupted=True)
+                return
+            self._outbox.put_nowait(types.LiveServerMessage(server_content=types.LiveServerContent(
+                model_turn=types.Content(parts=[types.Part(inline_data=types.Blob(
+                    data=server.next_chunk(), mime_type=f"audio/pcm;rate={server.sample_rate}"))]))))
+            text = " ".join(words[i * per_chunk:(i + 1) * per_chunk])
+            if text:
+                self._emit(output_transcription=types.Transcription(text=text + " "))
+            await asyncio.sleep(server.delay(server.chunk_ms / server.stream_rate))
+
+    def _emit(self, **content):
+        self._outbox.put_nowait(types.LiveServerMessage(server_content=types.LiveServerContent(**content)))
+
+
+class FakeLiveServer:
+    """Scripted Live backend; pass `server.connect` to AudioLoop(connect=...)."""
+
+    def __init__(self, script: Optional[List[FakeTurn]] = None, first_byte_ms: float = 300.0,
+                 jitter_ms: float = 20.0, chunk_ms: float = 40.0, stream_rate: float = 1.0,
+                 connect_ms: float = 50.0, sample_rate: int = 24000, tagged_audio: bool = False,
+                 seed: int = 0, clock=time.monotonic):
+        self.script = list(script or [])
+        self.first_byte_ms = first_byte_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_ms = chunk_ms
+        self.stream_rate = stream_rate  # Model audio is streamed at this multiple of real time
+        self.connect_ms = connect_ms
+        self.sample_rate = sample_rate
+        self.tagged_audio = tagged_audio
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._chunk_samples = int(sample_rate * chunk_ms / 1000.0)
+        t = np.arange(self._chunk_samples) / sample_rate
+        self._tone = (3000 * np.sin(2 * np.pi * 220.0 * t)).astype("<i2").tobytes()
+        self.session: Optional[FakeLiveSession] = None
+        self.turn_index = 0
+
+        # Logs (clock times) and counters
+        self.uplink = []  # (t, bytes) per mic audio message
+        self.downlink = []  # (t, bytes) per audio message handed to the client
+        self.tool_latency_ms = []  # tool_call sent -> send_tool_response received
+        self.connects = []  # t each connection became usable
+        self.drops = []  # t of each drop()
+        self.chunks_sent = 0
+        self.turns_done = 0
+        self.tool_calls = 0
+        self.stream_ends = 0
+        self.text_messages = 0
+        self.media_messages = 0
+
+    def delay(self, ms: float) -> float:
+        """`ms` plus uniform jitter, in seconds (never negative)."""
+        return max(0.0, ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+
+    def next_chunk(self) -> bytes:
+        self.chunks_sent += 1
+        if self.tagged_audio:
+            return np.full(self._chunk_samples, (self.chunks_sent - 1) % 32767 + 1, dtype="<i2").tobytes()
+        return self._tone
+
+    @contextlib.asynccontextmanager
+    async def connect(self, **kwargs):
+        """Same shape as client.aio.live.connect(model=..., config=...)."""
+        await asyncio.sleep(self.delay(self.connect_ms))
+        session = FakeLiveSession(self)
+        self.connects.append(self.clock())
+        try:
+            yield session
+        finally:
+            session._close()
+            if session._director:
+                session._director.cancel()
+                with contextlib.suppress(asyncio.CancelledError, ConnectionError):
+                    await session._director
+            if self.session is session:
+                self.session = None
+
+    def drop(self):
+        """Kills the session in use (receive() raises, sends fail)."""
+        if self.session:
+            self.drops.append(self.clock())
+            self.session._close(dropped=True)
+
+    def go_away(self, time_left: float):
+        """Tells the session in use that it will be closed in `time_left` seconds."""
+        if self.session:
+            self.session._outbox.put_nowait(types.LiveServerMessage(
+                go_away=types.LiveServerGoAway(time_left=f"{time_left}s")))
+
+    def stats(self) -> Dict:
+        return {
+            "connects": len(self.connects),
+            "turns_done": self.turns_done,
+            "uplink_messages": len(self.uplink),
+            "uplink_bytes": sum(n for _, n in self.uplink),
+            "downlink_chunks": len(self.downlink),
+            "tool_calls": self.tool_calls,
+            "stream_ends": self.stream_ends,
+        }
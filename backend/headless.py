@@ -0,0 +1,301 @@
+"""
+Headless - File-driven AudioLoop sessions (WAV in, WAV/transcript out).
+
+FileAudioIO stands in for the mic and speaker so an AudioLoop runs without
+PyAudio or sound hardware:
+
+- WavInputStream replays a 16-bit WAV (any rate, stereo is down-mixed)
+  through the normal capture path, paced at `speed` x real time (0 = as fast
+  as possible). After the file it keeps returning silence in real time, like
+  a quiet room, so the server's turn detection can end the user's turn.
+- WavOutputStream writes the model audio to a 24 kHz WAV, paced like a
+  device at the same speed.
+
+The streams are shared across reconnects (the I/O threads close them, the
+FileAudioIO keeps the files open until close()). There is no acoustic path,
+so the echo canceller only ever sees an uncorrelated reference.
+
+run_batch() runs several files concurrently in one event loop and writes
+<name>.model.wav and <name>.transcript.txt per input plus a results.json
+with timing. Entry point: python backend/ada.py --wav a.wav b.wav --out out/
+"""
+
+import asyncio
+import json
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class _Pacer:
+    """Sleeps so that audio is delivered no faster than `speed` x real time."""
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._due = None
+
+    def wait(self, seconds: float, speed: float):
+        now = self._clock()
+        if speed <= 0:
+            self._due = now
+            return
+        self._due = max(self._due if self._due is not None else now, now) + seconds / speed
+        delay = self._due - now
+        if delay > 0:
+            self._sleep(delay)
+
+
+class WavInputStream:
+    """Read side of a PyAudio input stream, backed by a WAV file."""
+
+    def __init__(self, path, speed: float = 1.0, tail_seconds: float = 1.5,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.path = Path(path)
+        self.name = f"file:{self.path.name}"
+        with wave.open(str(self.path), "rb") as w:
+            if w.getsampwidth() != 2:
+                raise ValueError(f"{self.path}: only 16-bit PCM WAV files are supported")
+            self.rate = w.getframerate()
+            channels = w.getnchannels()
+            pcm = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+        if channels > 1:
+            pcm = pcm.reshape(-1, channels).mean(axis=1).astype("<i2")
+        self._pcm = pcm
+        self.speed = speed
+        self._tail = int(tail_seconds * self.rate)
+        self._pos = 0
+        self._clock = clock
+        self._pacer = _Pacer(clock, sleep)
+
+        self.data_done_at = None  # Clock time the last file sample was delivered
+        self.finished = threading.Event()  # File and tail silence delivered
+
+    @property
+    def duration(self) -> float:
+        return self._pcm.shape[0] / self.rate
+
+    def read(self, frames: int, **kwargs) -> bytes:
+        start = self._pos
+        self._pos += frames
+        chunk = self._pcm[start:self._pos]
+        in_file = chunk.shape[0] > 0
+        if chunk.shape[0] < frames:
+            chunk = np.concatenate((chunk, np.zeros(frames - chunk.shape[0], dtype="<i2")))
+
+        # Silence after the file always runs in real time
+        self._pacer.wait(frames / self.rate, self.speed if in_file else 1.0)
+        if self.data_done_at is None and self._pos >= self._pcm.shape[0]:
+            self.data_done_at = self._clock()
+        if self._pos >= self._pcm.shape[0] + self._tail:
+            self.finished.set()
+        return chunk.tobytes()
+
+    def get_input_latency(self) -> float:
+        return 0.0
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class WavOutputStream:
+    """Write side of a PyAudio output stream, backed by a WAV file."""
+
+    def __init__(self, path, rate: int = 24000, speed: float = 1.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.path = Path(path)
+        self.name = f"file:{self.path.name}"
+        self.rate = rate
+        self.speed = speed
+        self._wav = wave.open(str(self.path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+        self._pacer = _Pacer(clock, sleep)
+        self._lock = threading.Lock()
+        self.frames = 0
+
+    def write(self, data):
+        frames = len(data) // 2
+        with self._lock:
+            if self._wav is None:
+                return
+            self._wav.writeframes(data)
+            self.frames += frames
+        self._pacer.wait(frames / self.rate, self.speed)
+
+    def get_output_latency(self) -> float:
+        return 0.0
+
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+    def finalize(self):
+        with self._lock:
+            if self._wav is not None:
+                self._wav.close()
+                self._wav = None
+
+
+class FileAudioIO:
+    """Mic and speaker replacement for AudioLoop(file_io=...)."""
+
+    def __init__(self, input_path, output_path, speed: float = 1.0, tail_seconds: float = 1.5,
+                 output_rate: int = 24000):
+        self.input = WavInputStream(input_path, speed=speed, tail_seconds=tail_seconds)
+        self.output = WavOutputStream(output_path, rate=output_rate, speed=speed)
+
+    def open_input(self) -> WavInputStream:
+        return self.input
+
+    def open_output(self) -> WavOutputStream:
+        return self.output
+
+    def close(self):
+        self.output.finalize()
+
+
+class _Transcript:
+    """Collects streamed transcription deltas into one line per turn."""
+
+    def __init__(self):
+        self.lines = []
+        self.last_user = 0.0
+        self.last_model = 0.0
+
+    def add(self, data: Dict):
+        sender, text = data.get("sender"), data.get("text", "")
+        if sender == "User":
+            self.last_user = time.monotonic()
+        else:
+            self.last_model = time.monotonic()
+        if self.lines and self.lines[-1][0] == sender:
+            self.lines[-1][1] += text
+        else:
+            self.lines.append([sender, text])
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for sender, text in self.lines:
+                f.write(f"[{sender}]: {text.strip()}\n")
+
+
+async def _run_one(audio_loop, io: FileAudioIO, transcript: _Transcript, out_dir: Path,
+                   idle_seconds: float, timeout: float) -> Dict:
+    stream = io.input
+    state = {"first_audio": None, "audio_chunks": 0}
+
+    def on_audio(_data):
+        now = time.monotonic()
+        transcript.last_model = now
+        state["audio_chunks"] += 1
+        if state["first_audio"] is None and stream.data_done_at is not None:
+            state["first_audio"] = now
+
+    audio_loop.on_audio_data = on_audio
+    start = time.monotonic()
+    task = asyncio.create_task(audio_loop.run())
+    timed_out = False
+    try:
+        while not task.done():
+            await asyncio.sleep(0.1)
+            if not stream.finished.is_set():
+                continue
+            now = time.monotonic()
+            if now - stream.data_done_at > timeout:
+                timed_out = True
+                break
+            responded = transcript.last_model > transcript.last_user
+            quiet = now - max(transcript.last_model, stream.data_done_at) >= idle_seconds
+            if responded and quiet and len(audio_loop.playback_buffer) == 0:
+                break
+    finally:
+        threads = [t for t in (audio_loop._input_thread, audio_loop._output_thread) if t]
+        audio_loop.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        for thread in threads:
+            await asyncio.to_thread(thread.join, 1.0)
+        io.close()
+
+    name = stream.path.stem
+    transcript.write(out_dir / f"{name}.transcript.txt")
+    wall = time.monotonic() - start
+    first_audio = state["first_audio"]
+    return {
+        "file": str(stream.path),
+        "input_s": round(stream.duration, 2),
+        "wall_s": round(wall, 2),
+        "realtime_factor": round(stream.duration / wall, 2) if wall else None,
+        "first_audio_ms": round((first_audio - stream.data_done_at) * 1000.0) if first_audio else None,
+        "model_audio_s": round(io.output.frames / io.output.rate, 2),
+        "turns": len(transcript.lines),
+        "timed_out": timed_out,
+    }
+
+
+async def run_batch(paths: List[str], out_dir, concurrency: int = 4, speed: float = 1.0,
+                    tail_seconds: float = 1.5, idle_seconds: float = 3.0, timeout: float = 60.0,
+                    settings: Optional[Dict] = None) -> List[Dict]:
+    """
+    Runs every WAV in `paths` through its own AudioLoop/Live session, at most
+    `concurrency` at a time. `settings` are the server.py settings blocks
+    (vad, dsp, aec, packetizer, silence_gate) to apply to each loop.
+    """
+    from ada import AudioLoop
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    settings = settings or {}
+
+    # Loops are built up front: each one resets the shared temp project on creation
+    jobs = []
+    for path in paths:
+        io = FileAudioIO(path, out_dir / f"{Path(path).stem}.model.wav", speed=speed, tail_seconds=tail_seconds)
+        transcript = _Transcript()
+        audio_loop = AudioLoop(video_mode="none", on_transcription=transcript.add, file_io=io)
+        for block in ("vad", "dsp", "aec", "packetizer", "silence_gate"):
+            if block in settings:
+                getattr(audio_loop, f"update_{block}_settings")(settings[block])
+        jobs.append((audio_loop, io, transcript))
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(job):
+        async with semaphore:
+            print(f"[HEADLESS] Starting {job[1].input.path.name} ({job[1].input.duration:.1f} s)")
+            result = await _run_one(*job, out_dir, idle_seconds, timeout)
+            print(f"[HEADLESS] Finished {job[1].input.path.name}: {result}")
+            return result
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(run(job) for job in jobs))
+    wall = time.monotonic() - start
+    total_input = sum(r["input_s"] for r in results)
+    summary = {
+        "files": len(results),
+        "concurrency": concurrency,
+        "speed": speed,
+        "wall_s": round(wall, 2),
+        "input_s": round(total_input, 2),
+        "throughput_x": round(total_input / wall, 2) if wall else None,
+        "results": results,
+    }
+    with open(out_dir / "results.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"[HEADLESS] {len(results)} files, {total_input:.1f} s of audio in {wall:.1f} s "
+          f"({summary['throughput_x']}x real time). Results in {out_dir / 'results.json'}")
+    return results
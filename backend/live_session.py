@@ -0,0 +1,301 @@
+"""
+Live Session - Active + hot-standby Gemini Live connections.
+
+LiveSessionManager keeps the connection AudioLoop is talking to (active) and,
+optionally, a second one that is already connected and idle (standby). When
+the active connection drops, or is rotated before the server's session
+limits, the standby is promoted instead of dialling from scratch, and a new
+standby is warmed in the background.
+
+A standby ages like any connection, so it is replaced once it is half a
+rotation period old; a promoted standby therefore always has at least half a
+period left. rotate_after is a soft limit (AudioLoop waits for a quiet moment:
+no model turn, no pending tool call, user not speaking); past
+rotate_after + max_rotation_wait, or shortly before a server GoAway deadline,
+rotation is forced.
+
+Connections are opened through `connect`, which has the shape of
+client.aio.live.connect (an async context manager yielding a session).
+"""
+
+import asyncio
+import contextlib
+import time
+from typing import Dict, Optional
+
+
+def parse_duration(value) -> Optional[float]:
+    """Seconds from a protobuf Duration string such as '9.5s' (None if unparseable)."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).rstrip("s"))
+    except ValueError:
+        return None
+
+
+class _Connection:
+    def __init__(self, stack: contextlib.AsyncExitStack, session, opened_at: float):
+        self.stack = stack
+        self.session = session
+        self.opened_at = opened_at
+
+
+class LiveSessionManager:
+    """Active connection plus a pre-warmed standby, with proactive rotation."""
+
+    def __init__(self, connect, standby: bool = True, rotate_after: float = 540.0,
+                 max_rotation_wait: float = 30.0, go_away_margin: float = 2.0,
+                 min_backoff: float = 1.0, max_backoff: float = 10.0, clock=time.monotonic):
+        self._connect = connect
+        self.standby_enabled = standby
+        self.rotate_after = rotate_after
+        self.max_rotation_wait = max_rotation_wait
+        self.go_away_margin = go_away_margin
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+
+        self.active: Optional[_Connection] = None
+        self._standby: Optional[_Connection] = None
+        self._warming: Optional[asyncio.Task] = None
+        self._standby_taken = asyncio.Event()
+        self._standby_settled = asyncio.Event()  # Clear while a standby connect is in flight
+        self._standby_settled.set()
+        self._closing = set()  # Background closes of replaced connections
+        self._go_away_at = None  # Server-announced termination time of the active connection
+        self._switch_started = None
+
+        # Counters
+        self.connects = 0
+        self.connect_failures = 0
+        self.last_connect_ms = 0.0
+        self.switches = {}  # By reason (drop / rotate)
+        self.standby_hits = 0
+        self.standby_misses = 0
+        self.standby_refreshes = 0
+        self.last_switch_ms = None
+        self.max_switch_ms = 0.0
+
+    @property
+    def session(self):
+        return self.active.session if self.active else None
+
+    def configure(self, standby: Optional[bool] = None, rotate_after: Optional[float] = None):
+        if standby is not None:
+            self.standby_enabled = bool(standby)
+            if not self.standby_enabled:
+                self._drop_standby()
+            elif self.active:
+                self._warm()
+        if rotate_after is not None:
+            self.rotate_after = max(10.0, float(rotate_after))
+
+    # --- Connecting ---
+
+    async def _open(self) -> _Connection:
+        start = self._clock()
+        stack = contextlib.AsyncExitStack()
+        try:
+            session = await stack.enter_async_context(self._connect())
+        except BaseException:
+            await stack.aclose()
+            raise
+        now = self._clock()
+        self.connects += 1
+        self.last_connect_ms = (now - start) * 1000.0
+        return _Connection(stack, session, now)
+
+    async def _open_with_backoff(self) -> _Connection:
+        delay = self.min_backoff
+        while True:
+            try:
+                return await self._open()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connect_failures += 1
+                print(f"[ADA DEBUG] [ERR] Connection Error: {e}")
+                print(f"[ADA DEBUG] [RETRY] Reconnecting in {delay} seconds...")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)  # Exponential backoff capped at max_backoff
+
+    async def _close(self, conn: Optional[_Connection]):
+        if conn is None:
+            return
+        try:
+            await conn.stack.aclose()
+        except Exception as e:
+            print(f"[ADA DEBUG] [CONNECT] Error closing Live connection: {e}")
+
+    def _close_later(self, conn: Optional[_Connection]):
+        """Closes `conn` in the background; close() waits for it."""
+        if conn is None:
+            return
+        task = asyncio.create_task(self._close(conn))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    # --- Standby ---
+
+    def _warm(self):
+        """Starts maintaining a standby connection if enabled and not already running."""
+        if self.standby_enabled and (self._warming is None or self._warming.done()):
+            self._warming = asyncio.create_task(self._maintain_standby())
+
+    async def _maintain_standby(self):
+        """Keeps one fresh standby: opens it, then replaces it when it gets half a period old."""
+        delay = self.min_backoff
+        while self.standby_enabled:
+            if self._standby is None:
+                self._standby_settled.clear()
+                try:
+                    self._standby = await self._open()
+                    delay = self.min_backoff
+                    print("[ADA DEBUG] [CONNECT] Standby session ready.")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.connect_failures += 1
+                    print(f"[ADA DEBUG] [ERR] Standby connection failed: {e}")
+                    self._standby_settled.set()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+                    continue
+                finally:
+                    self._standby_settled.set()
+            refresh_in = self._standby.opened_at + self.rotate_after / 2 - self._clock()
+            if refresh_in > 0:
+                # Woken early when the standby is promoted. asyncio.wait, not wait_for: wait_for
+                # (3.11) swallows a cancel that lands as the event is set, and close() would hang
+                self._standby_taken.clear()
+                taken = asyncio.ensure_future(self._standby_taken.wait())
+                try:
+                    await asyncio.wait({taken}, timeout=refresh_in)
+                finally:
+                    taken.cancel()
+                continue
+            try:
+                fresh = await self._open()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connect_failures += 1
+                print(f"[ADA DEBUG] [ERR] Standby refresh failed: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            # Read after the await: if the old standby was promoted meanwhile, there is nothing to close
+            stale, self._standby = self._standby, fresh
+            self.standby_refreshes += 1
+            await self._close(stale)
+
+    def _drop_standby(self):
+        if self._warming:
+            self._warming.cancel()
+            self._warming = None
+        self._close_later(self._standby)
+        self._standby = None
+
+    async def _take_standby(self) -> Optional[_Connection]:
+        """Removes the standby for promotion (waits for it if it is still connecting)."""
+        if self._standby is None and not self._standby_settled.is_set():
+            # Connecting right now: finishing that is still faster than starting over
+            await self._standby_settled.wait()
+        conn, self._standby = self._standby, None
+        self._standby_taken.set()
+        return conn
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        """Connects the active session (retrying with backoff) and warms a standby."""
+        self.active = await self._open_with_backoff()
+        self._go_away_at = None
+        self._warm()
+        return self.active.session
+
+    async def switch(self, reason: str):
+        """
+        Replaces the active connection with the standby (or a fresh one) and
+        returns the new session. Call switch_done() once the session is usable.
+        """
+        self._switch_started = self._clock()
+        old, self.active = self.active, None
+        self._go_away_at = None
+        conn = await self._take_standby()
+        if conn is not None:
+            self.standby_hits += 1
+        else:
+            self.standby_misses += 1
+            conn = await self._open_with_backoff()
+        self.active = conn
+        self.switches[reason] = self.switches.get(reason, 0) + 1
+        # The old connection is closed in the background so it cannot delay the handover
+        self._close_later(old)
+        self._warm()
+        return conn.session
+
+    def switch_done(self) -> float:
+        """Records the switchover latency (switch() call -> session ready) in ms."""
+        elapsed = (self._clock() - self._switch_started) * 1000.0
+        self.last_switch_ms = elapsed
+        self.max_switch_ms = max(self.max_switch_ms, elapsed)
+        return elapsed
+
+    async def close(self):
+        if self._warming:
+            self._warming.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._warming
+            self._warming = None
+        standby, self._standby = self._standby, None
+        active, self.active = self.active, None
+        await self._close(standby)
+        await self._close(active)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    # --- Rotation ---
+
+    def on_go_away(self, time_left):
+        """The server announced it will close the active connection in `time_left`."""
+        seconds = parse_duration(time_left)
+        self._go_away_at = self._clock() + (seconds if seconds is not None else 0.0)
+
+    def _deadline(self) -> float:
+        if self.active is None:
+            return float("inf")
+        deadline = self.active.opened_at + self.rotate_after
+        if self._go_away_at is not None:
+            deadline = min(deadline, self._go_away_at - self.go_away_margin - self.max_rotation_wait)
+        return deadline
+
+    def seconds_until_rotation(self) -> float:
+        return max(0.0, self._deadline() - self._clock())
+
+    def rotation_due(self) -> bool:
+        """Time to rotate at the next quiet moment."""
+        return self._clock() >= self._deadline()
+
+    def rotation_forced(self) -> bool:
+        """Time to rotate even mid-turn."""
+        return self._clock() >= self._deadline() + self.max_rotation_wait
+
+    def stats(self) -> Dict:
+        now = self._clock()
+        return {
+            "active_age_s": round(now - self.active.opened_at, 1) if self.active else None,
+            "standby": self.standby_enabled,
+            "standby_ready": self._standby is not None,
+            "rotate_in_s": round(self.seconds_until_rotation(), 1) if self.active else None,
+            "connects": self.connects,
+            "connect_failures": self.connect_failures,
+            "last_connect_ms": round(self.last_connect_ms, 1),
+            "switches": dict(self.switches),
+            "standby_hits": self.standby_hits,
+            "standby_misses": self.standby_misses,
+            "standby_refreshes": self.standby_refreshes,
+            "last_switch_ms": round(self.last_switch_ms, 1) if self.last_switch_ms is not None else None,
+            "max_switch_ms": round(self.max_switch_ms, 1),
+        }
@@ -0,0 +1,136 @@
+"""
+Packetizer - Adaptive sizing of outbound mic audio messages.
+
+Every session.send is one websocket message with its own base64/JSON framing,
+so sending each 64 ms capture frame separately is the lowest-latency but most
+overhead-heavy choice. The packetizer decides how many capture frames
+send_realtime coalesces into the next message:
+
+- speech onset (first `onset_frames` after a VAD onset) and silence:
+  `min_frames`, so the first syllable and end-of-speech reach the server ASAP
+- steady speech: at least `steady_frames`, more when sends are slow
+  (smoothed send latency relative to the frame duration)
+- backlog (sender fell behind): everything queued, up to `max_frames`
+
+It also keeps a sliding window of sends to report messages/s and bytes/s.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class AdaptivePacketizer:
+    """Chooses frames per outbound audio message and tracks uplink rates."""
+
+    def __init__(self, frame_seconds: float, min_frames: int = 1, steady_frames: int = 2,
+                 max_frames: int = 4, onset_frames: int = 4, backlog_frames: int = 4,
+                 max_hold_ms: float = 150.0, rate_window: float = 5.0, clock=time.monotonic):
+        self.frame_seconds = frame_seconds
+        self.rate_window = rate_window
+        self._clock = clock
+        self.configure(min_frames=min_frames, steady_frames=steady_frames, max_frames=max_frames,
+                       onset_frames=onset_frames, backlog_frames=backlog_frames, max_hold_ms=max_hold_ms)
+
+        self.in_speech = False
+        self._onset_left = 0
+        self.send_ms = 0.0  # Smoothed (EWMA) duration of one session.send
+        self._sends = deque()  # (time, nbytes) inside the rate window
+
+        # Counters
+        self.messages = 0
+        self.frames = 0
+        self.bytes = 0
+        self.last_frames = 0
+
+    def configure(self, min_frames: Optional[int] = None, steady_frames: Optional[int] = None,
+                  max_frames: Optional[int] = None, onset_frames: Optional[int] = None,
+                  backlog_frames: Optional[int] = None, max_hold_ms: Optional[float] = None):
+        """Updates sizing settings at runtime."""
+        if min_frames is not None:
+            self.min_frames = max(1, int(min_frames))
+        if steady_frames is not None:
+            self.steady_frames = int(steady_frames)
+        if max_frames is not None:
+            self.max_frames = int(max_frames)
+        if onset_frames is not None:
+            self.onset_frames = max(0, int(onset_frames))
+        if backlog_frames is not None:
+            self.backlog_frames = max(1, int(backlog_frames))
+        if max_hold_ms is not None:
+            self.max_hold_ms = float(max_hold_ms)
+        self.max_frames = max(self.min_frames, self.max_frames)
+        self.steady_frames = min(max(self.min_frames, self.steady_frames), self.max_frames)
+
+    def settings(self) -> Dict:
+        return {
+            "min_frames": self.min_frames,
+            "steady_frames": self.steady_frames,
+            "max_frames": self.max_frames,
+            "onset_frames": self.onset_frames,
+            "backlog_frames": self.backlog_frames,
+            "max_hold_ms": self.max_hold_ms,
+        }
+
+    def on_vad(self, event: str):
+        """Feeds VAD "onset"/"offset" events."""
+        if event == "onset":
+            self.in_speech = True
+            self._onset_left = self.onset_frames
+        elif event == "offset":
+            self.in_speech = False
+            self._onset_left = 0
+
+    def target_frames(self, available: int) -> int:
+        """Frames the next message should carry, given the frames queued now."""
+        if available >= self.backlog_frames:
+            return min(available, self.max_frames)
+        if not self.in_speech or self._onset_left > 0:
+            return self.min_frames
+        # Slow uplink: grow packets so one send covers at least its own duration
+        by_latency = math.ceil(self.send_ms / 1000.0 / self.frame_seconds)
+        return min(max(self.steady_frames, by_latency), self.max_frames)
+
+    def on_sent(self, frames: int, nbytes: int, seconds: float, now: Optional[float] = None):
+        """Records one audio message that took `seconds` to send."""
+        now = self._clock() if now is None else now
+        ms = seconds * 1000.0
+        self.send_ms = ms if self.messages == 0 else 0.8 * self.send_ms + 0.2 * ms
+        self.messages += 1
+        self.frames += frames
+        self.bytes += nbytes
+        self.last_frames = frames
+        if self._onset_left > 0:
+            self._onset_left = max(0, self._onset_left - frames)
+
+        self._sends.append((now, nbytes))
+        self._trim(now)
+
+    def _trim(self, now: float):
+        cutoff = now - self.rate_window
+        while self._sends and self._sends[0][0] < cutoff:
+            self._sends.popleft()
+
+    def rates(self, now: Optional[float] = None):
+        """Returns (messages_per_s, bytes_per_s) over the sliding window."""
+        now = self._clock() if now is None else now
+        self._trim(now)
+        count = len(self._sends)
+        total = sum(n for _, n in self._sends)
+        return count / self.rate_window, total / self.rate_window
+
+    def stats(self) -> Dict:
+        msgs_per_s, bytes_per_s = self.rates()
+        return {
+            "messages_per_s": round(msgs_per_s, 2),
+            "bytes_per_s": round(bytes_per_s, 1),
+            "wire_bytes_per_s": round(bytes_per_s * 4 / 3, 1),  # base64 payload
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "avg_frames_per_message": round(self.frames / self.messages, 2) if self.messages else 0.0,
+            "last_frames": self.last_frames,
+            "send_ms": round(self.send_ms, 2),
+            "in_speech": self.in_speech,
+            **self.settings(),
+        }
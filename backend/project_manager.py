@@ -4,11 +4,43 @@ import shutil
 import time
 from pathlib import Path
 
+from chat_log import ChatLogWriter
+
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def read_tail_lines(path, count: int, block_size: int = TAIL_BLOCK_SIZE):
+    """
+    Returns the last `count` non-empty lines of a text file, oldest first.
+    Reads backwards from the end in blocks, so the I/O depends on the size of
+    those lines, not on the size of the file.
+    """
+    found = [] # Newest first
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        partial = b"" # Start of the earliest line seen so far (may continue in the previous block)
+        while pos > 0 and len(found) < count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            parts = (f.read(step) + partial).split(b"\n")
+            partial = parts.pop(0)
+            for line in reversed(parts):
+                if line.strip():
+                    found.append(line)
+                    if len(found) == count:
+                        break
+        if pos == 0 and len(found) < count and partial.strip():
+            found.append(partial) # First line of the file
+    return [line.decode("utf-8", errors="replace") for line in reversed(found)]
+
+
 class ProjectManager:
     def __init__(self, workspace_root: str):
         self.workspace_root = Path(workspace_root)
         self.projects_dir = self.workspace_root / "projects"
         self.current_project = "temp"
+        self.chat_log = ChatLogWriter() # Batched, background appends to chat_history.jsonl
         
         # Ensure projects root exists
         if not self.projects_dir.exists():
@@ -56,15 +88,22 @@ class ProjectManager:
         return self.projects_dir / self.current_project
 
     def log_chat(self, sender: str, text: str):
-        """Appends a chat message to the current project's history."""
+        """Appends a chat message to the current project's history (written in the background)."""
         log_file = self.get_current_project_path() / "chat_history.jsonl"
         entry = {
             "timestamp": time.time(),
             "sender": sender,
             "text": text
         }
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry) + "\n")
+        self.chat_log.append(log_file, entry)
+
+    def flush_chat_log(self):
+        """Writes queued chat messages to disk now."""
+        self.chat_log.flush()
+
+    def close_chat_log(self):
+        """Writes queued chat messages and stops the writer thread."""
+        self.chat_log.close()
 
     def save_cad_artifact(self, source_path: str, prompt: str):
         """Copies a generated CAD file to the project's 'cad' folder."""
@@ -96,6 +135,7 @@ class ProjectManager:
         project_path = self.get_current_project_path()
         if not project_path.exists():
             return f"Project '{self.current_project}' does not exist."
+        self.chat_log.flush() # chat_history.jsonl is part of the context
 
         context_lines = [f"=== Project Context: '{self.current_project}' ==="]
         context_lines.append(f"Project directory: {project_path}")
@@ -143,17 +183,18 @@ class ProjectManager:
 
     def get_recent_chat_history(self, limit: int = 10):
         """Returns the last 'limit' chat messages from history."""
+        self.chat_log.flush() # Include messages still queued for writing
         log_file = self.get_current_project_path() / "chat_history.jsonl"
         if not log_file.exists():
             return []
             
         try:
-            with open(log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                
+            # Only the tail is read: logs of long-running projects grow to many MB
+            lines = read_tail_lines(log_file, limit)
+
             # Parse last N lines
             history = []
-            for line in lines[-limit:]:
+            for line in lines:
                 try:
                     entry = json.loads(line)
                     history.append(entry)
@@ -25,11 +25,17 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import ada
 from authenticator import FaceAuthenticator
 from kasa_agent import KasaAgent
+from binary_transport import BinaryTransport, as_bytes
+from emit_scheduler import EmitScheduler
+from subscriptions import Subscriptions, topic_room
 
 # Create a Socket.IO server
 sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
 app = FastAPI()
 app_socketio = socketio.ASGIApp(sio, app)
+subscriptions = Subscriptions() # Topic rooms (printers, kasa, browser, audio_viz, auth) + per-client traffic
+transport = BinaryTransport(sio, on_emit=subscriptions.record) # Emits with binary attachments (frames, STL) + per-event histograms
+scheduler = EmitScheduler(transport.emit) # Priority queues for callback / background-loop emits
 
 import signal
 
@@ -69,6 +75,51 @@ DEFAULT_SETTINGS = {
         "switch_project": True,
         "list_projects": True
     },
+    "vad": {
+        "detector": "energy", # energy | zero_crossing | band_energy
+        "threshold": 800,
+        "silence_duration": 0.5
+    },
+    "dsp": {
+        "highpass_hz": 80, # DC / rumble filter before send (0 = off)
+        "agc": True, # Automatic gain control toward agc_target RMS
+        "agc_target": 3000,
+        "agc_max_gain": 4
+    },
+    "aec": {
+        "enabled": True, # Echo cancellation (full duplex); off = mute mic while Lexi speaks
+        "filter_ms": 128, # Echo tail the adaptive filter covers
+        "margin_ms": 20 # Slack for output latency estimation errors
+    },
+    "packetizer": {
+        "min_frames": 1, # Mic chunks (64 ms) per send at speech onset / in silence
+        "steady_frames": 2, # Minimum chunks per send during steady speech
+        "max_frames": 4, # Upper bound when the uplink is slow or backlogged
+        "max_hold_ms": 150 # Longest audio is held back waiting to fill a send
+    },
+    "silence_gate": {
+        "enabled": False, # Stop streaming mic audio during long silences
+        "hangover": 1.0, # Seconds of silence before the uplink pauses
+        "preroll": 0.3 # Seconds of audio re-sent before the first speech chunk
+    },
+    "recorder": {
+        "enabled": False # Record mic/model/speaker audio and events to <project>/recordings/
+    },
+    "session": {
+        "standby": True, # Keep a pre-warmed Live connection ready for instant switchover
+        "rotate_after": 540 # Seconds before a connection is proactively replaced (server limit ~10 min)
+    },
+    "confirmations": {
+        "timeout": 30 # Seconds a tool confirmation popup waits before the call is denied
+    },
+    "transcription": {
+        "window_ms": 50 # Transcription deltas are merged for this long per emit (0 = every delta)
+    },
+    "visualizer": {
+        "fps": 30, # Level frames (RMS + FFT bands) per second of playback
+        "bands": 16, # FFT bands per frame
+        "raw_pcm": False # Also stream raw playback PCM as binary 'audio_pcm' events
+    },
     "printers": [], # List of {host, port, name, type}
     "kasa_devices": [], # List of {ip, alias, model}
     "camera_flipped": False # Invert cursor horizontal direction
@@ -87,6 +138,8 @@ def load_settings():
                 for k, v in loaded.items():
                     if k == "tool_permissions" and isinstance(v, dict):
                          SETTINGS["tool_permissions"].update(v)
+                    elif k in ("vad", "dsp", "aec", "packetizer", "silence_gate", "recorder", "session", "confirmations", "transcription", "visualizer") and isinstance(v, dict):
+                        SETTINGS[k].update(v)
                     else:
                         SETTINGS[k] = v
             print(f"Loaded settings: {SETTINGS}")
@@ -128,9 +181,35 @@ async def startup_event():
 async def status():
     return {"status": "running", "service": "Lexi Backend"}
 
+@app.get("/metrics")
+async def metrics():
+    """Live audio pipeline metrics (buffer depth, added latency, drops, ...)."""
+    return {"audio": audio_loop.get_audio_metrics() if audio_loop else None}
+
+@app.get("/transport")
+async def transport_stats():
+    """Per-event Socket.IO payload size and emit latency histograms."""
+    return transport.stats()
+
+@app.get("/emits")
+async def emit_stats():
+    """Outbound emit queues per priority class: depth, sends, drops, latest-wins replacements, wait."""
+    return scheduler.stats()
+
+@app.get("/clients")
+async def client_stats():
+    """Per-client topics and bandwidth (bytes sent through the transport, by topic)."""
+    return subscriptions.report()
+
+@app.get("/tasks")
+async def tasks():
+    """Running and queued background tasks (tool jobs) with their durations and recent failures."""
+    return audio_loop.tasks.stats() if audio_loop else None
+
 @sio.event
 async def connect(sid, environ):
     print(f"Client connected: {sid}")
+    subscriptions.connect(sid)
     await sio.emit('status', {'msg': 'Connected to Lexi Backend'}, room=sid)
 
     global authenticator
@@ -140,9 +219,9 @@ async def connect(sid, environ):
         print(f"[SERVER] Auth status change: {is_auth}")
         await sio.emit('auth_status', {'authenticated': is_auth})
 
-    # Callback for Auth Camera Frames
-    async def on_auth_frame(frame_b64):
-        await sio.emit('auth_frame', {'image': frame_b64})
+    # Callback for Auth Camera Frames (raw JPEG, sent as a binary attachment)
+    async def on_auth_frame(frame_jpeg):
+        emit_in_background('auth_frame', {'image': frame_jpeg})
 
     # Initialize Authenticator if not already done
     if authenticator is None:
@@ -171,6 +250,43 @@ async def connect(sid, environ):
 @sio.event
 async def disconnect(sid):
     print(f"Client disconnected: {sid}")
+    subscriptions.disconnect(sid)
+
+@sio.event
+async def subscribe(sid, data):
+    # data: {topics: ["printers", "kasa", "browser", "audio_viz", "auth"]}
+    topics = data.get('topics', []) if isinstance(data, dict) else data
+    added, unknown = subscriptions.subscribe(sid, topics)
+    for topic in added:
+        await sio.enter_room(sid, topic_room(topic))
+    if unknown:
+        print(f"[SERVER] Client {sid} asked for unknown topics: {unknown}")
+    await sio.emit('subscriptions', {'topics': subscriptions.topics_of(sid), 'unknown': unknown}, room=sid)
+
+@sio.event
+async def unsubscribe(sid, data):
+    topics = data.get('topics', []) if isinstance(data, dict) else data
+    for topic in subscriptions.unsubscribe(sid, topics):
+        await sio.leave_room(sid, topic_room(topic))
+    await sio.emit('subscriptions', {'topics': subscriptions.topics_of(sid), 'unknown': []}, room=sid)
+
+def emit_in_background(event, data):
+    """Fire-and-forget emit from a callback or background loop, sent in priority order (see emit_scheduler.py)."""
+    send, room = subscriptions.route(event)
+    if send:
+        scheduler.submit(event, data, room=room)
+
+async def publish(event, data):
+    """Emits a topic event from a request handler to its subscribers (broadcast if it has no topic)."""
+    send, room = subscriptions.route(event)
+    if send:
+        await transport.emit(event, data, room=room)
+
+def cad_payload(result):
+    """cad_data for the frontend, with the STL as raw bytes (CadAgent results carry it base64-encoded)."""
+    if result.get('data') is None:
+        return result
+    return {**result, 'data': as_bytes(result['data'])}
 
 @sio.event
 async def start_audio(sid, data=None):
@@ -207,11 +323,15 @@ async def start_audio(sid, data=None):
              return
 
 
-    # Callback to send audio data to frontend
+    # Callback to send visualizer levels to frontend
+    def on_audio_levels(levels):
+        # levels = bytes: [rms, band 1..n] (uint8), already decimated to the UI frame rate
+        emit_in_background('audio_levels', levels)
+
+    # Callback to send raw playback audio to frontend (opt-in: visualizer.raw_pcm)
     def on_audio_data(data_bytes):
-        # We need to schedule this on the event loop
-        # This is high frequency, so we might want to downsample or batch if it's too much
-        asyncio.create_task(sio.emit('audio_data', {'data': list(data_bytes)}))
+        # Binary int16 PCM at 24 kHz
+        emit_in_background('audio_pcm', data_bytes)
 
     # Callback to send CAL data to frontend
     def on_cad_data(data):
@@ -220,18 +340,23 @@ async def start_audio(sid, data=None):
     # Callback to send Browser data to frontend
     def on_web_data(data):
         print(f"Sending Browser data to frontend: {len(data.get('log', ''))} chars logs")
-        asyncio.create_task(sio.emit('browser_frame', data))
+        emit_in_background('browser_frame', data)
         
     # Callback to send Transcription data to frontend
     def on_transcription(data):
         # data = {"sender": "User"|"ADA", "text": "..."}
-        asyncio.create_task(sio.emit('transcription', data))
+        emit_in_background('transcription', data)
 
     # Callback to send Confirmation Request to frontend
     def on_tool_confirmation(data):
         # data = {"id": "uuid", "tool": "tool_name", "args": {...}}
         print(f"Requesting confirmation for tool: {data.get('tool')}")
-        asyncio.create_task(sio.emit('tool_confirmation_request', data))
+        emit_in_background('tool_confirmation_request', data)
+
+    # Callback to withdraw a Confirmation Request that timed out (auto-denied)
+    def on_tool_confirmation_expired(data):
+        print(f"Confirmation for tool {data.get('tool')} expired")
+        emit_in_background('tool_confirmation_expired', {'id': data['id']})
 
     # Callback to send CAD status to frontend
     def on_cad_status(status):
@@ -244,18 +369,18 @@ async def start_audio(sid, data=None):
     # Callback to send Project Update to frontend
     def on_project_update(project_name):
         print(f"Sending Project Update: {project_name}")
-        asyncio.create_task(sio.emit('project_update', {'project': project_name}))
+        emit_in_background('project_update', {'project': project_name})
 
     # Callback to send Device Update to frontend
     def on_device_update(devices):
         # devices is a list of dicts
         print(f"Sending Kasa Device Update: {len(devices)} devices")
-        asyncio.create_task(sio.emit('kasa_devices', devices))
+        emit_in_background('kasa_devices', devices)
 
     # Callback to send Error to frontend
     def on_error(msg):
         print(f"Sending Error to frontend: {msg}")
-        asyncio.create_task(sio.emit('error', {'msg': msg}))
+        emit_in_background('error', {'msg': msg})
 
     # Initialize ADA
     try:
@@ -263,10 +388,12 @@ async def start_audio(sid, data=None):
         audio_loop = ada.AudioLoop(
             video_mode="none", 
             on_audio_data=on_audio_data,
+            on_audio_levels=on_audio_levels,
             on_cad_data=on_cad_data,
             on_web_data=on_web_data,
             on_transcription=on_transcription,
             on_tool_confirmation=on_tool_confirmation,
+            on_tool_confirmation_expired=on_tool_confirmation_expired,
             on_cad_status=on_cad_status,
             on_cad_thought=on_cad_thought,
             on_project_update=on_project_update,
@@ -281,6 +408,16 @@ async def start_audio(sid, data=None):
 
         # Apply current permissions
         audio_loop.update_permissions(SETTINGS["tool_permissions"])
+        audio_loop.update_vad_settings(SETTINGS["vad"])
+        audio_loop.update_dsp_settings(SETTINGS["dsp"])
+        audio_loop.update_aec_settings(SETTINGS["aec"])
+        audio_loop.update_packetizer_settings(SETTINGS["packetizer"])
+        audio_loop.update_silence_gate_settings(SETTINGS["silence_gate"])
+        audio_loop.update_recorder_settings(SETTINGS["recorder"])
+        audio_loop.update_session_settings(SETTINGS["session"])
+        audio_loop.update_confirmation_settings(SETTINGS["confirmations"])
+        audio_loop.update_transcription_settings(SETTINGS["transcription"])
+        audio_loop.update_visualizer_settings(SETTINGS["visualizer"])
         
         # Check initial mute state
         if data and data.get('muted', False):
@@ -351,7 +488,7 @@ async def monitor_printers_loop():
                         pass # Ignore errors for now
                     elif res:
                         # res is PrintStatus object
-                        await sio.emit('print_status_update', res.to_dict())
+                        emit_in_background('print_status_update', res.to_dict())
                         
         except asyncio.CancelledError:
             print("[SERVER] Printer Monitor Cancelled")
@@ -473,6 +610,8 @@ from pathlib import Path
 async def video_frame(sid, data):
     # data should contain 'image' which is binary (blob) or base64 encoded
     image_data = data.get('image')
+    if image_data:
+        transport.record('video_frame', len(image_data), 0.0, direction="in")
     if image_data and audio_loop:
         # We don't await this because we don't want to block the socket handler
         # But send_frame is async, so we create a task
@@ -552,7 +691,7 @@ async def discover_kasa(sid):
     print(f"Received discover_kasa request")
     try:
         devices = await kasa_agent.discover_devices()
-        await sio.emit('kasa_devices', devices)
+        await publish('kasa_devices', devices)
         await sio.emit('status', {'msg': f"Found {len(devices)} Kasa devices"})
         
         # Save to settings
@@ -597,9 +736,9 @@ async def iterate_cad(sid, data):
         result = await audio_loop.cad_agent.iterate_prototype(prompt, output_dir=cad_output_dir)
         
         if result:
-            info = f"{len(result.get('data', ''))} bytes (STL)"
-            print(f"Sending updated CAD data: {info}")
-            await sio.emit('cad_data', result)
+            payload = cad_payload(result)
+            print(f"Sending updated CAD data: {len(payload.get('data') or b'')} bytes (STL)")
+            await transport.emit('cad_data', payload)
             # Save to Project
             if 'file_path' in result:
                 saved_path = audio_loop.project_manager.save_cad_artifact(result['file_path'], prompt)
@@ -633,9 +772,9 @@ async def generate_cad(sid, data):
         result = await audio_loop.cad_agent.generate_prototype(prompt, output_dir=cad_output_dir)
         
         if result:
-            info = f"{len(result.get('data', ''))} bytes (STL)"
-            print(f"Sending newly generated CAD data: {info}")
-            await sio.emit('cad_data', result)
+            payload = cad_payload(result)
+            print(f"Sending newly generated CAD data: {len(payload.get('data') or b'')} bytes (STL)")
+            await transport.emit('cad_data', payload)
 
 
             # Save to Project
@@ -702,16 +841,16 @@ async def discover_printers(sid):
                     "camera_url": p.get("camera_url")
                 })
             print(f"[SERVER] Returning {len(printer_list)} saved printers (audio_loop not ready)")
-            await sio.emit('printer_list', printer_list)
+            await publish('printer_list', printer_list)
             return
         else:
-            await sio.emit('printer_list', [])
+            await publish('printer_list', [])
             await sio.emit('status', {'msg': "Connect to Lexi to enable printer discovery"})
             return
         
     try:
         printers = await audio_loop.printer_agent.discover_printers()
-        await sio.emit('printer_list', printers)
+        await publish('printer_list', printers)
         await sio.emit('status', {'msg': f"Found {len(printers)} printers"})
     except Exception as e:
         print(f"Error discovering printers: {e}")
@@ -787,7 +926,7 @@ async def add_printer(sid, data):
              
         # Refresh list for everyone
         printers = [p.to_dict() for p in audio_loop.printer_agent.printers.values()]
-        await sio.emit('printer_list', printers)
+        await publish('printer_list', printers)
         await sio.emit('status', {'msg': f"Added printer: {name}"})
         
     except Exception as e:
@@ -836,16 +975,13 @@ async def print_stl(sid, data):
         if resolved_stl and os.path.exists(resolved_stl):
             # Open the STL in the CAD module for preview
             try:
-                import base64
-                with open(resolved_stl, 'rb') as f:
-                    stl_data = f.read()
-                stl_b64 = base64.b64encode(stl_data).decode('utf-8')
+                stl_data = await asyncio.to_thread(Path(resolved_stl).read_bytes)
                 stl_filename = os.path.basename(resolved_stl)
                 
-                print(f"[SERVER] Opening STL in CAD module: {stl_filename}")
-                await sio.emit('cad_data', {
+                print(f"[SERVER] Opening STL in CAD module: {stl_filename} ({len(stl_data)} bytes)")
+                await transport.emit('cad_data', {
                     'format': 'stl',
-                    'data': stl_b64,
+                    'data': stl_data, # Binary attachment, chunked if large
                     'filename': stl_filename
                 })
             except Exception as e:
@@ -853,7 +989,7 @@ async def print_stl(sid, data):
         
         # Progress Callback
         async def on_slicing_progress(percent, message):
-            await sio.emit('slicing_progress', {
+            await publish('slicing_progress', {
                 'printer': printer_name,
                 'percent': percent,
                 'message': message
@@ -869,7 +1005,7 @@ async def print_stl(sid, data):
             root_path=current_project_path
         )
         
-        await sio.emit('print_result', result)
+        await publish('print_result', result)
         await sio.emit('status', {'msg': f"Print Job: {result.get('status', 'unknown')}"})
         
     except Exception as e:
@@ -915,7 +1051,7 @@ async def control_kasa(sid, data):
             success = await kasa_agent.set_color(ip, (h, s, v))
         
         if success:
-            await sio.emit('kasa_update', {
+            await publish('kasa_update', {
                 'ip': ip,
                 'is_on': True if action == "on" else (False if action == "off" else None),
                 'brightness': data.get('value') if action == "brightness" else None,
@@ -928,6 +1064,53 @@ async def control_kasa(sid, data):
          print(f"Error controlling kasa: {e}")
          await sio.emit('error', {'msg': f"Kasa Control Error: {str(e)}"})
 
+@sio.event
+async def get_audio_devices(sid):
+    """
+    Lists the PortAudio devices. While audio is stopped this is a full rescan
+    (hotplug); while streams are open it can only re-read the current instance,
+    and a new device shows up once it is selected by name (rescan on miss).
+    """
+    if audio_loop is None:
+        # No streams open, so a full PortAudio rescan is safe
+        await asyncio.to_thread(ada.audio_devices.rescan)
+    else:
+        await asyncio.to_thread(ada.audio_devices.refresh)
+    await sio.emit('audio_devices', {
+        "inputs": ada.audio_devices.devices(ada.INPUT),
+        "outputs": ada.audio_devices.devices(ada.OUTPUT),
+        "input": audio_loop.input_device if audio_loop else None,
+        "output": audio_loop.output_device if audio_loop else None,
+    }, room=sid)
+
+@sio.event
+async def switch_input_device(sid, data):
+    # data: { device_name, device_index }
+    if not audio_loop:
+        return
+    result = await audio_loop.switch_input_device(data.get('device_name'), data.get('device_index'))
+    if result["ok"]:
+        await sio.emit('status', {'msg': f"Microphone: {result['device']} ({result['switch_ms']:.0f} ms)"})
+    else:
+        await sio.emit('error', {'msg': f"Failed to switch microphone: {result['error']}"})
+
+@sio.event
+async def switch_output_device(sid, data):
+    # data: { device_name, device_index }
+    if not audio_loop:
+        return
+    result = await audio_loop.switch_output_device(data.get('device_name'), data.get('device_index'))
+    if result["ok"]:
+        await sio.emit('status', {'msg': f"Speaker: {result['device']} ({result['switch_ms']:.0f} ms)"})
+    else:
+        await sio.emit('error', {'msg': f"Failed to switch speaker: {result['error']}"})
+
+@sio.event
+async def get_audio_metrics(sid):
+    """Returns live audio pipeline counters (buffers, overruns, ...) to the requesting client."""
+    metrics = audio_loop.get_audio_metrics() if audio_loop else {}
+    await sio.emit('audio_metrics', metrics, room=sid)
+
 @sio.event
 async def get_settings(sid):
     await sio.emit('settings', SETTINGS)
@@ -952,6 +1135,56 @@ async def update_settings(sid, data):
              if authenticator:
                  authenticator.stop() 
 
+    if "vad" in data:
+        SETTINGS["vad"].update(data["vad"])
+        if audio_loop:
+            audio_loop.update_vad_settings(SETTINGS["vad"])
+
+    if "dsp" in data:
+        SETTINGS["dsp"].update(data["dsp"])
+        if audio_loop:
+            audio_loop.update_dsp_settings(SETTINGS["dsp"])
+
+    if "aec" in data:
+        SETTINGS["aec"].update(data["aec"])
+        if audio_loop:
+            audio_loop.update_aec_settings(SETTINGS["aec"])
+
+    if "packetizer" in data:
+        SETTINGS["packetizer"].update(data["packetizer"])
+        if audio_loop:
+            audio_loop.update_packetizer_settings(SETTINGS["packetizer"])
+
+    if "silence_gate" in data:
+        SETTINGS["silence_gate"].update(data["silence_gate"])
+        if audio_loop:
+            audio_loop.update_silence_gate_settings(SETTINGS["silence_gate"])
+
+    if "recorder" in data:
+        SETTINGS["recorder"].update(data["recorder"])
+        if audio_loop:
+            audio_loop.update_recorder_settings(SETTINGS["recorder"])
+
+    if "session" in data:
+        SETTINGS["session"].update(data["session"])
+        if audio_loop:
+            audio_loop.update_session_settings(SETTINGS["session"])
+
+    if "confirmations" in data:
+        SETTINGS["confirmations"].update(data["confirmations"])
+        if audio_loop:
+            audio_loop.update_confirmation_settings(SETTINGS["confirmations"])
+
+    if "transcription" in data:
+        SETTINGS["transcription"].update(data["transcription"])
+        if audio_loop:
+            audio_loop.update_transcription_settings(SETTINGS["transcription"])
+
+    if "visualizer" in data:
+        SETTINGS["visualizer"].update(data["visualizer"])
+        if audio_loop:
+            audio_loop.update_visualizer_settings(SETTINGS["visualizer"])
+
     if "camera_flipped" in data:
         SETTINGS["camera_flipped"] = data["camera_flipped"]
         print(f"[SERVER] Camera flip set to: {data['camera_flipped']}")
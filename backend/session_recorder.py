@@ -0,0 +1,233 @@
+"""
+Session Recorder - Opt-in capture of what flowed through AudioLoop.
+
+One directory per Live session under <project>/recordings/<session>/:
+- mic.wav      16 kHz PCM handed to the send ring (after DSP/AEC)
+- model.wav    24 kHz PCM as received from the model
+- speaker.wav  24 kHz PCM as written to the output device
+- <track>.idx  int64 pairs (monotonic_ns, first sample index) per chunk
+- events.jsonl transcription deltas, VAD, tool calls, interruptions, turns
+- meta.json    rates, start time, track lengths
+
+Tracks are preallocated files written through mmap, so recording a chunk on
+the audio threads is one memcpy plus an index entry; files grow by doubling
+when full (rare). Each track has a single writer thread (its lock only
+guards against close()). On close the WAV
+headers are patched and the files truncated to their real length, so they
+open in any audio tool. load_recording() reads a directory back.
+"""
+
+import json
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+WAV_HEADER_BYTES = 44
+INDEX_ENTRY = struct.Struct("<qq")  # monotonic_ns, first sample index
+
+
+def _wav_header(sample_rate: int, data_bytes: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_bytes,
+    )
+
+
+class MappedFile:
+    """Append-only file backed by a growing memory map."""
+
+    def __init__(self, path: Path, capacity: int, header: bytes = b""):
+        self.path = path
+        self._header_len = len(header)
+        self._file = open(path, "w+b")
+        self._capacity = max(capacity, 4096)
+        self._file.truncate(self._header_len + self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._header_len + self._capacity)
+        self._map[:self._header_len] = header
+        self.size = 0  # Payload bytes written after the header
+        self.grows = 0
+
+    def append(self, data):
+        n = len(data)
+        if self.size + n > self._capacity:
+            self._grow(self.size + n)
+        start = self._header_len + self.size
+        self._map[start:start + n] = data
+        self.size += n
+
+    def _grow(self, needed: int):
+        while self._capacity < needed:
+            self._capacity *= 2
+        self._map.close()
+        self._file.truncate(self._header_len + self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._header_len + self._capacity)
+        self.grows += 1
+
+    def close(self, header: Optional[bytes] = None):
+        if self._map is None:
+            return
+        if header is not None:
+            self._map[:len(header)] = header
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate(self._header_len + self.size)
+        self._file.close()
+
+
+class Track:
+    """One PCM stream: a WAV file plus a chunk timing index."""
+
+    def __init__(self, directory: Path, name: str, sample_rate: int, prealloc_seconds: float = 60.0,
+                 sample_width: int = 2, clock_ns=time.monotonic_ns):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self._clock_ns = clock_ns
+        self._wav = MappedFile(directory / f"{name}.wav", int(sample_rate * sample_width * prealloc_seconds),
+                               header=_wav_header(sample_rate, 0))
+        self._idx = MappedFile(directory / f"{name}.idx", INDEX_ENTRY.size * 4096)
+        self._entry = bytearray(INDEX_ENTRY.size)
+        self._lock = threading.Lock()  # Uncontended except against close()
+        self.closed = False
+        self.chunks = 0
+
+    @property
+    def samples(self) -> int:
+        return self._wav.size // self.sample_width
+
+    def write(self, data, t_ns: Optional[int] = None):
+        """Appends a PCM chunk that was seen at `t_ns` (monotonic, defaults to now)."""
+        t_ns = self._clock_ns() if t_ns is None else t_ns
+        with self._lock:
+            if self.closed:
+                return
+            INDEX_ENTRY.pack_into(self._entry, 0, t_ns, self.samples)
+            self._idx.append(self._entry)
+            self._wav.append(data)
+            self.chunks += 1
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._wav.close(header=_wav_header(self.sample_rate, self._wav.size))
+            self._idx.close()
+
+    def stats(self) -> Dict:
+        return {
+            "seconds": round(self.samples / self.sample_rate, 1),
+            "chunks": self.chunks,
+            "grows": self._wav.grows,
+        }
+
+
+class SessionRecorder:
+    """Writes the tracks and event log of one Live session."""
+
+    TRACKS = {"mic": 16000, "model": 24000, "speaker": 24000}
+
+    def __init__(self, directory, tracks: Optional[Dict[str, int]] = None, clock_ns=time.monotonic_ns):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._clock_ns = clock_ns
+        self.start_ns = clock_ns()
+        self.start_wall = time.time()
+        self.tracks = {
+            name: Track(self.directory, name, rate, clock_ns=clock_ns)
+            for name, rate in (tracks or self.TRACKS).items()
+        }
+        self._events = MappedFile(self.directory / "events.jsonl", 256 * 1024)
+        self._lock = threading.Lock()
+        self.events = 0
+        self.closed = False
+
+    def write(self, track: str, data, t_ns: Optional[int] = None):
+        """Records a PCM chunk (call from the track's own thread)."""
+        if not self.closed:
+            self.tracks[track].write(data, t_ns)
+
+    def event(self, kind: str, **fields):
+        """Appends one event line with a monotonic timestamp."""
+        if self.closed:
+            return
+        t_ns = self._clock_ns()
+        line = json.dumps({"t_ns": t_ns, "type": kind, **fields}, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self.closed:
+                return
+            self._events.append(line.encode("utf-8"))
+            self.events += 1
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for track in self.tracks.values():
+            track.close()
+        with self._lock:
+            self._events.close()
+        meta = {
+            "start_ns": self.start_ns,
+            "start_time": self.start_wall,
+            "duration_s": round((self._clock_ns() - self.start_ns) / 1e9, 3),
+            "tracks": {name: {"sample_rate": t.sample_rate, "samples": t.samples} for name, t in self.tracks.items()},
+            "events": self.events,
+        }
+        with open(self.directory / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def stats(self) -> Dict:
+        return {
+            "directory": str(self.directory),
+            "events": self.events,
+            "tracks": {name: t.stats() for name, t in self.tracks.items()},
+        }
+
+
+def load_recording(directory) -> Dict:
+    """Reads a closed recording: PCM arrays, chunk indexes and events (times in seconds from start)."""
+    import numpy as np
+
+    directory = Path(directory)
+    with open(directory / "meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    start_ns = meta["start_ns"]
+
+    tracks = {}
+    for name, info in meta["tracks"].items():
+        with open(directory / f"{name}.wav", "rb") as f:
+            f.seek(WAV_HEADER_BYTES)
+            pcm = np.frombuffer(f.read(), dtype="<i2")
+        index = np.fromfile(directory / f"{name}.idx", dtype="<i8").reshape(-1, 2)
+        tracks[name] = {
+            "sample_rate": info["sample_rate"],
+            "pcm": pcm,
+            "chunk_times": (index[:, 0] - start_ns) / 1e9,
+            "chunk_samples": index[:, 1],
+        }
+
+    events = []
+    with open(directory / "events.jsonl", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                event["t"] = (event.pop("t_ns") - start_ns) / 1e9
+                events.append(event)
+    return {"meta": meta, "tracks": tracks, "events": events}
+
+
+def session_directory(project_path, now: Optional[float] = None) -> Path:
+    """recordings/<YYYYmmdd-HHMMSS> under a project, made unique if needed."""
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+    base = Path(project_path) / "recordings" / stamp
+    path, n = base, 1
+    while path.exists():
+        n += 1
+        path = base.with_name(f"{stamp}-{n}")
+    return path
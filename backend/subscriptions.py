@@ -0,0 +1,159 @@
+"""
+Subscriptions - Topic rooms for high-volume Socket.IO events.
+
+Printer status, Kasa updates, browser screenshots, visualizer frames and auth
+camera frames used to be broadcast to every connected client (Electron
+window, Tauri shell, debug tabs). Each of these events now belongs to a
+topic, and clients opt in with the 'subscribe' / 'unsubscribe' events.
+Subscribing puts the client in the Socket.IO room "topic:<name>", and topic
+events are emitted to that room only:
+
+- printers: print_status_update, printer_list, slicing_progress, print_result
+- kasa: kasa_devices, kasa_update
+- browser: browser_frame
+- audio_viz: audio_levels, audio_pcm
+- auth: auth_frame
+
+Events without a topic (status, errors, transcription, confirmations, ...)
+are still broadcast. A topic event with no subscribers is not emitted at all,
+so fan-out work follows interest, not the number of connected clients.
+
+record() is called for every emit that goes through BinaryTransport. It
+charges the payload to each client that receives it, which gives the
+per-client bandwidth report in report().
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOPICS = {
+    "printers": ("print_status_update", "printer_list", "slicing_progress", "print_result"),
+    "kasa": ("kasa_devices", "kasa_update"),
+    "browser": ("browser_frame",),
+    "audio_viz": ("audio_levels", "audio_pcm"),
+    "auth": ("auth_frame",),
+}
+
+ROOM_PREFIX = "topic:"
+
+
+def topic_room(topic: str) -> str:
+    return ROOM_PREFIX + topic
+
+
+class _Client:
+    def __init__(self, connected_at: float):
+        self.connected_at = connected_at
+        self.topics = set()
+        self.events = 0
+        self.bytes = 0
+        self.by_topic: Dict[str, int] = {}  # Topic ("-" for broadcast/direct events) -> bytes
+
+
+class Subscriptions:
+    """Client topic subscriptions and per-client traffic accounting."""
+
+    def __init__(self, topics: Optional[Dict] = None, clock=time.monotonic):
+        self.topics = TOPICS if topics is None else topics
+        self._event_topics = {event: topic for topic, events in self.topics.items() for event in events}
+        self._clock = clock
+        self._clients: Dict[str, _Client] = {}
+        self._subscribers: Dict[str, set] = {topic: set() for topic in self.topics}
+
+        # Counters
+        self.skipped: Dict[str, int] = {}  # Topic -> emits skipped for lack of subscribers
+
+    # --- Clients ---
+
+    def connect(self, sid: str):
+        self._clients[sid] = _Client(self._clock())
+
+    def disconnect(self, sid: str):
+        client = self._clients.pop(sid, None)
+        if client:
+            for topic in client.topics:
+                self._subscribers[topic].discard(sid)
+
+    def subscribe(self, sid: str, topics: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Adds topics for a client. Returns (newly added, unknown) topic names."""
+        client = self._clients.get(sid)
+        if client is None:
+            self.connect(sid)
+            client = self._clients[sid]
+        added, unknown = [], []
+        for topic in topics:
+            if topic not in self.topics:
+                unknown.append(topic)
+            elif topic not in client.topics:
+                client.topics.add(topic)
+                self._subscribers[topic].add(sid)
+                added.append(topic)
+        return added, unknown
+
+    def unsubscribe(self, sid: str, topics: Iterable[str]) -> List[str]:
+        """Removes topics for a client. Returns the ones it was subscribed to."""
+        client = self._clients.get(sid)
+        removed = []
+        if client:
+            for topic in topics:
+                if topic in client.topics:
+                    client.topics.discard(topic)
+                    self._subscribers[topic].discard(sid)
+                    removed.append(topic)
+        return removed
+
+    def topics_of(self, sid: str) -> List[str]:
+        client = self._clients.get(sid)
+        return sorted(client.topics) if client else []
+
+    # --- Routing ---
+
+    def topic_of(self, event: str) -> Optional[str]:
+        return self._event_topics.get(event)
+
+    def route(self, event: str) -> Tuple[bool, Optional[str]]:
+        """(send?, room) for an event: its topic room, or None to broadcast."""
+        topic = self._event_topics.get(event)
+        if topic is None:
+            return True, None
+        if not self._subscribers[topic]:
+            self.skipped[topic] = self.skipped.get(topic, 0) + 1
+            return False, None
+        return True, topic_room(topic)
+
+    # --- Accounting ---
+
+    def _recipients(self, room: Optional[str]):
+        if room is None:
+            return self._clients.keys()
+        if room.startswith(ROOM_PREFIX):
+            return self._subscribers.get(room[len(ROOM_PREFIX):], ())
+        return (room,) if room in self._clients else ()  # A client's own sid room
+
+    def record(self, event: str, room: Optional[str], size: int):
+        """Charges one emit of `size` bytes to every client that receives it."""
+        topic = self._event_topics.get(event, "-")
+        for sid in self._recipients(room):
+            client = self._clients[sid]
+            client.events += 1
+            client.bytes += size
+            client.by_topic[topic] = client.by_topic.get(topic, 0) + size
+
+    def report(self) -> Dict:
+        now = self._clock()
+        clients = {}
+        for sid, client in self._clients.items():
+            elapsed = max(now - client.connected_at, 1e-3)
+            clients[sid] = {
+                "topics": sorted(client.topics),
+                "connected_s": round(now - client.connected_at, 1),
+                "events": client.events,
+                "bytes": client.bytes,
+                "bytes_per_s": round(client.bytes / elapsed),
+                "bytes_by_topic": dict(client.by_topic),
+            }
+        return {
+            "clients": clients,
+            "subscribers": {topic: len(sids) for topic, sids in self._subscribers.items()},
+            "skipped": dict(self.skipped),
+        }
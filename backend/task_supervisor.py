@@ -0,0 +1,184 @@
+"""
+Task Supervisor - Tracked fire-and-forget work for AudioLoop.
+
+Background jobs (web agent, CAD generation, file tools, tool call batches)
+are started through TaskSupervisor.spawn() instead of bare
+asyncio.create_task, in a named group:
+
+- a group may cap how many of its tasks run at once (`limit`); the rest wait
+  in FIFO order, and at most `max_queued` may wait - further spawns are
+  rejected so a runaway producer cannot pile up work
+- exceptions are caught, logged and kept (last `max_errors`) instead of
+  vanishing with an unreferenced task
+- cancel() stops one group or everything (AudioLoop does this on stop)
+- snapshot() lists every running and queued task with its age
+"""
+
+import asyncio
+import itertools
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class _Group:
+    def __init__(self, name: str, limit: Optional[int] = None, max_queued: Optional[int] = None):
+        self.name = name
+        self.entries: Dict[int, "_Entry"] = {}
+        self.configure(limit, max_queued)
+
+        # Counters
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def configure(self, limit: Optional[int], max_queued: Optional[int]):
+        self.limit = max(1, int(limit)) if limit else None
+        self.max_queued = max(0, int(max_queued)) if max_queued is not None else None
+        self.semaphore = asyncio.Semaphore(self.limit) if self.limit else None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for e in self.entries.values() if e.started is None)
+
+    @property
+    def running(self) -> int:
+        return sum(1 for e in self.entries.values() if e.started is not None)
+
+
+class _Entry:
+    def __init__(self, entry_id: int, group: str, name: str, created: float):
+        self.id = entry_id
+        self.group = group
+        self.name = name
+        self.created = created
+        self.started = None  # None while waiting for a slot
+        self.task: Optional[asyncio.Task] = None
+
+
+class TaskSupervisor:
+    """Named task groups with concurrency caps, cancellation and error capture."""
+
+    def __init__(self, max_errors: int = 20, clock=time.monotonic):
+        self._groups: Dict[str, _Group] = {}
+        self._ids = itertools.count(1)
+        self._clock = clock
+        self.errors = deque(maxlen=max_errors)  # Most recent failures, oldest first
+
+    def configure_group(self, name: str, limit: Optional[int] = None, max_queued: Optional[int] = None):
+        """Sets a group's caps (applies to tasks spawned afterwards)."""
+        group = self._groups.get(name)
+        if group is None:
+            self._groups[name] = _Group(name, limit, max_queued)
+        else:
+            group.configure(limit, max_queued)
+
+    def _group(self, name: str) -> _Group:
+        if name not in self._groups:
+            self._groups[name] = _Group(name)
+        return self._groups[name]
+
+    def spawn(self, group_name: str, coro, name: Optional[str] = None) -> Optional[asyncio.Task]:
+        """
+        Schedules `coro` in `group_name`. Returns its task, or None if the
+        group's queue is full (the coroutine is then closed unstarted).
+        """
+        group = self._group(group_name)
+        if group.limit and group.max_queued is not None and len(group.entries) >= group.limit + group.max_queued:
+            group.rejected += 1
+            coro.close()
+            if group.rejected == 1 or group.rejected % 100 == 0: # A runaway producer would flood the log
+                print(f"[ADA DEBUG] [TASK] Rejected '{name or group_name}': {group.queued} '{group_name}' task(s) already queued "
+                      f"({group.rejected} rejected so far).")
+            return None
+        entry = _Entry(next(self._ids), group_name, name or getattr(coro, "__name__", group_name), self._clock())
+        group.entries[entry.id] = entry
+        entry.task = asyncio.create_task(self._run(group, entry, coro))
+        return entry.task
+
+    async def _run(self, group: _Group, entry: _Entry, coro):
+        try:
+            if group.semaphore:
+                async with group.semaphore:
+                    await self._execute(group, entry, coro)
+            else:
+                await self._execute(group, entry, coro)
+        except asyncio.CancelledError:
+            group.cancelled += 1
+            coro.close() # Never started if it was still queued
+            raise
+        finally:
+            group.entries.pop(entry.id, None)
+
+    async def _execute(self, group: _Group, entry: _Entry, coro):
+        entry.started = self._clock()
+        group.started += 1
+        try:
+            await coro
+            group.finished += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            group.failed += 1
+            self.errors.append({
+                "group": group.name,
+                "name": entry.name,
+                "error": repr(e),
+                "traceback": traceback.format_exc(),
+                "at": self._clock(),
+            })
+            print(f"[ADA DEBUG] [ERR] Background task '{entry.name}' ({group.name}) failed: {e}")
+
+    def cancel(self, group_name: Optional[str] = None) -> int:
+        """Cancels the tasks of one group (or of all groups). Returns how many."""
+        groups = [self._groups[group_name]] if group_name in self._groups else \
+            (list(self._groups.values()) if group_name is None else [])
+        count = 0
+        for group in groups:
+            for entry in list(group.entries.values()):
+                if entry.task and not entry.task.done():
+                    entry.task.cancel()
+                    count += 1
+        return count
+
+    def active(self, group_name: Optional[str] = None) -> int:
+        """Running + queued tasks in one group (or in all)."""
+        if group_name is not None:
+            group = self._groups.get(group_name)
+            return len(group.entries) if group else 0
+        return sum(len(g.entries) for g in self._groups.values())
+
+    def snapshot(self) -> List[Dict]:
+        """Every running and queued task, oldest first."""
+        now = self._clock()
+        entries = sorted((e for g in self._groups.values() for e in g.entries.values()), key=lambda e: e.id)
+        return [{
+            "group": e.group,
+            "name": e.name,
+            "state": "running" if e.started is not None else "queued",
+            "age_s": round(now - e.created, 2),
+            "running_s": round(now - e.started, 2) if e.started is not None else None,
+        } for e in entries]
+
+    def stats(self) -> Dict:
+        return {
+            "groups": {
+                g.name: {
+                    "limit": g.limit,
+                    "max_queued": g.max_queued,
+                    "running": g.running,
+                    "queued": g.queued,
+                    "started": g.started,
+                    "finished": g.finished,
+                    "failed": g.failed,
+                    "cancelled": g.cancelled,
+                    "rejected": g.rejected,
+                }
+                for g in self._groups.values()
+            },
+            "tasks": self.snapshot(),
+            "errors": [{k: v for k, v in e.items() if k != "traceback"} for e in self.errors],
+        }
@@ -0,0 +1,245 @@
+"""
+Tool Registry - Name -> handler table for Live API function calls.
+
+Each tool is registered with an async handler `handler(args) -> Optional[str]`
+whose return value becomes the `result` of the FunctionResponse (None: no
+response is sent). How a call is executed is declared at registration:
+
+- foreground (default): the handler runs to completion and its result is
+  returned, bounded by `timeout` seconds; a timeout or exception is turned
+  into an error result for the model instead of propagating
+- background: the handler is started as a task and `ack` is returned
+  immediately (None: no response), for long jobs that report back on their
+  own (web agent, CAD generation, file tools). With a TaskSupervisor the task
+  runs in the tool's `group`, subject to that group's caps; when the group
+  is full the call is answered with a busy result instead
+
+AudioLoop dispatches every function call of a tool_call concurrently through
+execute(), so one slow tool never holds up another or the receive loop.
+
+ToolConfirmations tracks the calls waiting for the user to allow or deny
+them. Any number can be outstanding; each one is denied automatically after
+`timeout` seconds so an unattended popup cannot stall the model. Time spent
+waiting for the user is counted here, separately from execution time.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_TIMEOUT = 30.0
+CONFIRMATION_TIMEOUT = 30.0
+
+
+class ToolSpec:
+    """How one tool is executed."""
+
+    def __init__(self, name: str, handler: Callable, background: bool = False,
+                 ack: Optional[str] = None, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 group: str = "tools"):
+        self.name = name
+        self.handler = handler
+        self.background = background
+        self.ack = ack  # Immediate result of a background tool
+        self.timeout = timeout  # Foreground only; None waits forever
+        self.group = group  # Supervisor group of a background tool
+
+        # Counters
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class ToolRegistry:
+    """Registered tools plus per-tool execution counters."""
+
+    def __init__(self, supervisor=None, clock=time.monotonic):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._supervisor = supervisor  # TaskSupervisor for background tools (optional)
+        self._background = set()  # Running background handlers (keeps them referenced)
+        self._clock = clock
+
+    def register(self, name: str, handler: Callable, background: bool = False,
+                 ack: Optional[str] = None, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 group: str = "tools") -> ToolSpec:
+        """Adds (or replaces) a tool."""
+        spec = ToolSpec(name, handler, background=background, ack=ack, timeout=timeout, group=group)
+        self._tools[name] = spec
+        return spec
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    @property
+    def background_running(self) -> int:
+        return len(self._background)
+
+    async def execute(self, name: str, args: Optional[Dict] = None) -> Optional[str]:
+        """Runs one call and returns the result text for the model (None: send nothing)."""
+        spec = self._tools.get(name)
+        if spec is None:
+            return f"Unknown tool '{name}'."
+        args = args or {}
+        spec.calls += 1
+
+        if spec.background:
+            if self._supervisor:
+                task = self._supervisor.spawn(spec.group, self._run_background(spec, args), name=name)
+                if task is None:
+                    spec.rejected += 1
+                    return f"Tool '{name}' is busy: too many {spec.group} jobs are already waiting. Try again later."
+            else:
+                task = asyncio.create_task(self._run_background(spec, args))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return spec.ack
+
+        start = self._clock()
+        try:
+            if spec.timeout is None:
+                return await spec.handler(args)
+            return await asyncio.wait_for(spec.handler(args), spec.timeout)
+        except asyncio.TimeoutError:
+            spec.timeouts += 1
+            print(f"[ADA DEBUG] [TOOL] '{name}' timed out after {spec.timeout:.0f} s")
+            return f"Tool '{name}' timed out after {spec.timeout:.0f} seconds."
+        except Exception as e:
+            spec.errors += 1
+            print(f"[ADA DEBUG] [ERR] Tool '{name}' failed: {e}")
+            return f"Tool '{name}' failed: {e}"
+        finally:
+            self._record_time(spec, start)
+
+    async def _run_background(self, spec: ToolSpec, args: Dict):
+        start = self._clock()
+        try:
+            await spec.handler(args)
+        except Exception as e:
+            spec.errors += 1
+            if self._supervisor:
+                raise # Captured and logged by the supervisor
+            print(f"[ADA DEBUG] [ERR] Background tool '{spec.name}' failed: {e}")
+        finally:
+            self._record_time(spec, start)
+
+    def _record_time(self, spec: ToolSpec, start: float):
+        elapsed = (self._clock() - start) * 1000.0
+        spec.total_ms += elapsed
+        spec.max_ms = max(spec.max_ms, elapsed)
+
+    def stats(self) -> Dict:
+        return {
+            "background_running": len(self._background),
+            "tools": {
+                spec.name: {
+                    "calls": spec.calls,
+                    "errors": spec.errors,
+                    "timeouts": spec.timeouts,
+                    "rejected": spec.rejected,
+                    "avg_ms": round(spec.total_ms / spec.calls, 1) if spec.calls else 0.0,
+                    "max_ms": round(spec.max_ms, 1),
+                }
+                for spec in self._tools.values() if spec.calls
+            },
+        }
+
+
+class ToolConfirmations:
+    """Outstanding user confirmations, with auto-deny after `timeout` seconds."""
+
+    def __init__(self, timeout: float = CONFIRMATION_TIMEOUT, clock=time.monotonic):
+        self.timeout = timeout
+        self._clock = clock
+        self._pending: Dict[str, Dict] = {}  # request id -> {"tool", "future", "since"}
+
+        # Counters
+        self.requested = 0
+        self.confirmed = 0
+        self.denied = 0
+        self.expired = 0
+        self.wait_ms = {}  # Tool -> [total ms, answers, max ms]
+
+    def configure(self, timeout: Optional[float] = None):
+        if timeout is not None:
+            self.timeout = max(1.0, float(timeout))
+
+    async def confirm(self, tool: str, args: Dict, ask: Callable,
+                      on_expired: Optional[Callable] = None) -> Optional[bool]:
+        """
+        Calls ask({"id", "tool", "args", "timeout"}) and waits for resolve().
+        Returns the user's answer, or None if none came within the timeout.
+        on_expired(request) is called when the request ends without an answer
+        (timeout or cancellation) so the UI can withdraw it.
+        """
+        request_id = str(uuid.uuid4())
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = {"tool": tool, "future": future, "since": self._clock()}
+        self.requested += 1
+        request = {"id": request_id, "tool": tool, "args": args, "timeout": self.timeout}
+        print(f"[ADA DEBUG] [STOP] Requesting confirmation for '{tool}' (ID: {request_id})")
+        answered = False
+        try:
+            ask(request)
+            confirmed = await asyncio.wait_for(future, self.timeout)
+            answered = True
+        except asyncio.TimeoutError:
+            self.expired += 1
+            print(f"[ADA DEBUG] [DENY] Confirmation {request_id} for '{tool}' timed out after {self.timeout:.0f} s.")
+            confirmed = None
+        finally:
+            entry = self._pending.pop(request_id)
+            if answered:
+                self._record_wait(tool, entry["since"])
+            elif on_expired:
+                on_expired(request)
+        if confirmed:
+            self.confirmed += 1
+        elif answered:
+            self.denied += 1
+        print(f"[ADA DEBUG] [CONFIRM] Request {request_id} resolved. Confirmed: {confirmed}")
+        return confirmed
+
+    def resolve(self, request_id: str, confirmed: bool) -> bool:
+        """Answers an outstanding request. False if it is unknown or already settled."""
+        entry = self._pending.get(request_id)
+        if entry is None or entry["future"].done():
+            return False
+        entry["future"].set_result(bool(confirmed))
+        return True
+
+    def pending(self) -> List[Dict]:
+        """Outstanding requests, oldest first."""
+        now = self._clock()
+        return [{"id": request_id, "tool": entry["tool"], "waiting_s": round(now - entry["since"], 1)}
+                for request_id, entry in self._pending.items()]
+
+    def _record_wait(self, tool: str, since: float):
+        elapsed = (self._clock() - since) * 1000.0
+        total = self.wait_ms.setdefault(tool, [0.0, 0, 0.0])
+        total[0] += elapsed
+        total[1] += 1
+        total[2] = max(total[2], elapsed)
+
+    def stats(self) -> Dict:
+        return {
+            "timeout_s": self.timeout,
+            "outstanding": len(self._pending),
+            "requested": self.requested,
+            "confirmed": self.confirmed,
+            "denied": self.denied,
+            "expired": self.expired,
+            "wait_ms": {
+                tool: {"answers": n, "avg": round(total / n, 1), "max": round(peak, 1)}
+                for tool, (total, n, peak) in self.wait_ms.items()
+            },
+        }
@@ -0,0 +1,83 @@
+"""
+Transcription Batcher - Coalesced transcription updates for the frontend.
+
+Gemini streams transcriptions as many small deltas (often a word or less),
+and each one used to become its own Socket.IO emit. TranscriptionBatcher
+merges consecutive deltas of one sender for up to `window` seconds and
+emits them as a single {"sender", "text"} update:
+
+- the first delta of a batch arms a timer; the batch goes out when it fires
+- a delta from the other sender flushes the pending batch first, so
+  updates keep their order
+- flush() sends whatever is pending right away (AudioLoop calls it at turn
+  end and on stop)
+
+The frontend appends updates of the same sender to the last message, so the
+rendered text is the same as with one emit per delta. A window of 0 sends
+every delta immediately. Must be used from the event loop thread.
+"""
+
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_WINDOW = 0.05
+
+
+class TranscriptionBatcher:
+    """Per-sender delta coalescing over a short time window."""
+
+    def __init__(self, emit: Callable[[Dict], None], window: float = DEFAULT_WINDOW):
+        self._emit = emit
+        self.window = window
+        self._sender: Optional[str] = None
+        self._parts: List[str] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Counters
+        self.deltas = 0
+        self.emits = 0
+        self.flushes = {}  # By reason (window / switch / turn_end / stop)
+
+    def configure(self, window: Optional[float] = None):
+        if window is not None:
+            self.window = max(0.0, float(window))
+
+    def add(self, sender: str, delta: str):
+        """Queues one delta (flushes the other sender's pending text first)."""
+        if not delta:
+            return
+        self.deltas += 1
+        if self._parts and sender != self._sender:
+            self.flush("switch")
+        self._sender = sender
+        self._parts.append(delta)
+        if self.window <= 0:
+            self.flush("window")
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush, "window")
+
+    def flush(self, reason: str = "turn_end"):
+        """Emits the pending text now, if any."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        self._parts = []
+        self.emits += 1
+        self.flushes[reason] = self.flushes.get(reason, 0) + 1
+        self._emit({"sender": self._sender, "text": text})
+
+    @property
+    def pending(self) -> int:
+        return len(self._parts)
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": round(self.window * 1000.0),
+            "deltas": self.deltas,
+            "emits": self.emits,
+            "emits_avoided": self.deltas - self.emits - (1 if self._parts else 0),  # Pending text is one emit
+            "flushes": dict(self.flushes),
+        }
@@ -0,0 +1,343 @@
+"""
+VAD - Voice activity detection for the microphone path.
+
+All detectors work on zero-copy NumPy views (np.frombuffer) of the raw
+16-bit PCM chunks read from PyAudio and reuse scratch buffers, so a
+detection pass costs a handful of vectorized calls instead of a Python
+loop over every sample.
+
+Detectors:
+- energy:        RMS level above a threshold (the original behaviour)
+- zero_crossing: RMS level above a threshold AND a low zero-crossing rate
+                 (rejects hiss and broadband noise)
+- band_energy:   RMS level of the speech band (300-3400 Hz) above a threshold
+                 AND enough of the total energy inside that band
+
+SilenceGate uses the detector's speech state to optionally stop streaming
+mic audio during long silences (with a pre-roll on resume).
+"""
+
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 800  # Adj based on mic sensitivity (800 is conservative for 16-bit)
+DEFAULT_SILENCE_DURATION = 0.5  # Seconds of silence to consider "done speaking"
+
+
+def pcm16_view(data) -> np.ndarray:
+    """Returns an int16 view over a PCM buffer without copying it."""
+    return np.frombuffer(data, dtype="<i2")
+
+
+class _Scratch:
+    """Reusable float32 work buffer, grown on demand."""
+
+    def __init__(self, size: int = 1024):
+        self._buf = np.zeros(size, dtype=np.float32)
+
+    def load(self, samples: np.ndarray) -> np.ndarray:
+        n = samples.shape[0]
+        if n > self._buf.shape[0]:
+            self._buf = np.zeros(n, dtype=np.float32)
+        out = self._buf[:n]
+        np.copyto(out, samples, casting="unsafe")
+        return out
+
+
+def _rms(x: np.ndarray) -> float:
+    n = x.shape[0]
+    if n == 0:
+        return 0.0
+    return float(np.sqrt(np.dot(x, x) / n))
+
+
+class EnergyDetector:
+    """Plain RMS energy gate."""
+
+    name = "energy"
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._scratch = _Scratch()
+
+    def score(self, samples: np.ndarray) -> float:
+        return _rms(self._scratch.load(samples))
+
+    def is_speech(self, samples: np.ndarray):
+        level = self.score(samples)
+        return level > self.threshold, level
+
+
+class ZeroCrossingDetector(EnergyDetector):
+    """RMS gate that also requires a voiced-speech zero-crossing rate."""
+
+    name = "zero_crossing"
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_rate: float = 0.25):
+        super().__init__(threshold)
+        self.max_rate = max_rate
+        self._sign = np.zeros(1024, dtype=bool)
+        self._diff = np.zeros(1024, dtype=bool)
+
+    def crossing_rate(self, samples: np.ndarray) -> float:
+        n = samples.shape[0]
+        if n < 2:
+            return 0.0
+        if n > self._sign.shape[0]:
+            self._sign = np.zeros(n, dtype=bool)
+            self._diff = np.zeros(n, dtype=bool)
+        sign = self._sign[:n]
+        np.signbit(samples, out=sign)
+        diff = self._diff[:n - 1]
+        np.not_equal(sign[1:], sign[:-1], out=diff)
+        return np.count_nonzero(diff) / (n - 1)
+
+    def is_speech(self, samples: np.ndarray):
+        level = self.score(samples)
+        if level <= self.threshold:
+            return False, level
+        return self.crossing_rate(samples) < self.max_rate, level
+
+
+class BandEnergyDetector:
+    """Gate on the energy inside the speech band of the spectrum."""
+
+    name = "band_energy"
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, sample_rate: int = 16000,
+                 low_hz: float = 300.0, high_hz: float = 3400.0, min_ratio: float = 0.5):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.low_hz = low_hz
+        self.high_hz = high_hz
+        self.min_ratio = min_ratio
+        self._scratch = _Scratch()
+        self._size = 0
+        self._window = None
+        self._band = slice(0, 0)
+
+    def _prepare(self, n: int):
+        if n == self._size:
+            return
+        self._size = n
+        self._window = np.hanning(n).astype(np.float32)
+        freqs = np.fft.rfftfreq(n, d=1.0 / self.sample_rate)
+        lo = int(np.searchsorted(freqs, self.low_hz))
+        hi = int(np.searchsorted(freqs, self.high_hz, side="right"))
+        self._band = slice(lo, hi)
+
+    def band_levels(self, samples: np.ndarray):
+        """Returns (band_rms, band_ratio) for a chunk."""
+        n = samples.shape[0]
+        if n == 0:
+            return 0.0, 0.0
+        self._prepare(n)
+        x = self._scratch.load(samples)
+        x *= self._window
+        power = np.abs(np.fft.rfft(x)) ** 2
+        total = float(power.sum())
+        if total <= 0.0:
+            return 0.0, 0.0
+        band = float(power[self._band].sum())
+        # Parseval: sum(|X|^2) == n * sum(x^2) for the one-sided spectrum (approx.)
+        window_gain = float(np.dot(self._window, self._window)) / n
+        band_rms = np.sqrt(2.0 * band / (n * n * window_gain))
+        return float(band_rms), band / total
+
+    def score(self, samples: np.ndarray) -> float:
+        return self.band_levels(samples)[0]
+
+    def is_speech(self, samples: np.ndarray):
+        level, ratio = self.band_levels(samples)
+        return level > self.threshold and ratio >= self.min_ratio, level
+
+
+DETECTORS = {
+    EnergyDetector.name: EnergyDetector,
+    ZeroCrossingDetector.name: ZeroCrossingDetector,
+    BandEnergyDetector.name: BandEnergyDetector,
+}
+
+
+class VoiceActivityDetector:
+    """
+    Tracks speech onset/offset for a stream of PCM chunks.
+
+    The hangover is measured in audio time (samples seen), not wall-clock
+    time, so it behaves the same whether chunks arrive live or in bursts.
+    """
+
+    def __init__(self, sample_rate: int = 16000, detector: str = "energy",
+                 threshold: float = DEFAULT_THRESHOLD,
+                 silence_duration: float = DEFAULT_SILENCE_DURATION):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.silence_duration = silence_duration
+        self.detector = self._make_detector(detector, threshold)
+
+        self.is_speech = False
+        self.last_level = 0.0
+        self._silence_samples = 0
+
+    def _make_detector(self, name: str, threshold: float):
+        if name not in DETECTORS:
+            raise ValueError(f"Unknown VAD detector '{name}'. Available: {', '.join(DETECTORS)}")
+        if name == BandEnergyDetector.name:
+            return BandEnergyDetector(threshold, sample_rate=self.sample_rate)
+        return DETECTORS[name](threshold)
+
+    def configure(self, threshold: Optional[float] = None, silence_duration: Optional[float] = None,
+                  detector: Optional[str] = None):
+        """Updates detection settings at runtime."""
+        if threshold is not None:
+            self.threshold = float(threshold)
+            self.detector.threshold = self.threshold
+        if silence_duration is not None:
+            self.silence_duration = float(silence_duration)
+        if detector is not None and detector != self.detector.name:
+            self.detector = self._make_detector(detector, self.threshold)
+
+    def settings(self) -> Dict:
+        return {
+            "detector": self.detector.name,
+            "threshold": self.threshold,
+            "silence_duration": self.silence_duration,
+        }
+
+    def reset(self):
+        self.is_speech = False
+        self._silence_samples = 0
+
+    def process(self, data) -> Optional[str]:
+        """
+        Feeds one PCM chunk. Returns "onset" when speech starts, "offset" when
+        the hangover has elapsed after speech, otherwise None.
+        """
+        samples = pcm16_view(data)
+        speech, self.last_level = self.detector.is_speech(samples)
+
+        if speech:
+            self._silence_samples = 0
+            if not self.is_speech:
+                self.is_speech = True
+                return "onset"
+            return None
+
+        if self.is_speech:
+            self._silence_samples += samples.shape[0]
+            if self._silence_samples > self.silence_duration * self.sample_rate:
+                self.reset()
+                return "offset"
+        return None
+
+
+class SilenceGate:
+    """
+    Optional uplink silence suppression driven by the VAD's speech state.
+
+    After `hangover` seconds (audio time) without speech, chunks stop being
+    passed through and the last `preroll` seconds are kept in a small ring
+    instead. On the next speech chunk the pre-roll is released ahead of it so
+    the first syllable is not clipped. Disabled, every chunk passes through.
+    """
+
+    STREAMING = "streaming"
+    SUPPRESSED = "suppressed"
+
+    def __init__(self, sample_rate: int = 16000, enabled: bool = False,
+                 hangover: float = 1.0, preroll: float = 0.3, sample_width: int = 2):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.enabled = enabled
+        self.hangover = hangover
+        self.preroll = preroll
+
+        self.state = self.STREAMING
+        self._silence_samples = 0
+        self._preroll = deque()
+        self._preroll_samples = 0
+
+        # Counters (per session, see reset_counters)
+        self.pauses = 0
+        self.resumes = 0
+        self.suppressed_bytes = 0
+        self.preroll_bytes = 0
+
+    def configure(self, enabled: Optional[bool] = None, hangover: Optional[float] = None,
+                  preroll: Optional[float] = None):
+        """Updates gating settings at runtime."""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+            if not self.enabled:
+                self.reset()
+        if hangover is not None:
+            self.hangover = float(hangover)
+        if preroll is not None:
+            self.preroll = float(preroll)
+
+    def settings(self) -> Dict:
+        return {"enabled": self.enabled, "hangover": self.hangover, "preroll": self.preroll}
+
+    def reset(self):
+        self.state = self.STREAMING
+        self._silence_samples = 0
+        self._preroll.clear()
+        self._preroll_samples = 0
+
+    def reset_counters(self):
+        self.pauses = 0
+        self.resumes = 0
+        self.suppressed_bytes = 0
+        self.preroll_bytes = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.suppressed_bytes - self.preroll_bytes
+
+    def process(self, data, speech: bool):
+        """
+        Feeds one mic chunk with the VAD's current speech state.
+        Returns (chunks_to_send, event) where event is "pause", "resume" or None.
+        """
+        if not self.enabled:
+            return (data,), None
+
+        samples = len(data) // self.sample_width
+        if self.state == self.STREAMING:
+            if speech:
+                self._silence_samples = 0
+                return (data,), None
+            self._silence_samples += samples
+            if self._silence_samples < self.hangover * self.sample_rate:
+                return (data,), None
+            # Hangover elapsed: this is the last chunk sent before the pause
+            self.state = self.SUPPRESSED
+            self.pauses += 1
+            return (data,), "pause"
+
+        if speech:
+            chunks = tuple(self._preroll) + (data,)
+            self.preroll_bytes += self._preroll_samples * self.sample_width
+            self.reset()
+            self.resumes += 1
+            return chunks, "resume"
+
+        self.suppressed_bytes += len(data)
+        self._preroll.append(bytes(data))  # Copy: callers may pass views of reused buffers
+        self._preroll_samples += samples
+        limit = self.preroll * self.sample_rate
+        while self._preroll and self._preroll_samples - len(self._preroll[0]) // self.sample_width >= limit:
+            self._preroll_samples -= len(self._preroll.popleft()) // self.sample_width
+        return (), None
+
+    def stats(self) -> Dict:
+        return {
+            **self.settings(),
+            "state": self.state,
+            "pauses": self.pauses,
+            "resumes": self.resumes,
+            "bytes_saved": self.bytes_saved,
+            "suppressed_seconds": round(self.suppressed_bytes / self.sample_width / self.sample_rate, 1),
+        }
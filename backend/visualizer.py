@@ -0,0 +1,123 @@
+"""
+Visualizer - Playback levels for the UI, computed on the server.
+
+Instead of shipping every playback chunk to the browser (previously as a JSON
+list of byte values, ~8 KB per 43 ms chunk), LevelMeter reduces the audio
+being played to one small frame per UI tick:
+
+- byte 0: RMS of the last `window` samples, -60..0 dBFS mapped to 0..255
+- bytes 1..bands: energy of log-spaced FFT bands between min_hz and max_hz
+  (Hann window, root of the summed bin power), -70..0 dB mapped to 0..255
+
+Frames are produced at most `fps` times per second of audio. Decimation counts
+samples, so it follows the playback clock rather than wall time, and a chunk
+that spans several ticks yields only its latest frame. A frame is a bytes
+object, which Socket.IO sends as a binary attachment (an ArrayBuffer in the
+browser, read with a Uint8Array).
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+RMS_FLOOR_DB = -60.0
+BAND_FLOOR_DB = -70.0
+MAX_BANDS = 64
+
+
+def _db_to_byte(db, floor_db: float):
+    """0 at floor_db (and below), 255 at 0 dB."""
+    return np.clip((np.asarray(db) - floor_db) * (255.0 / -floor_db), 0.0, 255.0)
+
+
+class LevelMeter:
+    """RMS + FFT band frames from int16 PCM, decimated to `fps`."""
+
+    def __init__(self, sample_rate: int = 24000, fps: float = 30.0, bands: int = 16,
+                 window: int = 1024, min_hz: float = 80.0, max_hz: float = 8000.0):
+        self.sample_rate = sample_rate
+        self.window = window
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self._history = np.zeros(window, dtype=np.float64)  # Last `window` samples, newest last
+        self._taper = np.hanning(window)
+        self._fft_scale = 2.0 / (self._taper.sum() * 32768.0)  # Full-scale sine -> magnitude 1
+        self._since = 0  # Samples since the last frame
+        self.configure(fps=fps, bands=bands)
+
+        # Counters
+        self.chunks = 0
+        self.frames = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def configure(self, fps: Optional[float] = None, bands: Optional[int] = None):
+        if fps is not None:
+            self.fps = max(1.0, float(fps))
+            self._hop = max(1, int(self.sample_rate / self.fps))
+        if bands is not None:
+            self.bands = max(1, min(MAX_BANDS, int(bands)))
+            # Swapped in one assignment: the output thread may be in feed()
+            self._band_index = self._band_bins(self.bands)
+
+    def _band_bins(self, bands: int):
+        """First FFT bin of every band (at least one bin each) and the end bin."""
+        freqs = np.fft.rfftfreq(self.window, 1.0 / self.sample_rate)
+        top = min(self.max_hz, self.sample_rate / 2)
+        edges = np.searchsorted(freqs, np.geomspace(self.min_hz, top, bands + 1))
+        starts = []
+        for edge in edges[:-1]:
+            starts.append(max(int(edge), starts[-1] + 1 if starts else 1))
+        stop = min(max(int(edges[-1]), starts[-1] + 1), len(freqs))
+        return np.minimum(np.array(starts), stop - 1), stop
+
+    def feed(self, pcm: bytes) -> Optional[bytes]:
+        """Adds a playback chunk; returns a frame when one is due (None otherwise)."""
+        samples = np.frombuffer(pcm, dtype="<i2")
+        n = len(samples)
+        self.chunks += 1
+        self.bytes_in += len(pcm)
+        if n == 0:
+            return None
+        history = self._history
+        if n >= self.window:
+            history[:] = samples[-self.window:]
+        else:
+            history[:-n] = history[n:]
+            history[-n:] = samples
+        self._since += n
+        if self._since < self._hop:
+            return None
+        self._since %= self._hop
+        frame = self._frame()
+        self.frames += 1
+        self.bytes_out += len(frame)
+        return frame
+
+    def _frame(self) -> bytes:
+        starts, stop = self._band_index
+        x = self._history
+        rms = math.sqrt(float(np.dot(x, x)) / self.window) / 32768.0
+        spectrum = np.abs(np.fft.rfft(x * self._taper)[:stop]) * self._fft_scale
+        mags = np.sqrt(np.add.reduceat(spectrum * spectrum, starts))
+        out = np.empty(1 + len(starts), dtype=np.uint8)
+        out[0] = _db_to_byte(20.0 * math.log10(max(rms, 1e-9)), RMS_FLOOR_DB)
+        out[1:] = _db_to_byte(20.0 * np.log10(np.maximum(mags, 1e-9)), BAND_FLOOR_DB)
+        return out.tobytes()
+
+    def silence(self) -> bytes:
+        """Resets the meter and returns an all-zero frame (playback stopped)."""
+        self._history[:] = 0.0
+        self._since = 0
+        return bytes(1 + len(self._band_index[0]))
+
+    def stats(self) -> Dict:
+        return {
+            "fps": self.fps,
+            "bands": self.bands,
+            "chunks": self.chunks,
+            "frames": self.frames,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
@@ -1,7 +1,6 @@
 import os
 import time
 import asyncio
-import base64
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 from google import genai
@@ -186,7 +185,7 @@ class WebAgent:
     async def run_task(self, prompt, update_callback=None):
         """
         Runs the agent with the given prompt.
-        update_callback: async function(screenshot_b64: str, logs: str)
+        update_callback: async function(screenshot_png: bytes, logs: str)
         Returns the final response from the agent.
         """
         print(f"[START] WebAgent started. Goal: {prompt}")
@@ -219,8 +218,7 @@ class WebAgent:
             
             # Send initial state
             if update_callback:
-                encoded_image = base64.b64encode(initial_screenshot).decode('utf-8')
-                await update_callback(encoded_image, "Web Agent Initialized")
+                await update_callback(initial_screenshot, "Web Agent Initialized")
 
             chat_history = [
                 types.Content(
@@ -301,10 +299,9 @@ class WebAgent:
                 
                 # Update frontend
                 if update_callback:
-                    encoded_image = base64.b64encode(screenshot_bytes).decode('utf-8')
                     # Format a log message from the actions taken
                     actions_log = ", ".join([r[1] for r in results])
-                    await update_callback(encoded_image, f"Executed: {actions_log}")
+                    await update_callback(screenshot_bytes, f"Executed: {actions_log}")
 
                 # Send Response Back
                 response_parts = [types.Part(function_response=fr) for fr in function_responses]
@@ -0,0 +1,124 @@
+"""
+Offline harness for the echo canceller: runs recorded far-end (what the
+speaker played) / near-end (what the mic heard) WAV pairs through
+EchoCanceller chunk by chunk, as the capture thread would, and reports ERLE
+and CPU cost.
+
+Usage:
+    python scripts/aec_harness.py far.wav near.wav [--out cleaned.wav] [--delay-ms 0]
+    python scripts/aec_harness.py --synthetic [--seconds 10]
+
+WAVs must be 16-bit PCM; stereo is down-mixed and any rate is resampled to
+16 kHz. --delay-ms shifts the far-end later (positive) to line it up with the
+recording if the two were not captured in sync.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from aec import EchoCanceller  # noqa: E402
+from dsp import PolyphaseResampler  # noqa: E402
+
+RATE = 16000
+CHUNK = 1024
+
+
+def read_wav(path):
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise SystemExit(f"{path}: only 16-bit PCM is supported")
+        rate = w.getframerate()
+        x = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float64)
+        if w.getnchannels() > 1:
+            x = x.reshape(-1, w.getnchannels()).mean(axis=1)
+    if rate != RATE:
+        x = PolyphaseResampler(rate, RATE).process(x).copy()
+    return x
+
+
+def write_wav(path, x):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(np.clip(np.rint(x), -32768, 32767).astype("<i2").tobytes())
+
+
+def synthetic_pair(seconds, seed=0):
+    """Coloured-noise far end through a decaying room response, plus a near-end talker."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE)
+    far = np.convolve(rng.normal(0, 3000, n), [1.0, 0.6, 0.3], mode="same")
+    ir = np.zeros(1200)
+    ir[480:1080] = rng.normal(0, 1, 600) * np.exp(-np.arange(600) / 100) * 0.05
+    echo = np.convolve(far, ir)[:n]
+    talker = np.zeros(n)
+    a, b = int(n * 0.7), int(n * 0.8)
+    talker[a:b] = rng.normal(0, 2000, b - a) * np.sin(np.pi * np.arange(b - a) / (b - a))
+    return far, echo + talker + rng.normal(0, 30, n)
+
+
+def run(far, near, filter_ms=128.0):
+    n = min(len(far), len(near))
+    aec = EchoCanceller(RATE, filter_ms=filter_ms)
+    out = []
+    start = time.process_time()
+    for i in range(0, n - CHUNK + 1, CHUNK):
+        out.append(aec.process(near[i:i + CHUNK], far[i:i + CHUNK]).copy())
+    cpu = time.process_time() - start
+    return np.concatenate(out), aec, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("far", nargs="?")
+    parser.add_argument("near", nargs="?")
+    parser.add_argument("--out")
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--filter-ms", type=float, default=128.0)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        far, near = synthetic_pair(args.seconds)
+    elif args.far and args.near:
+        far, near = read_wav(args.far), read_wav(args.near)
+    else:
+        parser.error("give far.wav and near.wav, or --synthetic")
+
+    shift = int(round(args.delay_ms * RATE / 1000))
+    if shift > 0:
+        far = np.concatenate((np.zeros(shift), far))
+    elif shift < 0:
+        far = far[-shift:]
+
+    cleaned, aec, cpu = run(far, near, args.filter_ms)
+    audio_seconds = len(cleaned) / RATE
+
+    print(f"{audio_seconds:.1f} s, filter {aec.stats()['filter_ms']} ms\n")
+    print(f"{'second':>6} {'ERLE dB':>8}")
+    for sec in range(int(audio_seconds)):
+        s = slice(sec * RATE, (sec + 1) * RATE)
+        d, e = float(np.dot(near[s], near[s])), float(np.dot(cleaned[s], cleaned[s]))
+        erle = 10 * math.log10(d / e) if d > 0 and e > 0 else 0.0
+        print(f"{sec:>6} {erle:8.1f}")
+
+    stats = aec.stats()
+    print(f"\nsmoothed ERLE: {stats['erle_db']} dB, double-talk blocks: {stats['double_talk_blocks']}/{stats['blocks']}")
+    print(f"CPU: {cpu / audio_seconds * 1000:.2f} ms per second of audio ({cpu / audio_seconds * 100:.2f}% of realtime)")
+
+    if args.out:
+        write_wav(args.out, cleaned)
+        print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
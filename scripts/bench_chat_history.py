@@ -0,0 +1,74 @@
+"""
+Benchmark: get_recent_chat_history on large chat logs.
+
+Builds a chat_history.jsonl of the requested size in a temporary project and
+times fetching the last N entries with a full readlines() (the previous
+implementation) against the backwards block reader (read_tail_lines). The
+page cache is warm for both, so the numbers show CPU/memory cost, not disk.
+
+Usage:
+    python scripts/bench_chat_history.py [--sizes-mb 1 50 300] [--limit 10] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from project_manager import ProjectManager, read_tail_lines  # noqa: E402
+
+
+def write_log(path, size_mb):
+    entry = {"timestamp": 0.0, "sender": "Lexi", "text": "Det här låter egentligen redan klart. " * 4}
+    line = (json.dumps(entry) + "\n").encode("utf-8")
+    block = line * 1000
+    target = int(size_mb * 1024 * 1024)
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return written // len(line)
+
+
+def readlines_tail(path, limit):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    return [json.loads(line) for line in lines[-limit:]]
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 50, 300])
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        manager = ProjectManager(root)
+        log = manager.get_current_project_path() / "chat_history.jsonl"
+        print(f"{'log size':>10} {'entries':>10} {'readlines ms':>13} {'tail ms':>9} {'speedup':>8}")
+        for size_mb in args.sizes_mb:
+            entries = write_log(log, size_mb)
+            assert readlines_tail(log, args.limit) == manager.get_recent_chat_history(args.limit)
+            full = best_ms(lambda: readlines_tail(log, args.limit), args.repeat)
+            tail = best_ms(lambda: manager.get_recent_chat_history(args.limit), args.repeat)
+            print(f"{size_mb:>8.0f}MB {entries:>10d} {full:>13.1f} {tail:>9.3f} {full / tail:>7.0f}x")
+        raw = best_ms(lambda: read_tail_lines(log, args.limit), args.repeat)
+        print(f"\nread_tail_lines alone ({args.limit} lines): {raw:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
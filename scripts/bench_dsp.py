@@ -0,0 +1,55 @@
+"""
+Benchmark: CPU cost of the mic DSP front-end (resample -> high-pass -> AGC)
+per second of captured audio, for common device native rates.
+
+Usage:
+    python scripts/bench_dsp.py [--seconds 30] [--chunk-ms 64]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from dsp import MicFrontEnd  # noqa: E402
+
+RATES = (16000, 22050, 44100, 48000)
+
+
+def make_chunks(rate, seconds, chunk_ms):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 4000 * np.sin(2 * np.pi * 220 * t) + 300 + rng.normal(0, 300, t.shape)
+    pcm = np.clip(signal, -32768, 32767).astype("<i2").tobytes()
+    step = round(rate * chunk_ms / 1000) * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm) - step + 1, step)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--chunk-ms", type=float, default=64.0)
+    args = parser.parse_args()
+
+    print(f"{args.seconds:.0f} s of audio in {args.chunk_ms:.0f} ms chunks\n")
+    print(f"{'native rate':<12} {'cpu ms / s audio':>17} {'us / chunk':>11} {'realtime %':>11}")
+    for rate in RATES:
+        chunks = make_chunks(rate, args.seconds, args.chunk_ms)
+        frontend = MicFrontEnd(rate)
+        frontend.process(chunks[0])  # Warm up buffers
+
+        start = time.process_time()
+        for chunk in chunks:
+            frontend.process(chunk)
+        cpu = time.process_time() - start
+
+        audio_seconds = len(chunks) * args.chunk_ms / 1000
+        per_second = cpu / audio_seconds
+        print(f"{rate:<12} {per_second * 1000:17.2f} {cpu / len(chunks) * 1e6:11.1f} {per_second * 100:10.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark: AudioLoop end to end against the local Live stand-in
+(backend/fake_live.py) - no network, no sound hardware.
+
+A synthetic mic streams a tone in real time; the fake server answers each
+turn with tagged model audio (optionally one tool call), then drops the
+connection once so run() has to reconnect. Reported:
+
+- mic -> send:        capture thread read -> session.send of that audio
+- receive -> playback: model chunk handed to receive_audio -> first sample
+                      written to the (simulated) output device
+- tool dispatch:      tool_call received -> send_tool_response
+- reconnect:          connection drop -> mic flowing again on the next session,
+                      plus the session switchover (drop -> context seeded);
+                      with the hot standby (default) no connect is on that path,
+                      --no-standby dials a fresh connection instead
+
+Usage:
+    python scripts/bench_live.py [--turns 5] [--first-byte-ms 300] [--jitter-ms 20]
+                                 [--stream-rate 1.0] [--connect-ms 50] [--no-standby] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+os.environ.setdefault("GEMINI_API_KEY", "offline")  # The fake never talks to the API
+
+import ada  # noqa: E402
+from fake_live import FakeLiveServer, FakeTurn  # noqa: E402
+
+MIC_RATE = ada.SEND_SAMPLE_RATE
+
+
+class ToneInput:
+    """Mic stand-in: a 16 kHz tone delivered in real time, logging each read."""
+
+    name = "bench:tone"
+    rate = MIC_RATE
+
+    def __init__(self):
+        self.reads = []  # (t, bytes) when each chunk became available
+        self._phase = 0
+        self._due = None
+
+    def read(self, frames, **kwargs):
+        now = time.monotonic()
+        self._due = max(self._due or now, now) + frames / self.rate
+        time.sleep(max(0.0, self._due - now))
+        n = np.arange(self._phase, self._phase + frames)
+        self._phase += frames
+        pcm = (3000 * np.sin(2 * np.pi * 300.0 * n / self.rate)).astype("<i2").tobytes()
+        self.reads.append((time.monotonic(), len(pcm)))
+        return pcm
+
+    def get_input_latency(self):
+        return 0.0
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TaggedOutput:
+    """Speaker stand-in: paced like a device, notes when each tagged chunk starts playing."""
+
+    name = "bench:speaker"
+
+    def __init__(self, rate=ada.RECEIVE_SAMPLE_RATE):
+        self.rate = rate
+        self.first_played = {}  # chunk tag -> t
+        self._due = None
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        tag = int(np.frombuffer(data[:2], dtype="<i2")[0])
+        now = time.monotonic()
+        with self._lock:
+            self.first_played.setdefault(tag, now)
+        self._due = max(self._due or now, now) + len(data) / 2 / self.rate
+        time.sleep(max(0.0, self._due - now))
+
+    def get_output_latency(self):
+        return 0.0
+
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BenchIO:
+    def __init__(self):
+        self.input = ToneInput()
+        self.output = TaggedOutput()
+
+    def open_input(self):
+        return self.input
+
+    def open_output(self):
+        return self.output
+
+
+def summary(values):
+    if not values:
+        return {"n": 0}
+    v = np.asarray(values)
+    return {"n": len(v), "p50": round(float(np.percentile(v, 50)), 1),
+            "p95": round(float(np.percentile(v, 95)), 1), "max": round(float(v.max()), 1)}
+
+
+def mic_to_send(reads, uplink):
+    """Latency of every captured chunk to the send that carried its last byte."""
+    latencies = []
+    i, captured = 0, 0
+    sent = 0
+    for t_send, n in uplink:
+        sent += n
+        while i < len(reads) and captured + reads[i][1] <= sent:
+            captured += reads[i][1]
+            latencies.append((t_send - reads[i][0]) * 1000.0)
+            i += 1
+    return latencies
+
+
+async def wait_until(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("benchmark scenario stalled")
+        await asyncio.sleep(0.01)
+
+
+async def run_bench(args):
+    script = []
+    for i in range(args.turns):
+        tools = [{"name": "list_projects"}] if i == args.turns // 2 else None
+        script.append(FakeTurn(after_audio_ms=600, input_text=f"request {i}", output_text="sure, here you go",
+                               audio_ms=args.audio_ms, tool_calls=tools))
+    script.append(FakeTurn(after_audio_ms=600, output_text="I'm back", audio_ms=400))
+    server = FakeLiveServer(script, first_byte_ms=args.first_byte_ms, jitter_ms=args.jitter_ms,
+                            stream_rate=args.stream_rate, connect_ms=args.connect_ms, tagged_audio=True)
+    io = BenchIO()
+    loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect)
+    loop.update_permissions({"list_projects": False})  # No confirmation round-trip
+    loop.update_session_settings({"standby": not args.no_standby})
+
+    task = asyncio.create_task(loop.run())
+    try:
+        await wait_until(lambda: server.turns_done == args.turns, 60 + args.turns * 10)
+        await asyncio.sleep(0.5)  # Let the last reply finish playing
+        uplink_first_session = list(server.uplink)
+        reads_first_session = list(io.input.reads)
+        downlink = list(server.downlink)
+
+        if not args.no_standby:
+            await wait_until(lambda: loop.sessions.stats()["standby_ready"], 30)
+        server.drop()
+        await wait_until(lambda: loop.sessions.last_switch_ms is not None, 30)
+        await wait_until(lambda: server.uplink and server.uplink[-1][0] > server.drops[0], 30)
+        session = loop.get_audio_metrics()["session"]
+        reconnect = {
+            "switch_ms": session["last_switch_ms"],
+            "mic_flowing_ms": round((next(t for t, _ in server.uplink if t > server.drops[0])
+                                     - server.drops[0]) * 1000.0, 1),
+            "standby_hit": session["standby_hits"] == 1,
+        }
+        await wait_until(lambda: server.turns_done == len(script), 30)
+    finally:
+        loop.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    played = io.output.first_played
+    playback = [(played[tag] - t) * 1000.0 for tag, (t, _) in enumerate(downlink, 1) if tag in played]
+    return {
+        "mic_to_send_ms": summary(mic_to_send(reads_first_session, uplink_first_session)),
+        "receive_to_playback_ms": summary(playback),
+        "chunks_not_played": len(downlink) - len(playback),
+        "tool_dispatch_ms": summary(server.tool_latency_ms),
+        "reconnect": reconnect,
+        "server": server.stats(),
+        "uplink": loop.packetizer.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--audio-ms", type=float, default=1200.0, help="Model audio per turn")
+    parser.add_argument("--first-byte-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--stream-rate", type=float, default=1.0, help="Model audio streaming speed (x real time)")
+    parser.add_argument("--connect-ms", type=float, default=50.0, help="Simulated connection setup time")
+    parser.add_argument("--no-standby", action="store_true", help="Reconnect without the hot standby")
+    parser.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_bench(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{args.turns} turns, first byte {args.first_byte_ms:.0f} +/- {args.jitter_ms:.0f} ms, "
+          f"model audio at {args.stream_rate}x real time\n")
+    print(f"{'metric':<24} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for key in ("mic_to_send_ms", "receive_to_playback_ms", "tool_dispatch_ms"):
+        s = results[key]
+        if s["n"]:
+            print(f"{key[:-3]:<24} {s['n']:5d} {s['p50']:8.1f} {s['p95']:8.1f} {s['max']:8.1f}")
+        else:
+            print(f"{key[:-3]:<24} {0:5d} {'-':>8} {'-':>8} {'-':>8}")
+    print(f"\nModel chunks never played (cleared at turn end / barge-in): {results['chunks_not_played']}")
+    reconnect = results["reconnect"]
+    print(f"Reconnect ({'standby' if reconnect['standby_hit'] else 'fresh connection'}): "
+          f"switchover {reconnect['switch_ms']:.0f} ms, mic flowing after {reconnect['mic_flowing_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
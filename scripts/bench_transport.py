@@ -0,0 +1,98 @@
+"""
+Benchmark: base64-in-JSON vs binary Socket.IO attachments for bulk payloads.
+
+For typical payloads (auth camera JPEG, browser screenshot PNG, STL files)
+encodes the event the way AsyncServer.emit does, with python-socketio's
+packet encoder:
+
+- before: base64 string inside the JSON payload (b64encode + JSON encode)
+- after: bytes as a binary attachment, split into BinaryTransport chunks
+
+Reports payload bytes on the wire, server CPU per emit, and the longest
+single encode: the event loop cannot emit anything else while one packet is
+being encoded, so that is how long a large artifact stalls other events.
+
+Usage:
+    python scripts/bench_transport.py [--repeat 20] [--chunk-kb 256]
+"""
+import argparse
+import base64
+import os
+import sys
+import time
+
+from socketio import packet
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from binary_transport import CHUNK_SIZE  # noqa: E402
+
+PAYLOADS = [
+    ("auth_frame", "image", 20 * 1024),
+    ("browser_frame", "image", 300 * 1024),
+    ("cad_data", "data", 2 * 1024 * 1024),
+    ("cad_data", "data", 20 * 1024 * 1024),
+]
+
+
+def encoded_size(encoded) -> int:
+    if isinstance(encoded, list):
+        return sum(len(part) for part in encoded) + 1
+    return len(encoded) + 1
+
+
+def before(event, key, blob):
+    """(wire bytes, longest encode s) with base64 in JSON."""
+    start = time.perf_counter()
+    encoded = packet.Packet(packet.EVENT, data=[event, {key: base64.b64encode(blob).decode("utf-8")}]).encode()
+    return encoded_size(encoded), time.perf_counter() - start
+
+
+def after(event, key, blob, chunk_size):
+    """(wire bytes, longest encode s) with chunked binary attachments."""
+    total, longest = 0, 0.0
+    view = memoryview(blob)
+    count = -(-len(blob) // chunk_size) if len(blob) > chunk_size else 0
+    for index in range(count):
+        start = time.perf_counter()
+        encoded = packet.Packet(packet.EVENT, data=["binary_chunk", {
+            "id": 1, "index": index, "count": count,
+            "data": view[index * chunk_size:(index + 1) * chunk_size].tobytes()}]).encode()
+        longest = max(longest, time.perf_counter() - start)
+        total += encoded_size(encoded)
+    value = {"__chunked__": 1, "size": len(blob)} if count else blob
+    start = time.perf_counter()
+    encoded = packet.Packet(packet.EVENT, data=[event, {key: value}]).encode()
+    longest = max(longest, time.perf_counter() - start)
+    return total + encoded_size(encoded), longest
+
+
+def best(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.process_time()
+        size, longest = fn()
+        runs.append((time.process_time() - start, size, longest))
+    cpu, size, _ = min(runs)
+    return size, cpu, min(r[2] for r in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk-kb", type=int, default=CHUNK_SIZE // 1024)
+    args = parser.parse_args()
+    chunk_size = args.chunk_kb * 1024
+
+    print(f"{'event':<14} {'payload':>8} | {'b64 bytes':>10} {'cpu ms':>7} {'stall ms':>8} | "
+          f"{'bin bytes':>10} {'cpu ms':>7} {'stall ms':>8}")
+    for event, key, size in PAYLOADS:
+        blob = os.urandom(size)
+        b_size, b_cpu, b_stall = best(lambda: before(event, key, blob), args.repeat)
+        a_size, a_cpu, a_stall = best(lambda: after(event, key, blob, chunk_size), args.repeat)
+        print(f"{event:<14} {size // 1024:>6}KB | {b_size:>10} {b_cpu * 1000:>7.2f} {b_stall * 1000:>8.2f} | "
+              f"{a_size:>10} {a_cpu * 1000:>7.2f} {a_stall * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Micro-benchmark: per-chunk CPU cost of the VAD detectors vs. the original
+struct.unpack + generator RMS from AudioLoop.listen_audio.
+
+Usage:
+    python scripts/bench_vad.py [--chunks 2000] [--chunk-size 1024]
+"""
+import argparse
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from vad import VoiceActivityDetector, DETECTORS  # noqa: E402
+
+
+def legacy_rms(data):
+    """The RMS computation listen_audio used before the VAD module."""
+    count = len(data) // 2
+    if count > 0:
+        shorts = struct.unpack(f"<{count}h", data)
+        sum_squares = sum(s**2 for s in shorts)
+        return int(math.sqrt(sum_squares / count))
+    return 0
+
+
+def make_chunks(n_chunks, chunk_size, sample_rate=16000):
+    rng = np.random.default_rng(0)
+    t = np.arange(chunk_size * n_chunks) / sample_rate
+    # Alternating bursts of "speech" (tone + noise) and low noise
+    envelope = (np.sin(2 * np.pi * 0.5 * t) > 0).astype(np.float64)
+    signal = envelope * 6000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 200, t.shape)
+    pcm = np.clip(signal, -32768, 32767).astype("<i2").tobytes()
+    step = chunk_size * 2
+    return [pcm[i:i + step] for i in range(0, len(pcm), step)]
+
+
+def bench(fn, chunks):
+    start = time.perf_counter()
+    for c in chunks:
+        fn(c)
+    return (time.perf_counter() - start) / len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.chunk_size)
+    chunk_ms = args.chunk_size / 16000 * 1000
+
+    print(f"{len(chunks)} chunks of {args.chunk_size} samples ({chunk_ms:.0f} ms each)\n")
+    baseline = bench(legacy_rms, chunks)
+    print(f"{'legacy struct+generator':<26} {baseline * 1e6:9.1f} us/chunk  (1.0x)")
+
+    for name in DETECTORS:
+        vad = VoiceActivityDetector(detector=name)
+        per_chunk = bench(vad.process, chunks)
+        print(f"{'vad/' + name:<26} {per_chunk * 1e6:9.1f} us/chunk  ({baseline / per_chunk:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: socket traffic and server CPU of the playback visualizer feed.
+
+Feeds N seconds of speech-like 24 kHz playback audio, in the chunks the
+output thread writes (1024 samples), through both paths and encodes every
+emit with python-socketio's packet encoder, the way AsyncServer.emit does:
+
+- before: {'data': list(chunk)} per chunk (JSON list of byte values)
+- after: LevelMeter frames (RMS + FFT bands, uint8) as a binary attachment
+- raw: the opt-in 'audio_pcm' binary stream, for reference
+
+Bytes are WebSocket payload bytes (Engine.IO message prefix included, frame
+headers not). CPU is process time spent per second of audio, which is the
+share of one core the feed costs.
+
+Usage:
+    python scripts/bench_visualizer.py [--seconds 30] [--fps 30] [--bands 16]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from socketio import packet
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from visualizer import LevelMeter  # noqa: E402
+
+SAMPLE_RATE = 24000
+CHUNK_SAMPLES = 1024
+
+
+def speech_like(seconds: float, seed: int = 0) -> np.ndarray:
+    """Harmonics on a wandering pitch plus noise, with a syllable-rate envelope."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    signal = 4000 * envelope * voice + rng.normal(0, 300, len(t))
+    return np.clip(signal, -32768, 32767).astype("<i2")
+
+
+def wire_bytes(event: str, data) -> int:
+    """Payload bytes of one emit: Engine.IO '4' + Socket.IO packet (+ binary attachments)."""
+    encoded = packet.Packet(packet.EVENT, data=[event, data]).encode()
+    if isinstance(encoded, list):
+        return 1 + len(encoded[0]) + sum(len(b) for b in encoded[1:])
+    return 1 + len(encoded)
+
+
+def run(chunks, make_emits):
+    """(bytes, emits, cpu seconds) for feeding all chunks through make_emits."""
+    total = emits = 0
+    start = time.process_time()
+    for chunk in chunks:
+        for event, data in make_emits(chunk):
+            total += wire_bytes(event, data)
+            emits += 1
+    return total, emits, time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--bands", type=int, default=16)
+    args = parser.parse_args()
+
+    audio = speech_like(args.seconds)
+    chunks = [audio[i:i + CHUNK_SAMPLES].tobytes() for i in range(0, len(audio), CHUNK_SAMPLES)]
+    meter = LevelMeter(SAMPLE_RATE, fps=args.fps, bands=args.bands)
+
+    def before(chunk):
+        return [("audio_data", {"data": list(chunk)})]
+
+    def after(chunk):
+        levels = meter.feed(chunk)
+        return [("audio_levels", levels)] if levels is not None else []
+
+    def raw(chunk):
+        return [("audio_pcm", chunk)]
+
+    print(f"{args.seconds:.0f} s of audio, {len(chunks)} chunks of {CHUNK_SAMPLES} samples\n")
+    print(f"{'feed':<28} {'emits/s':>8} {'bytes/s':>10} {'CPU % core':>11}")
+    results = {}
+    for label, fn in (("before: JSON list per chunk", before), ("after: levels (binary)", after),
+                      ("opt-in: raw PCM (binary)", raw)):
+        total, emits, cpu = run(chunks, fn)
+        results[label] = (total, cpu)
+        print(f"{label:<28} {emits / args.seconds:>8.1f} {total / args.seconds:>10.0f} "
+              f"{100.0 * cpu / args.seconds:>10.3f}%")
+    (b_bytes, b_cpu), (a_bytes, a_cpu) = results["before: JSON list per chunk"], results["after: levels (binary)"]
+    print(f"\nlevels vs JSON list: {b_bytes / a_bytes:.0f}x fewer bytes, {b_cpu / max(a_cpu, 1e-9):.1f}x less CPU")
+
+
+if __name__ == "__main__":
+    main()
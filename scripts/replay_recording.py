@@ -0,0 +1,103 @@
+"""
+Reads a session recording (see backend/session_recorder.py) and reports the
+latency of each turn from the timestamps alone:
+
+- model:   end of user speech (VAD offset) -> first model audio received
+- speaker: end of user speech -> first model audio written to the device
+- stop:    interruption -> last speaker write that followed it
+
+Usage:
+    python scripts/replay_recording.py projects/<project>/recordings/<session>
+    python scripts/replay_recording.py <session> --events   # also dump the event log
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from session_recorder import load_recording  # noqa: E402
+
+
+def first_after(times, t):
+    i = np.searchsorted(times, t, side="right")
+    return float(times[i]) if i < len(times) else None
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+def turn_latencies(recording):
+    tracks = recording["tracks"]
+    events = recording["events"]
+    model_times = tracks["model"]["chunk_times"] if "model" in tracks else np.zeros(0)
+    speaker_times = tracks["speaker"]["chunk_times"] if "speaker" in tracks else np.zeros(0)
+
+    offsets = [e["t"] for e in events if e["type"] == "vad" and e.get("state") == "offset"]
+    turns = []
+    for i, t in enumerate(offsets):
+        # The reply has to arrive before the user's next utterance ends to count for this turn
+        horizon = offsets[i + 1] if i + 1 < len(offsets) else float("inf")
+        model = first_after(model_times, t)
+        speaker = first_after(speaker_times, t)
+        turns.append({
+            "t": t,
+            "model_ms": (model - t) * 1000.0 if model is not None and model < horizon else None,
+            "speaker_ms": (speaker - t) * 1000.0 if speaker is not None and speaker < horizon else None,
+        })
+
+    stops = []
+    for e in events:
+        if e["type"] != "interruption":
+            continue
+        i = np.searchsorted(speaker_times, e["t"], side="right")
+        # Writes already queued at the moment of the interruption still land on the device
+        last = e["t"]
+        while i < len(speaker_times) and speaker_times[i] - last < 0.1:
+            last = float(speaker_times[i])
+            i += 1
+        stops.append({"t": e["t"], "source": e.get("source"), "stop_ms": (last - e["t"]) * 1000.0})
+    return turns, stops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn latency report for a session recording")
+    parser.add_argument("directory")
+    parser.add_argument("--events", action="store_true", help="Print the event log")
+    args = parser.parse_args()
+
+    recording = load_recording(args.directory)
+    meta = recording["meta"]
+    print(f"Session: {args.directory} ({meta['duration_s']:.1f} s, {meta['events']} events)")
+    for name, track in recording["tracks"].items():
+        seconds = len(track["pcm"]) / track["sample_rate"]
+        print(f"  {name:8s} {seconds:7.1f} s  {len(track['chunk_times']):6d} chunks")
+
+    if args.events:
+        for e in recording["events"]:
+            fields = {k: v for k, v in e.items() if k not in ("t", "type")}
+            print(f"  {e['t']:8.3f}  {e['type']:14s} {fields}")
+
+    turns, stops = turn_latencies(recording)
+    print(f"\n{'turn':>4s}  {'at (s)':>8s}  {'model ms':>9s}  {'speaker ms':>10s}")
+    for n, turn in enumerate(turns, 1):
+        model = f"{turn['model_ms']:.0f}" if turn["model_ms"] is not None else "-"
+        speaker = f"{turn['speaker_ms']:.0f}" if turn["speaker_ms"] is not None else "-"
+        print(f"{n:4d}  {turn['t']:8.2f}  {model:>9s}  {speaker:>10s}")
+
+    model = [t["model_ms"] for t in turns if t["model_ms"] is not None]
+    speaker = [t["speaker_ms"] for t in turns if t["speaker_ms"] is not None]
+    print(f"\nmodel   p50 {percentile(model, 50):.0f} ms  p95 {percentile(model, 95):.0f} ms  ({len(model)} turns)")
+    print(f"speaker p50 {percentile(speaker, 50):.0f} ms  p95 {percentile(speaker, 95):.0f} ms  ({len(speaker)} turns)")
+
+    if stops:
+        print("\nInterruptions:")
+        for stop in stops:
+            print(f"  {stop['t']:8.2f} s  {stop['source']:13s} speaker stopped after {stop['stop_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,11 @@ import SettingsWindow from './components/SettingsWindow';
 
 const socket = io('http://localhost:8000');
 import { shell } from './utils/shellAdapter';
+import { attachBinaryTransport, resolveBinary, imageUrl } from './utils/binaryTransport';
+attachBinaryTransport(socket);
+
+// Topic events this window renders (the backend only sends these to subscribers; AuthLock adds 'auth')
+const APP_TOPICS = ['printers', 'kasa', 'browser', 'audio_viz'];
 // const { ipcRenderer } = window.require('electron');
 
 function App() {
@@ -55,7 +60,7 @@ function App() {
     const [cadRetryInfo, setCadRetryInfo] = useState({ attempt: 1, maxAttempts: 3, error: null }); // Retry status
     const [browserData, setBrowserData] = useState({ image: null, logs: [] });
     // showMemoryPrompt removed - memory is now actively saved to project
-    const [confirmationRequest, setConfirmationRequest] = useState(null); // { id, tool, args }
+    const [confirmationRequests, setConfirmationRequests] = useState([]); // Queue of { id, tool, args, timeout }
     const [kasaDevices, setKasaDevices] = useState([]);
     const [showKasaWindow, setShowKasaWindow] = useState(false);
     const [showPrinterWindow, setShowPrinterWindow] = useState(false);
@@ -70,7 +75,7 @@ function App() {
 
 
     // RESTORED STATE
-    const [aiAudioData, setAiAudioData] = useState(new Array(64).fill(0));
+    const [aiAudioData, setAiAudioData] = useState(new Array(16).fill(0));
     const [micAudioData, setMicAudioData] = useState(new Array(32).fill(0));
     const [fps, setFps] = useState(0);
 
@@ -320,6 +325,7 @@ function App() {
         socket.on('connect', () => {
             setStatus('Connected');
             setSocketConnected(true);
+            socket.emit('subscribe', { topics: APP_TOPICS }); // Rooms are per connection: renew on reconnect
             socket.emit('get_settings');
         });
         socket.on('disconnect', () => {
@@ -335,8 +341,10 @@ function App() {
                 setStatus('Connected');
             }
         });
-        socket.on('audio_data', (data) => {
-            setAiAudioData(data.data);
+        socket.on('audio_levels', (data) => {
+            // Binary frame: [rms, band 1..n] as uint8 (computed on the server)
+            const levels = new Uint8Array(data);
+            setAiAudioData(Array.from(levels.subarray(1)));
         });
         socket.on('auth_status', (data) => {
             console.log("Auth Status:", data);
@@ -372,7 +380,8 @@ function App() {
             console.error("Socket Error:", data);
             addMessage('System', `Error: ${data.msg}`);
         });
-        socket.on('cad_data', (data) => {
+        socket.on('cad_data', (payload) => {
+            const data = resolveBinary(payload); // STL arrives as an ArrayBuffer (chunked if large)
             console.log("Received CAD Data:", data);
             setCadData(data);
             setCadThoughts(''); // Clear thoughts when generation complete
@@ -421,9 +430,10 @@ function App() {
             // Append streaming thought text
             setCadThoughts(prev => prev + data.text);
         });
-        socket.on('browser_frame', (data) => {
+        socket.on('browser_frame', (payload) => {
+            const data = resolveBinary(payload);
             setBrowserData(prev => ({
-                image: data.image,
+                image: imageUrl(data.image, 'image/png', prev.image),
                 logs: [...prev.logs, data.log].filter(l => l).slice(-50) // Keep last 50 logs
             }));
             setShowBrowserWindow(true);
@@ -467,7 +477,13 @@ function App() {
         // Handle tool confirmation requests
         socket.on('tool_confirmation_request', (data) => {
             console.log("Received Confirmation Request:", data);
-            setConfirmationRequest(data);
+            setConfirmationRequests(prev => [...prev, data]);
+        });
+
+        // Backend auto-denied a request nobody answered in time
+        socket.on('tool_confirmation_expired', (data) => {
+            console.log("Confirmation Request expired:", data.id);
+            setConfirmationRequests(prev => prev.filter(r => r.id !== data.id));
         });
 
         // Handle Print Window Request (from CadWindow)
@@ -621,13 +637,14 @@ function App() {
             socket.off('connect');
             socket.off('disconnect');
             socket.off('status');
-            socket.off('audio_data');
+            socket.off('audio_levels');
             socket.off('cad_data');
             socket.off('cad_thought');
             socket.off('cad_status');
             socket.off('browser_frame');
             socket.off('transcription');
             socket.off('tool_confirmation_request');
+            socket.off('tool_confirmation_expired');
             socket.off('kasa_devices');
             socket.off('printer_list');
             socket.off('slicing_progress');
@@ -643,6 +660,7 @@ function App() {
     useEffect(() => {
         if (socket.connected) {
             setStatus('Connected');
+            socket.emit('subscribe', { topics: APP_TOPICS });
             socket.emit('get_settings');
         }
     }, []);
@@ -662,6 +680,32 @@ function App() {
         }
     }, [selectedSpeakerId]);
 
+    // Hot-swap backend audio devices when the selection changes mid-session
+    // (only the PyAudio streams are reopened, the Live session keeps running)
+    const lastMicIdRef = useRef(selectedMicId);
+    useEffect(() => {
+        if (!selectedMicId || selectedMicId === lastMicIdRef.current) return;
+        lastMicIdRef.current = selectedMicId;
+        if (!hasAutoConnectedRef.current) return;
+        const index = micDevices.findIndex(d => d.deviceId === selectedMicId);
+        const device = micDevices[index];
+        socket.emit('switch_input_device', {
+            device_index: index >= 0 ? index : null,
+            device_name: device ? device.label : null
+        });
+    }, [selectedMicId]);
+
+    const lastSpeakerIdRef = useRef(selectedSpeakerId);
+    useEffect(() => {
+        if (!selectedSpeakerId || selectedSpeakerId === lastSpeakerIdRef.current) return;
+        lastSpeakerIdRef.current = selectedSpeakerId;
+        if (!hasAutoConnectedRef.current) return;
+        const device = speakerDevices.find(d => d.deviceId === selectedSpeakerId);
+        socket.emit('switch_output_device', {
+            device_name: device ? device.label : null
+        });
+    }, [selectedSpeakerId]);
+
     useEffect(() => {
         if (selectedWebcamId) {
             localStorage.setItem('selectedWebcamId', selectedWebcamId);
@@ -1160,19 +1204,17 @@ function App() {
 
     // handleCancelClose removed - no longer using memory prompt
 
-    const handleConfirmTool = () => {
-        if (confirmationRequest) {
-            socket.emit('confirm_tool', { id: confirmationRequest.id, confirmed: true });
-            setConfirmationRequest(null);
+    const answerConfirmation = (confirmed) => {
+        const request = confirmationRequests[0];
+        if (request) {
+            socket.emit('confirm_tool', { id: request.id, confirmed });
+            setConfirmationRequests(prev => prev.filter(r => r.id !== request.id));
         }
     };
 
-    const handleDenyTool = () => {
-        if (confirmationRequest) {
-            socket.emit('confirm_tool', { id: confirmationRequest.id, confirmed: false });
-            setConfirmationRequest(null);
-        }
-    };
+    const handleConfirmTool = () => answerConfirmation(true);
+
+    const handleDenyTool = () => answerConfirmation(false);
 
     // Updated Bounds Checking Logic
     const updateElementPosition = (id, dx, dy) => {
@@ -1687,7 +1729,8 @@ function App() {
 
                 {/* Tool Confirmation Modal */}
                 <ConfirmationPopup
-                    request={confirmationRequest}
+                    request={confirmationRequests[0]}
+                    queued={confirmationRequests.length - 1}
                     onConfirm={handleConfirmTool}
                     onDeny={handleDenyTool}
                 />
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Lock, Unlock, User } from 'lucide-react';
+import { imageUrl } from '../utils/binaryTransport';
 
 const AuthLock = ({ socket, onAuthenticated, onAnimationComplete }) => {
     const [frameSrc, setFrameSrc] = useState(null);
@@ -26,7 +27,7 @@ const AuthLock = ({ socket, onAuthenticated, onAnimationComplete }) => {
         };
 
         const handleAuthFrame = (data) => {
-            setFrameSrc(`data:image/jpeg;base64,${data.image}`);
+            setFrameSrc(prev => imageUrl(data.image, 'image/jpeg', prev));
         };
 
         socket.on('auth_status', handleAuthStatus);
@@ -38,6 +39,18 @@ const AuthLock = ({ socket, onAuthenticated, onAnimationComplete }) => {
         };
     }, [socket, onAuthenticated, onAnimationComplete, isUnlocking]);
 
+    // Camera frames are only sent to subscribed clients, and only while the lock screen is shown
+    useEffect(() => {
+        if (!socket) return;
+        const subscribe = () => socket.emit('subscribe', { topics: ['auth'] });
+        subscribe();
+        socket.on('connect', subscribe);
+        return () => {
+            socket.off('connect', subscribe);
+            socket.emit('unsubscribe', { topics: ['auth'] });
+        };
+    }, [socket]);
+
     const themeColor = isUnlocking ? 'text-green-500' : 'text-cyan-500';
     const borderColor = isUnlocking ? 'border-green-500' : 'border-cyan-500';
     const shadowColor = isUnlocking ? 'shadow-[0_0_50px_rgba(34,197,94,0.4)]' : 'shadow-[0_0_50px_rgba(34,211,238,0.2)]';
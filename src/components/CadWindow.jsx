@@ -50,17 +50,20 @@ const CadWindow = ({ data, thoughts, retryInfo = {}, onClose, socket }) => {
         if (!data || data.format !== 'stl' || !data.data) return null;
 
         try {
-            // Convert Base64 to ArrayBuffer
-            const byteCharacters = atob(data.data);
-            const byteNumbers = new Array(byteCharacters.length);
-            for (let i = 0; i < byteCharacters.length; i++) {
-                byteNumbers[i] = byteCharacters.charCodeAt(i);
+            // The backend sends the STL as a binary attachment (ArrayBuffer); base64 is still accepted
+            let buffer = data.data;
+            if (typeof buffer === 'string') {
+                const byteCharacters = atob(buffer);
+                const byteArray = new Uint8Array(byteCharacters.length);
+                for (let i = 0; i < byteCharacters.length; i++) {
+                    byteArray[i] = byteCharacters.charCodeAt(i);
+                }
+                buffer = byteArray.buffer;
             }
-            const byteArray = new Uint8Array(byteNumbers);
 
             // Parse directly using THREE.STLLoader
             const loader = new STLLoader();
-            const geom = loader.parse(byteArray.buffer);
+            const geom = loader.parse(buffer);
             geom.center(); // Optional: Center the geometry
             return geom;
         } catch (e) {
@@ -1,6 +1,6 @@
 import React from 'react';
 
-const ConfirmationPopup = ({ request, onConfirm, onDeny }) => {
+const ConfirmationPopup = ({ request, queued = 0, onConfirm, onDeny }) => {
     if (!request) return null;
 
     return (
@@ -18,7 +18,7 @@ const ConfirmationPopup = ({ request, onConfirm, onDeny }) => {
                             AUTHORIZATION REQUIRED
                         </h2>
                         <p className="text-xs text-cyan-600 font-mono tracking-widest uppercase">
-                            AI Logic Core Request
+                            AI Logic Core Request{queued > 0 ? ` (+${queued} more waiting)` : ''}
                         </p>
                     </div>
                 </div>
@@ -27,6 +27,7 @@ const ConfirmationPopup = ({ request, onConfirm, onDeny }) => {
                 <div className="mb-8 space-y-4 relative z-10">
                     <p className="text-gray-300 leading-relaxed text-sm">
                         The system is requesting permission to execute an autonomous function. Please review the parameters below.
+                        {request.timeout ? ` Unanswered requests are denied after ${Math.round(request.timeout)} seconds.` : ''}
                     </p>
 
                     <div className="space-y-2">
@@ -0,0 +1,62 @@
+/**
+ * Binary Transport
+ * Receiving side of backend/binary_transport.py. Bulk payloads (frames, STL)
+ * arrive as binary attachments (ArrayBuffer) instead of base64 strings.
+ * Payloads above the server's chunk size are streamed first as 'binary_chunk'
+ * events and referenced from the event by {__chunked__: id}.
+ */
+
+const pending = new Map(); // transfer id -> { parts, received }
+const attached = new WeakSet();
+
+export const attachBinaryTransport = (socket) => {
+    if (attached.has(socket)) return;
+    attached.add(socket);
+    socket.on('binary_chunk', ({ id, index, count, data }) => {
+        let entry = pending.get(id);
+        if (!entry) {
+            entry = { parts: new Array(count), received: 0 };
+            pending.set(id, entry);
+        }
+        entry.parts[index] = new Uint8Array(data);
+        entry.received += 1;
+    });
+};
+
+const assemble = (id) => {
+    const entry = pending.get(id);
+    pending.delete(id);
+    if (!entry || entry.received !== entry.parts.length) {
+        console.error(`Binary transfer ${id} incomplete`);
+        return null;
+    }
+    const size = entry.parts.reduce((n, part) => n + part.byteLength, 0);
+    const out = new Uint8Array(size);
+    let offset = 0;
+    for (const part of entry.parts) {
+        out.set(part, offset);
+        offset += part.byteLength;
+    }
+    return out.buffer;
+};
+
+// Replaces chunked-transfer references in an event payload with their ArrayBuffers
+export const resolveBinary = (data) => {
+    if (!data || typeof data !== 'object') return data;
+    let out = data;
+    for (const [key, value] of Object.entries(data)) {
+        if (value && typeof value === 'object' && value.__chunked__ !== undefined) {
+            if (out === data) out = { ...data };
+            out[key] = assemble(value.__chunked__);
+        }
+    }
+    return out;
+};
+
+// Object URL for a binary image (revokes the previous one); base64 strings from older backends still work
+export const imageUrl = (image, type, previous) => {
+    if (previous && previous.startsWith('blob:')) URL.revokeObjectURL(previous);
+    if (!image) return null;
+    if (typeof image === 'string') return `data:${type};base64,${image}`;
+    return URL.createObjectURL(new Blob([image], { type }));
+};
@@ -36,6 +36,31 @@ def printers(settings):
     return settings.get("printers", [])
 
 
+@pytest.fixture
+def isolated_projects(tmp_path, monkeypatch):
+    """Makes the ProjectManager that AudioLoop builds use tmp_path instead of the repo's projects/."""
+    import project_manager
+    real = project_manager.ProjectManager
+    monkeypatch.setattr(project_manager, "ProjectManager", lambda workspace_root: real(str(tmp_path)))
+    return tmp_path / "projects"
+
+
+class FakeClock:
+    """Manually advanced clock for code that takes a `clock` callable."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    """FakeClock factory: fake_clock() starts at 0, fake_clock(start) elsewhere (e.g. in ns)."""
+    return FakeClock
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """Provide a temporary directory for file operations."""
@@ -0,0 +1,116 @@
+"""
+Tests for the acoustic echo canceller and its far-end reference.
+"""
+import numpy as np
+import pytest
+
+from aec import CaptureTimeline, EchoCanceller, FarEndReference
+
+RATE = 16000
+
+
+def echo_pair(seconds=4.0, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE)
+    far = np.convolve(rng.normal(0, 3000, n), [1.0, 0.6, 0.3], mode="same")
+    ir = np.zeros(1200)
+    ir[480:1080] = rng.normal(0, 1, 600) * np.exp(-np.arange(600) / 100) * 0.05
+    return far, np.convolve(far, ir)[:n] + rng.normal(0, 30, n)
+
+
+class TestEchoCanceller:
+    """Test echo removal and double-talk handling."""
+
+    def test_converges_on_synthetic_echo(self):
+        """Test a delayed, reverberant echo is attenuated by more than 20 dB."""
+        far, near = echo_pair()
+        aec = EchoCanceller(RATE)
+        out = np.concatenate([aec.process(near[i:i + 1024], far[i:i + 1024]).copy()
+                              for i in range(0, len(near), 1024)])
+        tail = slice(3 * RATE, 4 * RATE)
+        erle = 10 * np.log10(np.mean(near[tail] ** 2) / np.mean(out[tail] ** 2))
+        assert erle > 20
+        assert aec.stats()["erle_db"] > 20
+
+    def test_near_end_passes_without_far_end(self):
+        """Test the mic signal is untouched when nothing is playing."""
+        aec = EchoCanceller(RATE)
+        near = np.random.default_rng(1).normal(0, 2000, 1024)
+        out = aec.process(near, np.zeros(1024))
+        np.testing.assert_allclose(out, near)
+        assert aec.adapted_blocks == 0
+
+    def test_double_talk_freezes_adaptation(self):
+        """Test a loud near-end talker is detected as double-talk."""
+        aec = EchoCanceller(RATE)
+        rng = np.random.default_rng(2)
+        aec.process(rng.normal(0, 10000, 1024), rng.normal(0, 1000, 1024))
+        assert aec.double_talk
+        assert aec.adapted_blocks == 0
+
+    def test_partial_blocks_are_carried(self):
+        """Test chunks that are not a multiple of the block size lose no samples."""
+        aec = EchoCanceller(RATE, block=256)
+        assert len(aec.process(np.zeros(1000), np.zeros(1000))) == 768
+        assert len(aec.process(np.zeros(1000), np.zeros(1000))) == 1024
+
+
+    def test_uneven_chunks_reuse_the_output_buffer(self):
+        """Test varying chunk sizes (44.1 kHz capture) give the same result without reallocating."""
+        far, near = echo_pair(seconds=1.0)
+        reference = EchoCanceller(RATE)
+        expected = np.concatenate([reference.process(near[i:i + 1024], far[i:i + 1024]).copy()
+                                   for i in range(0, len(near), 1024)])
+
+        aec = EchoCanceller(RATE)
+        sizes = [372, 371, 372, 371, 371] * 40  # 1024 frames at 44.1 kHz, resampled
+        pos, out, buffers = 0, [], set()
+        for i, n in enumerate(sizes):
+            block = aec.process(near[pos:pos + n], far[pos:pos + n])
+            if i >= 10:  # Grown to the largest output by now
+                buffers.add(block.base.ctypes.data if block.base is not None else block.ctypes.data)
+            out.append(block.copy())
+            pos += n
+        out = np.concatenate(out)
+        np.testing.assert_allclose(out, expected[:len(out)])
+        assert len(buffers) == 1
+
+
+class TestFarEndReference:
+    """Test the time-addressed playback reference."""
+
+    def test_read_is_aligned_to_audible_time(self, fake_clock):
+        """Test reads return far-end audio at its audible time and zeros elsewhere."""
+        clock = fake_clock()
+        ref = FarEndReference(RATE, source_rate=RATE, clock=clock)
+        chunk = np.full(1600, 1000, dtype="<i2").tobytes()  # 100 ms
+        ref.write(chunk, audible_at=0.5)
+
+        out = np.zeros(3200)
+        assert ref.read(0.45, out)
+        assert np.all(out[:800 - 30] == 0)  # Before it plays (minus resampler ramp)
+        assert np.all(np.abs(out[900:2300] - 1000) < 1)
+        assert np.all(out[2400 + 30:] == 0)
+        assert not ref.read(2.0, out)
+
+    def test_truncate_drops_unplayed_audio(self, fake_clock):
+        """Test audio after a flush point is forgotten."""
+        clock = fake_clock()
+        ref = FarEndReference(RATE, source_rate=RATE, clock=clock)
+        ref.write(np.full(16000, 1000, dtype="<i2").tobytes(), audible_at=0.0)
+        ref.truncate(0.5)
+        out = np.zeros(1600)
+        assert not ref.read(0.6, out)
+
+
+class TestCaptureTimeline:
+    """Test mic chunk timestamps."""
+
+    def test_counts_samples_and_reanchors_on_gap(self, fake_clock):
+        """Test read jitter is ignored but a real gap re-anchors."""
+        clock = fake_clock()
+        tl = CaptureTimeline(RATE, input_latency=0.01, clock=clock)
+        assert tl.chunk_start(1600, now=0.11) == pytest.approx(0.0)
+        assert tl.chunk_start(1600, now=0.215) == pytest.approx(0.1)  # 5 ms jitter
+        assert tl.chunk_start(1600, now=1.11) == pytest.approx(1.0)
+        assert tl.reanchors == 1
@@ -0,0 +1,160 @@
+"""
+Tests for the preallocated audio buffers.
+"""
+import pytest
+
+from audio_buffers import PcmRingBuffer, PlaybackJitterBuffer, DROP_OLDEST, DROP_NEWEST
+
+FRAME = 8
+
+
+def chunk(value, n=FRAME):
+    return bytes([value]) * n
+
+
+class TestPcmRingBuffer:
+    """Test the mic -> sender ring buffer."""
+
+    def test_write_and_read_whole_frames(self):
+        """Test frames come out in order and partial frames are held back."""
+        ring = PcmRingBuffer(capacity=4 * FRAME, frame_size=FRAME)
+        ring.write(chunk(1) + chunk(2)[:4])
+        assert ring.read_frame() == chunk(1)
+        assert ring.read_frame() is None
+        assert ring.underruns == 1
+
+        ring.write(chunk(2)[4:])
+        assert ring.read_frame() == chunk(2)
+
+    def test_wraparound(self):
+        """Test data written across the end of the ring is read back intact."""
+        ring = PcmRingBuffer(capacity=3 * FRAME, frame_size=FRAME)
+        for i in range(10):
+            ring.write(chunk(i))
+            assert ring.read_frame() == chunk(i)
+        assert ring.overruns == 0
+
+    def test_drop_oldest(self):
+        """Test overflow discards the oldest frames and counts them."""
+        ring = PcmRingBuffer(capacity=2 * FRAME, frame_size=FRAME, overflow=DROP_OLDEST)
+        ring.write(chunk(1))
+        ring.write(chunk(2))
+        dropped = ring.write(chunk(3))
+        assert dropped == FRAME
+        assert ring.overruns == 1
+        assert ring.read_frame() == chunk(2)
+        assert ring.read_frame() == chunk(3)
+
+    def test_drop_newest(self):
+        """Test overflow discards the incoming chunk."""
+        ring = PcmRingBuffer(capacity=2 * FRAME, frame_size=FRAME, overflow=DROP_NEWEST)
+        ring.write(chunk(1))
+        ring.write(chunk(2))
+        assert ring.write(chunk(3)) == FRAME
+        assert ring.read_frame() == chunk(1)
+        assert ring.read_frame() == chunk(2)
+        assert ring.stats()["dropped_bytes"] == FRAME
+
+    def test_read_into_reuses_buffer(self):
+        """Test read_into fills a caller-owned buffer."""
+        ring = PcmRingBuffer(capacity=2 * FRAME, frame_size=FRAME)
+        out = bytearray(FRAME)
+        ring.write(chunk(7))
+        assert ring.read_into(out)
+        assert out == chunk(7)
+
+    def test_read_frames_coalesces(self):
+        """Test several whole frames are returned as one contiguous packet."""
+        ring = PcmRingBuffer(capacity=3 * FRAME, frame_size=FRAME)
+        ring.write(chunk(1))
+        ring.write(chunk(2))
+        assert ring.read_frames(3) is None
+        assert ring.read_frames(2) == chunk(1) + chunk(2)
+        assert ring.underruns == 1
+
+    def test_read_frames_across_the_wrap(self):
+        """Test a multi-frame read that spans the end of the ring comes back as one bytes object."""
+        ring = PcmRingBuffer(capacity=3 * FRAME, frame_size=FRAME)
+        ring.write(chunk(1))
+        ring.write(chunk(2))
+        assert ring.read_frame() == chunk(1)
+        ring.write(chunk(3))  # Lands at the start of the ring
+        packet = ring.read_frames(2)
+        assert type(packet) is bytes
+        assert packet == chunk(2) + chunk(3)
+
+    def test_invalid_policy(self):
+        """Test an unknown overflow policy is rejected."""
+        with pytest.raises(ValueError):
+            PcmRingBuffer(capacity=FRAME, frame_size=FRAME, overflow="drop_random")
+
+
+# 24 kHz 16-bit mono: 48 bytes per ms
+def ms(duration):
+    return bytes(int(48 * duration))
+
+
+class TestPlaybackJitterBuffer:
+    """Test the playback jitter buffer."""
+
+    def test_primes_to_target_depth(self, fake_clock):
+        """Test playback waits for the target depth before starting."""
+        clock = fake_clock()
+        jb = PlaybackJitterBuffer(target_ms=100, clock=clock)
+        jb.put(ms(40))
+        assert jb.pop() is None
+        assert jb.ready_in() == pytest.approx(0.1)
+        jb.put(ms(60))
+        assert jb.pop() is not None
+
+    def test_prime_deadline(self, fake_clock):
+        """Test a short utterance still plays once the target time has passed."""
+        clock = fake_clock()
+        jb = PlaybackJitterBuffer(target_ms=100, clock=clock)
+        jb.put(ms(20))
+        clock.now = 0.1
+        assert jb.pop() is not None
+        assert jb.stats()["prime_wait_ms"] == pytest.approx(100)
+
+    def test_late_chunks_dropped(self, fake_clock):
+        """Test chunks far behind schedule are skipped to catch up."""
+        clock = fake_clock()
+        jb = PlaybackJitterBuffer(target_ms=0, late_ms=100, clock=clock)
+        for _ in range(10):
+            jb.put(ms(50))
+        assert jb.pop() is not None
+        # Device stalls for 300 ms: the next 5 chunks (250 ms) are late
+        clock.now = 0.35
+        assert jb.pop() is not None
+        assert jb.late_drops == 4
+        assert jb.stats()["lag_ms"] <= 100
+
+    def test_gap_is_not_lateness(self, fake_clock):
+        """Test running dry re-anchors the schedule instead of dropping new audio."""
+        clock = fake_clock()
+        jb = PlaybackJitterBuffer(target_ms=0, late_ms=100, clock=clock)
+        jb.put(ms(50))
+        assert jb.pop() is not None
+        assert jb.pop() is None
+        clock.now = 5.0
+        jb.put(ms(50))
+        assert jb.pop() is not None
+        assert jb.late_drops == 0
+        assert jb.underruns == 1
+
+    def test_bounded_maximum(self, fake_clock):
+        """Test buffered audio never exceeds max_ms."""
+        jb = PlaybackJitterBuffer(max_ms=200, clock=fake_clock())
+        for _ in range(10):
+            jb.put(ms(50))
+        assert jb.depth_ms <= 200
+        assert jb.overflow_drops == 6
+
+    def test_clear(self, fake_clock):
+        """Test clear drops everything and reports the count."""
+        jb = PlaybackJitterBuffer(clock=fake_clock())
+        jb.put(ms(50))
+        jb.put(ms(50))
+        assert jb.clear() == 2
+        assert len(jb) == 0
+        assert jb.depth_ms == 0
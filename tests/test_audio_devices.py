@@ -0,0 +1,178 @@
+"""
+Tests for the cached audio device registry and live device switching.
+"""
+import asyncio
+import time
+
+import pytest
+
+from audio_devices import DeviceRegistry, INPUT, OUTPUT
+
+
+class FakeStream:
+    def __init__(self, rate=16000, **kwargs):
+        self.rate = rate
+        self.kwargs = kwargs
+        self.closed = False
+
+    def read(self, n, **kwargs):
+        time.sleep(n / self.rate)
+        return bytes(n * 2)
+
+    def write(self, data):
+        time.sleep(len(data) / 2 / self.rate)
+
+    def get_input_latency(self):
+        return 0.01
+
+    def get_output_latency(self):
+        return 0.02
+
+    def stop_stream(self):
+        pass
+
+    def start_stream(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio:
+    """PortAudio stand-in with a mutable device list."""
+
+    instances = 0
+    devices = [
+        {"name": "Built-in Microphone", "maxInputChannels": 1, "maxOutputChannels": 0, "defaultSampleRate": 48000.0},
+        {"name": "Built-in Output", "maxInputChannels": 0, "maxOutputChannels": 2, "defaultSampleRate": 48000.0},
+    ]
+
+    def __init__(self):
+        FakePyAudio.instances += 1
+        self.snapshot = [dict(d, index=i) for i, d in enumerate(FakePyAudio.devices)]
+        self.info_calls = 0
+        self.streams = []
+
+    def get_device_count(self):
+        return len(self.snapshot)
+
+    def get_device_info_by_index(self, i):
+        self.info_calls += 1
+        return self.snapshot[i]
+
+    def get_default_input_device_info(self):
+        return self.snapshot[0]
+
+    def get_default_output_device_info(self):
+        return self.snapshot[1]
+
+    def open(self, **kwargs):
+        stream = FakeStream(**kwargs)
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        pass
+
+
+@pytest.fixture
+def fake_devices():
+    saved = list(FakePyAudio.devices)
+    yield FakePyAudio.devices
+    FakePyAudio.devices[:] = saved
+
+
+class TestDeviceRegistry:
+    """Test caching, lookup and rescans."""
+
+    def test_lazy_and_cached(self, fake_devices):
+        """Test PortAudio is created on first use and lookups hit the cache."""
+        FakePyAudio.instances = 0
+        registry = DeviceRegistry(FakePyAudio)
+        assert FakePyAudio.instances == 0
+        assert [d["name"] for d in registry.devices(INPUT)] == ["Built-in Microphone"]
+        calls = registry.pa.info_calls
+        for _ in range(10):
+            registry.find("built-in output", OUTPUT)
+            registry.devices(OUTPUT)
+        assert registry.pa.info_calls == calls
+        assert FakePyAudio.instances == 1
+
+    def test_resolve_by_name_index_and_default(self, fake_devices):
+        """Test name match (substring either way), index fallback and default."""
+        registry = DeviceRegistry(FakePyAudio)
+        assert registry.resolve(INPUT, "Microphone")["index"] == 0
+        assert registry.resolve(INPUT, "Built-in Microphone (Default)")["index"] == 0
+        assert registry.resolve(OUTPUT, None, 1)["name"] == "Built-in Output"
+        assert registry.resolve(INPUT, "missing")["index"] == 0  # Default
+
+    def test_rescan_on_miss_finds_hotplugged_device(self, fake_devices):
+        """Test a device plugged in after the scan is found after a rescan."""
+        registry = DeviceRegistry(FakePyAudio)
+        registry.devices()
+        fake_devices.append({"name": "USB Headset", "maxInputChannels": 1, "maxOutputChannels": 2,
+                             "defaultSampleRate": 44100.0})
+        assert registry.find("USB Headset", INPUT) is None
+        device = registry.resolve(INPUT, "USB Headset", rescan_on_miss=True)
+        assert device["name"] == "USB Headset"
+        assert registry.stats()["rescans"] == 1
+        assert registry.generation == 2
+
+
+class TestDeviceSwitch:
+    """Test AudioLoop hot-swapping streams without a reconnect."""
+
+    def test_switch_input_and_output(self, fake_devices, monkeypatch, isolated_projects):
+        """Test streams are replaced in place and the switch takes milliseconds."""
+        ada = pytest.importorskip("ada")
+        fake_devices.append({"name": "USB Headset", "maxInputChannels": 1, "maxOutputChannels": 2,
+                             "defaultSampleRate": 16000.0})
+        monkeypatch.setattr(ada, "audio_devices", DeviceRegistry(FakePyAudio))
+        monkeypatch.setattr(ada, "abort_output_stream", lambda stream: None)
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none")
+            await loop.listen_audio()
+            await loop.play_audio()
+            old_in, old_out = loop._input_thread, loop._output_thread
+            mic_buffer = loop.mic_buffer
+
+            result = await loop.switch_input_device("USB Headset")
+            assert result["ok"] and result["device"] == "USB Headset"
+            assert not old_in.is_alive() and old_in.stream.closed
+            assert loop._output_thread is old_out  # Playback untouched
+
+            result = await loop.switch_output_device("USB Headset")
+            assert result["ok"]
+            assert not old_out.is_alive()
+            assert loop.mic_buffer is mic_buffer
+            assert loop.get_audio_metrics()["devices"]["switch_ms"]["input"] < 500
+            loop._stop_audio_threads()
+
+        asyncio.run(scenario())
+
+    def test_rescan_skipped_while_a_stream_is_busy(self, monkeypatch, isolated_projects):
+        """Test PortAudio is not re-initialized while an audio thread is still blocked in read/write."""
+        ada = pytest.importorskip("ada")
+        registry = DeviceRegistry(FakePyAudio)
+        monkeypatch.setattr(ada, "audio_devices", registry)
+
+        class StuckThread:
+            name = "audio-input"
+
+            def stop(self):
+                pass
+
+            def join(self, timeout=None):
+                pass
+
+            def is_alive(self):
+                return True
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none")
+            loop._input_thread = StuckThread()
+            return await loop._rescan_devices()
+
+        assert asyncio.run(scenario()) is False
+        assert registry.rescans == 0
@@ -0,0 +1,201 @@
+"""
+Tests for the dedicated audio I/O threads.
+"""
+import threading
+import time
+
+import pytest
+
+from audio_buffers import PlaybackJitterBuffer
+from audio_io import AudioInputThread, AudioOutputThread, PlaybackClock, EchoGate
+
+
+class FakeStream:
+    """Minimal stand-in for a PyAudio blocking stream."""
+
+    def __init__(self, chunk_seconds=0.001, write_seconds=0.0):
+        self.chunk_seconds = chunk_seconds
+        self.write_seconds = write_seconds
+        self.written = []
+        self.closed = False
+        self.started = 0
+
+    def read(self, n, **kwargs):
+        time.sleep(self.chunk_seconds)
+        return bytes(n * 2)
+
+    def write(self, data):
+        time.sleep(self.write_seconds)
+        self.written.append(bytes(data))
+
+    def stop_stream(self):
+        pass
+
+    def start_stream(self):
+        self.started += 1
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class TestAudioInputThread:
+    """Test the capture thread."""
+
+    def test_reads_until_stopped_and_closes_stream(self):
+        """Test chunks are delivered and the thread closes its own stream."""
+        chunks = []
+        enabled = threading.Event()
+        enabled.set()
+        stream = FakeStream()
+        thread = AudioInputThread(stream, 16, on_chunk=chunks.append, enabled=enabled)
+        thread.start()
+        assert wait_for(lambda: len(chunks) >= 3)
+        thread.stop()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+        assert stream.closed
+        assert chunks[0] == bytes(32)
+
+    def test_pause_blocks_on_event(self):
+        """Test no reads happen while the enabled event is cleared."""
+        chunks = []
+        enabled = threading.Event()
+        thread = AudioInputThread(FakeStream(), 16, on_chunk=chunks.append, enabled=enabled)
+        thread.start()
+        time.sleep(0.05)
+        assert chunks == []
+        enabled.set()
+        assert wait_for(lambda: len(chunks) > 0)
+        thread.stop()
+        thread.join(timeout=2)
+
+
+class TestAudioOutputThread:
+    """Test the playback thread."""
+
+    def test_drains_jitter_buffer(self):
+        """Test queued chunks are written in order and drain is reported."""
+        source = PlaybackJitterBuffer(target_ms=0)
+        ready = threading.Event()
+        drained = threading.Event()
+        stream = FakeStream()
+        thread = AudioOutputThread(stream, source, ready, on_drained=drained.set)
+        thread.start()
+
+        for i in range(3):
+            source.put(bytes([i]) * 48)
+        ready.set()
+
+        assert drained.wait(timeout=2)
+        assert wait_for(lambda: len(stream.written) == 3)
+        assert [c[0] for c in stream.written] == [0, 1, 2]
+        thread.stop()
+        ready.set()
+        thread.join(timeout=2)
+        assert stream.closed
+
+    def test_flush_drops_in_flight_chunk(self):
+        """Test flush cuts the current chunk short, aborts the device and times it."""
+        source = PlaybackJitterBuffer(target_ms=0)
+        ready = threading.Event()
+        clock = PlaybackClock(sample_rate=24000)
+        aborted = []
+        flushed = threading.Event()
+        stream = FakeStream(write_seconds=0.01)
+        thread = AudioOutputThread(stream, source, ready, playback_clock=clock,
+                                   abort_stream=aborted.append, on_flush=flushed.set, slice_bytes=960)
+        thread.start()
+
+        source.put(bytes(96000))  # 2 s of audio -> 100 slices
+        ready.set()
+        assert wait_for(lambda: len(stream.written) >= 2)
+        thread.flush()
+
+        assert wait_for(lambda: thread.flushes == 1)
+        assert aborted == [stream]
+        assert flushed.is_set()
+        assert stream.started == 1
+        assert len(stream.written) < 100
+        assert not clock.is_playing()
+        assert thread.chunks == 0
+        assert thread.stats()["last_flush_ms"] < 100
+        thread.stop()
+        ready.set()
+        thread.join(timeout=2)
+
+
+    def test_abort_falls_back_to_stop_stream(self, monkeypatch):
+        """Test abort_output_stream uses Pa_AbortStream when PyAudio exposes it and stop_stream otherwise."""
+        ada = pytest.importorskip("ada")
+
+        class Stopped(FakeStream):
+            stops = 0
+
+            def stop_stream(self):
+                self.stops += 1
+
+        aborted = []
+        monkeypatch.setattr(ada, "pyaudio", type("PyAudio", (), {"_portaudio": type("PA", (), {
+            "abort_stream": staticmethod(aborted.append)})}))
+        stream = Stopped()
+        stream._stream = "pa-stream"
+        ada.abort_output_stream(stream)
+        assert aborted == ["pa-stream"] and stream.stops == 0
+
+        monkeypatch.setattr(ada, "pyaudio", type("PyAudio", (), {}))  # Private API not there
+        ada.abort_output_stream(stream)
+        assert stream.stops == 1
+
+
+class TestPlaybackClock:
+    """Test playback position tracking."""
+
+    def test_tracks_queued_audio_and_latency(self):
+        """Test the audible end accounts for queued frames and output latency."""
+        clock = PlaybackClock(sample_rate=24000, output_latency=0.05)
+        clock.on_write(4800, now=10.0)  # 100 ms
+        clock.on_write(4800, now=10.01)  # Queues behind the first chunk
+        assert clock.audible_until() == pytest.approx(10.25)
+        assert clock.remaining(now=10.2) == pytest.approx(0.05)
+        assert not clock.is_playing(now=10.3)
+        assert clock.position(now=10.1) == 2400
+
+    def test_gap_restarts_from_now(self):
+        """Test a write after the device ran dry does not inherit old time."""
+        clock = PlaybackClock(sample_rate=24000)
+        clock.on_write(4800, now=0.0)
+        clock.on_write(4800, now=5.0)
+        assert clock.audible_until() == pytest.approx(5.1)
+
+    def test_reset(self):
+        """Test reset forgets pending audio."""
+        clock = PlaybackClock(sample_rate=24000)
+        clock.on_write(48000, now=0.0)
+        clock.reset(now=0.2)
+        assert not clock.is_playing(now=0.2)
+
+
+class TestEchoGate:
+    """Test mic gating against the playback clock."""
+
+    def test_gates_only_while_audible(self):
+        """Test mic chunks overlapping playback are dropped and counted."""
+        clock = PlaybackClock(sample_rate=24000, output_latency=0.05)
+        gate = EchoGate(clock, tail_ms=0)
+        clock.on_write(4800, now=0.0)  # Audible until 0.15
+
+        assert not gate.allow(0.064, now=0.1)
+        assert not gate.allow(0.064, now=0.2)  # Chunk started at 0.136
+        assert gate.allow(0.064, now=0.25)
+        assert gate.gated_chunks == 2
+        assert gate.stats()["dead_time_ms"] == pytest.approx(128)
+        assert gate.last_reopen_delay_ms == pytest.approx(36)
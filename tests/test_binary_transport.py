@@ -0,0 +1,93 @@
+"""
+Tests for binary Socket.IO payloads, chunking and transfer histograms.
+"""
+import asyncio
+import base64
+
+from binary_transport import BinaryTransport, as_bytes, payload_size
+
+
+class FakeSio:
+    """Records emits in order."""
+
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data=None, room=None):
+        self.emitted.append((event, data, room))
+
+
+class TestBinaryTransport:
+    """Test binary attachments and chunked transfers."""
+
+    def test_small_binary_is_sent_as_is(self):
+        """Test bytes below the chunk size go out untouched in one emit."""
+        sio = FakeSio()
+        transport = BinaryTransport(sio, chunk_size=1024)
+        asyncio.run(transport.emit("auth_frame", {"image": b"\xff\xd8jpeg"}))
+        assert sio.emitted == [("auth_frame", {"image": b"\xff\xd8jpeg"}, None)]
+
+    def test_large_binary_is_chunked_before_the_event(self):
+        """Test a large payload is streamed as chunks that reassemble to the original."""
+        sio = FakeSio()
+        transport = BinaryTransport(sio, chunk_size=1000)
+        blob = bytes(range(256)) * 10  # 2560 bytes -> 3 chunks
+        payload = {"format": "stl", "data": blob, "filename": "part.stl"}
+        asyncio.run(transport.emit("cad_data", payload, room="sid-1"))
+
+        chunks = [data for event, data, _ in sio.emitted if event == "binary_chunk"]
+        event, data, room = sio.emitted[-1]
+        assert [c["index"] for c in chunks] == [0, 1, 2]
+        assert all(c["count"] == 3 for c in chunks)
+        assert b"".join(c["data"] for c in chunks) == blob
+        assert event == "cad_data" and room == "sid-1"
+        assert data == {"format": "stl", "data": {"__chunked__": chunks[0]["id"], "size": 2560}, "filename": "part.stl"}
+        assert payload["data"] is blob  # Caller's dict untouched
+
+    def test_other_emits_interleave_with_chunks(self):
+        """Test a chunked transfer yields so concurrent emits are not stuck behind it."""
+        sio = FakeSio()
+        transport = BinaryTransport(sio, chunk_size=100)
+
+        async def scenario():
+            await asyncio.gather(transport.emit("cad_data", {"data": bytes(1000)}),
+                                 transport.emit("transcription", {"text": "hi"}))
+
+        asyncio.run(scenario())
+        events = [event for event, _, _ in sio.emitted]
+        assert events.index("transcription") < events.index("cad_data")
+        assert events.index("transcription") < len([e for e in events if e == "binary_chunk"])
+
+    def test_histograms(self):
+        """Test per-event size and latency histograms, including ingest."""
+        sio = FakeSio()
+        transport = BinaryTransport(sio, chunk_size=1000)
+
+        async def scenario():
+            await transport.emit("browser_frame", {"image": bytes(500), "log": "x"})
+            await transport.emit("browser_frame", {"image": bytes(5000), "log": "y"})
+
+        asyncio.run(scenario())
+        transport.record("video_frame", 20000, 0.0, direction="in")
+        stats = transport.stats()["events"]
+        frame = stats["browser_frame"]
+        assert frame["count"] == 2
+        assert frame["chunked"] == 1
+        assert frame["size_hist"] == {"<=1K": 1, "<=16K": 1}
+        assert sum(frame["latency_hist"].values()) == 2
+        assert stats["video_frame (in)"]["direction"] == "in"
+        assert stats["video_frame (in)"]["size_hist"] == {"<=64K": 1}
+
+
+class TestHelpers:
+    """Test payload helpers."""
+
+    def test_as_bytes(self):
+        """Test base64 strings are decoded and bytes pass through."""
+        assert as_bytes(base64.b64encode(b"solid").decode()) == b"solid"
+        assert as_bytes(b"solid") == b"solid"
+        assert as_bytes(None) is None
+
+    def test_payload_size(self):
+        """Test binaries and strings are counted through nested payloads."""
+        assert payload_size({"image": bytes(100), "log": "abc", "meta": [{"n": "xy"}]}) == 105
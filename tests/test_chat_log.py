@@ -0,0 +1,118 @@
+"""
+Tests for the batched chat log writer and the transcription buffer.
+"""
+import json
+import time
+
+from chat_log import ChatBuffer, ChatLogWriter
+
+
+def read_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestChatLogWriter:
+    """Test batching, ordering and flushing of chat log writes."""
+
+    def test_append_is_queued_until_flush(self, tmp_path):
+        """Test append() does not touch the file and flush() writes one batch."""
+        path = tmp_path / "chat_history.jsonl"
+        writer = ChatLogWriter(interval=60)
+        for i in range(5):
+            writer.append(path, {"text": f"message {i}"})
+        assert writer.pending == 5
+        assert not path.exists()
+        writer.flush()
+        assert [e["text"] for e in read_entries(path)] == [f"message {i}" for i in range(5)]
+        assert writer.stats()["batches"] == 1
+        assert writer.stats()["max_batch"] == 5
+        writer.close()
+
+    def test_background_thread_writes_on_interval(self, tmp_path):
+        """Test queued entries reach the file within about one interval."""
+        path = tmp_path / "chat_history.jsonl"
+        writer = ChatLogWriter(interval=0.05)
+        writer.append(path, {"text": "hello"})
+        deadline = time.monotonic() + 2.0
+        while writer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert writer.pending == 0
+        assert read_entries(path) == [{"text": "hello"}]
+        writer.close()
+
+    def test_max_pending_wakes_writer(self, tmp_path):
+        """Test reaching max_pending writes before the interval is up."""
+        path = tmp_path / "chat_history.jsonl"
+        writer = ChatLogWriter(interval=60, max_pending=10)
+        for i in range(10):
+            writer.append(path, {"i": i})
+        deadline = time.monotonic() + 2.0
+        while writer.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [e["i"] for e in read_entries(path)] == list(range(10))
+        writer.close()
+
+    def test_order_kept_per_file(self, tmp_path):
+        """Test interleaved appends to two files keep their order in each."""
+        a, b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+        writer = ChatLogWriter(interval=60)
+        for i in range(20):
+            writer.append(a if i % 2 else b, {"i": i})
+        writer.flush()
+        assert [e["i"] for e in read_entries(a)] == list(range(1, 20, 2))
+        assert [e["i"] for e in read_entries(b)] == list(range(0, 20, 2))
+        assert writer.stats()["open_files"] == 2
+        writer.close()
+
+    def test_close_writes_and_later_appends_go_straight_through(self, tmp_path):
+        """Test close() flushes the queue, ends the thread, and appends after close are not lost."""
+        path = tmp_path / "chat_history.jsonl"
+        writer = ChatLogWriter(interval=60)
+        writer.append(path, {"i": 0})
+        thread = writer._thread
+        writer.close()
+        assert not thread.is_alive()
+        assert writer.stats()["open_files"] == 0
+        writer.append(path, {"i": 1})
+        assert [e["i"] for e in read_entries(path)] == [0, 1]
+        assert writer.stats()["open_files"] == 0  # No handle left open after a late append
+        writer.close()
+
+    def test_write_error_is_counted(self, tmp_path):
+        """Test a missing directory is reported as an error instead of raising."""
+        writer = ChatLogWriter(interval=60)
+        writer.append(tmp_path / "missing" / "chat_history.jsonl", {"i": 0})
+        writer.flush()
+        assert writer.stats()["errors"] == 1
+        writer.close()
+
+
+class TestChatBuffer:
+    """Test aggregation of transcription deltas."""
+
+    def test_deltas_are_joined(self):
+        """Test deltas of one speaker form one message."""
+        buffer = ChatBuffer()
+        assert buffer.add("User", "Hello ") is None
+        assert buffer.add("User", "there") is None
+        assert buffer.text == "Hello there"
+        assert buffer.add("User", "!") is None
+        assert buffer.text == "Hello there!"
+        assert buffer.take() == ("User", "Hello there!")
+        assert buffer.sender is None and buffer.text == ""
+
+    def test_speaker_switch_returns_previous_message(self):
+        """Test a new speaker hands back the previous speaker's message."""
+        buffer = ChatBuffer()
+        buffer.add("User", "Hi")
+        assert buffer.add("Lexi", "Hello") == ("User", "Hi")
+        assert buffer.sender == "Lexi"
+        assert buffer.take() == ("Lexi", "Hello")
+
+    def test_blank_messages_are_dropped(self):
+        """Test whitespace-only messages are not returned."""
+        buffer = ChatBuffer()
+        buffer.add("User", "  ")
+        assert buffer.add("Lexi", "ok") is None
+        assert ChatBuffer().take() is None
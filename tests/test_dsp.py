@@ -0,0 +1,91 @@
+"""
+Tests for the mic DSP front-end.
+"""
+import numpy as np
+import pytest
+
+from dsp import AutomaticGainControl, HighPassFilter, MicFrontEnd, PolyphaseResampler
+
+
+def tone(freq, rate, seconds=1.0, amplitude=10000.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return amplitude * np.sin(2 * np.pi * freq * t)
+
+
+def level_db(x, reference):
+    return 20 * np.log10(np.std(x) / np.std(reference) + 1e-12)
+
+
+class TestPolyphaseResampler:
+    """Test native-rate to 16 kHz conversion."""
+
+    @pytest.mark.parametrize("rate", [44100, 48000])
+    def test_passes_speech_band_and_rejects_aliases(self, rate):
+        """Test in-band tones keep their level and out-of-band tones are filtered."""
+        passed = PolyphaseResampler(rate, 16000).process(tone(1000, rate)).copy()
+        assert abs(level_db(passed[200:], tone(1000, 16000))) < 0.5
+        alias = PolyphaseResampler(rate, 16000).process(tone(12000, rate)).copy()
+        assert level_db(alias[200:], tone(1000, 16000)) < -60
+
+    def test_streaming_matches_one_shot(self):
+        """Test chunked processing gives the same output as a single call."""
+        x = tone(440, 44100, seconds=0.5)
+        whole = PolyphaseResampler(44100, 16000).process(x).copy()
+        r = PolyphaseResampler(44100, 16000)
+        parts = [r.process(x[i:i + 2822]).copy() for i in range(0, len(x), 2822)]
+        chunked = np.concatenate(parts)
+        assert len(chunked) == len(whole)
+        np.testing.assert_allclose(chunked, whole, atol=1e-6)
+
+
+class TestConditioning:
+    """Test high-pass and AGC stages."""
+
+    def test_highpass_removes_dc(self):
+        """Test a DC offset is removed while the tone survives."""
+        hp = HighPassFilter(16000, cutoff_hz=80)
+        x = tone(440, 16000) + 3000
+        y = hp.process(x)
+        assert abs(y[8000:].mean()) < 5
+        assert abs(level_db(y[8000:], tone(440, 16000))) < 0.5
+
+    def test_agc_converges_and_ignores_noise_floor(self):
+        """Test quiet speech is raised toward the target but the gain is capped and frozen on silence."""
+        agc = AutomaticGainControl(target=3000, max_gain=4, noise_floor=200)
+        for _ in range(100):
+            agc.process(tone(300, 16000, 0.064, amplitude=1000.0))
+        assert agc.gain == pytest.approx(4.0, rel=0.01)
+        agc = AutomaticGainControl(target=3000, noise_floor=200)
+        agc.process(tone(300, 16000, 0.064, amplitude=100.0))
+        assert agc.gain == 1.0
+
+
+class TestMicFrontEnd:
+    """Test the full chain on int16 PCM."""
+
+    def test_output_is_16k_pcm_in_reused_buffer(self):
+        """Test a 48 kHz chunk becomes 16 kHz PCM without reallocating buffers."""
+        fe = MicFrontEnd(48000, agc=False)
+        chunk = tone(440, 48000, 0.064).astype("<i2").tobytes()
+        first = fe.process(chunk)
+        assert len(first) == 1024 * 2
+        ptr = np.frombuffer(first, dtype="<i2").ctypes.data
+        second = fe.process(chunk)
+        assert np.frombuffer(second, dtype="<i2").ctypes.data == ptr
+
+    def test_room_noise_is_not_speech_after_agc(self):
+        """Test steady noise below the VAD threshold stays silence although AGC boosts it."""
+        from vad import VoiceActivityDetector
+
+        fe = MicFrontEnd(16000)
+        vad = VoiceActivityDetector(threshold=800)
+        rng = np.random.default_rng(0)
+        boosted = []
+        for _ in range(100):
+            chunk = np.clip(rng.normal(0, 300, 1024), -32768, 32767).astype("<i2").tobytes()
+            out = fe.process(chunk)
+            boosted.append(np.std(np.frombuffer(out, dtype="<i2")))
+            vad.process(fe.pre_agc)
+            assert not vad.is_speech
+        assert fe.agc.gain > 3.0
+        assert boosted[-1] > 800  # The sent audio is above the threshold; the VAD must not use it
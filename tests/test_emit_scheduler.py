@@ -0,0 +1,141 @@
+"""
+Tests for the priority-aware outbound emit scheduler.
+"""
+import asyncio
+
+from emit_scheduler import EmitScheduler
+
+
+class Recorder:
+    """Async send() that records events in order."""
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = set(fail)
+
+    async def __call__(self, event, data=None, room=None):
+        if event in self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append((event, data))
+
+
+async def drain():
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+
+class TestEmitScheduler:
+    """Test ordering, bounds, latest-wins and metrics."""
+
+    def test_higher_classes_go_first(self):
+        """Test a queued burst is sent critical -> interactive -> state -> bulk."""
+        send = Recorder()
+
+        async def scenario():
+            scheduler = EmitScheduler(send)
+            scheduler.submit("auth_frame", {"image": b"1"})
+            scheduler.submit("kasa_devices", [])
+            scheduler.submit("transcription", {"sender": "Lexi", "text": "hi"})
+            scheduler.submit("tool_confirmation_request", {"id": "a"})
+            await drain()
+            await scheduler.close()
+
+        asyncio.run(scenario())
+        assert [event for event, _ in send.sent] == ["tool_confirmation_request", "transcription",
+                                                     "kasa_devices", "auth_frame"]
+
+    def test_order_within_a_class_is_kept(self):
+        """Test events of one class keep their submission order."""
+        send = Recorder()
+
+        async def scenario():
+            scheduler = EmitScheduler(send)
+            for i in range(5):
+                scheduler.submit("transcription", {"text": str(i)})
+            await drain()
+            await scheduler.close()
+
+        asyncio.run(scenario())
+        assert [data["text"] for _, data in send.sent] == ["0", "1", "2", "3", "4"]
+
+    def test_latest_wins_replaces_queued_frames(self):
+        """Test a backlog of frames collapses to the newest, keeping browser log lines."""
+        send = Recorder()
+
+        async def scenario():
+            scheduler = EmitScheduler(send)
+            scheduler.submit("browser_frame", {"image": b"1", "log": "Clicked"})
+            scheduler.submit("browser_frame", {"image": b"2", "log": "Typed"})
+            scheduler.submit("browser_frame", {"image": b"3", "log": None})
+            scheduler.submit("print_status_update", {"printer": "a", "progress_percent": 1})
+            scheduler.submit("print_status_update", {"printer": "b", "progress_percent": 5})
+            scheduler.submit("print_status_update", {"printer": "a", "progress_percent": 2})
+            await drain()
+            stats = scheduler.stats()
+            await scheduler.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        frames = [data for event, data in send.sent if event == "browser_frame"]
+        assert frames == [{"image": b"3", "log": "Clicked\nTyped"}]
+        printers = [data for event, data in send.sent if event == "print_status_update"]
+        assert printers == [{"printer": "a", "progress_percent": 2}, {"printer": "b", "progress_percent": 5}]
+        assert stats["bulk"]["replaced"] == 2
+        assert stats["state"]["replaced"] == 1
+
+    def test_full_class_drops_oldest(self):
+        """Test a bounded class drops its oldest events and counts them."""
+        send = Recorder()
+
+        async def scenario():
+            scheduler = EmitScheduler(send, classes=(("critical", 10), ("bulk", 3)))
+            for i in range(6):
+                scheduler.submit("audio_pcm", bytes([i]))
+            assert scheduler.depth("bulk") == 3
+            await drain()
+            stats = scheduler.stats()
+            await scheduler.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert [data for _, data in send.sent] == [b"\x03", b"\x04", b"\x05"]
+        assert stats["bulk"]["dropped"] == 3
+        assert stats["bulk"]["max_depth"] == 3
+        assert stats["bulk"]["sent"] == 3
+
+    def test_send_errors_are_counted(self):
+        """Test a failing send is counted and does not stop the worker."""
+        send = Recorder(fail={"error"})
+
+        async def scenario():
+            scheduler = EmitScheduler(send)
+            scheduler.submit("error", {"msg": "x"})
+            scheduler.submit("status", {"msg": "ok"})
+            await drain()
+            stats = scheduler.stats()
+            await scheduler.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert send.sent == [("status", {"msg": "ok"})]
+        assert stats["critical"]["errors"] == 1
+        assert stats["critical"]["sent"] == 1
+        assert stats["critical"]["depth"] == 0
+
+    def test_urgent_event_overtakes_backlog(self):
+        """Test an event submitted while bulk is draining is sent before the remaining bulk."""
+        send = Recorder()
+
+        async def scenario():
+            scheduler = EmitScheduler(send)
+            for i in range(5):
+                scheduler.submit("cad_data", {"n": i})
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            scheduler.submit("tool_confirmation_request", {"id": "a"})
+            await drain()
+            await scheduler.close()
+
+        asyncio.run(scenario())
+        events = [event for event, _ in send.sent]
+        assert events.index("tool_confirmation_request") < 4
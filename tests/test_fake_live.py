@@ -0,0 +1,143 @@
+"""
+Tests for the local Live API stand-in and AudioLoop running against it.
+"""
+import asyncio
+import wave
+
+import numpy as np
+import pytest
+
+from fake_live import FakeLiveServer, FakeTurn
+from google.genai import types
+
+
+def fast_server(script, **kwargs):
+    return FakeLiveServer(script, first_byte_ms=5, jitter_ms=0, chunk_ms=20, stream_rate=20.0,
+                          connect_ms=0, **kwargs)
+
+
+async def collect_turn(session):
+    return [msg async for msg in session.receive()]
+
+
+class TestFakeLiveServer:
+    """Test the scripted session protocol."""
+
+    def test_turn_on_mic_audio(self):
+        """Test a turn starts after enough mic audio and ends with turn_complete."""
+        server = fast_server([FakeTurn(after_audio_ms=100, input_text="hi", output_text="hello there",
+                                       audio_ms=100)], tagged_audio=True)
+
+        async def scenario():
+            async with server.connect() as session:
+                await session.send(input={"data": bytes(3200), "mime_type": "audio/pcm"})
+                msgs = await asyncio.wait_for(collect_turn(session), 2.0)
+            return msgs
+
+        msgs = asyncio.run(scenario())
+        assert msgs[0].server_content.input_transcription.text == "hi"
+        audio = [m.data for m in msgs if m.data]
+        assert len(audio) == 5
+        assert np.frombuffer(audio[2], dtype="<i2")[0] == 3  # Tagged with its chunk number
+        text = "".join(m.server_content.output_transcription.text for m in msgs
+                       if m.server_content and m.server_content.output_transcription)
+        assert text.split() == ["hello", "there"]
+        assert msgs[-1].server_content.turn_complete
+        assert server.stats()["uplink_bytes"] == 3200
+
+    def test_tool_call_waits_for_response(self):
+        """Test audio after a tool call only flows once the response is sent."""
+        server = fast_server([FakeTurn(trigger="text", tool_calls=[{"name": "list_projects"}], audio_ms=40)])
+
+        async def scenario():
+            async with server.connect() as session:
+                await session.send(input="what projects?", end_of_turn=True)
+                receive = session.receive()
+                msg = await receive.__anext__()
+                call = msg.tool_call.function_calls[0]
+                assert call.name == "list_projects"
+                await asyncio.sleep(0.05)
+                assert session._outbox.empty()
+                await session.send_tool_response(function_responses=[
+                    types.FunctionResponse(id=call.id, name=call.name, response={"result": "ok"})])
+                rest = [m async for m in receive]
+            return rest
+
+        rest = asyncio.run(scenario())
+        assert any(m.data for m in rest)
+        assert server.tool_latency_ms[0] >= 50
+
+    def test_drop_and_resume(self):
+        """Test a dropped connection raises in receive() and the script resumes on reconnect."""
+        server = fast_server([FakeTurn(trigger="immediate", audio_ms=40),
+                              FakeTurn(trigger="immediate", audio_ms=40, input_text="second")])
+
+        async def scenario():
+            async with server.connect() as session:
+                await collect_turn(session)
+                server.drop()
+                with pytest.raises(ConnectionError):
+                    await collect_turn(session)
+                with pytest.raises(ConnectionError):
+                    await session.send(input="late")
+            async with server.connect() as session:
+                msgs = await asyncio.wait_for(collect_turn(session), 2.0)
+            return msgs
+
+        msgs = asyncio.run(scenario())
+        assert msgs[0].server_content.input_transcription.text == "second"
+        assert len(server.connects) == 2 and len(server.drops) == 1
+
+
+class TestAudioLoopAgainstFake:
+    """Test run()/receive_audio end to end without the network."""
+
+    def test_session_turn_and_switchover(self, tmp_path, monkeypatch, isolated_projects):
+        """Test transcripts and model audio flow, and a drop promotes the standby session."""
+        ada = pytest.importorskip("ada")
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(np.full(8000, 1000, dtype="<i2").tobytes())
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        server = fast_server([FakeTurn(after_audio_ms=200, input_text="hello", output_text="hi", audio_ms=200),
+                              FakeTurn(after_audio_ms=100, output_text="back", audio_ms=100)])
+        transcripts = []
+        metrics, context = {}, {}
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect,
+                                 on_transcription=transcripts.append)
+            task = asyncio.create_task(loop.run())
+            for _ in range(200):
+                if server.turns_done == 1:
+                    break
+                await asyncio.sleep(0.01)
+            server.drop()
+            # The standby takes over and the mic keeps streaming into it
+            for _ in range(400):
+                if server.turns_done == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.2)
+            metrics["session"] = loop.get_audio_metrics()["session"]
+            context["turns"] = server.session.context_turns
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert server.turns_done == 2
+        assert metrics["session"]["standby_hits"] == 1
+        assert metrics["session"]["switches"] == {"drop": 1}
+        assert context["turns"] >= 2  # Chat history seeded silently, no re-acknowledgement turn
+        assert {"sender": "User", "text": "hello"} in transcripts
+        assert [t["text"].strip() for t in transcripts if t["sender"] == "Lexi"] == ["hi", "back"]
+        assert io.output.frames > 0
@@ -0,0 +1,128 @@
+"""
+Tests for the file-driven headless audio streams.
+"""
+import asyncio
+import wave
+
+import numpy as np
+import pytest
+
+from headless import FileAudioIO, WavInputStream, WavOutputStream
+
+
+class FakeTime:
+    """Clock whose sleep() just advances it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+def write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+
+
+class TestWavStreams:
+    """Test pacing, padding and the output file."""
+
+    def test_input_paced_at_speed(self, tmp_path):
+        """Test file audio is delivered at speed x real time, then silence in real time."""
+        write_wav(tmp_path / "in.wav", np.full(16000, 500))
+        t = FakeTime()
+        stream = WavInputStream(tmp_path / "in.wav", speed=4.0, tail_seconds=0.5, clock=t.clock, sleep=t.sleep)
+        for _ in range(10):
+            chunk = np.frombuffer(stream.read(1600), dtype="<i2")
+            assert (chunk == 500).all()
+        assert t.now == pytest.approx(0.25)
+        assert stream.data_done_at == pytest.approx(0.25)
+        assert not stream.finished.is_set()
+
+        for _ in range(5):
+            assert stream.read(1600) == bytes(3200)
+        assert t.now == pytest.approx(0.75)
+        assert stream.finished.is_set()
+
+    def test_input_unpaced_and_downmixed(self, tmp_path):
+        """Test speed 0 never sleeps and stereo files are down-mixed."""
+        stereo = np.stack([np.full(4000, 100), np.full(4000, 300)], axis=1).ravel()
+        write_wav(tmp_path / "in.wav", stereo, rate=48000, channels=2)
+        t = FakeTime()
+        stream = WavInputStream(tmp_path / "in.wav", speed=0, tail_seconds=0, clock=t.clock, sleep=t.sleep)
+        assert stream.rate == 48000
+        chunk = np.frombuffer(stream.read(3000), dtype="<i2")
+        assert (chunk == 200).all()
+        # Partial last chunk is padded with silence
+        chunk = np.frombuffer(stream.read(3000), dtype="<i2")
+        assert (chunk[:1000] == 200).all() and (chunk[1000:] == 0).all()
+        assert t.slept == 0.0
+        assert stream.finished.is_set()
+
+    def test_rejects_non_16_bit(self, tmp_path):
+        """Test 8-bit files are refused up front."""
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(1)
+            w.setframerate(8000)
+            w.writeframes(bytes(800))
+        with pytest.raises(ValueError):
+            WavInputStream(tmp_path / "in.wav")
+
+    def test_output_survives_stream_close(self, tmp_path):
+        """Test the I/O thread closing the stream keeps the file open until finalize()."""
+        out = WavOutputStream(tmp_path / "out.wav", speed=0)
+        out.write(bytes(960))
+        out.close()
+        out.write(bytes(480))
+        out.finalize()
+        out.write(bytes(480))  # Late write after finalize is dropped
+        with wave.open(str(tmp_path / "out.wav"), "rb") as w:
+            assert w.getframerate() == 24000
+            assert w.getnframes() == 720
+
+
+class TestHeadlessAudioLoop:
+    """Test AudioLoop runs its I/O threads on files without PyAudio."""
+
+    def test_file_io_bypasses_devices(self, tmp_path, monkeypatch, isolated_projects):
+        """Test mic chunks reach the send buffer and model audio lands in the WAV."""
+        ada = pytest.importorskip("ada")
+
+        class NoDevices:
+            def __getattr__(self, name):
+                raise AssertionError("PortAudio must not be touched in headless mode")
+
+        monkeypatch.setattr(ada, "audio_devices", NoDevices())
+        write_wav(tmp_path / "in.wav", np.full(8000, 1000))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0, tail_seconds=0)
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io)
+            await loop.listen_audio()
+            await loop.play_audio()
+            assert loop.input_device == "file:in.wav"
+            loop.playback_buffer.put(bytes(4800))
+            loop._playback_ready.set()
+            for _ in range(100):
+                if io.output.frames and loop.mic_buffer.frames_available():
+                    break
+                await asyncio.sleep(0.01)
+            threads = [loop._input_thread, loop._output_thread]
+            loop._stop_audio_threads()
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        with wave.open(str(tmp_path / "out.wav"), "rb") as w:
+            assert w.getnframes() == 2400
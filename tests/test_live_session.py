@@ -0,0 +1,259 @@
+"""
+Tests for the active/standby Live session manager.
+"""
+import asyncio
+import contextlib
+import wave
+
+import numpy as np
+import pytest
+
+from live_session import LiveSessionManager, parse_duration
+
+
+class Dialer:
+    """connect() stand-in that counts opens/closes and can fail on demand."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.opened = []
+        self.closed = []
+
+    @contextlib.asynccontextmanager
+    async def connect(self):
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("refused")
+        session = object()
+        self.opened.append(session)
+        try:
+            yield session
+        finally:
+            self.closed.append(session)
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestLiveSessionManager:
+    """Test standby promotion, rotation deadlines and reconnects."""
+
+    def test_switch_promotes_standby(self):
+        """Test a switch hands over the pre-warmed connection and warms the next one."""
+        dialer = Dialer()
+
+        async def scenario():
+            manager = LiveSessionManager(dialer.connect)
+            first = await manager.start()
+            await settle()
+            assert len(dialer.opened) == 2  # Active + standby
+            second = await manager.switch("drop")
+            assert second is dialer.opened[1]
+            manager.switch_done()
+            await settle()
+            assert first in dialer.closed
+            assert len(dialer.opened) == 3
+            stats = manager.stats()
+            await manager.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats["standby_hits"] == 1 and stats["switches"] == {"drop": 1}
+        assert stats["last_switch_ms"] is not None
+        assert len(dialer.closed) == 3
+
+    def test_switch_waits_for_connecting_standby(self):
+        """Test a switch during the standby's connect takes that standby, and close() waits for background closes."""
+        dialer = Dialer()
+        gate = asyncio.Event()
+        closing = []
+
+        @contextlib.asynccontextmanager
+        async def connect():
+            if dialer.opened:
+                await gate.wait()  # Standby connect is held until released
+            async with dialer.connect() as session:
+                try:
+                    yield session
+                finally:
+                    await asyncio.sleep(0.02)  # Slow close
+                    closing.append(session)
+
+        async def scenario():
+            manager = LiveSessionManager(connect)
+            first = await manager.start()
+            await settle()
+            switch = asyncio.create_task(manager.switch("drop"))
+            await settle()
+            assert not switch.done()
+            gate.set()
+            second = await asyncio.wait_for(switch, 1.0)
+            await manager.close()
+            return manager.stats(), first, second
+
+        stats, first, second = asyncio.run(scenario())
+        assert stats["standby_hits"] == 1 and stats["standby_misses"] == 0
+        assert second is dialer.opened[1]
+        assert first in closing and second in closing  # The background close finished before close() returned
+
+    def test_switch_without_standby_reconnects(self):
+        """Test with standby off a switch dials a new connection, retrying failures."""
+        dialer = Dialer()
+
+        async def scenario():
+            manager = LiveSessionManager(dialer.connect, standby=False, min_backoff=0.01)
+            await manager.start()
+            dialer.failures = 2
+            await manager.switch("drop")
+            await settle()
+            stats = manager.stats()
+            await manager.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats["standby_misses"] == 1
+        assert stats["connect_failures"] == 2
+        assert len(dialer.opened) == 2
+
+    def test_rotation_deadlines(self, fake_clock):
+        """Test the soft/forced rotation times and that GoAway moves them up."""
+        clock = fake_clock()
+        dialer = Dialer()
+
+        async def scenario():
+            manager = LiveSessionManager(dialer.connect, standby=False, rotate_after=100.0,
+                                         max_rotation_wait=30.0, clock=clock)
+            await manager.start()
+            clock.now = 99.0
+            assert not manager.rotation_due()
+            clock.now = 100.0
+            assert manager.rotation_due() and not manager.rotation_forced()
+            clock.now = 130.0
+            assert manager.rotation_forced()
+
+            await manager.switch("rotate")
+            clock.now = 140.0
+            assert not manager.rotation_due()
+            manager.on_go_away("40s")  # Closed at 180: forced by 178, due 30 s earlier
+            clock.now = 148.0
+            assert manager.rotation_due() and not manager.rotation_forced()
+            clock.now = 178.0
+            assert manager.rotation_forced()
+            await manager.close()
+
+        asyncio.run(scenario())
+        assert parse_duration("2.5s") == 2.5
+        assert parse_duration(None) is None
+
+    def test_stale_standby_is_refreshed(self):
+        """Test an idle standby is replaced once it is half a rotation period old."""
+        dialer = Dialer()
+
+        async def scenario():
+            manager = LiveSessionManager(dialer.connect, rotate_after=0.1)
+            await manager.start()
+            await asyncio.sleep(0.2)
+            stats = manager.stats()
+            await manager.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats["standby_refreshes"] >= 2
+        assert len(dialer.closed) == len(dialer.opened)
+
+
+class TestAudioLoopRotation:
+    """Test AudioLoop rotates to the standby when the server sends GoAway."""
+
+    def test_go_away_rotates_without_losing_the_mic(self, tmp_path, isolated_projects):
+        """Test rotation happens at a quiet moment and audio keeps flowing to the new session."""
+        ada = pytest.importorskip("ada")
+        from fake_live import FakeLiveServer, FakeTurn
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        server = FakeLiveServer([FakeTurn(after_audio_ms=100, output_text="ok", audio_ms=80)],
+                                first_byte_ms=5, jitter_ms=0, chunk_ms=20, stream_rate=20.0, connect_ms=0)
+        result = {}
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect)
+            task = asyncio.create_task(loop.run())
+            for _ in range(200):
+                if server.turns_done == 1 and loop.sessions.stats()["standby_ready"]:
+                    break
+                await asyncio.sleep(0.01)
+            old = server.session
+            server.go_away(time_left=1.0)
+            for _ in range(200):
+                if loop.sessions.switches.get("rotate"):
+                    break
+                await asyncio.sleep(0.01)
+            rotated_at = server.clock()
+            await asyncio.sleep(0.3)
+            result["new_session"] = server.session is not old
+            result["uplink_after"] = sum(n for t, n in server.uplink if t > rotated_at)
+            result["stats"] = loop.get_audio_metrics()["session"]
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert result["stats"]["switches"] == {"rotate": 1}
+        assert result["stats"]["standby_hits"] == 1
+        assert result["new_session"]
+        assert result["uplink_after"] > 0
+
+    def test_tool_result_waits_for_the_replacement_session(self, tmp_path, isolated_projects):
+        """Test a tool result finished mid-switch is sent to the new session, not lost on the old one."""
+        ada = pytest.importorskip("ada")
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+
+        class ClosedSession:
+            async def send(self, **kwargs):
+                raise ConnectionError("closed")
+
+        class NewSession:
+            def __init__(self):
+                self.sent = []
+
+            async def send(self, **kwargs):
+                self.sent.append(kwargs)
+
+        new = NewSession()
+        result = {}
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io)
+            loop._use_session(ClosedSession())
+            task = asyncio.create_task(loop.handle_read_directory(str(tmp_path)))
+            await asyncio.sleep(0.05)
+            result["waiting"] = not task.done()
+            loop._use_session(new)
+            await asyncio.wait_for(task, 1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert result["waiting"]
+        assert len(new.sent) == 1
+        assert new.sent[0]["input"].startswith("System Notification: Contents of")
+        assert new.sent[0]["end_of_turn"] is True
@@ -0,0 +1,58 @@
+"""
+Tests for the adaptive outbound audio packetizer.
+"""
+import pytest
+
+from packetizer import AdaptivePacketizer
+
+FRAME = 0.064  # 1024 samples at 16 kHz
+
+
+class TestAdaptivePacketizer:
+    """Test packet sizing and rate reporting."""
+
+    def test_small_packets_at_onset_and_in_silence(self):
+        """Test onset and silence use the minimum packet size."""
+        p = AdaptivePacketizer(FRAME, onset_frames=2)
+        assert p.target_frames(1) == 1
+        p.on_vad("onset")
+        assert p.target_frames(1) == 1
+        p.on_sent(1, 2048, 0.001)
+        p.on_sent(1, 2048, 0.001)
+        # Onset window used up: steady speech coalesces
+        assert p.target_frames(1) == 2
+        p.on_vad("offset")
+        assert p.target_frames(1) == 1
+
+    def test_slow_uplink_grows_packets(self):
+        """Test packets grow with send latency but stay capped."""
+        p = AdaptivePacketizer(FRAME, onset_frames=0, max_frames=4)
+        p.on_vad("onset")
+        p.on_sent(2, 4096, 0.150)  # Slower than two frames of audio
+        assert p.target_frames(1) == 3
+        p.on_sent(3, 6144, 1.0)
+        assert p.target_frames(1) == 4
+
+    def test_backlog_is_drained_in_one_message(self):
+        """Test a backlog is sent at once up to max_frames."""
+        p = AdaptivePacketizer(FRAME, backlog_frames=3, max_frames=5)
+        assert p.target_frames(3) == 3
+        assert p.target_frames(9) == 5
+
+    def test_rates(self, fake_clock):
+        """Test messages/s and bytes/s over the sliding window."""
+        clock = fake_clock()
+        p = AdaptivePacketizer(FRAME, rate_window=2.0, clock=clock)
+        for i in range(4):
+            clock.now = i * 0.5
+            p.on_sent(1, 2048, 0.001)
+        assert p.rates() == pytest.approx((2.0, 4096.0))
+        clock.now = 10.0
+        assert p.rates() == (0.0, 0.0)
+        assert p.stats()["messages"] == 4
+
+    def test_configure_clamps(self):
+        """Test steady size is kept within min/max."""
+        p = AdaptivePacketizer(FRAME)
+        p.configure(min_frames=2, steady_frames=8, max_frames=3)
+        assert p.settings()["steady_frames"] == 3
@@ -0,0 +1,48 @@
+"""
+Tests for ProjectManager chat history.
+"""
+import json
+import random
+
+import pytest
+
+from project_manager import ProjectManager, read_tail_lines
+
+
+class TestReadTailLines:
+    """Test the backwards block reader against a full read."""
+
+    @pytest.mark.parametrize("block_size", [1, 7, 64, 65536])
+    def test_matches_full_read(self, tmp_path, block_size):
+        """Test the tail equals the last non-empty lines for any block size."""
+        rng = random.Random(block_size)
+        lines = ["x" * rng.randint(1, 200) + "åäö" * rng.randint(0, 3) for _ in range(50)]
+        path = tmp_path / "log.jsonl"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        for count in (1, 10, 49, 50, 80):
+            assert read_tail_lines(path, count, block_size=block_size) == lines[-count:]
+
+    def test_edges(self, tmp_path):
+        """Test empty files, a missing final newline and blank lines."""
+        path = tmp_path / "log.jsonl"
+        path.write_text("", encoding="utf-8")
+        assert read_tail_lines(path, 5) == []
+        path.write_text("first\n\n\nsecond\nthird", encoding="utf-8")
+        assert read_tail_lines(path, 2, block_size=3) == ["second", "third"]
+        assert read_tail_lines(path, 10, block_size=3) == ["first", "second", "third"]
+
+
+class TestChatHistory:
+    """Test chat logging and recent history."""
+
+    def test_recent_history_returns_last_entries(self, tmp_path):
+        """Test get_recent_chat_history returns the newest entries in order, skipping corrupt lines."""
+        manager = ProjectManager(str(tmp_path))
+        for i in range(25):
+            manager.log_chat("User" if i % 2 else "Lexi", f"message {i}")
+        manager.flush_chat_log()
+        with open(manager.get_current_project_path() / "chat_history.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"sender": "User", "te')  # Torn write
+        history = manager.get_recent_chat_history(limit=10)
+        assert [e["text"] for e in history] == [f"message {i}" for i in range(16, 25)]
+        assert json.dumps(history[-1]["sender"]) == '"Lexi"'
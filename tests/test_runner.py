@@ -20,6 +20,26 @@ MODULES = {
     "web": "test_web_agent.py",
     "auth": "test_authenticator.py",
     "tools": "test_ada_tools.py",
+    "vad": "test_vad.py",
+    "buffers": "test_audio_buffers.py",
+    "audio_io": "test_audio_io.py",
+    "packetizer": "test_packetizer.py",
+    "dsp": "test_dsp.py",
+    "aec": "test_aec.py",
+    "devices": "test_audio_devices.py",
+    "recorder": "test_session_recorder.py",
+    "headless": "test_headless.py",
+    "fake_live": "test_fake_live.py",
+    "live_session": "test_live_session.py",
+    "tool_registry": "test_tool_registry.py",
+    "task_supervisor": "test_task_supervisor.py",
+    "project_manager": "test_project_manager.py",
+    "chat_log": "test_chat_log.py",
+    "visualizer": "test_visualizer.py",
+    "binary_transport": "test_binary_transport.py",
+    "transcription_batcher": "test_transcription_batcher.py",
+    "emit_scheduler": "test_emit_scheduler.py",
+    "subscriptions": "test_subscriptions.py",
 }
 
 TESTS_DIR = Path(__file__).parent
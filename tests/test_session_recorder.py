@@ -0,0 +1,85 @@
+"""
+Tests for the mmap-backed session recorder.
+"""
+import json
+import wave
+
+import numpy as np
+
+from session_recorder import SessionRecorder, Track, load_recording, session_directory
+
+
+def pcm(n, value=100):
+    return np.full(n, value, dtype="<i2").tobytes()
+
+
+class TestSessionRecorder:
+    """Test the track files, index and event log."""
+
+    def test_tracks_are_valid_wavs(self, tmp_path):
+        """Test closed tracks open with the wave module at their real length."""
+        rec = SessionRecorder(tmp_path / "s")
+        rec.write("mic", pcm(1600))
+        rec.write("mic", pcm(1600))
+        rec.write("model", pcm(2400))
+        rec.close()
+
+        with wave.open(str(tmp_path / "s" / "mic.wav"), "rb") as w:
+            assert w.getframerate() == 16000
+            assert w.getsampwidth() == 2
+            assert w.getnframes() == 3200
+        with wave.open(str(tmp_path / "s" / "speaker.wav"), "rb") as w:
+            assert w.getframerate() == 24000
+            assert w.getnframes() == 0
+
+    def test_index_and_events(self, tmp_path, fake_clock):
+        """Test chunk times and events are relative to the recording start."""
+        clock = fake_clock(1_000_000_000)
+        rec = SessionRecorder(tmp_path / "s", clock_ns=clock)
+        clock.now += 500_000_000
+        rec.write("mic", pcm(800))
+        rec.event("vad", state="onset")
+        clock.now += 250_000_000
+        rec.write("mic", pcm(800))
+        rec.event("transcription", sender="User", text="hi")
+        rec.close()
+
+        data = load_recording(tmp_path / "s")
+        mic = data["tracks"]["mic"]
+        assert list(mic["chunk_times"]) == [0.5, 0.75]
+        assert list(mic["chunk_samples"]) == [0, 800]
+        assert len(mic["pcm"]) == 1600
+        assert [(e["type"], e["t"]) for e in data["events"]] == [("vad", 0.5), ("transcription", 0.75)]
+        assert data["events"][1]["text"] == "hi"
+        meta = json.loads((tmp_path / "s" / "meta.json").read_text())
+        assert meta["tracks"]["mic"]["samples"] == 1600
+
+    def test_grows_past_preallocation(self, tmp_path):
+        """Test a track keeps every sample after outgrowing its preallocated file."""
+        track = Track(tmp_path, "t", 16000, prealloc_seconds=0.1)
+        for i in range(10):
+            track.write(pcm(1600, value=i), t_ns=i)
+        assert track.stats()["grows"] > 0
+        track.close()
+
+        with wave.open(str(tmp_path / "t.wav"), "rb") as w:
+            samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+        assert samples.shape[0] == 16000
+        assert list(samples[::1600]) == list(range(10))
+
+    def test_writes_after_close_are_ignored(self, tmp_path):
+        """Test late writes from the audio threads are dropped, not raised."""
+        rec = SessionRecorder(tmp_path / "s")
+        rec.close()
+        rec.write("mic", pcm(160))
+        rec.event("vad", state="offset")
+        rec.close()
+        assert load_recording(tmp_path / "s")["events"] == []
+
+    def test_session_directory_is_unique(self, tmp_path):
+        """Test two sessions started in the same second get separate directories."""
+        first = session_directory(tmp_path, now=0)
+        first.mkdir(parents=True)
+        second = session_directory(tmp_path, now=0)
+        assert first != second
+        assert first.parent == tmp_path / "recordings"
@@ -0,0 +1,68 @@
+"""
+Tests for topic subscriptions and per-client traffic accounting.
+"""
+import asyncio
+
+from binary_transport import BinaryTransport
+from subscriptions import Subscriptions, topic_room
+
+
+class TestSubscriptions:
+    """Test subscribe/unsubscribe and event routing."""
+
+    def test_subscribe_and_unsubscribe(self):
+        """Test topics are added once, unknown ones reported, and removed again."""
+        subs = Subscriptions()
+        subs.connect("a")
+        assert subs.subscribe("a", ["printers", "kasa", "weather"]) == (["printers", "kasa"], ["weather"])
+        assert subs.subscribe("a", ["kasa"]) == ([], [])
+        assert subs.topics_of("a") == ["kasa", "printers"]
+        assert subs.unsubscribe("a", ["kasa", "browser"]) == ["kasa"]
+        assert subs.topics_of("a") == ["printers"]
+
+    def test_routing(self):
+        """Test topic events go to their room, are skipped without subscribers, others broadcast."""
+        subs = Subscriptions()
+        subs.connect("a")
+        assert subs.route("transcription") == (True, None)
+        assert subs.route("browser_frame") == (False, None)
+        subs.subscribe("a", ["browser"])
+        assert subs.route("browser_frame") == (True, topic_room("browser"))
+        subs.disconnect("a")
+        assert subs.route("browser_frame") == (False, None)
+        assert subs.report()["skipped"] == {"browser": 2}
+
+    def test_bandwidth_report(self, fake_clock):
+        """Test emits are charged to exactly the clients that receive them."""
+        clock = fake_clock()
+        subs = Subscriptions(clock=clock)
+        subs.connect("viewer")
+        subs.connect("debug")
+        subs.subscribe("viewer", ["audio_viz"])
+        subs.record("audio_levels", topic_room("audio_viz"), 17)
+        subs.record("status", None, 30)
+        subs.record("audio_metrics", "debug", 500)
+        clock.now = 2.0
+        report = subs.report()["clients"]
+        assert report["viewer"]["bytes"] == 47
+        assert report["viewer"]["bytes_by_topic"] == {"audio_viz": 17, "-": 30}
+        assert report["debug"]["bytes"] == 530
+        assert report["debug"]["events"] == 2
+        assert report["debug"]["bytes_per_s"] == 265
+        assert subs.report()["subscribers"]["audio_viz"] == 1
+
+    def test_transport_reports_emits(self):
+        """Test BinaryTransport passes every emit to the accounting hook."""
+        subs = Subscriptions()
+        subs.connect("a")
+        subs.subscribe("a", ["browser"])
+
+        class Sio:
+            async def emit(self, event, data=None, room=None):
+                pass
+
+        transport = BinaryTransport(Sio(), chunk_size=10, on_emit=subs.record)
+        asyncio.run(transport.emit("browser_frame", {"image": bytes(25), "log": "abc"}, room=topic_room("browser")))
+        client = subs.report()["clients"]["a"]
+        assert client["events"] == 1
+        assert client["bytes_by_topic"] == {"browser": 28}
@@ -0,0 +1,104 @@
+"""
+Tests for the background task supervisor.
+"""
+import asyncio
+
+from task_supervisor import TaskSupervisor
+from tool_registry import ToolRegistry
+
+
+class TestTaskSupervisor:
+    """Test group caps, queueing, cancellation and error capture."""
+
+    def test_limit_queues_in_order_and_rejects_overflow(self):
+        """Test a capped group runs one task at a time, FIFO, and rejects beyond max_queued."""
+        supervisor = TaskSupervisor()
+        supervisor.configure_group("web_agent", limit=1, max_queued=2)
+        order = []
+        release = asyncio.Event()
+
+        async def job(n):
+            order.append(n)
+            await release.wait()
+
+        async def scenario():
+            tasks = [supervisor.spawn("web_agent", job(n), name=f"job{n}") for n in range(4)]
+            await asyncio.sleep(0.01)
+            snapshot = supervisor.snapshot()
+            release.set()
+            await asyncio.gather(*(t for t in tasks if t))
+            return tasks, snapshot
+
+        tasks, snapshot = asyncio.run(scenario())
+        assert tasks[3] is None
+        assert order == [0, 1, 2]
+        assert [t["state"] for t in snapshot] == ["running", "queued", "queued"]
+        assert snapshot[0]["name"] == "job0" and snapshot[0]["running_s"] is not None
+        stats = supervisor.stats()["groups"]["web_agent"]
+        assert stats["finished"] == 3 and stats["rejected"] == 1
+        assert stats["running"] == 0 and stats["queued"] == 0
+
+    def test_exceptions_are_captured(self):
+        """Test a failing task is logged in errors instead of being lost."""
+        supervisor = TaskSupervisor()
+
+        async def broken():
+            raise ValueError("slicer crashed")
+
+        async def scenario():
+            await supervisor.spawn("cad", broken(), name="generate_cad")
+
+        asyncio.run(scenario())
+        error = supervisor.errors[-1]
+        assert error["group"] == "cad" and error["name"] == "generate_cad"
+        assert "slicer crashed" in error["error"] and "ValueError" in error["traceback"]
+        assert supervisor.stats()["groups"]["cad"]["failed"] == 1
+
+    def test_cancel_running_and_queued(self):
+        """Test cancel() stops running tasks and drops queued ones without starting them."""
+        supervisor = TaskSupervisor()
+        supervisor.configure_group("files", limit=1, max_queued=5)
+        started = []
+
+        async def job(n):
+            started.append(n)
+            await asyncio.sleep(10)
+
+        async def scenario():
+            tasks = [supervisor.spawn("files", job(n)) for n in range(3)]
+            supervisor.spawn("emit", asyncio.sleep(10))
+            await asyncio.sleep(0.01)
+            count = supervisor.cancel("files")
+            await asyncio.gather(*tasks, return_exceptions=True)
+            remaining = supervisor.active()
+            supervisor.cancel()
+            await asyncio.sleep(0)
+            return count, remaining
+
+        count, remaining = asyncio.run(scenario())
+        assert count == 3 and remaining == 1
+        assert started == [0]
+        assert supervisor.stats()["groups"]["files"]["cancelled"] == 3
+        assert supervisor.active() == 0
+
+    def test_full_group_makes_background_tool_busy(self):
+        """Test a background tool whose group is full answers with a busy result."""
+        supervisor = TaskSupervisor()
+        supervisor.configure_group("web_agent", limit=1, max_queued=0)
+        registry = ToolRegistry(supervisor=supervisor)
+
+        async def browse(args):
+            await asyncio.sleep(0.05)
+
+        registry.register("run_web_agent", browse, background=True, group="web_agent", ack="Started.")
+
+        async def scenario():
+            first = await registry.execute("run_web_agent")
+            second = await registry.execute("run_web_agent")
+            await asyncio.sleep(0.1)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == "Started."
+        assert "busy" in second
+        assert registry.stats()["tools"]["run_web_agent"]["rejected"] == 1
@@ -0,0 +1,241 @@
+"""
+Tests for the tool registry, user confirmations and concurrent tool dispatch in AudioLoop.
+"""
+import asyncio
+import wave
+
+import pytest
+
+from tool_registry import ToolConfirmations, ToolRegistry
+
+
+class TestToolRegistry:
+    """Test foreground/background execution, timeouts and errors."""
+
+    def test_foreground_result_and_stats(self):
+        """Test a foreground handler's return value is the result and is timed."""
+        registry = ToolRegistry()
+
+        async def echo(args):
+            return f"hello {args['name']}"
+
+        registry.register("echo", echo)
+        result = asyncio.run(registry.execute("echo", {"name": "lexi"}))
+        assert result == "hello lexi"
+        assert registry.stats()["tools"]["echo"]["calls"] == 1
+
+    def test_timeout_and_error_become_results(self):
+        """Test a slow or failing handler is reported to the model instead of raising."""
+        registry = ToolRegistry()
+
+        async def slow(args):
+            await asyncio.sleep(1.0)
+
+        async def broken(args):
+            raise RuntimeError("printer on fire")
+
+        registry.register("slow", slow, timeout=0.05)
+        registry.register("broken", broken)
+
+        async def scenario():
+            return await asyncio.gather(registry.execute("slow"), registry.execute("broken"),
+                                        registry.execute("missing"))
+
+        slow_result, broken_result, missing_result = asyncio.run(scenario())
+        assert "timed out" in slow_result
+        assert "printer on fire" in broken_result
+        assert missing_result == "Unknown tool 'missing'."
+        stats = registry.stats()["tools"]
+        assert stats["slow"]["timeouts"] == 1 and stats["broken"]["errors"] == 1
+
+    def test_background_returns_ack_immediately(self):
+        """Test a background tool acknowledges at once and keeps running."""
+        registry = ToolRegistry()
+        done = []
+
+        async def job(args):
+            await asyncio.sleep(0.05)
+            done.append(args["n"])
+
+        registry.register("job", job, background=True, ack="Started.")
+
+        async def scenario():
+            result = await registry.execute("job", {"n": 1})
+            running = registry.background_running
+            await asyncio.sleep(0.1)
+            return result, running
+
+        result, running = asyncio.run(scenario())
+        assert result == "Started." and running == 1
+        assert done == [1]
+        assert registry.background_running == 0
+
+
+class TestToolConfirmations:
+    """Test outstanding confirmations, auto-deny and wait metrics."""
+
+    def test_multiple_outstanding_resolved_independently(self):
+        """Test several requests can wait at once and each gets its own answer."""
+        confirmations = ToolConfirmations(timeout=5.0)
+        asked = []
+
+        async def scenario():
+            first = asyncio.create_task(confirmations.confirm("write_file", {}, asked.append))
+            second = asyncio.create_task(confirmations.confirm("run_web_agent", {}, asked.append))
+            await asyncio.sleep(0)
+            assert len(confirmations.pending()) == 2
+            assert confirmations.resolve(asked[1]["id"], False)
+            assert confirmations.resolve(asked[0]["id"], True)
+            assert not confirmations.resolve(asked[0]["id"], False)  # Already answered
+            return await first, await second
+
+        assert asyncio.run(scenario()) == (True, False)
+        stats = confirmations.stats()
+        assert stats["confirmed"] == 1 and stats["denied"] == 1 and stats["outstanding"] == 0
+        assert set(stats["wait_ms"]) == {"write_file", "run_web_agent"}
+
+    def test_timeout_auto_denies_and_withdraws(self):
+        """Test an unanswered request returns None and is withdrawn from the UI."""
+        confirmations = ToolConfirmations(timeout=0.05)
+        expired = []
+
+        async def scenario():
+            return await confirmations.confirm("print_stl", {"printer": "mk4"}, lambda r: None,
+                                               on_expired=expired.append)
+
+        assert asyncio.run(scenario()) is None
+        assert expired[0]["tool"] == "print_stl"
+        stats = confirmations.stats()
+        assert stats["expired"] == 1 and stats["wait_ms"] == {}
+        assert not confirmations.resolve(expired[0]["id"], True)
+
+
+class TestConcurrentDispatch:
+    """Test AudioLoop runs tool calls off the receive loop."""
+
+    def test_calls_run_concurrently_without_blocking_receive(self, tmp_path, isolated_projects):
+        """Test a fast call is answered before a slow one and messages keep flowing meanwhile."""
+        ada = pytest.importorskip("ada")
+        from fake_live import FakeLiveServer, FakeTurn
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        server = FakeLiveServer([FakeTurn(after_audio_ms=100, audio_ms=40,
+                                          tool_calls=[{"name": "slow_tool"}, {"name": "fast_tool"}])],
+                                first_byte_ms=5, jitter_ms=0, chunk_ms=20, stream_rate=20.0, connect_ms=0)
+        release = asyncio.Event()
+        result = {}
+
+        async def slow_tool(args):
+            await release.wait()
+            return "slow done"
+
+        async def fast_tool(args):
+            return "fast done"
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect)
+            loop.tools.register("slow_tool", slow_tool)
+            loop.tools.register("fast_tool", fast_tool)
+            loop.update_permissions({"slow_tool": False, "fast_tool": False})
+            task = asyncio.create_task(loop.run())
+            for _ in range(200):
+                if server.tool_latency_ms:
+                    break
+                await asyncio.sleep(0.01)
+            result["answered_while_slow"] = len(server.tool_latency_ms)
+            result["pending"] = loop._tools_pending
+            # The receive loop is free: a GoAway sent now is handled straight away
+            server.go_away(time_left=60.0)
+            await asyncio.sleep(0.1)
+            result["go_away_seen"] = loop.sessions._go_away_at is not None
+            release.set()
+            for _ in range(200):
+                if server.turns_done:
+                    break
+                await asyncio.sleep(0.01)
+            result["turns_done"] = server.turns_done
+            result["stats"] = loop.get_audio_metrics()["tools"]
+            loop.tasks.spawn("web_agent", asyncio.sleep(30), name="runaway")
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.sleep(0)
+            result["active_after_stop"] = loop.tasks.active()
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert result["active_after_stop"] == 0  # stop() cancels background work
+        assert result["answered_while_slow"] == 1
+        assert result["pending"] == 1
+        assert result["go_away_seen"]
+        assert result["turns_done"] == 1
+        assert result["stats"]["batches_pending"] == 0
+        assert result["stats"]["tools"]["slow_tool"]["calls"] == 1
+
+    def test_confirmation_does_not_hold_other_calls(self, tmp_path, isolated_projects):
+        """Test a call waiting for the user neither blocks its batch partner nor outlives the timeout."""
+        ada = pytest.importorskip("ada")
+        from fake_live import FakeLiveServer, FakeTurn
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        server = FakeLiveServer([FakeTurn(after_audio_ms=100, audio_ms=40,
+                                          tool_calls=[{"name": "guarded_tool"}, {"name": "free_tool"}])],
+                                first_byte_ms=5, jitter_ms=0, chunk_ms=20, stream_rate=20.0, connect_ms=0)
+        asked, expired, ran = [], [], []
+        result = {}
+
+        async def guarded_tool(args):
+            ran.append("guarded")
+            return "done"
+
+        async def free_tool(args):
+            ran.append("free")
+            return "done"
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect,
+                                 on_tool_confirmation=asked.append, on_tool_confirmation_expired=expired.append)
+            loop.tools.register("guarded_tool", guarded_tool)
+            loop.tools.register("free_tool", free_tool)
+            loop.update_permissions({"free_tool": False})
+            loop.confirmations.timeout = 0.3
+            task = asyncio.create_task(loop.run())
+            for _ in range(200):
+                if server.tool_latency_ms:
+                    break
+                await asyncio.sleep(0.01)
+            result["answered_first"] = list(ran)
+            for _ in range(200):
+                if server.turns_done:
+                    break
+                await asyncio.sleep(0.01)
+            result["stats"] = loop.get_audio_metrics()["confirmations"]
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert result["answered_first"] == ["free"]
+        assert [r["tool"] for r in asked] == ["guarded_tool"]
+        assert expired and expired[0]["id"] == asked[0]["id"]
+        assert server.turns_done == 1  # The expired call was answered with a denial
+        assert ran == ["free"]
+        assert result["stats"]["expired"] == 1
@@ -0,0 +1,138 @@
+"""
+Tests for coalesced transcription emits.
+"""
+import asyncio
+import wave
+
+import pytest
+
+from transcription_batcher import TranscriptionBatcher
+
+
+def render(updates):
+    """Chat messages the way the frontend builds them from updates."""
+    messages = []
+    for update in updates:
+        if messages and messages[-1][0] == update["sender"]:
+            messages[-1][1] += update["text"]
+        else:
+            messages.append([update["sender"], update["text"]])
+    return messages
+
+
+class TestTranscriptionBatcher:
+    """Test windowed merging, flush triggers and counters."""
+
+    def test_deltas_within_window_are_merged(self):
+        """Test deltas of one sender inside the window become one emit."""
+        emitted = []
+
+        async def scenario():
+            batcher = TranscriptionBatcher(emitted.append, window=0.05)
+            for word in ("Hel", "lo ", "there"):
+                batcher.add("Lexi", word)
+            assert emitted == []
+            await asyncio.sleep(0.1)
+            return batcher.stats()
+
+        stats = asyncio.run(scenario())
+        assert emitted == [{"sender": "Lexi", "text": "Hello there"}]
+        assert stats["deltas"] == 3 and stats["emits"] == 1 and stats["emits_avoided"] == 2
+        assert stats["flushes"] == {"window": 1}
+
+    def test_sender_switch_and_turn_end_flush_immediately(self):
+        """Test a sender switch and flush() emit without waiting, keeping order."""
+        emitted = []
+
+        async def scenario():
+            batcher = TranscriptionBatcher(emitted.append, window=10.0)
+            batcher.add("User", "What time ")
+            batcher.add("User", "is it?")
+            batcher.add("Lexi", "It is ")
+            assert emitted == [{"sender": "User", "text": "What time is it?"}]
+            batcher.add("Lexi", "noon.")
+            batcher.flush("turn_end")
+            batcher.flush("turn_end")  # Nothing pending: no emit
+            return batcher.stats()
+
+        stats = asyncio.run(scenario())
+        assert emitted[-1] == {"sender": "Lexi", "text": "It is noon."}
+        assert stats["flushes"] == {"switch": 1, "turn_end": 1}
+
+    def test_rendered_text_is_unchanged(self):
+        """Test the frontend renders the same messages with and without batching."""
+        deltas = [("User", "turn "), ("User", "on "), ("User", "the light"), ("Lexi", "Sure"),
+                  ("Lexi", ", "), ("Lexi", "done."), ("User", "thanks")]
+        batched, direct = [], []
+
+        async def scenario():
+            batcher = TranscriptionBatcher(batched.append, window=0.02)
+            for i, (sender, delta) in enumerate(deltas):
+                batcher.add(sender, delta)
+                direct.append({"sender": sender, "text": delta})
+                if i == 4:
+                    await asyncio.sleep(0.05)  # One window expires mid-message
+            batcher.flush("stop")
+
+        asyncio.run(scenario())
+        assert render(batched) == render(direct)
+        assert len(batched) < len(direct)
+
+    def test_zero_window_passes_through(self):
+        """Test window 0 emits every delta as it arrives."""
+        emitted = []
+
+        async def scenario():
+            batcher = TranscriptionBatcher(emitted.append)
+            batcher.configure(window=0)
+            batcher.add("Lexi", "a")
+            batcher.add("Lexi", "b")
+            batcher.add("Lexi", "")
+
+        asyncio.run(scenario())
+        assert emitted == [{"sender": "Lexi", "text": "a"}, {"sender": "Lexi", "text": "b"}]
+
+
+class TestAudioLoopTranscription:
+    """Test AudioLoop emits fewer, merged transcription updates."""
+
+    def test_turn_transcripts_are_coalesced(self, tmp_path, isolated_projects):
+        """Test a streamed turn arrives in fewer emits with identical text."""
+        ada = pytest.importorskip("ada")
+        from fake_live import FakeLiveServer, FakeTurn
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        words = "one two three four five six seven eight nine ten"
+        server = FakeLiveServer([FakeTurn(after_audio_ms=100, input_text="count", output_text=words, audio_ms=400)],
+                                first_byte_ms=5, jitter_ms=0, chunk_ms=40, stream_rate=20.0, connect_ms=0)
+        updates, stats = [], {}
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect,
+                                 on_transcription=updates.append)
+            task = asyncio.create_task(loop.run())
+            for _ in range(300):
+                if server.turns_done == 1:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            stats.update(loop.get_audio_metrics()["transcription"])
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert render(updates) == [["User", "count"], ["Lexi", " ".join(words.split()) + " "]]
+        assert stats["deltas"] == 11
+        assert stats["emits"] < stats["deltas"]
+        assert stats["emits_avoided"] == stats["deltas"] - stats["emits"]
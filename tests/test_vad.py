@@ -0,0 +1,120 @@
+"""
+Tests for the Voice Activity Detection module.
+"""
+import pytest
+import numpy as np
+
+from vad import (
+    VoiceActivityDetector,
+    EnergyDetector,
+    ZeroCrossingDetector,
+    BandEnergyDetector,
+    SilenceGate,
+    pcm16_view,
+)
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def tone(freq, amplitude, n=CHUNK):
+    t = np.arange(n) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def silence(n=CHUNK):
+    return bytes(n * 2)
+
+
+def noise(amplitude, n=CHUNK, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.normal(0, amplitude, n), -32768, 32767).astype("<i2").tobytes()
+
+
+class TestDetectors:
+    """Test the individual detectors."""
+
+    def test_view_is_zero_copy(self):
+        """Test pcm16_view does not copy the buffer."""
+        data = bytearray(tone(440, 1000))
+        view = pcm16_view(data)
+        data[0:2] = (1234).to_bytes(2, "little", signed=True)
+        assert view[0] == 1234
+
+    def test_energy_matches_legacy_rms(self):
+        """Test the vectorized RMS matches the old struct-based value."""
+        import math
+        import struct
+        data = tone(440, 3000)
+        shorts = struct.unpack(f"<{CHUNK}h", data)
+        legacy = int(math.sqrt(sum(s**2 for s in shorts) / CHUNK))
+        level = EnergyDetector().score(pcm16_view(data))
+        assert abs(level - legacy) <= 1
+
+    def test_zero_crossing_rejects_hiss(self):
+        """Test loud broadband noise is rejected while voiced tone passes."""
+        det = ZeroCrossingDetector(threshold=800)
+        assert det.is_speech(pcm16_view(tone(200, 3000)))[0]
+        assert not det.is_speech(pcm16_view(noise(3000)))[0]
+
+    def test_band_energy_ignores_out_of_band(self):
+        """Test a low rumble outside the speech band is not speech."""
+        det = BandEnergyDetector(threshold=800, sample_rate=SAMPLE_RATE)
+        assert det.is_speech(pcm16_view(tone(1000, 3000)))[0]
+        assert not det.is_speech(pcm16_view(tone(60, 3000)))[0]
+
+
+class TestVoiceActivityDetector:
+    """Test onset/offset tracking and runtime settings."""
+
+    def test_onset_and_offset_with_hangover(self):
+        """Test offset fires only after the configured silence duration."""
+        vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE, silence_duration=0.2)
+        assert vad.process(tone(300, 3000)) == "onset"
+        assert vad.process(tone(300, 3000)) is None
+
+        events = [vad.process(silence()) for _ in range(4)]
+        # 0.2 s = 3200 samples -> offset on the 4th silent chunk (4096 samples)
+        assert events == [None, None, None, "offset"]
+        assert not vad.is_speech
+
+    def test_configure_at_runtime(self):
+        """Test threshold, hangover and detector can be changed live."""
+        vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+        vad.configure(threshold=5000, silence_duration=1.0, detector="band_energy")
+        assert vad.settings() == {"detector": "band_energy", "threshold": 5000.0, "silence_duration": 1.0}
+        assert vad.process(tone(300, 3000)) is None
+
+    def test_unknown_detector(self):
+        """Test an unknown detector name is rejected."""
+        with pytest.raises(ValueError):
+            VoiceActivityDetector(detector="magic")
+
+
+class TestSilenceGate:
+    """Test uplink silence suppression."""
+
+    def test_disabled_passes_everything(self):
+        """Test every chunk is sent when gating is off."""
+        gate = SilenceGate(sample_rate=SAMPLE_RATE)
+        assert gate.process(silence(), speech=False) == ((silence(),), None)
+
+    def test_pause_preroll_and_resume(self):
+        """Test the uplink pauses after the hangover and resumes with pre-roll."""
+        gate = SilenceGate(sample_rate=SAMPLE_RATE, enabled=True, hangover=0.1, preroll=0.1)
+        speech = tone(300, 3000)
+        assert gate.process(speech, speech=True) == ((speech,), None)
+        # 0.1 s = 1600 samples -> pause on the 2nd silent chunk
+        assert gate.process(silence(), speech=False)[1] is None
+        assert gate.process(silence(), speech=False)[1] == "pause"
+
+        quiet = [noise(100, seed=i) for i in range(5)]
+        for chunk in quiet:
+            assert gate.process(chunk, speech=False) == ((), None)
+
+        chunks, event = gate.process(speech, speech=True)
+        assert event == "resume"
+        # Pre-roll keeps the newest 2 chunks (>= 0.1 s) ahead of the speech chunk
+        assert chunks == (quiet[3], quiet[4], speech)
+        assert gate.bytes_saved == 3 * CHUNK * 2
+        assert gate.stats()["pauses"] == 1
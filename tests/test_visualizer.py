@@ -0,0 +1,97 @@
+"""
+Tests for the server-side visualizer level meter.
+"""
+import asyncio
+import wave
+
+import numpy as np
+import pytest
+
+from visualizer import LevelMeter
+
+RATE = 24000
+
+
+def tone(freq, samples=1024, amplitude=8000):
+    t = np.arange(samples) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+class TestLevelMeter:
+    """Test frame contents and decimation."""
+
+    def test_frame_layout_and_band_placement(self):
+        """Test a frame is rms + one byte per band and a tone lights up its own band."""
+        meter = LevelMeter(RATE, bands=16)
+        low = meter.feed(tone(150))
+        high = meter.feed(tone(5000))
+        assert len(low) == len(high) == 17
+        assert low[0] > 100 and high[0] > 100
+        assert np.argmax(list(low[1:])) < 4
+        assert np.argmax(list(high[1:])) > 12
+
+    def test_silence_is_zero(self):
+        """Test digital silence maps to all-zero frames."""
+        meter = LevelMeter(RATE)
+        assert meter.feed(bytes(2048)) == bytes(17)
+        meter.feed(tone(440))
+        assert meter.silence() == bytes(17)
+
+    def test_decimated_to_fps(self):
+        """Test small chunks produce at most fps frames per second of audio."""
+        meter = LevelMeter(RATE, fps=20)
+        frames = [meter.feed(tone(440, samples=240)) for _ in range(100)]  # 1 s in 10 ms chunks
+        assert sum(f is not None for f in frames) == 20
+        assert meter.stats()["frames"] == 20
+
+    def test_configure_bands(self):
+        """Test changing the band count changes the frame size."""
+        meter = LevelMeter(RATE)
+        meter.configure(bands=8, fps=60)
+        assert len(meter.feed(tone(440))) == 9
+        meter.configure(bands=1000)
+        assert meter.bands == 64
+
+
+class TestAudioLoopLevels:
+    """Test AudioLoop sends level frames instead of raw PCM when asked to."""
+
+    def test_levels_replace_raw_audio(self, tmp_path, isolated_projects):
+        """Test on_audio_levels gets frames and raw PCM is only forwarded when enabled."""
+        ada = pytest.importorskip("ada")
+        from fake_live import FakeLiveServer, FakeTurn
+        from headless import FileAudioIO
+
+        with wave.open(str(tmp_path / "in.wav"), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(bytes(3200))
+        io = FileAudioIO(tmp_path / "in.wav", tmp_path / "out.wav", speed=0)
+        server = FakeLiveServer([FakeTurn(after_audio_ms=100, output_text="ok", audio_ms=400)],
+                                first_byte_ms=5, jitter_ms=0, chunk_ms=20, stream_rate=20.0, connect_ms=0)
+        levels, raw = [], []
+
+        async def scenario():
+            loop = ada.AudioLoop(video_mode="none", file_io=io, connect=server.connect,
+                                 on_audio_data=raw.append, on_audio_levels=levels.append)
+            loop.update_visualizer_settings({"fps": 30, "bands": 8, "raw_pcm": False})
+            task = asyncio.create_task(loop.run())
+            for _ in range(300):
+                if server.turns_done == 1 and len(loop.playback_buffer) == 0 and levels:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.2)
+            threads = [t for t in (loop._input_thread, loop._output_thread) if t]
+            loop.stop()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for thread in threads:
+                thread.join(1.0)
+            io.close()
+
+        asyncio.run(scenario())
+        assert levels
+        assert all(isinstance(f, bytes) and len(f) == 9 for f in levels)
+        assert any(f[0] > 0 for f in levels)
+        assert raw == []